@@ -1,10 +1,13 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from django.utils.html import format_html
-from django.db.models import Avg, Count
+from django.db.models import Avg, Count, Q
 from django.utils.safestring import mark_safe
+from .gallery import gallery_cache
+from .paginators import LargeTablePaginator
 from .models import (
     DemoRequest, Course, SchoolDemoRequest, GameReview,
-    PhotoCategory, PhotoGallery, VideoTestimonial, SchoolReferral, School
+    PhotoCategory, PhotoGallery, VideoTestimonial, SchoolReferral, School, SchoolEnrollmentRollup
 )
 
 @admin.register(DemoRequest)
@@ -458,18 +461,21 @@ class PhotoGalleryAdmin(admin.ModelAdmin):
     def mark_as_featured(self, request, queryset):
         """Mark selected photos as featured"""
         count = queryset.update(is_featured=True)
+        gallery_cache.invalidate()
         self.message_user(request, f'Marked {count} photos as featured.')
     mark_as_featured.short_description = "Mark selected photos as featured"
     
     def mark_as_active(self, request, queryset):
         """Mark selected photos as active"""
         count = queryset.update(is_active=True)
+        gallery_cache.invalidate()
         self.message_user(request, f'Marked {count} photos as active.')
     mark_as_active.short_description = "Mark selected photos as active"
     
     def mark_as_inactive(self, request, queryset):
         """Mark selected photos as inactive"""
         count = queryset.update(is_active=False)
+        gallery_cache.invalidate()
         self.message_user(request, f'Marked {count} photos as inactive.')
     mark_as_inactive.short_description = "Mark selected photos as inactive"
     
@@ -564,18 +570,21 @@ class VideoTestimonialAdmin(admin.ModelAdmin):
     def mark_as_featured(self, request, queryset):
         """Mark selected videos as featured"""
         count = queryset.update(is_featured=True)
+        gallery_cache.invalidate()
         self.message_user(request, f'Marked {count} videos as featured.')
     mark_as_featured.short_description = "Mark selected videos as featured"
     
     def mark_as_active(self, request, queryset):
         """Mark selected videos as active"""
         count = queryset.update(is_active=True)
+        gallery_cache.invalidate()
         self.message_user(request, f'Marked {count} videos as active.')
     mark_as_active.short_description = "Mark selected videos as active"
     
     def mark_as_inactive(self, request, queryset):
         """Mark selected videos as inactive"""
         count = queryset.update(is_active=False)
+        gallery_cache.invalidate()
         self.message_user(request, f'Marked {count} videos as inactive.')
     mark_as_inactive.short_description = "Mark selected videos as inactive"
     
@@ -613,13 +622,53 @@ class VideoTestimonialAdmin(admin.ModelAdmin):
         js = ('admin/js/video_admin.js',)
 
 
+# Columns the School changelist loads: what it displays plus what saving a row
+# (list_editable status) reads, so the 30+ enrollment columns stay deferred
+SCHOOL_LIST_FIELDS = (
+    'school_code', 'school_name', 'state', 'district', 'sub_district', 'cluster',
+    'school_category', 'status', 'total_students', 'latitude', 'longitude',
+    'geohash', 'search_vector', 'created_at',
+)
+SCHOOL_SEARCH_LIMIT = 500
+
+
+class SchoolStateFilter(admin.SimpleListFilter):
+    """States from the in-memory facet tree instead of a DISTINCT scan over School"""
+    title = 'state'
+    parameter_name = 'state'
+
+    def lookups(self, request, model_admin):
+        from .school_facets import facet_tree
+        return [(state, state) for state in facet_tree.names()]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(state=self.value())
+        return queryset
+
+
+class SchoolChangeList(ChangeList):
+    def get_queryset(self, request):
+        return super().get_queryset(request).only(*SCHOOL_LIST_FIELDS)
+
+
 @admin.register(School)
 class SchoolAdmin(admin.ModelAdmin):
+    """
+    Changelist tuned for a million rows: estimated/cached counts and keyset
+    deep pages (core.paginators), search through the school search engine,
+    and only the listed columns loaded
+    """
     list_display = ['school_name', 'district', 'state', 'school_category', 'total_students', 'status', 'created_at']
-    list_filter = ['status', 'school_category', 'school_type', 'management', 'state', 'location_type', 'created_at']
-    search_fields = ['school_name', 'school_code', 'district', 'state', 'village', 'pincode']
+    list_filter = ['status', 'school_category', 'school_type', 'management', SchoolStateFilter, 'location_type', 'created_at']
+    # Searched by get_search_results, not by icontains over these
+    search_fields = ['school_name', 'school_code', 'pincode']
     readonly_fields = ['created_at', 'updated_at', 'search_vector']
     list_editable = ['status']
+    # Matches the (state, district, school_name) index; ending in pk keeps it total for keyset pages
+    ordering = ['state', 'district', 'school_name', 'pk']
+    paginator = LargeTablePaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Basic Information', {
@@ -649,8 +698,56 @@ class SchoolAdmin(admin.ModelAdmin):
         }),
     )
     
-    def get_queryset(self, request):
-        return super().get_queryset(request).select_related()
+    def get_changelist(self, request, **kwargs):
+        return SchoolChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        """Ranked name matches from the search engine, plus exact school code or pincode"""
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        matches = School.search_schools(term, limit=SCHOOL_SEARCH_LIMIT, fields=('school_code',))
+        return queryset.filter(
+            Q(pk__in=[school.pk for school in matches]) | Q(school_code=term) | Q(pincode=term)
+        ), False
+
+
+@admin.register(SchoolEnrollmentRollup)
+class SchoolEnrollmentRollupAdmin(admin.ModelAdmin):
+    """Read-only enrollment report; the summary above the list covers the filtered rows"""
+    change_list_template = 'admin/core/schoolenrollmentrollup/change_list.html'
+    list_display = ['state', 'district', 'management', 'school_category', 'school_count', 'student_total', 'teacher_total', 'pupil_teacher_ratio', 'schools_without_teachers']
+    list_filter = ['management', 'school_category', 'state']
+    search_fields = ['state', 'district']
+    actions = ['rebuild_rollups']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def rebuild_rollups(self, request, queryset):
+        """Recompute every rollup from the School table"""
+        from .school_rollups import rebuild_enrollment_rollups
+        count = rebuild_enrollment_rollups()
+        self.message_user(request, f'Rebuilt {count} enrollment rollups.')
+    rebuild_rollups.short_description = "Rebuild all rollups from schools"
+
+    def changelist_view(self, request, extra_context=None):
+        """Add the merged figures of the filtered rollups to the changelist"""
+        from .school_rollups import ensure_enrollment_rollups, merge_rollups, summarize
+
+        ensure_enrollment_rollups()
+        response = super().changelist_view(request, extra_context)
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            total = merge_rollups(changelist.queryset).get(None)
+            response.context_data['enrollment_summary'] = summarize(total) if total else None
+        return response
 
 
 # Add custom admin site configuration for better branding
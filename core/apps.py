@@ -3,4 +3,12 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'core'
\ No newline at end of file
+    name = 'core'
+
+    def ready(self):
+        from . import gallery, school_facets, school_geo, school_rollups, school_search
+        school_search.connect_signals()
+        school_facets.connect_signals()
+        school_geo.connect_signals()
+        school_rollups.connect_signals()
+        gallery.connect_signals()
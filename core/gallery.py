@@ -0,0 +1,133 @@
+"""
+Cached context for the gallery page
+
+``GalleryView`` used to run a ``PhotoGallery`` query per category, three
+COUNT/DISTINCT queries for the statistics, and let the template call
+``VideoTestimonial.get_best_thumbnail``, which could call the Vimeo API
+while rendering.
+
+``build_gallery_context`` now reads the active photos (with their
+categories) in one query and the active videos in another, and derives the
+featured/recent lists, the per-category groups and the statistics in
+Python. ``gallery_cache`` keeps the result in process (the configured cache
+backend is a dummy) until a photo, video or category is written, or for
+``GALLERY_CACHE_SECONDS`` at most for changes that bypass signals.
+
+Video thumbnails are resolved when a video is saved and persisted in
+``auto_thumbnail``; rendering never goes to the network. Vimeo lookups go
+through ``VIMEO_THUMBNAIL_RESOLVER`` (a dotted path), so tests and offline
+development can use ``local_vimeo_thumbnail`` instead of the API.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+GALLERY_CACHE_SECONDS = 300
+FEATURED_PHOTOS = 12
+RECENT_PHOTOS = 20
+FEATURED_VIDEOS = 6
+RECENT_VIDEOS = 12
+
+
+def fetch_vimeo_thumbnail(video_id):
+    """Large thumbnail URL from Vimeo's public API, or None"""
+    import requests
+
+    try:
+        response = requests.get(f"https://vimeo.com/api/v2/video/{video_id}.json", timeout=5)
+        if response.status_code == 200:
+            data = response.json()
+            if data:
+                return data[0].get('thumbnail_large', data[0].get('thumbnail_medium'))
+    except (requests.RequestException, ValueError, AttributeError) as e:
+        logger.warning(f"⚠️ Vimeo thumbnail lookup failed for {video_id}: {str(e)}")
+    return None
+
+
+def local_vimeo_thumbnail(video_id):
+    """Network-free stand-in for tests and offline development"""
+    return f'https://vimeo.invalid/thumbnails/{video_id}.jpg'
+
+
+def resolve_vimeo_thumbnail(video_id):
+    resolver = getattr(settings, 'VIMEO_THUMBNAIL_RESOLVER', 'core.gallery.fetch_vimeo_thumbnail')
+    return import_string(resolver)(video_id)
+
+
+def build_gallery_context():
+    """Photo and video context for the gallery template, from two queries"""
+    from .models import PhotoGallery, VideoTestimonial
+
+    photos = list(
+        PhotoGallery.objects.filter(is_active=True).select_related('category').order_by('order', '-created_at')
+    )
+    videos = list(VideoTestimonial.objects.filter(is_active=True).order_by('order', '-created_at'))
+
+    photos_by_category = {}
+    for photo in photos:
+        if photo.category.is_active:
+            photos_by_category.setdefault(photo.category, []).append(photo)
+    categories = sorted(photos_by_category, key=lambda category: (category.order, category.name))
+
+    featured_videos = [video for video in videos if video.is_featured][:FEATURED_VIDEOS]
+    shown = {video.pk for video in featured_videos}
+    return {
+        'photo_categories': categories,
+        'featured_photos': [photo for photo in photos if photo.is_featured][:FEATURED_PHOTOS],
+        'recent_photos': sorted(photos, key=lambda photo: photo.created_at, reverse=True)[:RECENT_PHOTOS],
+        'photos_by_category': {category: photos_by_category[category] for category in categories},
+        'featured_videos': featured_videos,
+        'recent_videos': sorted(videos, key=lambda video: video.created_at, reverse=True)[:RECENT_VIDEOS],
+        'other_videos': [video for video in videos if video.pk not in shown][:RECENT_VIDEOS],
+        'total_photos': len(photos),
+        'total_videos': len(videos),
+        'total_schools': len({photo.school_name for photo in photos if photo.school_name}),
+    }
+
+
+class GalleryCache:
+    """The gallery context, built on first use and dropped on writes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._context = None
+        self._expires = 0
+        self.builds = 0
+
+    def get(self):
+        with self._lock:
+            if self._context is None or self._expires < time.monotonic():
+                self._context = build_gallery_context()
+                self._expires = time.monotonic() + GALLERY_CACHE_SECONDS
+                self.builds += 1
+            return self._context
+
+    def invalidate(self):
+        with self._lock:
+            self._context = None
+
+
+gallery_cache = GalleryCache()
+
+
+def _invalidate_on_commit(sender, **kwargs):
+    # After commit, so a rebuild racing the write can't cache the old rows
+    transaction.on_commit(gallery_cache.invalidate)
+
+
+def connect_signals():
+    """Drop the cached gallery after photo, video and category writes (called from AppConfig.ready)"""
+    from django.db.models.signals import post_delete, post_save
+    from .models import PhotoCategory, PhotoGallery, VideoTestimonial
+
+    for model in (PhotoCategory, PhotoGallery, VideoTestimonial):
+        post_save.connect(_invalidate_on_commit, sender=model, dispatch_uid=f'gallery_{model.__name__}_save')
+        post_delete.connect(_invalidate_on_commit, sender=model, dispatch_uid=f'gallery_{model.__name__}_delete')
@@ -0,0 +1,185 @@
+"""
+Liveness and readiness probes
+
+``health_check`` used to run ``SELECT 1``, a ``Course`` COUNT and
+``psutil.virtual_memory()`` (imported per request, and not installed) on
+every Azure probe, so under database pressure the probe added load and the
+instance flapped.
+
+``/health/live/`` only proves the process answers requests. Readiness
+(``/health/ready/``, and ``/health/`` for the existing probe configuration)
+serves the last result of ``health_monitor``: a background thread that runs
+the deep checks every ``HEALTH_CHECK_INTERVAL`` seconds:
+
+- database: a ``SELECT 1`` round trip;
+- cache: a write read back (skipped for the dummy backend);
+- channel_layer: a message sent to and received from a fresh channel
+  (skipped for the in-memory layer, which lives in this process and isn't
+  safe to drive from the checker thread alongside the server's loop);
+- migrations: nothing unapplied.
+
+A probe therefore costs the same however loaded the dependencies are. Only
+database and channel-layer failures make the instance not ready (503); cache
+and migration problems report ``degraded`` with 200, so the instance stays
+reachable to be fixed. A result older than ``HEALTH_STALE_SECONDS`` (the
+checker is stuck) is reported as ``stale`` with 503.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+HEALTH_CHECK_INTERVAL = getattr(settings, 'HEALTH_CHECK_INTERVAL', 15)
+HEALTH_STALE_SECONDS = getattr(settings, 'HEALTH_STALE_SECONDS', HEALTH_CHECK_INTERVAL * 4)
+CHECK_TIMEOUT = 5
+# How long the very first probe waits for the first round before answering "starting"
+FIRST_RESULT_WAIT = 3
+CRITICAL_CHECKS = ('database', 'channel_layer')
+
+
+def check_database():
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    return 'ok'
+
+
+def check_cache():
+    from django.core.cache import caches
+    from django.core.cache.backends.dummy import DummyCache
+
+    cache = caches['default']
+    if isinstance(cache, DummyCache):
+        return 'dummy backend, not checked'
+    key = f'health:{uuid.uuid4().hex}'
+    cache.set(key, 1, CHECK_TIMEOUT * 2)
+    try:
+        if cache.get(key) != 1:
+            raise RuntimeError('value written was not read back')
+    finally:
+        cache.delete(key)
+    return 'ok'
+
+
+async def _channel_round_trip(layer):
+    channel = await layer.new_channel('health')
+    token = uuid.uuid4().hex
+    await layer.send(channel, {'type': 'health.ping', 'token': token})
+    message = await asyncio.wait_for(layer.receive(channel), CHECK_TIMEOUT)
+    if message.get('token') != token:
+        raise RuntimeError('received a different message')
+
+
+def check_channel_layer():
+    from asgiref.sync import async_to_sync
+    from channels.layers import InMemoryChannelLayer, get_channel_layer
+
+    layer = get_channel_layer()
+    if layer is None:
+        raise RuntimeError('no channel layer configured')
+    if isinstance(layer, InMemoryChannelLayer):
+        return 'in-memory layer, not checked'
+    async_to_sync(_channel_round_trip)(layer)
+    return 'ok'
+
+
+def check_migrations():
+    from django.db import connection
+    from django.db.migrations.executor import MigrationExecutor
+
+    executor = MigrationExecutor(connection)
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    if plan:
+        raise RuntimeError(f'{len(plan)} unapplied migrations')
+    return 'up to date'
+
+
+CHECKS = (
+    ('database', check_database),
+    ('cache', check_cache),
+    ('channel_layer', check_channel_layer),
+    ('migrations', check_migrations),
+)
+
+
+class HealthMonitor:
+    """Runs the deep checks on a background thread and keeps the last result"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._result = None
+        self._first_result = threading.Event()
+        self.rounds = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='health-checks', daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_checks()
+            except Exception as e:
+                logger.error(f"💥 Health checks failed to run: {str(e)}", exc_info=True)
+            finally:
+                # A fresh connection each round, so the next SELECT 1 tests connecting too
+                connections.close_all()
+            time.sleep(HEALTH_CHECK_INTERVAL)
+
+    def run_checks(self):
+        """Run every check once and store the result"""
+        checks = {}
+        for name, check in CHECKS:
+            started = time.monotonic()
+            try:
+                checks[name] = {'ok': True, 'detail': check()}
+            except Exception as e:
+                checks[name] = {'ok': False, 'detail': f'{type(e).__name__}: {str(e)}'}
+            checks[name]['ms'] = round((time.monotonic() - started) * 1000, 1)
+
+        failed = [name for name, check in checks.items() if not check['ok']]
+        if any(name in CRITICAL_CHECKS for name in failed):
+            status = 'not_ready'
+        else:
+            status = 'degraded' if failed else 'ready'
+        if failed:
+            logger.warning(f"⚠️ Health checks failing: {', '.join(failed)}")
+        with self._lock:
+            self._result = (time.monotonic(), datetime.now(timezone.utc), status, checks)
+            self.rounds += 1
+        self._first_result.set()
+
+    def report(self):
+        """The last result with its age; starts the checker on first use"""
+        self.start()
+        self._first_result.wait(FIRST_RESULT_WAIT)
+        with self._lock:
+            result = self._result
+        if result is None:
+            return {'status': 'starting', 'interval_seconds': HEALTH_CHECK_INTERVAL, 'checks': {}}
+        checked, checked_at, status, checks = result
+        age = time.monotonic() - checked
+        return {
+            'status': 'stale' if age > HEALTH_STALE_SECONDS else status,
+            'checked_at': checked_at.isoformat(),
+            'age_seconds': round(age, 1),
+            'interval_seconds': HEALTH_CHECK_INTERVAL,
+            'checks': checks,
+        }
+
+
+health_monitor = HealthMonitor()
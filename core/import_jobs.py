@@ -0,0 +1,189 @@
+"""
+Background school imports for the ``upload-schools-csv`` endpoint
+
+The endpoint used to ``.read().decode()`` the whole upload and
+``get_or_create`` row by row inside the request (with field names ``School``
+doesn't have), so large files timed the worker out.
+
+The endpoint is staff-only and refuses uploads over ``MAX_UPLOAD_BYTES``.
+The upload is written to ``SCHOOL_IMPORT_DIR`` in chunks (or moved there
+when Django already spooled it to a temporary file), a ``SchoolImportJob``
+row is queued and its id returned straight away. ``import_job_runner`` runs
+queued jobs one at a time on a background thread through the same
+``SchoolImporter`` pipeline as ``import_schools``, recording progress and
+error samples on the job after every batch.
+
+Jobs are claimed with a conditional UPDATE and keep a checkpoint next to the
+file, so a job that was running when the process stopped is re-queued and
+resumes from its last committed batch the next time the runner starts
+(a new upload, or polling the status of an unfinished job, starts it).
+"""
+
+import logging
+import os
+import shutil
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .school_import import ImportCheckpoint, SchoolImporter
+
+logger = logging.getLogger(__name__)
+
+
+SCHOOL_IMPORT_DIR = getattr(settings, 'SCHOOL_IMPORT_DIR', os.path.join(settings.BASE_DIR, 'uploads', 'school_imports'))
+IMPORT_JOB_BATCH_SIZE = getattr(settings, 'SCHOOL_IMPORT_JOB_BATCH_SIZE', 5000)
+# Parsing inline: forking a pool from the threaded server process isn't safe
+IMPORT_JOB_WORKERS = getattr(settings, 'SCHOOL_IMPORT_JOB_WORKERS', 1)
+MAX_ERROR_SAMPLES = 10
+# A full UDISE+ export is a few hundred MB
+MAX_UPLOAD_BYTES = getattr(settings, 'SCHOOL_IMPORT_MAX_UPLOAD_BYTES', 500 * 1024 * 1024)
+
+
+def save_upload(upload, job_id):
+    """Put an UploadedFile on disk under SCHOOL_IMPORT_DIR without holding it in memory"""
+    os.makedirs(SCHOOL_IMPORT_DIR, exist_ok=True)
+    path = os.path.join(SCHOOL_IMPORT_DIR, f'{job_id}.csv')
+    if hasattr(upload, 'temporary_file_path'):
+        # Closing a spooled upload deletes its temp file, so move it first
+        shutil.move(upload.temporary_file_path(), path)
+        upload.close()
+    else:
+        with open(path, 'wb') as destination:
+            for chunk in upload.chunks():
+                destination.write(chunk)
+    return path
+
+
+def create_import_job(upload, update_existing=False):
+    """Store the upload and queue a job for it; the runner starts once the job row commits"""
+    from .models import SchoolImportJob
+
+    job = SchoolImportJob(
+        original_filename=os.path.basename(upload.name or 'schools.csv')[:255],
+        file_size=upload.size or 0,
+        update_existing=update_existing,
+    )
+    job.file_path = save_upload(upload, job.id)
+    job.save()
+    transaction.on_commit(import_job_runner.wake)
+    return job
+
+
+def _checkpoint_path(job):
+    return f'{job.file_path}.checkpoint'
+
+
+def run_import_job(job):
+    """Run (or resume) one claimed job to completion, recording progress on its row"""
+    from .models import SchoolImportJob
+
+    checkpoint = ImportCheckpoint(_checkpoint_path(job)).load()
+    start_from = checkpoint['rows_done'] if checkpoint else 0
+    # Counts from before a resume; the importer only counts its own run
+    base = {'written': job.written, 'skipped': job.skipped, 'errors': job.errors} if start_from else \
+        {'written': 0, 'skipped': 0, 'errors': 0}
+    samples = list(job.error_samples) if start_from else []
+
+    def record(stats, **extra):
+        SchoolImportJob.objects.filter(pk=job.pk).update(
+            rows_done=stats['rows_done'],
+            written=base['written'] + stats['written'],
+            skipped=base['skipped'] + stats['skipped'],
+            errors=base['errors'] + stats['errors'],
+            error_samples=(samples + stats['error_messages'])[:MAX_ERROR_SAMPLES],
+            rows_per_second=stats['rows_per_second'],
+            **extra
+        )
+
+    importer = SchoolImporter(
+        job.file_path,
+        batch_size=IMPORT_JOB_BATCH_SIZE,
+        workers=IMPORT_JOB_WORKERS,
+        update_existing=job.update_existing,
+        skip_errors=True,
+        start_from=start_from,
+        checkpoint_path=_checkpoint_path(job),
+        progress=record,
+    )
+    try:
+        stats = importer.run()
+    except Exception as e:
+        logger.error(f"💥 School import job {job.pk} failed: {str(e)}", exc_info=True)
+        record(importer.stats, status='failed', message=str(e), finished_at=timezone.now())
+        return False
+
+    record(
+        stats, status='completed', finished_at=timezone.now(),
+        message=(
+            f"Imported {base['written'] + stats['written']} schools, rebuilt {stats['facets']} location facets "
+            f"and {stats['rollups']} enrollment rollups"
+        )
+    )
+    try:
+        os.remove(job.file_path)
+    except OSError:
+        pass
+    return True
+
+
+class ImportJobRunner:
+    """One background thread draining queued jobs, started on demand"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pending = False
+        self._recovered = False
+
+    def wake(self):
+        with self._lock:
+            self._pending = True
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='school-import-jobs', daemon=True)
+                self._thread.start()
+
+    def is_running(self):
+        with self._lock:
+            return self._thread is not None and self._thread.is_alive()
+
+    def _loop(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        self._thread = None
+                        return
+                    self._pending = False
+                while self.run_next():
+                    pass
+        except Exception as e:
+            logger.error(f"💥 School import runner stopped: {str(e)}", exc_info=True)
+        finally:
+            # Worker threads don't go through request_finished
+            connections.close_all()
+
+    def run_next(self):
+        """Claim and run the oldest queued job; False when there is none"""
+        from .models import SchoolImportJob
+
+        if not self._recovered:
+            # Single server process: anything still 'running' died with a previous one
+            SchoolImportJob.objects.filter(status='running').update(status='queued')
+            self._recovered = True
+
+        job = SchoolImportJob.objects.filter(status='queued').order_by('created_at').first()
+        if job is None:
+            return False
+        claimed = SchoolImportJob.objects.filter(pk=job.pk, status='queued').update(
+            status='running', started_at=timezone.now()
+        )
+        if claimed:
+            logger.info(f"🏫 Starting school import job {job.pk} ({job.original_filename})")
+            run_import_job(job)
+        return True
+
+
+import_job_runner = ImportJobRunner()
@@ -0,0 +1,201 @@
+from bisect import bisect_left
+from collections import defaultdict
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import School
+from core.school_geo import KDTree, encode_geohash, haversine_km, nearest_in_cells, prefix_range
+
+
+# Rough bounding box of India, where the synthetic schools are scattered
+LATITUDES = (8.0, 35.0)
+LONGITUDES = (68.5, 97.0)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(samples)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def synthetic_schools(points, states, rng):
+    """(state, latitude, longitude) clustered around state and district centres"""
+    centres = [(rng.uniform(*LATITUDES), rng.uniform(*LONGITUDES)) for _ in range(states)]
+    districts = [
+        [(lat + rng.gauss(0, 1.0), lon + rng.gauss(0, 1.0)) for _ in range(20)]
+        for lat, lon in centres
+    ]
+    schools = []
+    for index in range(points):
+        state = index % states
+        lat, lon = rng.choice(districts[state])
+        schools.append((state, lat + rng.gauss(0, 0.3), lon + rng.gauss(0, 0.3)))
+    return schools
+
+
+class GeohashTable:
+    """The geohash column and its index, as a sorted list scanned with bisect"""
+
+    def __init__(self, schools):
+        rows = sorted((encode_geohash(lat, lon), pk) for pk, (_state, lat, lon) in enumerate(schools))
+        self.hashes = [geohash for geohash, _pk in rows]
+        self.ids = [pk for _geohash, pk in rows]
+        self.schools = schools
+
+    def scan(self, low, high):
+        start = bisect_left(self.hashes, low)
+        end = bisect_left(self.hashes, high) if high else len(self.hashes)
+        return self.ids[start:end]
+
+    def fetch(self, cells):
+        candidates = [pk for cell in cells for pk in self.scan(*prefix_range(cell))] if cells \
+            else range(len(self.schools))
+        return ((pk, self.schools[pk][1], self.schools[pk][2]) for pk in candidates)
+
+    def nearest(self, latitude, longitude, k, radius_km=None):
+        return nearest_in_cells(self.fetch, latitude, longitude, k, radius_km)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark nearest-school lookups (geohash index and per-state KD-trees) on synthetic coordinates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--points',
+            type=int,
+            default=1000000,
+            help='Synthetic schools (default: 1000000)',
+        )
+        parser.add_argument(
+            '--states',
+            type=int,
+            default=36,
+            help='States the schools are spread over (default: 36)',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=1000,
+            help='Queries per lookup kind (default: 1000)',
+        )
+        parser.add_argument(
+            '--k',
+            type=int,
+            default=10,
+            help='Schools per k-nearest query (default: 10)',
+        )
+        parser.add_argument(
+            '--radius-km',
+            type=float,
+            default=5.0,
+            help='Radius of the radius queries (default: 5)',
+        )
+        parser.add_argument(
+            '--verify',
+            type=int,
+            default=20,
+            help='Queries checked against a brute-force scan (default: 20)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+        )
+        parser.add_argument(
+            '--db',
+            action='store_true',
+            help='Query the School table through School.nearest instead of synthetic points',
+        )
+
+    def handle(self, *args, **options):
+        if options['points'] < 1 or options['states'] < 1 or options['queries'] < 1:
+            raise CommandError('--points, --states and --queries must be at least 1')
+        rng = random.Random(options['seed'])
+        if options['db']:
+            self.benchmark_database(options, rng)
+        else:
+            self.benchmark_synthetic(options, rng)
+
+    def timed(self, label, queries, lookup):
+        samples = []
+        for query in queries:
+            started = time.perf_counter()
+            lookup(*query)
+            samples.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f'  {label:<28} p50 {percentile(samples, 50):7.2f} ms   '
+            f'p99 {percentile(samples, 99):7.2f} ms   max {max(samples):7.2f} ms'
+        )
+
+    def benchmark_synthetic(self, options, rng):
+        k, radius_km = options['k'], options['radius_km']
+        self.stdout.write(self.style.HTTP_INFO(
+            f"Generating {options['points']} schools over {options['states']} states..."
+        ))
+        schools = synthetic_schools(options['points'], options['states'], rng)
+
+        started = time.perf_counter()
+        table = GeohashTable(schools)
+        self.stdout.write(f'  geohash column + index      {time.perf_counter() - started:7.2f} s')
+
+        by_state = defaultdict(list)
+        for pk, (state, lat, lon) in enumerate(schools):
+            by_state[state].append((pk, lat, lon))
+        started = time.perf_counter()
+        trees = {state: KDTree(*zip(*rows)) for state, rows in by_state.items()}
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'  {len(trees)} state KD-trees          {elapsed:7.2f} s '
+            f'({elapsed / len(trees) * 1000:.0f} ms per state)'
+        )
+
+        # Queries near real schools, like a user standing at one
+        queries = []
+        for _ in range(options['queries']):
+            state, lat, lon = rng.choice(schools)
+            queries.append((state, lat + rng.gauss(0, 0.01), lon + rng.gauss(0, 0.01)))
+
+        self.stdout.write(self.style.HTTP_INFO(f"{len(queries)} queries, k={k}, radius={radius_km} km"))
+        self.timed('geohash k-nearest', queries, lambda s, lat, lon: table.nearest(lat, lon, k))
+        self.timed('geohash radius', queries, lambda s, lat, lon: table.nearest(lat, lon, k, radius_km))
+        self.timed('state KD-tree k-nearest', queries, lambda s, lat, lon: trees[s].nearest(lat, lon, k))
+        self.timed('state KD-tree radius', queries, lambda s, lat, lon: trees[s].nearest(lat, lon, k, radius_km))
+
+        mismatches = 0
+        for state, lat, lon in queries[:options['verify']]:
+            exact = sorted((haversine_km(lat, lon, la, lo), pk) for pk, (_s, la, lo) in enumerate(schools))[:k]
+            exact_state = sorted(
+                (haversine_km(lat, lon, la, lo), pk) for pk, la, lo in by_state[state]
+            )[:k]
+            mismatches += [pk for _d, pk in table.nearest(lat, lon, k)] != [pk for _d, pk in exact]
+            mismatches += [pk for _d, pk in trees[state].nearest(lat, lon, k)] != [pk for _d, pk in exact_state]
+        style = self.style.SUCCESS if not mismatches else self.style.ERROR
+        self.stdout.write(style(
+            f"Verified {min(options['verify'], len(queries))} queries against brute force: {mismatches} mismatches"
+        ))
+
+    def benchmark_database(self, options, rng):
+        located = School.objects.filter(status='functional').exclude(geohash='')
+        sample = list(located.order_by('?').values_list('state', 'latitude', 'longitude')[:options['queries']])
+        if not sample:
+            raise CommandError('No functional schools with coordinates to query around')
+        queries = [(state, float(lat) + rng.gauss(0, 0.01), float(lon) + rng.gauss(0, 0.01)) for state, lat, lon in sample]
+        k, radius_km = options['k'], options['radius_km']
+        fields = ('school_code', 'school_name', 'latitude', 'longitude')
+
+        self.stdout.write(self.style.HTTP_INFO(
+            f'{len(queries)} queries over {located.count()} schools, k={k}, radius={radius_km} km'
+        ))
+        self.timed('geohash k-nearest', queries, lambda s, lat, lon: School.nearest(lat, lon, k, fields=fields))
+        self.timed('geohash radius', queries, lambda s, lat, lon: School.nearest(
+            lat, lon, k, radius_km=radius_km, fields=fields
+        ))
+        self.timed('state KD-tree k-nearest', queries, lambda s, lat, lon: School.nearest(
+            lat, lon, k, state=s, fields=fields
+        ))
+        self.timed('state KD-tree radius', queries, lambda s, lat, lon: School.nearest(
+            lat, lon, k, radius_km=radius_km, state=s, fields=fields
+        ))
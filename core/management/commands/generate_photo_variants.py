@@ -0,0 +1,56 @@
+"""
+Management command to generate responsive variants for gallery photos
+(see core.photo_variants)
+
+Usage:
+    python manage.py generate_photo_variants
+    python manage.py generate_photo_variants --all
+    python manage.py generate_photo_variants --ids 3 7 12
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from core.models import PhotoGallery
+from core.photo_variants import pending_photos, process_photo
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive JPEG/WebP variants for gallery photos that lack them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Regenerate every photo, not only those without variants of their current image'
+        )
+        parser.add_argument(
+            '--ids',
+            type=int,
+            nargs='+',
+            help='Only these photo ids'
+        )
+
+    def handle(self, *args, **options):
+        photos = PhotoGallery.objects.exclude(image='').order_by('pk') if options['all'] else pending_photos()
+        if options['ids']:
+            photos = photos.filter(pk__in=options['ids'])
+
+        started = time.time()
+        processed = written = 0
+        # Photos are loaded one at a time; each holds a decoded image while it's processed
+        for pk in photos.values_list('pk', flat=True):
+            photo = PhotoGallery.objects.filter(pk=pk).first()
+            if photo is None or not photo.image:
+                continue
+            count = process_photo(photo)
+            processed += 1
+            written += count
+            if count:
+                self.stdout.write(f'🖼️  {photo.title}: {count} variants')
+            else:
+                self.stdout.write(self.style.WARNING(f'⚠️  {photo.title}: no variants (see the log)'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Processed {processed} photos ({written} variant files) in {time.time() - started:.2f} seconds'
+        ))
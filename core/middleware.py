@@ -57,7 +57,7 @@ class HealthCheckMiddleware(MiddlewareMixin):
     
     def process_request(self, request):
         # Fast response for health checks
-        if request.path in ['/health/', '/api/health/']:
+        if request.path in ['/health/', '/health/live/', '/health/ready/', '/api/health/']:
             return None  # Let it proceed normally but prioritize
         
         # Block suspicious requests that might cause timeouts
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_school_search_trigram_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchoolLocationFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(max_length=100)),
+                ('district', models.CharField(max_length=100)),
+                ('sub_district', models.CharField(blank=True, max_length=100)),
+                ('cluster', models.CharField(blank=True, max_length=100)),
+                ('school_count', models.PositiveIntegerField(default=0)),
+                ('student_total', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'School Location Facet',
+                'verbose_name_plural': 'School Location Facets',
+                'ordering': ['state', 'district', 'sub_district', 'cluster'],
+                'unique_together': {('state', 'district', 'sub_district', 'cluster')},
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:36
+
+from django.db import migrations, models
+
+
+# A copy of core.school_geo.encode_geohash as of this migration, so later
+# changes to that module can't change what the backfill computes
+GEOHASH_PRECISION = 9
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    if latitude is None or longitude is None:
+        return ''
+    latitude, longitude = float(latitude), float(longitude)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return ''
+
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        if coordinate >= middle:
+            value = (value << 1) | 1
+            interval[0] = middle
+        else:
+            value <<= 1
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def backfill_geohash(apps, schema_editor):
+    School = apps.get_model('core', 'School')
+    located = School.objects.filter(latitude__isnull=False, longitude__isnull=False).order_by('pk')
+    quote = schema_editor.connection.ops.quote_name
+    sql = f'UPDATE {quote(School._meta.db_table)} SET geohash = %s WHERE id = %s'
+    last_pk = 0
+    while True:
+        batch = list(located.filter(pk__gt=last_pk).values_list('pk', 'latitude', 'longitude')[:5000])
+        if not batch:
+            break
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(sql, [(encode_geohash(lat, lon), pk) for pk, lat, lon in batch])
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_schoolimportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='school',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, help_text='Geohash of latitude/longitude for nearest-school lookups', max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_school_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchoolEnrollmentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(max_length=100)),
+                ('district', models.CharField(max_length=100)),
+                ('management', models.CharField(blank=True, max_length=20)),
+                ('school_category', models.CharField(blank=True, max_length=20)),
+                ('school_count', models.PositiveIntegerField(default=0)),
+                ('student_total', models.PositiveBigIntegerField(default=0)),
+                ('teacher_total', models.PositiveBigIntegerField(default=0)),
+                ('totals', models.JSONField(default=dict, help_text='Sum of each enrollment, teacher and room column')),
+                ('size_histogram', models.JSONField(default=list, help_text='Schools per total_students bin')),
+                ('ratio_histogram', models.JSONField(default=list, help_text='Schools per pupil-teacher ratio bin')),
+                ('schools_without_teachers', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'School Enrollment Rollup',
+                'verbose_name_plural': 'School Enrollment Rollups',
+                'ordering': ['state', 'district', 'management', 'school_category'],
+                'unique_together': {('state', 'district', 'management', 'school_category')},
+            },
+        ),
+    ]
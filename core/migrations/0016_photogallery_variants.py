@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_schoolenrollmentrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photogallery',
+            name='variants',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Responsive JPEG/WebP sizes, generated in the background'),
+        ),
+        migrations.AddField(
+            model_name='photogallery',
+            name='variants_source',
+            field=models.CharField(blank=True, editable=False, help_text='Image the variants were generated from', max_length=255),
+        ),
+    ]
@@ -1,8 +1,6 @@
 from django.db import models
 from django.utils.html import mark_safe
-from PIL import Image
-import os
-import requests
+import uuid
 import json
 from urllib.parse import urlparse, parse_qs
 
@@ -420,6 +418,18 @@ class PhotoGallery(models.Model):
         blank=True, 
         help_text="Auto-generated thumbnail (leave blank)"
     )
+    variants = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        help_text="Responsive JPEG/WebP sizes, generated in the background"
+    )
+    variants_source = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        help_text="Image the variants were generated from"
+    )
     category = models.ForeignKey(
         PhotoCategory, 
         on_delete=models.CASCADE,
@@ -470,25 +480,50 @@ class PhotoGallery(models.Model):
     image_preview.short_description = "Preview"
     
     def save(self, *args, **kwargs):
-        """Auto-generate thumbnail when saving"""
+        """Queue responsive variants once the save commits if the image changed (see core.photo_variants)"""
         super().save(*args, **kwargs)
         
-        if self.image and not self.thumbnail:
-            # Create thumbnail
-            img = Image.open(self.image.path)
-            img.thumbnail((400, 300), Image.Resampling.LANCZOS)
-            
-            # Save thumbnail
-            thumb_name = f"thumb_{os.path.basename(self.image.name)}"
-            thumb_path = os.path.join('gallery/thumbnails/', thumb_name)
-            full_thumb_path = os.path.join('media', thumb_path)
-            
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(full_thumb_path), exist_ok=True)
-            
-            img.save(full_thumb_path, optimize=True, quality=85)
-            self.thumbnail = thumb_path
-            super().save(update_fields=['thumbnail'])
+        if self.image and self.image.name != self.variants_source:
+            from django.db import transaction
+            from .photo_variants import photo_variant_runner
+            transaction.on_commit(photo_variant_runner.wake)
+    
+    def _variants(self, format_name):
+        return sorted(
+            (variant for variant in self.variants or [] if variant['format'] == format_name),
+            key=lambda variant: variant['width']
+        )
+    
+    def _srcset(self, format_name):
+        storage = self.image.storage
+        return ', '.join(
+            f"{storage.url(variant['name'])} {variant['width']}w" for variant in self._variants(format_name)
+        )
+    
+    @property
+    def srcset(self):
+        """JPEG ``srcset`` value ('' until the variants exist)"""
+        return self._srcset('jpeg')
+    
+    @property
+    def webp_srcset(self):
+        return self._srcset('webp')
+    
+    @property
+    def display_url(self):
+        """A grid-card sized JPEG, or the original while variants are pending"""
+        from .photo_variants import THUMBNAIL_MIN_WIDTH
+        jpegs = self._variants('jpeg')
+        if not jpegs:
+            return self.image.url
+        variant = next((v for v in jpegs if v['width'] >= THUMBNAIL_MIN_WIDTH), jpegs[-1])
+        return self.image.storage.url(variant['name'])
+    
+    @property
+    def full_url(self):
+        """The widest JPEG variant (for the lightbox), or the original"""
+        jpegs = self._variants('jpeg')
+        return self.image.storage.url(jpegs[-1]['name']) if jpegs else self.image.url
 
 
 class VideoTestimonial(models.Model):
@@ -652,21 +687,13 @@ class VideoTestimonial(models.Model):
         return f"https://img.youtube.com/vi/{video_id}/{quality}.jpg"
     
     def get_vimeo_thumbnail_url(self):
-        """Get Vimeo thumbnail URL via API"""
-        if not self.video_url or 'vimeo.com' not in self.video_url:
+        """Get Vimeo thumbnail URL (see core.gallery.resolve_vimeo_thumbnail)"""
+        if not self.video_url or 'vimeo.com/' not in self.video_url:
             return None
-            
-        try:
-            video_id = self.video_url.split('vimeo.com/')[1].split('?')[0]
-            api_url = f"https://vimeo.com/api/v2/video/{video_id}.json"
-            response = requests.get(api_url, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                if data and len(data) > 0:
-                    return data[0].get('thumbnail_large', data[0].get('thumbnail_medium'))
-        except:
-            pass
-        return None
+        
+        from .gallery import resolve_vimeo_thumbnail
+        video_id = self.video_url.split('vimeo.com/')[1].split('?')[0].strip('/')
+        return resolve_vimeo_thumbnail(video_id) if video_id else None
     
     def auto_generate_thumbnail(self):
         """Automatically generate thumbnail based on video source"""
@@ -686,17 +713,11 @@ class VideoTestimonial(models.Model):
         return None
     
     def get_best_thumbnail(self):
-        """Get the best available thumbnail (custom > auto > fallback)"""
+        """Get the best available thumbnail (custom > auto > fallback) without network calls"""
         if self.thumbnail:
             return self.thumbnail.url
-        elif self.auto_thumbnail:
-            return self.auto_thumbnail
-        else:
-            # Auto-generate if not exists
-            auto_thumb = self.auto_generate_thumbnail()
-            if auto_thumb:
-                return auto_thumb
-        return None
+        # Vimeo thumbnails are resolved and stored when the video is saved
+        return self.auto_thumbnail or self.get_youtube_thumbnail_url('hqdefault')
     
     def calculate_aspect_ratio(self):
         """Calculate and store aspect ratio"""
@@ -954,6 +975,12 @@ class School(models.Model):
     year_of_establishment = models.PositiveIntegerField(null=True, blank=True)
     longitude = models.DecimalField(max_digits=10, decimal_places=7, null=True, blank=True)
     latitude = models.DecimalField(max_digits=10, decimal_places=7, null=True, blank=True)
+    geohash = models.CharField(
+        max_length=12,
+        blank=True,
+        db_index=True,
+        help_text="Geohash of latitude/longitude for nearest-school lookups"
+    )
     
     STATUS_CHOICES = [
         ('functional', 'Functional'),
@@ -1045,10 +1072,21 @@ class School(models.Model):
         ordering = ['state', 'district', 'school_name']
     
     def save(self, *args, **kwargs):
-        """Auto-populate search vector for fast text search"""
-        self.search_vector = f"{self.school_name} {self.district} {self.state} {self.school_code}".lower()
+        """Auto-populate search vector and geohash"""
+        from .school_geo import encode_geohash
+        from .school_import import build_search_vector
+        self.search_vector = build_search_vector(self.school_name, self.district, self.state, self.school_code)
+        self.geohash = encode_geohash(self.latitude, self.longitude)
         super().save(*args, **kwargs)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded location so facet counts can be moved on save"""
+        instance = super().from_db(db, field_names, values)
+        from .school_facets import remember_facet
+        remember_facet(instance)
+        return instance
+    
     def __str__(self):
         return f"{self.school_name}, {self.district}, {self.state}"
     
@@ -1065,27 +1103,23 @@ class School(models.Model):
         return "Not specified"
     
     @classmethod
-    def search_schools(cls, query, state=None, district=None, limit=50):
+    def search_schools(cls, query, state=None, district=None, limit=50, fields=None):
         """
-        Optimized search for dropdown autocomplete
-        Returns up to 50 matching schools for performance
+        Ranked, typo-tolerant search for dropdown autocomplete
+        Returns a list of up to ``limit`` functional schools, best match first
+        (see core.school_search)
         """
-        queryset = cls.objects.filter(status='functional')
-        
-        if query:
-            queryset = queryset.filter(
-                models.Q(search_vector__icontains=query.lower()) |
-                models.Q(school_name__icontains=query) |
-                models.Q(school_code__icontains=query)
-            )
-        
-        if state:
-            queryset = queryset.filter(state__iexact=state)
-            
-        if district:
-            queryset = queryset.filter(district__iexact=district)
-        
-        return queryset.select_related().order_by('school_name')[:limit]
+        from .school_search import search_schools
+        return search_schools(query, state=state, district=district, limit=limit, fields=fields)
+    
+    @classmethod
+    def nearest(cls, latitude, longitude, k=10, radius_km=None, state=None, fields=None):
+        """
+        Up to ``k`` functional schools nearest to a point, nearest first, each
+        with ``distance_km`` set (see core.school_geo)
+        """
+        from .school_geo import nearest_schools
+        return nearest_schools(latitude, longitude, k=k, radius_km=radius_km, state=state, fields=fields)
     
     
     def get_reward_display(self):
@@ -1101,4 +1135,120 @@ class School(models.Model):
             'converted': 'badge-primary',
             'rejected': 'badge-error',
         }
-        return status_classes.get(self.status, 'badge-neutral')
\ No newline at end of file
+        return status_classes.get(self.status, 'badge-neutral')
+
+
+class SchoolLocationFacet(models.Model):
+    """
+    Materialized state > district > sub-district > cluster counts of functional schools
+    One row per cluster; rebuilt by import_schools and kept current by School signals
+    (see core.school_facets)
+    """
+    state = models.CharField(max_length=100)
+    district = models.CharField(max_length=100)
+    sub_district = models.CharField(max_length=100, blank=True)
+    cluster = models.CharField(max_length=100, blank=True)
+    school_count = models.PositiveIntegerField(default=0)
+    student_total = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "School Location Facet"
+        verbose_name_plural = "School Location Facets"
+        unique_together = ['state', 'district', 'sub_district', 'cluster']
+        ordering = ['state', 'district', 'sub_district', 'cluster']
+
+    def __str__(self):
+        return f"{self.state} > {self.district} > {self.sub_district} > {self.cluster} ({self.school_count})"
+
+
+class SchoolEnrollmentRollup(models.Model):
+    """
+    Materialized enrollment figures of functional schools per state, district,
+    management and category: column sums plus school-size and pupil-teacher
+    ratio histograms, all additive (see core.school_rollups)
+    """
+    state = models.CharField(max_length=100)
+    district = models.CharField(max_length=100)
+    management = models.CharField(max_length=20, blank=True)
+    school_category = models.CharField(max_length=20, blank=True)
+    school_count = models.PositiveIntegerField(default=0)
+    student_total = models.PositiveBigIntegerField(default=0)
+    teacher_total = models.PositiveBigIntegerField(default=0)
+    totals = models.JSONField(default=dict, help_text="Sum of each enrollment, teacher and room column")
+    size_histogram = models.JSONField(default=list, help_text="Schools per total_students bin")
+    ratio_histogram = models.JSONField(default=list, help_text="Schools per pupil-teacher ratio bin")
+    schools_without_teachers = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "School Enrollment Rollup"
+        verbose_name_plural = "School Enrollment Rollups"
+        unique_together = ['state', 'district', 'management', 'school_category']
+        ordering = ['state', 'district', 'management', 'school_category']
+
+    def __str__(self):
+        return f"{self.state} > {self.district} ({self.management or '-'}, {self.school_category or '-'})"
+
+    @property
+    def pupil_teacher_ratio(self):
+        return round(self.student_total / self.teacher_total, 1) if self.teacher_total else None
+
+
+class SchoolImportJob(models.Model):
+    """
+    Background import of an uploaded schools CSV (see core.import_jobs)
+    Progress is written after every batch so the status endpoint can report it
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    original_filename = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    file_size = models.PositiveBigIntegerField(default=0)
+    update_existing = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', db_index=True)
+
+    # Progress (cumulative across resumes)
+    rows_done = models.PositiveIntegerField(default=0)
+    written = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+    error_samples = models.JSONField(default=list, blank=True)
+    rows_per_second = models.FloatField(default=0)
+    message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "School Import Job"
+        verbose_name_plural = "School Import Jobs"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.original_filename} ({self.get_status_display()})"
+
+    def to_dict(self):
+        return {
+            'job_id': str(self.id),
+            'status': self.status,
+            'file_name': self.original_filename,
+            'file_size': self.file_size,
+            'rows_done': self.rows_done,
+            'written': self.written,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'error_samples': self.error_samples,
+            'rows_per_second': self.rows_per_second,
+            'message': self.message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,185 @@
+"""
+Changelist pagination for large tables (used by SchoolAdmin)
+
+Django's paginator runs an exact ``COUNT(*)`` for every changelist view and
+turns page N into ``OFFSET (N - 1) * per_page``; on a million schools both
+walk the table. ``LargeTablePaginator`` instead:
+
+- counts an unfiltered PostgreSQL table from the planner's ``reltuples``
+  estimate, and anything else (filters, other databases) exactly, cached in
+  process for ``COUNT_CACHE_SECONDS`` (the configured cache is a dummy);
+- serves pages past ``DEEP_OFFSET`` by key: the ordering values of the last
+  row of each deep page are remembered, so the following page is a seek
+  past them. A deep page without a remembered predecessor reads only the
+  ordering columns at its offset (which the ordering index covers) and then
+  loads its rows by primary key.
+
+Keyset pages need an ordering of plain, non-null columns that ends in the
+primary key or another unique column; other orderings use Django's slicing.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.expressions import OrderBy
+from django.utils.functional import cached_property
+
+
+COUNT_CACHE_SECONDS = 60
+# Below this many rows the estimate isn't worth its error
+ESTIMATE_MIN_ROWS = 100000
+DEEP_OFFSET = 1000
+BOUNDARY_SECONDS = 600
+MAX_REMEMBERED = 2000
+
+
+class _ExpiringStore:
+    """Thread-safe, size-bounded map whose entries expire"""
+
+    def __init__(self, max_entries):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.max_entries = max_entries
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, seconds):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cached_counts = _ExpiringStore(MAX_REMEMBERED)
+page_boundaries = _ExpiringStore(MAX_REMEMBERED)
+
+
+def rows_after(keys, values):
+    """Q for rows strictly after ``values`` in the ``[(field, descending)]`` ordering"""
+    clauses, equal = [], {}
+    for (name, descending), value in zip(keys, values):
+        clauses.append(Q(**equal, **{f"{name}__{'lt' if descending else 'gt'}": value}))
+        equal[name] = value
+    # The redundant bound on the leading column lets the index seek instead of scanning
+    first, descending = keys[0]
+    return Q(**{f"{first}__{'lte' if descending else 'gte'}": values[0]}) & reduce(or_, clauses)
+
+
+class LargeTablePaginator(Paginator):
+    """Paginator with estimated/cached counts and keyset pages for deep offsets"""
+
+    @cached_property
+    def _query_key(self):
+        """Hash of the SQL behind ``object_list``; None when it can't match anything"""
+        queryset = self.object_list
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return None
+        return hashlib.md5(f'{queryset.db}:{sql}:{params!r}'.encode()).hexdigest()
+
+    @cached_property
+    def count(self):
+        if self._query_key is None:
+            return 0
+        if not self.object_list.query.where:
+            estimate = self._estimated_count()
+            if estimate is not None:
+                return estimate
+        count = cached_counts.get(self._query_key)
+        if count is None:
+            count = self.object_list.count()
+            cached_counts.set(self._query_key, count, COUNT_CACHE_SECONDS)
+        return count
+
+    def _estimated_count(self):
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [self.object_list.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        # -1 means never analyzed
+        return row[0] if row and row[0] >= ESTIMATE_MIN_ROWS else None
+
+    @cached_property
+    def _keys(self):
+        """``[(field, descending)]`` ending in a unique column, or None if keyset pages can't be used"""
+        query = self.object_list.query
+        opts = self.object_list.model._meta
+        keys = []
+        for item in query.order_by or (opts.ordering if query.default_ordering else ()):
+            if isinstance(item, str) and item != '?':
+                name, descending = item.lstrip('-'), item.startswith('-')
+            elif isinstance(item, OrderBy) and isinstance(item.expression, F) \
+                    and not (item.nulls_first or item.nulls_last):
+                name, descending = item.expression.name, item.descending
+            else:
+                return None
+            if LOOKUP_SEP in name:
+                return None
+            if name != 'pk':
+                try:
+                    field = opts.get_field(name)
+                except FieldDoesNotExist:
+                    return None
+                if not field.concrete or field.is_relation or field.null:
+                    return None
+                if field.primary_key:
+                    name = 'pk'
+                elif field.unique:
+                    keys.append((name, descending))
+                    return keys
+            keys.append((name, descending))
+            if name == 'pk':
+                return keys
+        return None
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        if bottom < DEEP_OFFSET or self._keys is None or self._query_key is None:
+            return super().page(number)
+
+        fields = [name for name, _descending in self._keys]
+        if 'pk' not in fields:
+            fields.append('pk')
+        queryset = self.object_list
+        boundary = page_boundaries.get((self._query_key, self.per_page, number - 1))
+        if boundary is not None:
+            keys = list(queryset.filter(rows_after(self._keys, boundary)).values_list(*fields)[:self.per_page])
+        else:
+            keys = list(queryset.values_list(*fields)[bottom:bottom + self.per_page])
+        if keys:
+            page_boundaries.set((self._query_key, self.per_page, number), keys[-1], BOUNDARY_SECONDS)
+
+        pk_index = fields.index('pk')
+        # Still a queryset, in the same order, for list_editable formsets
+        return self._get_page(queryset.filter(pk__in=[row[pk_index] for row in keys]), number, self)
@@ -0,0 +1,202 @@
+"""
+Responsive image variants for the photo gallery
+
+``PhotoGallery.save`` used to open the full-resolution upload with PIL
+inside the request, make one 400x300 thumbnail and write it under a
+hard-coded ``media/`` path, so a large phone photo stalled the admin and
+held its whole decoded bitmap in memory.
+
+Saving a photo now only queues it: ``photo_variant_runner`` processes
+photos whose ``variants_source`` doesn't match their current image on a
+background thread. ``render_variants`` decodes each upload once, at reduced
+resolution where the format allows it (``Image.draft`` lets the JPEG decoder
+scale by 1/2, 1/4 or 1/8 while decoding), and scales it down through
+``PHOTO_WIDTHS`` as JPEG and WebP. Files go through the image field's
+storage under content-hashed names, so they can be cached forever and a
+re-run writes nothing new. ``PhotoGallery.variants`` lists them for the
+``srcset`` helpers the gallery template uses.
+
+``python manage.py generate_photo_variants`` backfills existing photos.
+"""
+
+import hashlib
+import io
+import logging
+import math
+import os
+import threading
+import time
+
+from django.core.files.base import ContentFile
+from django.db import connections
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+
+PHOTO_WIDTHS = (320, 640, 960, 1280, 1920)
+# The thumbnail used to fit 400x300; the variant that replaces it is the smallest at least this wide
+THUMBNAIL_MIN_WIDTH = 400
+VARIANT_DIR = 'gallery/variants'
+FORMATS = (
+    ('jpeg', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    ('webp', 'webp', {'quality': 80, 'method': 4}),
+)
+EXIF_ORIENTATION = 0x0112
+# Grid cards are at least 300px wide (see gallery.html)
+PHOTO_SIZES = '(min-width: 1280px) 400px, (min-width: 640px) 50vw, 100vw'
+
+
+def variant_widths(width):
+    """Target widths for a source ``width`` pixels wide; never upscales"""
+    widths = [target for target in PHOTO_WIDTHS if target < width]
+    if width <= PHOTO_WIDTHS[-1]:
+        widths.append(width)
+    return widths or [PHOTO_WIDTHS[-1]]
+
+
+def _flatten(image):
+    """Upright RGB copy of a loaded image, transparency flattened onto white"""
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        flattened = Image.new('RGB', image.size, (255, 255, 255))
+        flattened.paste(image, mask=image.getchannel('A'))
+        return flattened
+    return image.convert('RGB')
+
+
+def render_variants(source):
+    """
+    Encode ``source`` (a path or binary file) at every target width
+    Returns ``[(width, height, format, extension, bytes)]``, widest first
+    """
+    with Image.open(source) as image:
+        rotated = image.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8)
+        upright_width = image.height if rotated else image.width
+        widths = sorted(variant_widths(upright_width), reverse=True)
+        if widths[0] < upright_width:
+            scale = widths[0] / upright_width
+            # Only JPEG acts on this: it decodes at the largest 1/2, 1/4 or 1/8 reduction still covering the size
+            image.draft('RGB', (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+        image = _flatten(image)
+
+    variants = []
+    for target in widths:
+        # Each size is scaled from the previous one, not from the source
+        height = max(1, round(image.height * target / image.width))
+        if image.size != (target, height):
+            image = image.resize((target, height), Image.Resampling.LANCZOS)
+        for format_name, extension, options in FORMATS:
+            buffer = io.BytesIO()
+            image.save(buffer, format_name.upper(), **options)
+            variants.append((target, height, format_name, extension, buffer.getvalue()))
+    return variants
+
+
+def variant_name(image_name, width, extension, data):
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    return f'{VARIANT_DIR}/{stem}-{width}w.{digest}.{extension}'
+
+
+def _delete_files(storage, names):
+    for name in names:
+        try:
+            storage.delete(name)
+        except OSError:
+            pass
+
+
+def process_photo(photo):
+    """Write the variants of ``photo``'s current image and record them; returns how many were written"""
+    from .models import PhotoGallery
+
+    image_name = photo.image.name
+    storage = photo.image.storage
+    started = time.time()
+    try:
+        with storage.open(image_name, 'rb') as source:
+            rendered = render_variants(source)
+    except Exception as e:
+        # Recorded as processed with no variants, so a broken upload isn't retried forever
+        logger.error(f"💥 Could not generate variants for photo {photo.pk} ({image_name}): {str(e)}")
+        PhotoGallery.objects.filter(pk=photo.pk, image=image_name).update(variants=[], variants_source=image_name)
+        return 0
+
+    variants = []
+    for width, height, format_name, extension, data in rendered:
+        name = variant_name(image_name, width, extension, data)
+        if not storage.exists(name):
+            name = storage.save(name, ContentFile(data))
+        variants.append({'width': width, 'height': height, 'format': format_name, 'name': name})
+
+    jpegs = sorted((v for v in variants if v['format'] == 'jpeg'), key=lambda v: v['width'])
+    thumbnail = next((v for v in jpegs if v['width'] >= THUMBNAIL_MIN_WIDTH), jpegs[-1])['name']
+    new_names = {variant['name'] for variant in variants}
+    # Only if the image wasn't replaced meanwhile; the replacement is queued on its own
+    updated = PhotoGallery.objects.filter(pk=photo.pk, image=image_name).update(
+        variants=variants, variants_source=image_name, thumbnail=thumbnail
+    )
+    if updated:
+        _delete_files(storage, {v['name'] for v in photo.variants or []} - new_names)
+        # The update skips signals; the cached gallery context still lists the old files
+        from .gallery import gallery_cache
+        gallery_cache.invalidate()
+    else:
+        _delete_files(storage, new_names)
+    logger.info(
+        f"🖼️ Generated {len(variants)} variants for photo {photo.pk} in {time.time() - started:.1f}s"
+    )
+    return len(variants) if updated else 0
+
+
+def pending_photos():
+    """Photos whose variants weren't generated from their current image"""
+    from django.db.models import F
+    from .models import PhotoGallery
+
+    return PhotoGallery.objects.exclude(image='').exclude(variants_source=F('image')).order_by('pk')
+
+
+class PhotoVariantRunner:
+    """One background thread draining pending photos, started on demand"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pending = False
+
+    def wake(self):
+        with self._lock:
+            self._pending = True
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='photo-variants', daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        self._thread = None
+                        return
+                    self._pending = False
+                while self.run_next():
+                    pass
+        except Exception as e:
+            logger.error(f"💥 Photo variant runner stopped: {str(e)}", exc_info=True)
+        finally:
+            # Worker threads don't go through request_finished
+            connections.close_all()
+
+    def run_next(self):
+        """Process the oldest pending photo; False when there is none"""
+        photo = pending_photos().first()
+        if photo is None:
+            return False
+        process_photo(photo)
+        return True
+
+
+photo_variant_runner = PhotoVariantRunner()
@@ -0,0 +1,260 @@
+"""
+Location facet hierarchy for the school dropdowns
+
+Populating state > district > sub-district > cluster dropdowns meant a
+DISTINCT scan over ``School`` per level, with no counts at all.
+
+``SchoolLocationFacet`` materializes one row per cluster with the number of
+functional schools and their student total. ``rebuild_school_facets`` fills
+it with one GROUP BY (the school importer calls it after loading). Single
+saves and deletes move counts incrementally: ``School.from_db`` remembers the
+loaded location, and the signal handlers below apply the difference with
+``F()`` updates in the same transaction.
+
+``facet_tree`` holds the hierarchy in memory (loaded from the facet table
+with one query, rebuilding it first if it was never built) and serves each
+node's children as a pre-serialized JSON document. Every change bumps its
+version, which is the ETag of the ``api/schools/locations/`` endpoint, so a
+dropdown revalidation answers 304 without touching the database.
+"""
+
+import json
+import logging
+import threading
+import time
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+logger = logging.getLogger(__name__)
+
+
+FACET_LEVELS = ('state', 'district', 'sub_district', 'cluster')
+SNAPSHOT_FIELDS = FACET_LEVELS + ('status', 'total_students')
+
+
+def _counted(values):
+    """(location key, students) a school contributes, or None if it isn't counted"""
+    if values['status'] != 'functional':
+        return None
+    return tuple(values[level] or '' for level in FACET_LEVELS), values['total_students'] or 0
+
+
+def remember_facet(school):
+    """Snapshot the loaded location (skipped for deferred loads, which never trigger queries here)"""
+    if all(field in school.__dict__ for field in SNAPSHOT_FIELDS):
+        school._facet_snapshot = _counted(school.__dict__)
+
+
+def _new_node():
+    return {'school_count': 0, 'student_total': 0, 'children': {}}
+
+
+class SchoolFacetTree:
+    """In-memory, versioned facet hierarchy with per-node JSON documents"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._root = None
+        self._documents = {}
+        self.version = 0
+        self.loads = 0
+
+    def _load(self):
+        from .models import School, SchoolLocationFacet
+
+        rows = list(SchoolLocationFacet.objects.filter(school_count__gt=0).values_list(
+            *FACET_LEVELS, 'school_count', 'student_total'
+        ))
+        if not rows and School.objects.filter(status='functional').exists():
+            rebuild_school_facets(refresh_tree=False)
+            rows = list(SchoolLocationFacet.objects.filter(school_count__gt=0).values_list(
+                *FACET_LEVELS, 'school_count', 'student_total'
+            ))
+
+        root = _new_node()
+        for *key, school_count, student_total in rows:
+            self._add(root, key, school_count, student_total)
+        self._root = root
+        self._documents = {}
+        # Seeded from the clock so ETags from before a reload never match
+        self.version = int(time.time() * 1000)
+        self.loads += 1
+
+    @staticmethod
+    def _add(root, key, schools, students):
+        nodes = [root]
+        for name in key:
+            nodes.append(nodes[-1]['children'].setdefault(name, _new_node()))
+        for node in nodes:
+            node['school_count'] += schools
+            node['student_total'] += students
+        # Prune emptied nodes bottom-up
+        for parent, name, node in reversed(list(zip(nodes, key, nodes[1:]))):
+            if node['school_count'] <= 0:
+                del parent['children'][name]
+
+    def apply(self, deltas):
+        """Patch the loaded tree with committed ``(key, schools, students)`` changes"""
+        with self._lock:
+            if self._root is None:
+                return
+            for key, schools, students in deltas:
+                self._add(self._root, key, schools, students)
+            self.version += 1
+            self._documents = {}
+
+    def invalidate(self):
+        with self._lock:
+            self._root = None
+            self._documents = {}
+
+    def get_version(self):
+        with self._lock:
+            if self._root is None:
+                self._load()
+            return self.version
+
+    def names(self, path=()):
+        """Sorted child names of the node at ``path`` (empty if there's no such node)"""
+        with self._lock:
+            if self._root is None:
+                self._load()
+            node = self._root
+            for name in path:
+                node = node['children'].get(name)
+                if node is None:
+                    return []
+            return sorted(node['children'])
+
+    def document(self, path):
+        """(version, JSON bytes) listing the children of the node at ``path``; None if there's no such node"""
+        with self._lock:
+            if self._root is None:
+                self._load()
+            cached = self._documents.get(path)
+            if cached is None:
+                node = self._root
+                for name in path:
+                    node = node['children'].get(name)
+                    if node is None:
+                        return None
+                children = node['children']
+                cached = self._documents[path] = json.dumps({
+                    'status': 'success',
+                    'version': self.version,
+                    'path': dict(zip(FACET_LEVELS, path)),
+                    'level': FACET_LEVELS[len(path)] if len(path) < len(FACET_LEVELS) else None,
+                    'school_count': node['school_count'],
+                    'student_total': node['student_total'],
+                    'children': [
+                        {
+                            'name': name,
+                            'school_count': children[name]['school_count'],
+                            'student_total': children[name]['student_total'],
+                            'has_children': bool(children[name]['children']),
+                        }
+                        for name in sorted(children)
+                    ],
+                }).encode()
+            return self.version, cached
+
+
+facet_tree = SchoolFacetTree()
+
+
+def rebuild_school_facets(refresh_tree=True):
+    """Recompute every facet row from ``School`` with one INSERT ... SELECT ... GROUP BY; returns the row count"""
+    from django.db import connection
+    from django.utils import timezone
+    from .models import School, SchoolLocationFacet
+
+    started = time.time()
+    quote = connection.ops.quote_name
+    levels = ', '.join(quote(level) for level in FACET_LEVELS)
+    with transaction.atomic():
+        SchoolLocationFacet.objects.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {quote(SchoolLocationFacet._meta.db_table)} '
+                f'({levels}, school_count, student_total, updated_at) '
+                f'SELECT {levels}, COUNT(*), COALESCE(SUM(total_students), 0), %s '
+                f'FROM {quote(School._meta.db_table)} WHERE status = %s GROUP BY {levels}',
+                [connection.ops.adapt_datetimefield_value(timezone.now()), 'functional']
+            )
+            count = cursor.rowcount
+        if refresh_tree:
+            transaction.on_commit(facet_tree.invalidate)
+    logger.info(f"🗺️ Rebuilt {count} school location facets in {time.time() - started:.1f}s")
+    return count
+
+
+def apply_facet_deltas(deltas):
+    """Move facet counts for ``(key, schools, students)`` changes inside the current transaction"""
+    from .models import SchoolLocationFacet
+
+    for key, schools, students in deltas:
+        facet = SchoolLocationFacet.objects.filter(**dict(zip(FACET_LEVELS, key)))
+        updated = facet.update(
+            school_count=Greatest(F('school_count') + schools, Value(0)),
+            student_total=Greatest(F('student_total') + students, Value(0))
+        )
+        if schools < 0:
+            facet.filter(school_count=0).delete()
+        elif not updated and SchoolLocationFacet.objects.exists():
+            # An empty table hasn't been built yet; the first read rebuilds it
+            SchoolLocationFacet.objects.create(
+                school_count=schools, student_total=students, **dict(zip(FACET_LEVELS, key))
+            )
+    transaction.on_commit(lambda: facet_tree.apply(deltas))
+
+
+def _deltas(old, new):
+    if old == new:
+        return []
+    deltas = []
+    if old is not None:
+        deltas.append((old[0], -1, -old[1]))
+    if new is not None:
+        deltas.append((new[0], 1, new[1]))
+    return deltas
+
+
+def _snapshot_before_save(sender, instance, raw=False, **kwargs):
+    # Instances that weren't loaded with every location field: read the stored row
+    if raw or instance._state.adding or hasattr(instance, '_facet_snapshot'):
+        return
+    row = sender.objects.filter(pk=instance.pk).values(*SNAPSHOT_FIELDS).first()
+    instance._facet_snapshot = _counted(row) if row else None
+
+
+def _move_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, '_facet_snapshot', None)
+    new = _counted({field: getattr(instance, field) for field in SNAPSHOT_FIELDS})
+    deltas = _deltas(old, new)
+    if deltas:
+        apply_facet_deltas(deltas)
+    instance._facet_snapshot = new
+
+
+def _remove_on_delete(sender, instance, **kwargs):
+    if hasattr(instance, '_facet_snapshot'):
+        old = instance._facet_snapshot
+    else:
+        old = _counted({field: getattr(instance, field) for field in SNAPSHOT_FIELDS})
+    deltas = _deltas(old, None)
+    if deltas:
+        apply_facet_deltas(deltas)
+
+
+def connect_signals():
+    """Keep facet counts in step with School writes (called from AppConfig.ready)"""
+    from django.db.models.signals import post_delete, post_save, pre_save
+    from .models import School
+
+    pre_save.connect(_snapshot_before_save, sender=School, dispatch_uid='school_facets_pre_save')
+    post_save.connect(_move_on_save, sender=School, dispatch_uid='school_facets_save')
+    post_delete.connect(_remove_on_delete, sender=School, dispatch_uid='school_facets_delete')
@@ -0,0 +1,323 @@
+"""
+Nearest-school lookups over School latitude/longitude (no PostGIS)
+
+Two ways to answer "schools near here", both exact on the sphere:
+
+- ``School.geohash`` (precision ``GEOHASH_PRECISION``, indexed) turns a
+  radius query into a few indexed range scans over the geohash cells under
+  the circle's bounding box, and filters the rows they return by haversine
+  distance. k-nearest queries without a radius widen it until k schools
+  are inside.
+- ``nearby_index`` keeps a ``KDTree`` per state, loaded lazily with one
+  query the first time that state is asked for. Only states in the facet
+  tree (those with functional schools) are loaded and kept, so arbitrary
+  ``?state=`` values can't grow the cache. Points are stored as unit
+  vectors, so chord length orders them exactly like great-circle distance
+  and longitude wrap-around needs no special case.
+
+The helpers above ``NearbySchoolIndex`` don't import Django models (the
+importer computes geohashes in its worker processes).
+"""
+
+import heapq
+import logging
+import math
+import threading
+import time
+from array import array
+from functools import reduce
+from operator import itemgetter, or_
+
+logger = logging.getLogger(__name__)
+
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Range scans per geohash query
+MAX_COVERING_CELLS = 16
+# k-nearest over the geohash index starts at this radius (see nearest_in_cells)
+INITIAL_RADIUS_KM = 2.0
+MAX_RADIUS_KM = 2000.0
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Geohash of a point; '' when either coordinate is missing or out of range"""
+    if latitude is None or longitude is None:
+        return ''
+    latitude, longitude = float(latitude), float(longitude)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return ''
+
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        if coordinate >= middle:
+            value = (value << 1) | 1
+            interval[0] = middle
+        else:
+            value <<= 1
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_degrees(precision):
+    """(height, width) in degrees of a geohash cell"""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """
+    Geohash prefixes whose cells together contain the whole circle: the cells
+    under its bounding box at the finest precision that needs at most
+    ``MAX_COVERING_CELLS`` of them ([] means everything)
+    """
+    km_per_degree = math.pi * EARTH_RADIUS_KM / 180
+    lat_radius = radius_km / km_per_degree
+    south, north = max(-90.0, latitude - lat_radius), min(90.0, latitude + lat_radius)
+    # The circle is widest (in degrees) at the edge nearest a pole
+    widest = math.cos(math.radians(min(89.9, max(abs(south), abs(north)))))
+    lon_radius = min(180.0, lat_radius / widest)
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_degrees(precision)
+        rows = range(int((south + 90) // height), min(int((north + 90) // height), int(180 / height) - 1) + 1)
+        columns = int(360 / width)
+        first, last = int((longitude - lon_radius + 180) // width), int((longitude + lon_radius + 180) // width)
+        if last - first + 1 >= columns:
+            first, last = 0, columns - 1
+        if len(rows) * (last - first + 1) <= MAX_COVERING_CELLS:
+            return sorted({
+                encode_geohash(-90 + (row + 0.5) * height, -180 + (column % columns + 0.5) * width, precision)
+                for row in rows for column in range(first, last + 1)
+            })
+    return []
+
+
+def prefix_range(prefix):
+    """(low, high) bounds of the geohashes starting with ``prefix``; high is None past 'zzz...'"""
+    stripped = prefix.rstrip(GEOHASH_BASE32[-1])
+    if not stripped:
+        return prefix, None
+    following = GEOHASH_BASE32[GEOHASH_BASE32.index(stripped[-1]) + 1]
+    return prefix, stripped[:-1] + following
+
+
+def _unit_vector(latitude, longitude):
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat)
+
+
+def _chord(km):
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def _km(chord_squared):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord_squared) / 2))
+
+
+class KDTree:
+    """Static 3-d tree over unit vectors; node of [lo, hi) is the median at (lo + hi) // 2"""
+
+    def __init__(self, ids, latitudes, longitudes):
+        points = [_unit_vector(float(lat), float(lon)) + (pk,) for pk, lat, lon in zip(ids, latitudes, longitudes)]
+        self._build(points, 0, len(points), 0)
+        self.coords = tuple(array('d', map(itemgetter(axis), points)) for axis in range(3))
+        self.ids = [point[3] for point in points]
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def _build(cls, points, lo, hi, depth):
+        if hi - lo <= 1:
+            return
+        points[lo:hi] = sorted(points[lo:hi], key=itemgetter(depth % 3))
+        mid = (lo + hi) // 2
+        cls._build(points, lo, mid, depth + 1)
+        cls._build(points, mid + 1, hi, depth + 1)
+
+    def nearest(self, latitude, longitude, k=10, max_km=None):
+        """Up to k (distance_km, id) pairs, nearest first, optionally within max_km"""
+        query = _unit_vector(latitude, longitude)
+        xs, ys, zs = self.coords
+        limit = _chord(max_km) ** 2 if max_km is not None else math.inf
+        best = []  # max-heap of (-chord², id)
+
+        def search(lo, hi, depth):
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            dx, dy, dz = xs[mid] - query[0], ys[mid] - query[1], zs[mid] - query[2]
+            distance = dx * dx + dy * dy + dz * dz
+            if distance <= limit:
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, self.ids[mid]))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, self.ids[mid]))
+
+            split = (dx, dy, dz)[depth % 3]
+            near, far = ((lo, mid), (mid + 1, hi)) if split > 0 else ((mid + 1, hi), (lo, mid))
+            search(*near, depth + 1)
+            bound = limit if len(best) < k else min(limit, -best[0][0])
+            if split * split <= bound:
+                search(*far, depth + 1)
+
+        if k > 0:
+            search(0, len(self.ids), 0)
+        return [(_km(-distance), pk) for distance, pk in sorted(best, reverse=True)]
+
+
+def nearest_in_cells(fetch, latitude, longitude, k, radius_km=None):
+    """
+    Up to k (distance_km, id) pairs, nearest first, from ``fetch(cells)``, which
+    yields (id, latitude, longitude) for every point under the geohash prefixes.
+
+    Without a radius the search starts at ``INITIAL_RADIUS_KM``; once k
+    candidates are in hand the k-th distance bounds the answer, so at most one
+    more round (at exactly that radius) is needed, else the radius grows 4x.
+    """
+    radius = radius_km if radius_km is not None else INITIAL_RADIUS_KM
+    while True:
+        candidates = sorted(
+            (haversine_km(latitude, longitude, lat, lon), pk)
+            for pk, lat, lon in fetch(covering_cells(latitude, longitude, radius))
+        )
+        if radius_km is not None:
+            return [hit for hit in candidates[:k] if hit[0] <= radius]
+        if len(candidates) >= k and candidates[k - 1][0] <= radius:
+            return candidates[:k]
+        if radius >= MAX_RADIUS_KM:
+            return [hit for hit in candidates[:k] if hit[0] <= radius]
+        radius = min(candidates[k - 1][0] if len(candidates) >= k else radius * 4, MAX_RADIUS_KM)
+
+
+# -- Django-backed lookups --
+
+class NearbySchoolIndex:
+    """Per-state KD-trees of functional schools with coordinates, built on first use"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trees = {}
+        self.builds = 0
+
+    def tree(self, state):
+        from .models import School
+        from .school_facets import facet_tree
+
+        key = state.strip().lower()
+        with self._lock:
+            tree = self._trees.get(key)
+        if tree is not None:
+            return tree
+
+        # Unknown states (client input) cost no query and aren't cached
+        if key not in {name.lower() for name in facet_tree.names()}:
+            return KDTree((), (), ())
+
+        started = time.time()
+        rows = list(School.objects.filter(
+            status='functional', state__iexact=state.strip(), latitude__isnull=False, longitude__isnull=False
+        ).values_list('pk', 'latitude', 'longitude'))
+        tree = KDTree(*zip(*rows)) if rows else KDTree((), (), ())
+        with self._lock:
+            self._trees[key] = tree
+            self.builds += 1
+        logger.info(f"📍 Built nearby-school tree for {state}: {len(tree)} schools in {time.time() - started:.2f}s")
+        return tree
+
+    def invalidate(self, state=None):
+        with self._lock:
+            if state is None:
+                self._trees.clear()
+            else:
+                self._trees.pop((state or '').strip().lower(), None)
+
+
+nearby_index = NearbySchoolIndex()
+
+
+def _nearest_from_db(latitude, longitude, k, radius_km):
+    from django.db.models import Q
+    from .models import School
+
+    def fetch(cells):
+        if cells:
+            # Ranges rather than startswith: SQLite's case-insensitive LIKE can't use the index
+            queryset = School.objects.filter(reduce(or_, (
+                Q(geohash__gte=low, geohash__lt=high) if high else Q(geohash__gte=low)
+                for low, high in map(prefix_range, cells)
+            )))
+        else:
+            queryset = School.objects.exclude(geohash='')
+        # status is checked here: filtering on it lets planners pick its index over the geohash ranges
+        rows = queryset.order_by().values_list('pk', 'latitude', 'longitude', 'status')
+        return ((pk, float(lat), float(lon)) for pk, lat, lon, status in rows if status == 'functional')
+
+    return nearest_in_cells(fetch, latitude, longitude, k, radius_km)
+
+
+def nearest_schools(latitude, longitude, k=10, radius_km=None, state=None, fields=None):
+    """
+    Up to k functional schools nearest to a point (optionally within radius_km),
+    nearest first, each with a ``distance_km`` attribute. With ``state`` the
+    lookup runs on that state's in-memory KD-tree, otherwise on the geohash index.
+    """
+    from .models import School
+
+    latitude, longitude = float(latitude), float(longitude)
+    if state:
+        hits = nearby_index.tree(state).nearest(latitude, longitude, k, max_km=radius_km)
+    else:
+        hits = _nearest_from_db(latitude, longitude, k, radius_km)
+
+    queryset = School.objects.all()
+    if fields:
+        queryset = queryset.only(*fields)
+    schools = queryset.in_bulk([pk for _distance, pk in hits])
+    results = []
+    for distance, pk in hits:
+        school = schools.get(pk)
+        if school is not None:
+            school.distance_km = round(distance, 3)
+            results.append(school)
+    return results
+
+
+def _remember_state(sender, instance, raw=False, **kwargs):
+    # The facet snapshot (taken before this handler) holds the stored state of functional schools
+    snapshot = getattr(instance, '_facet_snapshot', None)
+    instance._geo_state = snapshot[0][0] if snapshot else None
+
+
+def _invalidate_on_write(sender, instance, **kwargs):
+    nearby_index.invalidate(instance.state)
+    previous = getattr(instance, '_geo_state', None)
+    if previous and previous != instance.state:
+        nearby_index.invalidate(previous)
+
+
+def connect_signals():
+    """Drop cached state trees when a school in them changes (called from AppConfig.ready, after the facet handlers)"""
+    from django.db.models.signals import post_delete, post_save, pre_save
+    from .models import School
+
+    pre_save.connect(_remember_state, sender=School, dispatch_uid='school_geo_pre_save')
+    post_save.connect(_invalidate_on_write, sender=School, dispatch_uid='school_geo_save')
+    post_delete.connect(_invalidate_on_write, sender=School, dispatch_uid='school_geo_delete')
@@ -0,0 +1,467 @@
+"""
+Bulk School import pipeline (used by ``import_schools`` and the CSV upload job)
+
+The old command ran ``School.objects.filter(school_code=...).exists()`` for
+every row and ``bulk_create`` skipped the ``search_vector`` computed in
+``School.save``. ``SchoolImporter`` instead:
+
+- parses CSV rows into field dicts (``search_vector`` and ``geohash``
+  included) in a process pool, with at most ``2 * workers`` batches in
+  flight so memory stays bounded; ``workers=1`` parses inline;
+- skips existing schools against a set of codes preloaded with one query, or
+  with ``update_existing`` upserts on ``school_code``;
+- writes each batch in one transaction: on PostgreSQL with COPY into a temp
+  table and one ``INSERT ... SELECT ... ON CONFLICT``, on other databases
+  with ``ON CONFLICT`` support (SQLite) with one ``executemany`` INSERT, and
+  with ``bulk_create`` elsewhere;
+- after every committed batch writes a checkpoint (atomically replaced and
+  fsynced) holding the number of data rows done, which is exactly the
+  ``--start-from`` to resume with;
+- invalidates the search index and nearby-school trees and rebuilds the
+  location facets and enrollment rollups at the end.
+
+The parsing half of this module doesn't import Django models so pool
+workers can import it on their own.
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from .school_geo import encode_geohash
+
+logger = logging.getLogger(__name__)
+
+
+MANAGEMENT_MAP = {
+    'government': 'government',
+    'private': 'private',
+    'aided': 'aided',
+    'central': 'central_govt',
+    'central government': 'central_govt',
+    'private unaided': 'private',
+    'government aided': 'aided',
+}
+
+CATEGORY_MAP = {
+    'primary': 'primary',
+    'upper primary': 'upper_primary',
+    'secondary': 'secondary',
+    'higher secondary': 'higher_secondary',
+    'pre-primary': 'pre_primary',
+    'pre primary': 'pre_primary',
+}
+
+TYPE_MAP = {
+    'boys': 'boys',
+    'girls': 'girls',
+    'co-educational': 'co_ed',
+    'co-ed': 'co_ed',
+    'coeducational': 'co_ed',
+}
+
+# CSV column -> School enrollment field
+STUDENT_COLUMNS = {
+    'Pre Primary Students': 'pre_primary_students',
+    'Students in Class I': 'students_class_1',
+    'Students in Class II': 'students_class_2',
+    'Students in Class III': 'students_class_3',
+    'Students in Class IV': 'students_class_4',
+    'Students in Class V': 'students_class_5',
+    'Students in Class VI': 'students_class_6',
+    'Students in Class VII': 'students_class_7',
+    'Students in Class VIII': 'students_class_8',
+    'Students in Class IX': 'students_class_9',
+    'Students in Class X': 'students_class_10',
+    'Students in Class XI': 'students_class_11',
+    'Students in Class XII': 'students_class_12',
+    'Non Primary Students': 'non_primary_students',
+    'Total Students': 'total_students',
+}
+
+
+class SchoolImportError(Exception):
+    """A row couldn't be imported and ``skip_errors`` is off"""
+
+
+def build_search_vector(school_name, district, state, school_code):
+    """Text behind School.search_vector (shared by School.save and the importer)"""
+    return f"{school_name} {district} {state} {school_code}".lower()
+
+
+def safe_int(value, default=None):
+    try:
+        return int(float(value)) if value and str(value).strip() else default
+    except (ValueError, TypeError):
+        return default
+
+
+def safe_decimal(value, default=None):
+    try:
+        return Decimal(str(value)) if value and str(value).strip() else default
+    except (InvalidOperation, TypeError):
+        return default
+
+
+def safe_str(value, max_length=None):
+    if not value:
+        return ''
+    value = str(value).strip()
+    if max_length:
+        value = value[:max_length]
+    return value
+
+
+def parse_row(row):
+    """School field values for one CSV row (a dict keyed by column header)"""
+    school_code = safe_str(row.get('School Code'), 20)
+    school_name = safe_str(row.get('School Name'), 200)
+    if not school_code or not school_name:
+        raise ValueError('Missing required fields: School Code or School Name')
+
+    state = safe_str(row.get('State'), 100)
+    district = safe_str(row.get('District'), 100)
+    latitude, longitude = safe_decimal(row.get('Latitude')), safe_decimal(row.get('Longitude'))
+    school = {
+        # Core identifiers
+        'school_code': school_code,
+        'school_name': school_name,
+
+        # Location
+        'state': state,
+        'state_code': safe_str(row.get('State Code'), 10),
+        'district': district,
+        'district_code': safe_str(row.get('District Code'), 10),
+        'sub_district': safe_str(row.get('Sub-District'), 100),
+        'sub_district_code': safe_str(row.get('Sub-District Code'), 10),
+        'cluster': safe_str(row.get('Cluster'), 100),
+        'village': safe_str(row.get('Village'), 100),
+        'udise_village_code': safe_str(row.get('UDISE Village Code'), 20),
+        'pincode': safe_str(row.get('Pincode'), 10),
+        'ward': safe_str(row.get('Ward'), 50),
+
+        # Classification
+        'school_category': CATEGORY_MAP.get(safe_str(row.get('School Category')).lower(), ''),
+        'school_type': TYPE_MAP.get(safe_str(row.get('School Type')).lower(), ''),
+        'management': MANAGEMENT_MAP.get(safe_str(row.get('Management')).lower(), ''),
+
+        # Basic details
+        'year_of_establishment': safe_int(row.get('Year of Establishment')),
+        'longitude': longitude,
+        'latitude': latitude,
+        'geohash': encode_geohash(latitude, longitude),
+        'status': 'functional',
+        'location_type': 'rural' if 'rural' in safe_str(row.get('Location Type')).lower() else 'urban',
+
+        # Grade range
+        'class_from': safe_int(row.get('Class From')),
+        'class_to': safe_int(row.get('Class To')),
+
+        # Affiliation
+        'affiliation_board_secondary': safe_str(row.get('Affiliation Board for Secondary Education'), 100),
+        'affiliation_board_higher_secondary': safe_str(
+            row.get('Affiliation Board for Higher Secondary Education'), 100
+        ),
+
+        # Infrastructure
+        'pre_primary_rooms': safe_int(row.get('Pre Primary Rooms'), 0),
+        'class_rooms': safe_int(row.get('Class Rooms'), 0),
+        'other_rooms': safe_int(row.get('Other Rooms'), 0),
+        'teachers': safe_int(row.get('Teachers'), 0),
+
+        'search_vector': build_search_vector(school_name, district, state, school_code),
+    }
+    for column, field in STUDENT_COLUMNS.items():
+        school[field] = safe_int(row.get(column), 0)
+    return school
+
+
+def parse_chunk(header, rows, first_row):
+    """Parse raw CSV rows; returns (field dicts, [(row number, error)])"""
+    schools, errors = [], []
+    for row_number, values in enumerate(rows, first_row):
+        try:
+            schools.append(parse_row(dict(zip(header, values))))
+        except Exception as e:
+            errors.append((row_number, str(e)))
+    return schools, errors
+
+
+class ImportCheckpoint:
+    """Durable JSON progress file; ``rows_done`` is the ``--start-from`` to resume with"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, state):
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        # Make the rename itself durable
+        directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _copy_value(value):
+    """One field in PostgreSQL COPY csv format (unquoted empty is NULL)"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (int, Decimal)):
+        return str(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class SchoolImporter:
+    """Streams a schools CSV into ``School`` in parsed, checkpointed batches"""
+
+    def __init__(self, csv_path, batch_size=5000, workers=None, update_existing=False,
+                 skip_errors=False, start_from=0, checkpoint_path=None, use_copy=True, progress=None):
+        self.csv_path = csv_path
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.update_existing = update_existing
+        self.skip_errors = skip_errors
+        self.start_from = start_from
+        self.checkpoint = ImportCheckpoint(checkpoint_path) if checkpoint_path else None
+        self.use_copy = use_copy
+        self.progress = progress
+        self.stats = {
+            'rows_done': start_from,
+            'written': 0,
+            'skipped': 0,
+            'errors': 0,
+            'error_messages': [],
+            'rows_per_second': 0.0,
+        }
+
+    # -- reading --
+
+    def _parsed_batches(self):
+        """Yield (rows read, field dicts, errors) per batch, in file order"""
+        with open(self.csv_path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            header = [column.strip() for column in header]
+            deque(islice(reader, self.start_from), maxlen=0)
+
+            first_row = self.start_from + 1
+            chunks = iter(lambda: list(islice(reader, self.batch_size)), [])
+            if self.workers <= 1:
+                for chunk in chunks:
+                    yield (len(chunk),) + parse_chunk(header, chunk, first_row)
+                    first_row += len(chunk)
+                return
+
+            with ProcessPoolExecutor(self.workers) as pool:
+                pending = deque()
+                try:
+                    for chunk in chunks:
+                        pending.append((len(chunk), pool.submit(parse_chunk, header, chunk, first_row)))
+                        first_row += len(chunk)
+                        if len(pending) >= self.workers * 2:
+                            size, future = pending.popleft()
+                            yield (size,) + future.result()
+                    while pending:
+                        size, future = pending.popleft()
+                        yield (size,) + future.result()
+                finally:
+                    pool.shutdown(cancel_futures=True)
+
+    # -- writing --
+
+    def _existing_codes(self):
+        from .models import School
+        return set(School.objects.order_by().values_list('school_code', flat=True).iterator(chunk_size=20000))
+
+    @staticmethod
+    def _update_fields(schools):
+        return [field for field in schools[0] if field != 'school_code'] + ['updated_at']
+
+    def _bulk_create(self, schools):
+        from .models import School
+
+        objs = [School(**fields) for fields in schools]
+        if self.update_existing:
+            School.objects.bulk_create(
+                objs, update_conflicts=True, unique_fields=['school_code'], update_fields=self._update_fields(schools)
+            )
+        else:
+            School.objects.bulk_create(objs, ignore_conflicts=True)
+        return len(objs)
+
+    def _copy(self, schools):
+        from django.db import connection
+        from django.utils import timezone
+        from .models import School
+
+        quote = connection.ops.quote_name
+        now = timezone.now()
+        fields = list(schools[0]) + ['created_at', 'updated_at']
+        columns = ', '.join(quote(School._meta.get_field(field).column) for field in fields)
+        table = quote(School._meta.db_table)
+
+        buffer = io.StringIO()
+        for school in schools:
+            buffer.write(','.join(_copy_value(school[field]) for field in fields[:-2]))
+            buffer.write(f',{now.isoformat()},{now.isoformat()}\n')
+        buffer.seek(0)
+
+        if self.update_existing:
+            conflict = 'DO UPDATE SET ' + ', '.join(
+                f'{quote(School._meta.get_field(field).column)} = EXCLUDED.{quote(School._meta.get_field(field).column)}'
+                for field in self._update_fields(schools)
+            )
+        else:
+            conflict = 'DO NOTHING'
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE IF NOT EXISTS school_import_batch AS SELECT {columns} FROM {table} WITH NO DATA'
+            )
+            cursor.execute('TRUNCATE school_import_batch')
+            copy_sql = f'COPY school_import_batch ({columns}) FROM STDIN WITH (FORMAT csv)'
+            raw_cursor = cursor.cursor
+            if hasattr(raw_cursor, 'copy_expert'):  # psycopg2
+                raw_cursor.copy_expert(copy_sql, buffer)
+            else:  # psycopg 3
+                with raw_cursor.copy(copy_sql) as copy:
+                    copy.write(buffer.getvalue())
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) SELECT {columns} FROM school_import_batch '
+                f'ON CONFLICT ({quote("school_code")}) {conflict}'
+            )
+            return cursor.rowcount
+
+    def _insert(self, schools):
+        """One executemany INSERT ... ON CONFLICT (bulk_create compiles every value through the ORM)"""
+        from django.db import connection
+        from django.utils import timezone
+        from .models import School
+
+        quote = connection.ops.quote_name
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        fields = list(schools[0])
+        model_fields = [School._meta.get_field(field) for field in fields]
+        columns = ', '.join(quote(field.column) for field in model_fields) + \
+            f', {quote("created_at")}, {quote("updated_at")}'
+        placeholders = ', '.join(['%s'] * (len(fields) + 2))
+
+        # Decimals go straight to the driver's adapter (the backends register one)
+        rows = [[school[field] for field in fields] + [now, now] for school in schools]
+
+        if self.update_existing:
+            conflict = 'DO UPDATE SET ' + ', '.join(
+                f'{quote(School._meta.get_field(field).column)} = excluded.{quote(School._meta.get_field(field).column)}'
+                for field in self._update_fields(schools)
+            )
+        else:
+            conflict = 'DO NOTHING'
+
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {quote(School._meta.db_table)} ({columns}) VALUES ({placeholders}) '
+                f'ON CONFLICT ({quote("school_code")}) {conflict}',
+                rows
+            )
+            return cursor.rowcount
+
+    def _write(self, schools):
+        from django.db import connection, transaction
+
+        with transaction.atomic():
+            if self.use_copy and connection.vendor == 'postgresql':
+                return self._copy(schools)
+            if connection.features.supports_update_conflicts_with_target:
+                return self._insert(schools)
+            return self._bulk_create(schools)
+
+    # -- driver --
+
+    def run(self):
+        """Import the file; returns the stats dict (also kept on ``self.stats``)"""
+        from .school_facets import rebuild_school_facets
+        from .school_geo import nearby_index
+        from .school_rollups import rebuild_enrollment_rollups
+        from .school_search import school_index
+
+        started = time.time()
+        stats = self.stats
+        existing = None if self.update_existing else self._existing_codes()
+
+        try:
+            for rows, schools, errors in self._parsed_batches():
+                if errors:
+                    if not self.skip_errors:
+                        row_number, message = errors[0]
+                        raise SchoolImportError(f'Row {row_number}: {message}')
+                    stats['errors'] += len(errors)
+                    stats['error_messages'].extend(f'Row {n}: {message}' for n, message in errors[:10])
+                    del stats['error_messages'][10:]
+
+                # Later rows win within the file (ON CONFLICT can't touch a row twice)
+                batch = {}
+                for school in schools:
+                    code = school['school_code']
+                    if existing is not None:
+                        if code in existing:
+                            stats['skipped'] += 1
+                            continue
+                        existing.add(code)
+                    batch[code] = school
+                if batch:
+                    stats['written'] += self._write(list(batch.values()))
+
+                stats['rows_done'] += rows
+                elapsed = time.time() - started
+                stats['rows_per_second'] = round((stats['rows_done'] - self.start_from) / elapsed, 1) if elapsed else 0.0
+                if self.checkpoint:
+                    self.checkpoint.save({'csv_file': os.path.abspath(self.csv_path), **stats})
+                if self.progress:
+                    self.progress(stats)
+        finally:
+            # Also covers partial imports: bulk writes skip the signals both rely on
+            school_index.invalidate()
+            nearby_index.invalidate()
+            stats['facets'] = rebuild_school_facets()
+            stats['rollups'] = rebuild_enrollment_rollups()
+
+        stats['seconds'] = round(time.time() - started, 2)
+        if self.checkpoint:
+            self.checkpoint.clear()
+        logger.info(
+            f"🏫 Imported {stats['written']} schools from {self.csv_path} "
+            f"({stats['rows_per_second']} rows/sec, {stats['skipped']} skipped, {stats['errors']} errors)"
+        )
+        return stats
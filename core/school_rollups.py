@@ -0,0 +1,299 @@
+"""
+Enrollment rollups for school analytics
+
+A state- or district-level enrollment report used to mean aggregating every
+``School`` row on the fly. ``SchoolEnrollmentRollup`` materializes one row
+per (state, district, management, category) of functional schools with:
+
+- sums of the per-class enrollment columns, ``total_students``, teachers
+  and rooms;
+- fixed-bin histograms of school size and of the pupil-teacher ratio.
+
+Every figure is additive, so coarser reports (a state, one management type
+across the country) are merged from these rows without touching ``School``
+and the distributions stay exact to the bin.
+
+``rebuild_enrollment_rollups`` streams the functional schools through a
+chunked cursor and aggregates each chunk column-wise: with NumPy
+(``bincount`` over group codes) when it's installed, in plain Python
+otherwise. The importer calls it after loading; single saves and deletes
+re-aggregate just the districts they touched once the transaction commits.
+"""
+
+import logging
+import time
+from bisect import bisect_right
+
+from django.db import connection, transaction
+
+try:
+    import numpy as np
+except ImportError:  # Optional: the pure-Python aggregation gives the same results
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+ROLLUP_KEY = ('state', 'district', 'management', 'school_category')
+CLASS_FIELDS = (
+    ('pre_primary_students',)
+    + tuple(f'students_class_{grade}' for grade in range(1, 13))
+    + ('non_primary_students',)
+)
+ROOM_FIELDS = ('pre_primary_rooms', 'class_rooms', 'other_rooms')
+VALUE_FIELDS = CLASS_FIELDS + ('total_students', 'teachers') + ROOM_FIELDS
+STUDENTS = VALUE_FIELDS.index('total_students')
+TEACHERS = VALUE_FIELDS.index('teachers')
+
+# Lower bin edges; the last bin is open-ended
+SIZE_BINS = (0, 1, 50, 100, 250, 500, 1000, 2000)
+RATIO_BINS = (0, 10, 20, 30, 40, 50, 60)
+CHUNK_SIZE = 50000
+
+
+def _empty():
+    return {
+        'school_count': 0,
+        'sums': [0] * len(VALUE_FIELDS),
+        'size_histogram': [0] * len(SIZE_BINS),
+        'ratio_histogram': [0] * len(RATIO_BINS),
+        'schools_without_teachers': 0,
+    }
+
+
+def _aggregate_python(chunks):
+    width = len(ROLLUP_KEY)
+    rollups = {}
+    for rows in chunks:
+        for row in rows:
+            key = row[:width]
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollup = rollups[key] = _empty()
+            values = row[width:]
+            rollup['school_count'] += 1
+            sums = rollup['sums']
+            for index, value in enumerate(values):
+                sums[index] += value
+            students, teachers = values[STUDENTS], values[TEACHERS]
+            rollup['size_histogram'][bisect_right(SIZE_BINS, students) - 1] += 1
+            if teachers:
+                rollup['ratio_histogram'][bisect_right(RATIO_BINS, students / teachers) - 1] += 1
+            else:
+                rollup['schools_without_teachers'] += 1
+    return rollups
+
+
+def _aggregate_numpy(chunks):
+    width = len(ROLLUP_KEY)
+    size_edges, ratio_edges = np.array(SIZE_BINS), np.array(RATIO_BINS)
+    groups = {}
+    # Per-group accumulators, grown as chunks bring new groups
+    schools = np.zeros(0, dtype=np.int64)
+    sums = np.zeros((0, len(VALUE_FIELDS)), dtype=np.int64)
+    sizes = np.zeros((0, len(SIZE_BINS)), dtype=np.int64)
+    ratios = np.zeros((0, len(RATIO_BINS)), dtype=np.int64)
+    unstaffed = np.zeros(0, dtype=np.int64)
+
+    def grow(array, count):
+        return np.concatenate([array, np.zeros((count - len(array),) + array.shape[1:], dtype=array.dtype)])
+
+    def histogram(codes, values, edges, count):
+        cells = codes * len(edges) + np.searchsorted(edges, values, side='right') - 1
+        return np.bincount(cells, minlength=count * len(edges)).reshape(count, len(edges))
+
+    for rows in chunks:
+        if not rows:
+            continue
+        columns = list(zip(*rows))
+        codes = np.fromiter(
+            (groups.setdefault(key, len(groups)) for key in zip(*columns[:width])), dtype=np.intp, count=len(rows)
+        )
+        values = np.array(columns[width:], dtype=np.int64)  # one row per field
+        count = len(groups)
+        schools, sums, sizes, ratios, unstaffed = (
+            grow(array, count) for array in (schools, sums, sizes, ratios, unstaffed)
+        )
+
+        schools += np.bincount(codes, minlength=count)
+        # float64 weights are exact for any realistic per-chunk sum (< 2**53)
+        sums += np.column_stack([
+            np.bincount(codes, weights=column, minlength=count) for column in values
+        ]).astype(np.int64)
+        students, teachers = values[STUDENTS], values[TEACHERS]
+        staffed = teachers > 0
+        sizes += histogram(codes, students, size_edges, count)
+        ratios += histogram(codes[staffed], students[staffed] / teachers[staffed], ratio_edges, count)
+        unstaffed += np.bincount(codes[~staffed], minlength=count)
+
+    schools, sums, sizes, ratios, unstaffed = (
+        array.tolist() for array in (schools, sums, sizes, ratios, unstaffed)
+    )
+    return {
+        key: {
+            'school_count': schools[index],
+            'sums': sums[index],
+            'size_histogram': sizes[index],
+            'ratio_histogram': ratios[index],
+            'schools_without_teachers': unstaffed[index],
+        }
+        for key, index in groups.items()
+    }
+
+
+def aggregate_rows(chunks):
+    """
+    Rollups keyed by ROLLUP_KEY over chunks (lists) of rows holding
+    ``ROLLUP_KEY + VALUE_FIELDS`` values
+    """
+    return _aggregate_numpy(chunks) if np is not None else _aggregate_python(chunks)
+
+
+def merge_rollup(target, rollup):
+    target['school_count'] += rollup['school_count']
+    target['schools_without_teachers'] += rollup['schools_without_teachers']
+    for name in ('sums', 'size_histogram', 'ratio_histogram'):
+        target[name] = [a + b for a, b in zip(target[name], rollup[name])]
+    return target
+
+
+def _rollup_objects(rollups):
+    from .models import SchoolEnrollmentRollup
+
+    return [
+        SchoolEnrollmentRollup(
+            school_count=rollup['school_count'],
+            student_total=rollup['sums'][STUDENTS],
+            teacher_total=rollup['sums'][TEACHERS],
+            totals=dict(zip(VALUE_FIELDS, rollup['sums'])),
+            size_histogram=rollup['size_histogram'],
+            ratio_histogram=rollup['ratio_histogram'],
+            schools_without_teachers=rollup['schools_without_teachers'],
+            **dict(zip(ROLLUP_KEY, key))
+        )
+        for key, rollup in rollups.items()
+    ]
+
+
+def rebuild_enrollment_rollups():
+    """Recompute every rollup row from ``School`` in streamed, vectorized chunks; returns the row count"""
+    from .models import School, SchoolEnrollmentRollup
+
+    started = time.time()
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field) for field in ROLLUP_KEY + VALUE_FIELDS)
+    with transaction.atomic():
+        # A server-side cursor on PostgreSQL, so a million rows never sit in memory at once
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(
+                f'SELECT {columns} FROM {quote(School._meta.db_table)} WHERE status = %s', ['functional']
+            )
+            rollups = aggregate_rows(iter(lambda: cursor.fetchmany(CHUNK_SIZE), []))
+        SchoolEnrollmentRollup.objects.all().delete()
+        SchoolEnrollmentRollup.objects.bulk_create(_rollup_objects(rollups), batch_size=1000)
+    logger.info(
+        f"📈 Rebuilt {len(rollups)} enrollment rollups in {time.time() - started:.1f}s "
+        f"({'numpy' if np is not None else 'python'})"
+    )
+    return len(rollups)
+
+
+def refresh_enrollment_rollups(districts):
+    """Re-aggregate the rollups of the given (state, district) pairs from ``School``"""
+    from .models import School, SchoolEnrollmentRollup
+
+    # An empty table hasn't been built yet; the first report rebuilds it
+    if not SchoolEnrollmentRollup.objects.exists():
+        return
+    for state, district in districts:
+        rows = list(School.objects.filter(status='functional', state=state, district=district).order_by().values_list(
+            *ROLLUP_KEY, *VALUE_FIELDS
+        ))
+        with transaction.atomic():
+            SchoolEnrollmentRollup.objects.filter(state=state, district=district).delete()
+            SchoolEnrollmentRollup.objects.bulk_create(_rollup_objects(aggregate_rows([rows])))
+
+
+def ensure_enrollment_rollups():
+    """Build the rollups on first use if schools exist but nothing was materialized yet"""
+    from .models import School, SchoolEnrollmentRollup
+
+    if not SchoolEnrollmentRollup.objects.exists() and School.objects.filter(status='functional').exists():
+        rebuild_enrollment_rollups()
+
+
+def _distribution(histogram, edges):
+    # ``to`` is exclusive; the last bin has none
+    return [
+        {'from': low, 'to': high, 'schools': schools}
+        for low, high, schools in zip(edges, edges[1:] + (None,), histogram)
+    ]
+
+
+def summarize(rollup):
+    """JSON-ready figures for one (possibly merged) rollup"""
+    sums = dict(zip(VALUE_FIELDS, rollup['sums']))
+    students, teachers = sums['total_students'], sums['teachers']
+    return {
+        'school_count': rollup['school_count'],
+        'student_total': students,
+        'teacher_total': teachers,
+        'pupil_teacher_ratio': round(students / teachers, 1) if teachers else None,
+        'class_totals': {field: sums[field] for field in CLASS_FIELDS},
+        'rooms': {field: sums[field] for field in ROOM_FIELDS},
+        'size_distribution': _distribution(rollup['size_histogram'], SIZE_BINS),
+        'ratio_distribution': _distribution(rollup['ratio_histogram'], RATIO_BINS),
+        'schools_without_teachers': rollup['schools_without_teachers'],
+    }
+
+
+def merge_rollups(queryset, group_by=None):
+    """
+    Merge SchoolEnrollmentRollup rows, per ``group_by`` value or into one total
+    Returns ``{group value: rollup}`` (key None without ``group_by``)
+    """
+    fields = ('school_count', 'totals', 'size_histogram', 'ratio_histogram', 'schools_without_teachers')
+    merged = {}
+    for row in queryset.order_by().values(*fields, *((group_by,) if group_by else ())):
+        group = row[group_by] if group_by else None
+        row['sums'] = [row['totals'].get(field, 0) for field in VALUE_FIELDS]
+        merge_rollup(merged.setdefault(group, _empty()), row)
+    return merged
+
+
+def enrollment_report(group_by=None, **filters):
+    """(overall rollup, {group value: rollup}) over the rollup rows matching ``filters``"""
+    from .models import SchoolEnrollmentRollup
+
+    ensure_enrollment_rollups()
+    groups = merge_rollups(SchoolEnrollmentRollup.objects.filter(**filters), group_by)
+    total = _empty()
+    for rollup in groups.values():
+        merge_rollup(total, rollup)
+    return total, groups
+
+
+def _remember_district(sender, instance, raw=False, **kwargs):
+    # The facet snapshot (taken before this handler) holds the stored location of functional schools
+    snapshot = getattr(instance, '_facet_snapshot', None)
+    instance._rollup_district = tuple(snapshot[0][:2]) if snapshot else None
+
+
+def _refresh_on_write(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    districts = {(instance.state, instance.district)}
+    previous = getattr(instance, '_rollup_district', None)
+    if previous:
+        districts.add(previous)
+    transaction.on_commit(lambda: refresh_enrollment_rollups(districts))
+
+
+def connect_signals():
+    """Re-aggregate touched districts after School writes (called from AppConfig.ready, after the facet handlers)"""
+    from django.db.models.signals import post_delete, post_save, pre_save
+    from .models import School
+
+    pre_save.connect(_remember_district, sender=School, dispatch_uid='school_rollups_pre_save')
+    post_save.connect(_refresh_on_write, sender=School, dispatch_uid='school_rollups_save')
+    post_delete.connect(_refresh_on_write, sender=School, dispatch_uid='school_rollups_delete')
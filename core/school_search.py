@@ -0,0 +1,342 @@
+"""
+Autocomplete search over the School master table
+
+``School.search_schools`` used to OR three ``icontains`` filters. A leading
+wildcard LIKE can't use the B-tree indexes on ``School``, so every keystroke
+on the referral/demo forms scanned the whole table.
+
+On PostgreSQL the query runs against a ``gin_trgm_ops`` index on
+``search_vector`` (migration 0011): substring matches and trigram
+word-similarity matches (which absorb typos) are both answered from the
+index and ranked by word similarity.
+
+Other databases (SQLite in development and tests) use ``SchoolSearchIndex``,
+an in-process index over (code, name, district, state) of functional
+schools, built on first use:
+
+- every word is a term with a posting list of documents; documents are
+  numbered in ``school_name`` order, so posting lists come out name-sorted;
+- the sorted vocabulary answers prefix lookups with ``bisect``;
+- a trigram -> terms map finds misspelt words (Jaccard similarity of their
+  trigrams) when exact and prefix matches can't fill the result list;
+- state and district have their own posting lists for facet filters.
+
+A query word matches a document through its best term (exact 1.0, prefix
+0.8, fuzzy up to 0.6) and every word has to match. Candidates come from the
+most selective word or facet, at most ``SCAN_LIMIT`` of them are scored.
+``School`` saves and deletes update the index in place; bulk writes that
+skip signals call ``invalidate()`` and the next search rebuilds it.
+"""
+
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+from itertools import chain
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+SCAN_LIMIT = 10000
+MAX_PREFIX_TERMS = 2000
+FUZZY_MIN_LENGTH = 4
+FUZZY_THRESHOLD = 0.4
+
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.6
+
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def trigrams(term):
+    padded = f'${term}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _unique(sorted_docs):
+    previous = None
+    for doc in sorted_docs:
+        if doc != previous:
+            yield doc
+            previous = doc
+
+
+class SchoolSearchIndex:
+    """In-process term/prefix/trigram index used when the database isn't PostgreSQL"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self.builds = 0
+        self.build_seconds = 0.0
+
+    # -- building --
+
+    def _reset(self):
+        self._terms = {}           # term -> term id
+        self._term_names = []      # term id -> term
+        self._postings = []        # term id -> array of doc numbers
+        self._vocabulary = []      # sorted terms, for prefix lookups
+        self._grams = {}           # trigram -> array of term ids
+        self._facets = {}          # lowercased state/district -> facet id
+        self._facet_postings = []  # facet id -> array of doc numbers
+        self._doc_pks = array('q')
+        self._doc_terms = array('I')
+        self._doc_offsets = array('I', [0])
+        self._doc_state = array('I')
+        self._doc_district = array('I')
+        self._doc_by_pk = {}
+        self._removed = set()
+
+    def build(self, rows=None):
+        """(Re)build from ``(pk, code, name, district, state)`` rows, by default every functional school"""
+        with self._lock:
+            started = time.time()
+            if rows is None:
+                from .models import School
+
+                rows = School.objects.filter(status='functional').order_by('school_name', 'pk').values_list(
+                    'pk', 'school_code', 'school_name', 'district', 'state'
+                ).iterator(chunk_size=10000)
+            self._reset()
+            for row in rows:
+                self._add_doc(*row, keep_vocabulary_sorted=False)
+            self._vocabulary = sorted(self._terms)
+            self._built = True
+            self.builds += 1
+            self.build_seconds = time.time() - started
+            logger.info(f"🏫 School search index built: {len(self._doc_pks)} schools in {self.build_seconds:.1f}s")
+
+    def _term_id(self, term, keep_vocabulary_sorted):
+        term_id = self._terms.get(term)
+        if term_id is None:
+            term_id = self._terms[term] = len(self._term_names)
+            self._term_names.append(term)
+            self._postings.append(array('I'))
+            for gram in trigrams(term):
+                self._grams.setdefault(gram, array('I')).append(term_id)
+            if keep_vocabulary_sorted:
+                bisect.insort(self._vocabulary, term)
+        return term_id
+
+    def _facet_id(self, value):
+        key = (value or '').strip().lower()
+        facet_id = self._facets.get(key)
+        if facet_id is None:
+            facet_id = self._facets[key] = len(self._facet_postings)
+            self._facet_postings.append(array('I'))
+        return facet_id
+
+    def _add_doc(self, pk, code, name, district, state, keep_vocabulary_sorted=True):
+        doc = len(self._doc_pks)
+        words = set(tokenize(code)) | set(tokenize(name)) | set(tokenize(district)) | set(tokenize(state))
+        term_ids = sorted(self._term_id(word, keep_vocabulary_sorted) for word in words)
+        for term_id in term_ids:
+            self._postings[term_id].append(doc)
+        self._doc_terms.extend(term_ids)
+        self._doc_offsets.append(len(self._doc_terms))
+
+        state_id, district_id = self._facet_id(state), self._facet_id(district)
+        self._facet_postings[state_id].append(doc)
+        if district_id != state_id:
+            self._facet_postings[district_id].append(doc)
+        self._doc_state.append(state_id)
+        self._doc_district.append(district_id)
+        self._doc_pks.append(pk)
+        self._doc_by_pk[pk] = doc
+
+    # -- incremental maintenance --
+
+    def update(self, school):
+        """Re-index one saved school (no-op until the index is built)"""
+        with self._lock:
+            if not self._built:
+                return
+            self._remove_pk(school.pk)
+            if school.status == 'functional':
+                self._add_doc(school.pk, school.school_code, school.school_name, school.district, school.state)
+
+    def remove(self, pk):
+        with self._lock:
+            if self._built:
+                self._remove_pk(pk)
+
+    def _remove_pk(self, pk):
+        doc = self._doc_by_pk.pop(pk, None)
+        if doc is not None:
+            self._removed.add(doc)
+
+    def invalidate(self):
+        """Drop the index; the next search rebuilds it"""
+        with self._lock:
+            self._built = False
+            self._reset()
+
+    # -- querying --
+
+    def _word_weights(self, word, min_docs):
+        """term id -> weight for the terms one query word matches"""
+        weights = {}
+        term_id = self._terms.get(word)
+        if term_id is not None:
+            weights[term_id] = EXACT_WEIGHT
+
+        start = bisect.bisect_left(self._vocabulary, word)
+        for term in self._vocabulary[start:start + MAX_PREFIX_TERMS]:
+            if not term.startswith(word):
+                break
+            weights.setdefault(self._terms[term], PREFIX_WEIGHT)
+
+        # Misspellings (not codes): only when exact/prefix terms can't fill the results
+        if len(word) >= FUZZY_MIN_LENGTH and not word.isdigit() and sum(len(self._postings[t]) for t in weights) < min_docs:
+            word_grams = trigrams(word)
+            shared = Counter(chain.from_iterable(self._grams.get(gram, ()) for gram in word_grams))
+            for term_id, count in shared.items():
+                similarity = count / (len(word_grams) + len(trigrams(self._term_names[term_id])) - count)
+                if similarity >= FUZZY_THRESHOLD and term_id not in weights:
+                    weights[term_id] = FUZZY_WEIGHT * similarity
+        return weights
+
+    def _candidates(self, word_weights, facet_ids):
+        """Doc numbers (ascending, deduplicated) from the most selective word or facet"""
+        sources = [[self._postings[term_id] for term_id in weights] for weights in word_weights]
+        sources += [[self._facet_postings[facet_id]] for facet_id in facet_ids]
+        if not sources:
+            return range(len(self._doc_pks))
+
+        lists = min(sources, key=lambda postings: sum(len(p) for p in postings))
+        if len(lists) == 1:
+            return lists[0]
+        return _unique(heapq.merge(*lists))
+
+    def search_ids(self, query, state=None, district=None, limit=50):
+        """Primary keys of the best matching functional schools, best first"""
+        with self._lock:
+            if not self._built:
+                self.build()
+
+            facet_ids, facet_checks = [], []
+            for value, doc_facets in ((state, self._doc_state), (district, self._doc_district)):
+                if value:
+                    facet_id = self._facets.get(value.strip().lower())
+                    if facet_id is None:
+                        return []
+                    facet_ids.append(facet_id)
+                    facet_checks.append((doc_facets, facet_id))
+
+            word_weights = [self._word_weights(word, limit) for word in tokenize(query)]
+            if any(not weights for weights in word_weights):
+                return []
+
+            best = sum(max(weights.values()) for weights in word_weights)
+            scored, perfect, scanned = [], 0, 0
+            for doc in self._candidates(word_weights, facet_ids):
+                scanned += 1
+                if scanned > SCAN_LIMIT:
+                    break
+                if doc in self._removed or any(doc_facets[doc] != facet_id for doc_facets, facet_id in facet_checks):
+                    continue
+
+                doc_terms = self._doc_terms[self._doc_offsets[doc]:self._doc_offsets[doc + 1]]
+                score = 0.0
+                for weights in word_weights:
+                    matched = weights.keys() & doc_terms
+                    if not matched:
+                        break
+                    score += max(map(weights.__getitem__, matched))
+                else:
+                    scored.append((-score, doc))
+                    # Docs come in name order, so nothing later can outrank a best-possible score
+                    if score >= best:
+                        perfect += 1
+                        if perfect >= limit:
+                            break
+
+            return [self._doc_pks[doc] for _score, doc in heapq.nsmallest(limit, scored)]
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'built': self._built,
+                'schools': len(self._doc_by_pk) if self._built else 0,
+                'terms': len(self._term_names) if self._built else 0,
+                'builds': self.builds,
+                'build_seconds': round(self.build_seconds, 2),
+            }
+
+
+school_index = SchoolSearchIndex()
+
+
+def _search_postgres(query, state, district, limit, fields):
+    from django.contrib.postgres.lookups import TrigramWordSimilar
+    from django.contrib.postgres.search import TrigramWordSimilarity
+    from django.db.models import Q
+    from .models import School
+
+    queryset = School.objects.filter(status='functional')
+    if state:
+        queryset = queryset.filter(state__iexact=state)
+    if district:
+        queryset = queryset.filter(district__iexact=district)
+    if fields:
+        queryset = queryset.only(*fields)
+
+    text = ' '.join(tokenize(query))
+    if not text:
+        return list(queryset.order_by('school_name')[:limit])
+
+    search_field = School._meta.get_field('search_vector')
+    if 'trigram_word_similar' not in search_field.get_lookups():
+        search_field.register_lookup(TrigramWordSimilar)
+    # Both conditions are answered by the gin_trgm_ops index
+    return list(
+        queryset.filter(
+            Q(search_vector__contains=text) | Q(search_vector__trigram_word_similar=text)
+        ).annotate(
+            rank=TrigramWordSimilarity(text, 'search_vector')
+        ).order_by('-rank', 'school_name')[:limit]
+    )
+
+
+def search_schools(query, state=None, district=None, limit=50, fields=None):
+    """Best matching functional schools for an autocomplete query, best first"""
+    if connection.vendor == 'postgresql':
+        return _search_postgres(query, state, district, limit, fields)
+
+    from .models import School
+
+    pks = school_index.search_ids(query, state=state, district=district, limit=limit)
+    queryset = School.objects.filter(status='functional')
+    if fields:
+        queryset = queryset.only(*fields)
+    schools = queryset.in_bulk(pks)
+    return [schools[pk] for pk in pks if pk in schools]
+
+
+def _update_on_save(sender, instance, **kwargs):
+    school_index.update(instance)
+
+
+def _remove_on_delete(sender, instance, **kwargs):
+    school_index.remove(instance.pk)
+
+
+def connect_signals():
+    """Keep the in-process index in step with School writes (called from AppConfig.ready)"""
+    from django.db.models.signals import post_delete, post_save
+    from .models import School
+
+    post_save.connect(_update_on_save, sender=School, dispatch_uid='school_search_save')
+    post_delete.connect(_remove_on_delete, sender=School, dispatch_uid='school_search_delete')
@@ -0,0 +1,689 @@
+"""
+Tests for the core app
+"""
+import asyncio
+import csv
+import io
+import os
+import tempfile
+from unittest import mock, skipUnless
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.paginator import Paginator
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .gallery import gallery_cache
+from .health import health_monitor
+from .import_jobs import import_job_runner
+from .paginators import LargeTablePaginator, cached_counts, page_boundaries
+from .photo_variants import photo_variant_runner
+from .models import (
+    PhotoCategory, PhotoGallery, School, SchoolEnrollmentRollup, SchoolImportJob, SchoolLocationFacet,
+    VideoTestimonial,
+)
+from .school_facets import facet_tree, rebuild_school_facets
+from .school_geo import covering_cells, encode_geohash, haversine_km, nearby_index
+from .school_import import ImportCheckpoint, SchoolImporter, SchoolImportError
+from .school_rollups import (
+    VALUE_FIELDS, _aggregate_numpy, _aggregate_python, enrollment_report, np, rebuild_enrollment_rollups,
+)
+from .school_search import school_index
+
+
+def make_school(code, name, district, state, **extra):
+    return School.objects.create(
+        school_code=code,
+        school_name=name,
+        state=state,
+        state_code=state[:2].upper(),
+        district=district,
+        district_code=district[:3].upper(),
+        pincode='110001',
+        **extra
+    )
+
+
+class SchoolSearchTest(TestCase):
+    """Test the in-process school autocomplete index"""
+
+    def setUp(self):
+        school_index.invalidate()
+        self.addCleanup(school_index.invalidate)
+        self.kv_delhi = make_school('07050100101', 'Kendriya Vidyalaya No. 1', 'New Delhi', 'Delhi')
+        self.kv_pune = make_school('27250100202', 'Kendriya Vidyalaya Pune Cantt', 'Pune', 'Maharashtra')
+        self.dps = make_school('07050100303', 'Delhi Public School', 'South Delhi', 'Delhi')
+        make_school('07050100404', 'Kendriya Vidyalaya Closed', 'New Delhi', 'Delhi', status='closed')
+
+    def names(self, query, **kwargs):
+        return [school.school_name for school in School.search_schools(query, **kwargs)]
+
+    def test_prefix_typo_and_code_queries(self):
+        self.assertEqual(
+            self.names('kendriya vid'), ['Kendriya Vidyalaya No. 1', 'Kendriya Vidyalaya Pune Cantt']
+        )
+        self.assertEqual(self.names('kendriya vidyalya pune'), ['Kendriya Vidyalaya Pune Cantt'])
+        self.assertEqual(self.names('07050100303'), ['Delhi Public School'])
+        self.assertEqual(self.names('delhi'), ['Delhi Public School', 'Kendriya Vidyalaya No. 1'])
+        self.assertEqual(self.names('xyzzy'), [])
+
+    def test_facets_and_incremental_updates(self):
+        self.assertEqual(self.names('kendriya', state='maharashtra'), ['Kendriya Vidyalaya Pune Cantt'])
+        self.assertEqual(self.names('', district='South Delhi'), ['Delhi Public School'])
+        self.assertEqual(self.names('kendriya', state='Goa'), [])
+
+        # Saves and deletes update the built index without a rebuild
+        builds = school_index.builds
+        self.kv_pune.school_name = 'PM Shri Kendriya Vidyalaya Pune'
+        self.kv_pune.save()
+        self.kv_delhi.delete()
+        self.assertEqual(self.names('shri'), ['PM Shri Kendriya Vidyalaya Pune'])
+        self.assertEqual(self.names('kendriya'), ['PM Shri Kendriya Vidyalaya Pune'])
+        self.assertEqual(school_index.builds, builds)
+
+    def test_autocomplete_endpoint(self):
+        url = reverse('core:school_autocomplete')
+        self.client.get(url, {'q': 'kendriya'})
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'q': 'kendriya', 'state': 'Delhi', 'limit': 5})
+        data = response.json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'][0]['school_code'], '07050100101')
+        self.assertEqual(data['results'][0]['display_name'], 'Kendriya Vidyalaya No. 1 (New Delhi, Delhi)')
+
+        self.assertEqual(self.client.get(url, {'q': 'k'}).json()['count'], 0)
+
+
+class SchoolFacetTest(TestCase):
+    """Test the materialized location facet hierarchy"""
+
+    def setUp(self):
+        facet_tree.invalidate()
+        self.addCleanup(facet_tree.invalidate)
+        make_school('1', 'School A', 'Pune', 'Maharashtra', sub_district='Haveli', cluster='C1', total_students=100)
+        make_school('2', 'School B', 'Pune', 'Maharashtra', sub_district='Haveli', cluster='C2', total_students=50)
+        self.moving = make_school('3', 'School C', 'Nagpur', 'Maharashtra', sub_district='Kamptee', total_students=30)
+        make_school('4', 'School D', 'Nagpur', 'Maharashtra', status='closed', total_students=999)
+        self.assertEqual(rebuild_school_facets(), 3)
+
+    def children(self, **path):
+        return {child['name']: (child['school_count'], child['student_total'])
+                for child in self.client.get(reverse('core:school_locations'), path).json()['children']}
+
+    def test_counts_and_incremental_moves(self):
+        self.assertEqual(self.children(), {'Maharashtra': (3, 180)})
+        loads = facet_tree.loads
+        self.assertEqual(self.children(state='Maharashtra'), {'Nagpur': (1, 30), 'Pune': (2, 150)})
+        self.assertEqual(self.children(state='Maharashtra', district='Pune', sub_district='Haveli'),
+                         {'C1': (1, 100), 'C2': (1, 50)})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            school = School.objects.get(pk=self.moving.pk)
+            school.district, school.sub_district, school.cluster = 'Pune', 'Haveli', 'C1'
+            school.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            School.objects.get(school_code='2').delete()
+
+        self.assertEqual(self.children(state='Maharashtra'), {'Pune': (2, 130)})
+        self.assertEqual(self.children(state='Maharashtra', district='Pune', sub_district='Haveli'), {'C1': (2, 130)})
+        self.assertEqual(
+            list(SchoolLocationFacet.objects.values_list('district', 'cluster', 'school_count')),
+            [('Pune', 'C1', 2)]
+        )
+        self.assertEqual(facet_tree.loads, loads)
+
+    def test_etag_revalidation_skips_the_database(self):
+        url = reverse('core:school_locations')
+        etag = self.client.get(url, {'state': 'Maharashtra'})['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'state': 'Maharashtra'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_school('5', 'School E', 'Nashik', 'Maharashtra')
+        response = self.client.get(url, {'state': 'Maharashtra'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Nashik', [child['name'] for child in response.json()['children']])
+        self.assertEqual(self.client.get(url, {'state': 'Goa'}).status_code, 404)
+
+
+class SchoolImportTest(TestCase):
+    """Test the batched school CSV importer"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.csv_path = os.path.join(directory.name, 'schools.csv')
+        self.checkpoint_path = self.csv_path + '.checkpoint'
+        make_school('S0', 'Existing School', 'Pune', 'Maharashtra')
+
+    def write_csv(self, rows):
+        with open(self.csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['School Code', 'School Name', 'State', 'District', 'Cluster', 'Total Students', 'Latitude'])
+            writer.writerows(rows)
+
+    def importer(self, **options):
+        return SchoolImporter(self.csv_path, batch_size=2, workers=1, checkpoint_path=self.checkpoint_path, **options)
+
+    def test_batches_skip_existing_codes_without_per_row_queries(self):
+        self.write_csv([
+            ['S0', 'Existing School', 'Maharashtra', 'Pune', '', '10', ''],
+            ['S1', 'Govt Primary School', 'Goa', 'North Goa', 'Mapusa', '120', '15.5912'],
+            ['S2', 'Model School', 'Goa', 'North Goa', 'Mapusa', '80', ''],
+            ['S1', 'Govt Primary School (duplicate)', 'Goa', 'North Goa', 'Mapusa', '1', ''],
+            ['S3', 'Convent School', 'Goa', 'South Goa', '', '40', ''],
+        ])
+        # Preloaded codes, one INSERT per batch, the facet and rollup rebuilds; nothing per row
+        with self.assertNumQueries(19):
+            stats = self.importer().run()
+
+        self.assertEqual((stats['written'], stats['skipped'], stats['rows_done']), (3, 2, 5))
+        school = School.objects.get(school_code='S1')
+        self.assertEqual(school.search_vector, 'govt primary school north goa goa s1')
+        self.assertEqual(str(school.latitude), '15.5912000')
+        self.assertEqual(
+            SchoolLocationFacet.objects.get(district='North Goa', cluster='Mapusa').student_total, 200
+        )
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+    def test_checkpoint_resumes_after_a_bad_row(self):
+        self.write_csv([
+            ['S1', 'First School', 'Goa', 'North Goa', '', '1', ''],
+            ['S2', 'Second School', 'Goa', 'North Goa', '', '2', ''],
+            ['S3', '', 'Goa', 'North Goa', '', '3', ''],
+            ['S4', 'Fourth School', 'Goa', 'North Goa', '', '4', ''],
+        ])
+        with self.assertRaisesMessage(SchoolImportError, 'Row 3'):
+            self.importer().run()
+        self.assertEqual(ImportCheckpoint(self.checkpoint_path).load()['rows_done'], 2)
+
+        stats = self.importer(start_from=2, skip_errors=True, update_existing=True).run()
+        self.assertEqual((stats['written'], stats['errors'], stats['rows_done']), (1, 1, 4))
+        self.assertEqual(
+            sorted(School.objects.values_list('school_code', flat=True)), ['S0', 'S1', 'S2', 'S4']
+        )
+
+
+class SchoolImportJobTest(TestCase):
+    """Test background imports from the upload endpoint"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        patcher = mock.patch('core.import_jobs.SCHOOL_IMPORT_DIR', self.directory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        from django.contrib.auth.models import User
+        self.client.force_login(User.objects.create_user('importer', password='pw', is_staff=True))
+
+    def upload(self, content):
+        return self.client.post(reverse('core:upload_schools_csv'), {
+            'csv_file': SimpleUploadedFile('schools.csv', content.encode(), content_type='text/csv')
+        })
+
+    def test_upload_queues_a_job_that_reports_progress(self):
+        response = self.upload(
+            'School Code,School Name,State,District\n'
+            'U1,Upload School One,Goa,North Goa\n'
+            'U2,,Goa,North Goa\n'
+            'U3,Upload School Three,Goa,South Goa\n'
+        )
+        self.assertEqual(response.status_code, 202)
+        data = response.json()
+        job = SchoolImportJob.objects.get(pk=data['job_id'])
+        self.assertEqual(job.status, 'queued')
+        self.assertTrue(os.path.exists(job.file_path))
+        self.assertFalse(School.objects.exists())
+
+        self.assertTrue(import_job_runner.run_next())
+        self.assertFalse(import_job_runner.run_next())
+
+        job_data = self.client.get(data['status_url']).json()['job']
+        self.assertEqual(job_data['status'], 'completed')
+        self.assertEqual((job_data['rows_done'], job_data['written'], job_data['errors']), (3, 2, 1))
+        self.assertIn('Row 2', job_data['error_samples'][0])
+        self.assertEqual(School.objects.get(school_code='U3').search_vector, 'upload school three south goa goa u3')
+        self.assertFalse(os.path.exists(job.file_path))
+
+    def test_upload_and_status_require_staff(self):
+        self.client.logout()
+        response = self.upload('School Code,School Name\nU1,Upload School One\n')
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(SchoolImportJob.objects.exists())
+        self.assertEqual(os.listdir(self.directory), [])
+
+        job = SchoolImportJob.objects.create(original_filename='schools.csv', file_path='unused.csv')
+        response = self.client.get(reverse('core:school_import_status', args=[job.id]))
+        self.assertEqual(response.status_code, 302)
+
+    @mock.patch('core.import_jobs.MAX_UPLOAD_BYTES', 64)
+    def test_rejects_oversized_uploads(self):
+        response = self.upload('School Code,School Name\n' + 'U1,Upload School One\n' * 10)
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(SchoolImportJob.objects.exists())
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_rejects_files_without_school_columns(self):
+        response = self.upload('name,city\nSome School,Pune\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(SchoolImportJob.objects.exists())
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+class SchoolGeoTest(TestCase):
+    """Test nearest-school lookups over the geohash index and the state KD-trees"""
+
+    # (code, name, district, state, latitude, longitude)
+    SCHOOLS = [
+        ('G1', 'Panaji School', 'North Goa', 'Goa', '15.4909', '73.8278'),
+        ('G2', 'Mapusa School', 'North Goa', 'Goa', '15.5937', '73.8142'),
+        ('G3', 'Margao School', 'South Goa', 'Goa', '15.2832', '73.9862'),
+        ('G4', 'Vasco School', 'South Goa', 'Goa', '15.3860', '73.8440'),
+        ('K1', 'Belgaum School', 'Belagavi', 'Karnataka', '15.8497', '74.4977'),
+        ('K2', 'Karwar School', 'Uttara Kannada', 'Karnataka', '14.8136', '74.1290'),
+        ('M1', 'Sawantwadi School', 'Sindhudurg', 'Maharashtra', '15.9050', '73.8210'),
+    ]
+
+    def setUp(self):
+        nearby_index.invalidate()
+        self.addCleanup(nearby_index.invalidate)
+        facet_tree.invalidate()
+        self.addCleanup(facet_tree.invalidate)
+        for code, name, district, state, lat, lon in self.SCHOOLS:
+            make_school(code, name, district, state, latitude=lat, longitude=lon)
+        make_school('N1', 'School Without Coordinates', 'North Goa', 'Goa')
+
+    def brute_force(self, lat, lon, state=None):
+        rows = [row for row in self.SCHOOLS if state in (None, row[3])]
+        return [row[0] for row in sorted(rows, key=lambda row: haversine_km(lat, lon, float(row[4]), float(row[5])))]
+
+    def test_geohash_and_kd_tree_match_brute_force(self):
+        self.assertEqual(School.objects.get(school_code='G1').geohash, encode_geohash(15.4909, 73.8278))
+        self.assertEqual(School.objects.get(school_code='N1').geohash, '')
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+
+        for lat, lon in [(15.45, 73.85), (15.9, 74.2), (14.9, 74.0)]:
+            codes = [school.school_code for school in School.nearest(lat, lon, k=4)]
+            self.assertEqual(codes, self.brute_force(lat, lon)[:4])
+            codes = [school.school_code for school in School.nearest(lat, lon, k=3, state='goa')]
+            self.assertEqual(codes, self.brute_force(lat, lon, 'Goa')[:3])
+
+        # Radius queries: everything within 15 km of Panaji, by either path
+        near_panaji = [school.school_code for school in School.nearest(15.4909, 73.8278, k=10, radius_km=15)]
+        self.assertEqual(near_panaji, ['G1', 'G2', 'G4'])
+        self.assertEqual(
+            [school.school_code for school in School.nearest(15.4909, 73.8278, k=10, radius_km=15, state='Goa')],
+            near_panaji
+        )
+        second = School.nearest(15.4909, 73.8278, k=2)[1]
+        self.assertEqual(second.distance_km, round(haversine_km(15.4909, 73.8278, 15.5937, 73.8142), 3))
+        self.assertEqual(covering_cells(10, 10, 30000), [])
+
+    def test_state_trees_load_lazily_and_follow_writes(self):
+        builds = nearby_index.builds
+        School.nearest(15.5, 73.9, k=1, state='Goa')
+        School.nearest(15.5, 73.9, k=1, state='Goa')
+        self.assertEqual(nearby_index.builds, builds + 1)
+
+        # A Goa school moves to Karnataka: both trees are dropped and rebuilt
+        school = School.objects.get(school_code='G2')
+        school.state, school.latitude, school.longitude = 'Karnataka', '15.8500', '74.4900'
+        school.save()
+        self.assertEqual(school.geohash, encode_geohash(15.85, 74.49))
+        self.assertNotIn('G2', [s.school_code for s in School.nearest(15.59, 73.81, k=10, state='Goa')])
+        self.assertEqual(School.nearest(15.85, 74.49, k=1, state='Karnataka')[0].school_code, 'G2')
+        self.assertEqual(nearby_index.builds, builds + 3)
+
+    def test_unknown_states_are_not_queried_or_cached(self):
+        facet_tree.names()
+        builds = nearby_index.builds
+        with self.assertNumQueries(0):
+            for state in ('Atlantis', 'atlantis ', 'Lemuria'):
+                self.assertEqual(School.nearest(15.5, 73.9, k=1, state=state), [])
+        self.assertEqual(nearby_index.builds, builds)
+        self.assertEqual(nearby_index._trees, {})
+
+    def test_migration_geohash_matches_module(self):
+        import importlib
+        migration = importlib.import_module('core.migrations.0014_school_geohash')
+        for lat, lon in [(15.4909, 73.8278), (-33.8688, 151.2093), (90, 180), (-90, -180), (91, 0), (None, 5)]:
+            self.assertEqual(migration.encode_geohash(lat, lon), encode_geohash(lat, lon))
+
+    def test_nearby_endpoint(self):
+        response = self.client.get(reverse('core:school_nearby'), {'lat': '15.49', 'lon': '73.83', 'k': '2'})
+        data = response.json()
+        self.assertEqual(data['status'], 'success')
+        self.assertEqual([row['school_code'] for row in data['results']], ['G1', 'G2'])
+        self.assertLess(data['results'][0]['distance_km'], 1)
+
+        for params in [{'lat': '15.49'}, {'lat': 'north', 'lon': '73.83'}, {'lat': '95', 'lon': '73.83'}]:
+            self.assertEqual(self.client.get(reverse('core:school_nearby'), params).status_code, 400)
+
+
+class SchoolEnrollmentRollupTest(TestCase):
+    """Test the materialized enrollment rollups"""
+
+    def setUp(self):
+        # (code, district, management, category, students per class 1-5, teachers)
+        for code, district, management, category, per_class, teachers in [
+            ('E1', 'North Goa', 'government', 'primary', 10, 2),
+            ('E2', 'North Goa', 'government', 'primary', 30, 3),
+            ('E3', 'North Goa', 'private', 'primary', 100, 0),
+            ('E4', 'South Goa', 'government', 'upper_primary', 60, 5),
+        ]:
+            make_school(
+                code, f'School {code}', district, 'Goa', management=management, school_category=category,
+                teachers=teachers, total_students=per_class * 5,
+                **{f'students_class_{grade}': per_class for grade in range(1, 6)}
+            )
+        make_school('E5', 'Closed School', 'North Goa', 'Goa', status='closed', total_students=999)
+
+    def test_rebuild_merges_and_refreshes_changed_districts(self):
+        self.assertEqual(rebuild_enrollment_rollups(), 3)
+        rollup = SchoolEnrollmentRollup.objects.get(district='North Goa', management='government')
+        self.assertEqual((rollup.school_count, rollup.student_total, rollup.teacher_total), (2, 200, 5))
+        self.assertEqual(rollup.totals['students_class_3'], 40)
+        self.assertEqual(rollup.pupil_teacher_ratio, 40.0)
+        # 50 and 150 students; 25 and 50 pupils per teacher
+        self.assertEqual(rollup.size_histogram, [0, 0, 1, 1, 0, 0, 0, 0])
+        self.assertEqual(rollup.ratio_histogram, [0, 0, 1, 0, 0, 1, 0])
+
+        total, groups = enrollment_report('district', state='Goa')
+        self.assertEqual(total['school_count'], 4)
+        self.assertEqual(sorted(groups), ['North Goa', 'South Goa'])
+        self.assertEqual(groups['North Goa']['schools_without_teachers'], 1)
+
+        # Moving a school re-aggregates both districts once the save commits
+        school = School.objects.get(school_code='E3')
+        school.district = 'South Goa'
+        with self.captureOnCommitCallbacks(execute=True):
+            school.save()
+        _total, groups = enrollment_report('district')
+        self.assertEqual((groups['North Goa']['school_count'], groups['South Goa']['school_count']), (2, 2))
+        with self.captureOnCommitCallbacks(execute=True):
+            School.objects.get(school_code='E4').delete()
+        self.assertFalse(SchoolEnrollmentRollup.objects.filter(management='government', district='South Goa').exists())
+
+    @skipUnless(np is not None, 'NumPy is not installed')
+    def test_vectorized_aggregation_matches_the_plain_loop(self):
+        rows = list(School.objects.values_list(
+            'state', 'district', 'management', 'school_category', *VALUE_FIELDS
+        ))
+        self.assertEqual(_aggregate_numpy([rows[:2], [], rows[2:]]), _aggregate_python([rows]))
+
+    def test_enrollment_endpoint(self):
+        url = reverse('core:school_enrollment')
+        data = self.client.get(url, {'group_by': 'management', 'district': 'North Goa'}).json()
+        self.assertEqual(data['status'], 'success')
+        self.assertEqual([group['name'] for group in data['groups']], ['government', 'private'])
+        self.assertEqual(data['total']['student_total'], 700)
+        self.assertEqual(data['total']['class_totals']['students_class_1'], 140)
+        self.assertEqual(data['groups'][1]['pupil_teacher_ratio'], None)
+        self.assertEqual(self.client.get(url, {'group_by': 'pincode'}).status_code, 400)
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_admin_report_summarizes_filtered_rollups(self):
+        from django.contrib.auth.models import User
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.get(
+            reverse('admin:core_schoolenrollmentrollup_changelist'), {'management__exact': 'government'}
+        )
+        self.assertEqual(response.status_code, 200)
+        summary = response.context['enrollment_summary']
+        self.assertEqual((summary['school_count'], summary['student_total']), (3, 500))
+        self.assertContains(response, 'Enrollment summary (3 schools)')
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class SchoolAdminChangelistTest(TestCase):
+    """Test the large-table School changelist"""
+
+    def setUp(self):
+        for store in (cached_counts, page_boundaries):
+            store.clear()
+            self.addCleanup(store.clear)
+        for index in (school_index, facet_tree):
+            index.invalidate()
+            self.addCleanup(index.invalidate)
+        for number in range(13):
+            make_school(
+                f'A{number:02}', f'School {number % 4}', f'District {number % 3}', ('Goa', 'Kerala')[number % 2]
+            )
+        make_school('Z99', 'Shut Academy', 'Panaji', 'Goa', status='closed')
+
+    def test_keyset_pages_match_offset_pages(self):
+        ordered = School.objects.order_by('state', '-district', 'school_name', 'pk')
+        expected = [[school.pk for school in page] for page in map(Paginator(ordered, 2).page, range(1, 8))]
+        with mock.patch('core.paginators.DEEP_OFFSET', 4):
+            # Jumping to a deep page reads its keys at the offset, the pages after it seek past the last key
+            for start in (3, 5):
+                paginator = LargeTablePaginator(ordered, 2)
+                self.assertEqual(
+                    [[school.pk for school in paginator.page(number)] for number in range(start, 8)],
+                    expected[start - 1:]
+                )
+            # A non-total ordering falls back to slicing
+            self.assertIsNone(LargeTablePaginator(School.objects.order_by('state'), 2)._keys)
+
+    def test_counts_are_cached(self):
+        queryset = School.objects.filter(state='Goa')
+        with self.assertNumQueries(1):
+            self.assertEqual(LargeTablePaginator(queryset, 5).count, 8)
+        with self.assertNumQueries(0):
+            self.assertEqual(LargeTablePaginator(queryset, 5).count, 8)
+            self.assertEqual(LargeTablePaginator(School.objects.none(), 5).count, 0)
+
+    def test_changelist_search_filters_and_deferred_columns(self):
+        from django.contrib.auth.models import User
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        url = reverse('admin:core_school_changelist')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('students_class_1', response.context['cl'].result_list[0].get_deferred_fields())
+        state_filter = next(spec for spec in response.context['cl'].filter_specs if spec.title == 'state')
+        self.assertEqual([choice for choice, _label in state_filter.lookup_choices], ['Goa', 'Kerala'])
+
+        def codes(**params):
+            result_list = self.client.get(url, params).context['cl'].result_list
+            return sorted(school.school_code for school in result_list)
+
+        # Words match the name, district or state; A07 is School 3 in District 1
+        self.assertEqual(codes(q='School 1', state='Kerala'), ['A01', 'A05', 'A07', 'A09'])
+        # Exact codes and pincodes also find schools the (functional-only) search engine skips
+        self.assertEqual(codes(q='Z99'), ['Z99'])
+        self.assertEqual(len(codes(q='110001')), 14)
+
+
+class PhotoVariantTest(TestCase):
+    """Test the background responsive-image pipeline for the gallery"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            MEDIA_ROOT=directory.name,
+            STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.category = PhotoCategory.objects.create(name='Events')
+
+    def upload(self, name, content):
+        with self.captureOnCommitCallbacks() as callbacks:
+            photo = PhotoGallery.objects.create(
+                title=name, category=self.category, image=SimpleUploadedFile(name, content, content_type='image/jpeg')
+            )
+        self.assertIn(photo_variant_runner.wake, callbacks)
+        return photo
+
+    def test_variants_are_generated_off_the_save(self):
+        # Stored 1200x800 with "rotate 90" EXIF, so the upright photo is 800 wide
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        buffer = io.BytesIO()
+        Image.new('RGB', (1200, 800), (200, 40, 40)).save(buffer, 'JPEG', exif=exif)
+        photo = self.upload('assembly.jpg', buffer.getvalue())
+        self.assertEqual((photo.variants, photo.display_url), ([], photo.image.url))
+
+        self.assertTrue(photo_variant_runner.run_next())
+        self.assertFalse(photo_variant_runner.run_next())
+        photo.refresh_from_db()
+        self.assertEqual(
+            [(v['width'], v['height']) for v in photo.variants if v['format'] == 'webp'],
+            [(800, 1200), (640, 960), (320, 480)]
+        )
+        self.assertEqual(photo.thumbnail.name, next(
+            v['name'] for v in photo.variants if v['format'] == 'jpeg' and v['width'] == 640
+        ))
+        self.assertTrue(all(photo.image.storage.exists(v['name']) for v in photo.variants))
+        self.assertRegex(photo.srcset, r'^/gallery/variants/assembly-320w\.[0-9a-f]{12}\.jpg 320w, ')
+
+        # Content-hashed names: regenerating writes the same files
+        names = [v['name'] for v in photo.variants]
+        call_command('generate_photo_variants', '--all', stdout=io.StringIO())
+        photo.refresh_from_db()
+        self.assertEqual([v['name'] for v in photo.variants], names)
+
+        photo.is_featured = True
+        photo.save()
+        response = self.client.get(reverse('core:gallery'))
+        self.assertContains(response, f'srcset="{photo.webp_srcset}"')
+        self.assertContains(response, f'src="{photo.display_url}"')
+
+    def test_unreadable_upload_is_not_retried(self):
+        photo = self.upload('broken.jpg', b'not an image')
+        with self.assertLogs('core.photo_variants', 'ERROR'):
+            self.assertTrue(photo_variant_runner.run_next())
+        self.assertFalse(photo_variant_runner.run_next())
+        photo.refresh_from_db()
+        self.assertEqual((photo.variants, photo.srcset, photo.full_url), ([], '', photo.image.url))
+
+
+@override_settings(
+    VIMEO_THUMBNAIL_RESOLVER='core.gallery.local_vimeo_thumbnail',
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class GalleryContextTest(TestCase):
+    """Test the cached two-query gallery context"""
+
+    def setUp(self):
+        gallery_cache.invalidate()
+        self.addCleanup(gallery_cache.invalidate)
+        events = PhotoCategory.objects.create(name='Events', order=2)
+        labs = PhotoCategory.objects.create(name='Labs', order=1)
+        hidden = PhotoCategory.objects.create(name='Hidden', is_active=False)
+        for title, category, extra in [
+            ('Annual Day', events, {'is_featured': True, 'school_name': 'DPS'}),
+            ('Science Fair', events, {'school_name': 'DPS'}),
+            ('Robotics Lab', labs, {'school_name': 'KV Pune'}),
+            ('Draft', hidden, {}),
+            ('Retired', labs, {'is_active': False, 'school_name': 'Old School'}),
+        ]:
+            PhotoGallery.objects.create(title=title, category=category, image=f'gallery/photos/{title}.jpg', **extra)
+        self.vimeo = VideoTestimonial.objects.create(
+            title='Vimeo', student_name='Asha', school_name='DPS', video_url='https://vimeo.com/123456', is_featured=True
+        )
+        VideoTestimonial.objects.create(
+            title='YouTube', student_name='Ravi', school_name='KV Pune', video_url='https://youtu.be/abcDEF'
+        )
+
+    def test_context_comes_from_two_queries_and_is_cached(self):
+        with self.assertNumQueries(2):
+            context = gallery_cache.get()
+        with self.assertNumQueries(0):
+            self.assertIs(gallery_cache.get(), context)
+
+        self.assertEqual([category.name for category in context['photos_by_category']], ['Labs', 'Events'])
+        self.assertEqual(
+            [[photo.title for photo in photos] for photos in context['photos_by_category'].values()],
+            [['Robotics Lab'], ['Science Fair', 'Annual Day']]
+        )
+        self.assertEqual([photo.title for photo in context['featured_photos']], ['Annual Day'])
+        self.assertEqual((context['total_photos'], context['total_videos'], context['total_schools']), (4, 2, 2))
+        self.assertEqual([video.title for video in context['other_videos']], ['YouTube'])
+
+        # Writes drop the cached context once they commit
+        builds = gallery_cache.builds
+        with self.captureOnCommitCallbacks(execute=True):
+            PhotoGallery.objects.filter(title='Draft').get().delete()
+        self.assertEqual(gallery_cache.get()['total_photos'], 3)
+        self.assertEqual(gallery_cache.builds, builds + 1)
+
+    def test_thumbnails_are_persisted_and_never_fetched_while_rendering(self):
+        self.vimeo.refresh_from_db()
+        self.assertEqual(self.vimeo.auto_thumbnail, 'https://vimeo.invalid/thumbnails/123456.jpg')
+        with mock.patch('requests.get', side_effect=AssertionError('network call while rendering')):
+            response = self.client.get(reverse('core:gallery'))
+        self.assertContains(response, 'https://vimeo.invalid/thumbnails/123456.jpg')
+        self.assertContains(response, 'https://img.youtube.com/vi/abcDEF/hqdefault.jpg')
+        self.assertContains(response, 'data-category="labs"')
+
+
+class HealthProbeTest(TestCase):
+    """Test the liveness probe and the cached readiness probe"""
+
+    def setUp(self):
+        # Checks run inline here instead of on the monitor thread
+        patcher = mock.patch.object(health_monitor, 'start')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_liveness_touches_nothing(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('core:health_live'))
+        self.assertEqual(response.json(), {'status': 'alive'})
+
+    def test_readiness_serves_the_last_check(self):
+        health_monitor.run_checks()
+        with self.assertNumQueries(0):
+            data = self.client.get(reverse('core:health_ready')).json()
+        self.assertEqual(data['status'], 'ready')
+        self.assertEqual(set(data['checks']), {'database', 'cache', 'channel_layer', 'migrations'})
+        self.assertTrue(all(check['ok'] for check in data['checks'].values()))
+        self.assertLess(data['age_seconds'], 5)
+
+        # A non-critical failure degrades; a critical one (or an old result) takes the instance out
+        with mock.patch('core.health.CHECKS', (('migrations', mock.Mock(side_effect=RuntimeError('2 unapplied'))),)), \
+                self.assertLogs('core.health', 'WARNING'):
+            health_monitor.run_checks()
+        response = self.client.get(reverse('core:health_check'))
+        self.assertEqual((response.status_code, response.json()['status']), (200, 'degraded'))
+        with mock.patch('core.health.CHECKS', (('database', mock.Mock(side_effect=RuntimeError('down'))),)), \
+                self.assertLogs('core.health', 'WARNING'):
+            health_monitor.run_checks()
+        response = self.client.get(reverse('core:health_ready'))
+        self.assertEqual((response.status_code, response.json()['checks']['database']['detail']), (503, 'RuntimeError: down'))
+        with mock.patch('core.health.HEALTH_STALE_SECONDS', -1):
+            health_monitor.run_checks()
+            self.assertEqual(self.client.get(reverse('core:health_ready')).status_code, 503)
+
+    def test_channel_layer_round_trip_skips_the_in_memory_layer(self):
+        from channels.layers import InMemoryChannelLayer
+        from .health import check_channel_layer
+
+        in_memory = mock.create_autospec(InMemoryChannelLayer, instance=True)
+        with mock.patch('channels.layers.get_channel_layer', return_value=in_memory):
+            self.assertEqual(check_channel_layer(), 'in-memory layer, not checked')
+        in_memory.send.assert_not_called()
+
+        class EchoLayer:
+            async def new_channel(self, prefix):
+                self.messages = asyncio.Queue()
+                return f'{prefix}.echo'
+
+            async def send(self, channel, message):
+                await self.messages.put(message)
+
+            async def receive(self, channel):
+                return await self.messages.get()
+
+        with mock.patch('channels.layers.get_channel_layer', return_value=EchoLayer()):
+            self.assertEqual(check_channel_layer(), 'ok')
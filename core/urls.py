@@ -17,6 +17,11 @@ urlpatterns = [
     path('school-referral/', views.SchoolReferralView.as_view(), name='school_referral'),
     path('school-referral/success/', views.school_referral_success, name='school_referral_success'),
     path('upload-schools-csv/', views.upload_schools_csv, name='upload_schools_csv'),
+    path('upload-schools-csv/<uuid:job_id>/', views.school_import_status, name='school_import_status'),
+    path('api/schools/autocomplete/', views.school_autocomplete, name='school_autocomplete'),
+    path('api/schools/locations/', views.school_locations, name='school_locations'),
+    path('api/schools/nearby/', views.school_nearby, name='school_nearby'),
+    path('api/schools/enrollment/', views.school_enrollment, name='school_enrollment'),
     path('migrate/', views.run_migrations, name='migrate'),
     path('migrate-robotic-buddy/', views.migrate_robotic_buddy, name='migrate_robotic_buddy'),
     path('check-robotic-buddy/', views.check_robotic_buddy, name='check_robotic_buddy'),
@@ -29,6 +34,8 @@ urlpatterns = [
     path('create-production-superuser/', views.create_production_superuser, name='create_production_superuser'),
     path('mixpanel-test/', views.mixpanel_test, name='mixpanel_test'),
     path('health/', views.health_check, name='health_check'),
+    path('health/live/', views.health_live, name='health_live'),
+    path('health/ready/', views.health_check, name='health_ready'),
     path('api/track-event/', views.track_event_fallback, name='track_event_fallback'),
     path('api/analytics/track/', views.analytics_track_api, name='analytics_track_api'),
     path('migrate-quest-ciq/', views.migrate_quest_ciq, name='migrate_quest_ciq'),
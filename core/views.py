@@ -1,18 +1,22 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.views.generic import TemplateView, ListView, FormView
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.http import require_http_methods
+from django.views.decorators.cache import never_cache
 from django.core.mail import send_mail
 from django.conf import settings
 import sys
 import io
 from .models import (
     DemoRequest, Course, SchoolDemoRequest, GameReview,
-    PhotoCategory, PhotoGallery, VideoTestimonial, SchoolReferral, School
+    SchoolReferral, School
 )
+from .gallery import gallery_cache
+from .photo_variants import PHOTO_SIZES
 from .forms import DemoRequestForm, SchoolDemoRequestForm, SchoolReferralForm
 from .analytics import track_page_view, track_form_submission, track_error
 from django.core.management import execute_from_command_line
@@ -179,42 +183,11 @@ class GalleryView(TemplateView):
         context['page_title'] = 'Success Stories & Gallery - DecipherWorld'
         context['page_description'] = 'Explore success stories from schools using DecipherWorld AI education platform and watch student testimonials.'
         
-        # Photo Gallery Data
-        context['photo_categories'] = PhotoCategory.objects.filter(is_active=True).order_by('order', 'name')
-        context['featured_photos'] = PhotoGallery.objects.filter(
-            is_featured=True, 
-            is_active=True
-        ).select_related('category').order_by('order', '-created_at')[:12]
-        
-        context['recent_photos'] = PhotoGallery.objects.filter(
-            is_active=True
-        ).select_related('category').order_by('-created_at')[:20]
-        
-        # Group photos by category for filtering
-        context['photos_by_category'] = {}
-        for category in context['photo_categories']:
-            context['photos_by_category'][category.id] = PhotoGallery.objects.filter(
-                category=category,
-                is_active=True
-            ).order_by('order', '-created_at')
-        
-        # Video Testimonials Data
-        context['featured_videos'] = VideoTestimonial.objects.filter(
-            is_featured=True,
-            is_active=True
-        ).order_by('order', '-created_at')[:6]
-        
-        context['recent_videos'] = VideoTestimonial.objects.filter(
-            is_active=True
-        ).order_by('-created_at')[:12]
-        
-        # Statistics for display
-        context['total_photos'] = PhotoGallery.objects.filter(is_active=True).count()
-        context['total_videos'] = VideoTestimonial.objects.filter(is_active=True).count()
-        context['total_schools'] = PhotoGallery.objects.filter(
-            is_active=True, 
-            school_name__isnull=False
-        ).exclude(school_name='').values('school_name').distinct().count()
+        # Photos, videos and statistics from two queries, cached until the next gallery write
+        context.update(gallery_cache.get())
+        
+        # Responsive sizes for the photo cards' srcset (see core.photo_variants)
+        context['photo_sizes'] = PHOTO_SIZES
         
         # SEO and metadata
         context['canonical_url'] = self.request.build_absolute_uri()
@@ -1029,67 +1002,17 @@ def mixpanel_test(request):
     """Debug page for testing Mixpanel analytics"""
     return render(request, 'core/mixpanel_test.html')
 
+@never_cache
+def health_live(request):
+    """Liveness probe: the process answers requests (touches no dependency)"""
+    return JsonResponse({'status': 'alive'})
+
+@never_cache
 def health_check(request):
-    """Comprehensive health check endpoint for Azure monitoring"""
-    import time
-    from django.db import connection
-    
-    start_time = time.time()
-    health_status = {
-        "status": "healthy",
-        "timestamp": time.time(),
-        "version": "1.0.0",
-        "environment": "production",
-        "checks": {}
-    }
-    
-    try:
-        # Database connectivity check
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            health_status["checks"]["database"] = "healthy"
-    except Exception as e:
-        health_status["status"] = "unhealthy"
-        health_status["checks"]["database"] = f"unhealthy: {str(e)}"
-    
-    try:
-        # Check if we can import core models
-        from .models import Course
-        course_count = Course.objects.count()
-        health_status["checks"]["models"] = "healthy"
-        health_status["course_count"] = course_count
-    except Exception as e:
-        health_status["status"] = "degraded"
-        health_status["checks"]["models"] = f"degraded: {str(e)}"
-    
-    # Response time check
-    response_time = (time.time() - start_time) * 1000
-    health_status["response_time_ms"] = round(response_time, 2)
-    
-    if response_time > 2000:  # More than 2 seconds
-        health_status["status"] = "degraded"
-    
-    # Memory usage check (basic)
-    import psutil
-    try:
-        memory_percent = psutil.virtual_memory().percent
-        health_status["memory_usage_percent"] = memory_percent
-        health_status["checks"]["memory"] = "healthy" if memory_percent < 90 else "degraded"
-        
-        if memory_percent > 95:
-            health_status["status"] = "degraded"
-    except:
-        health_status["checks"]["memory"] = "unknown"
-    
-    # Determine HTTP status code
-    if health_status["status"] == "healthy":
-        status_code = 200
-    elif health_status["status"] == "degraded":
-        status_code = 200  # Still operational but with issues
-    else:
-        status_code = 503  # Service unavailable
-    
-    return JsonResponse(health_status, status=status_code)
+    """Readiness probe: the last background deep check with its age (see core.health)"""
+    from .health import health_monitor
+    report = health_monitor.report()
+    return JsonResponse(report, status=200 if report['status'] in ('ready', 'degraded') else 503)
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -1334,77 +1257,74 @@ def school_referral_success(request):
     })
 
 
-@csrf_exempt
+@staff_member_required
 def upload_schools_csv(request):
     """
     Admin interface for uploading schools CSV data
-    Accessible via web interface for easy bulk school imports
+    Staff-only, as it writes School rows; the file is imported in the
+    background (see core.import_jobs)
     """
+    from .import_jobs import MAX_UPLOAD_BYTES
+
     if request.method == 'GET':
         # Show upload form
         return JsonResponse({
             'status': 'ready',
             'message': 'Schools CSV Upload Interface',
-            'instructions': 'POST a CSV file with schools data to import',
+            'instructions': 'POST a CSV file with schools data (UDISE columns, as for import_schools) to import',
             'endpoint': '/upload-schools-csv/',
+            'required_columns': ['School Code', 'School Name'],
+            'options': {'update_existing': 'true to update schools whose code already exists'},
+            'max_upload_mb': MAX_UPLOAD_BYTES // (1024 * 1024),
             'sample_csv_path': '/sample_schools.csv',
             'admin_link': '/admin/core/school/'
         })
     
     elif request.method == 'POST':
+        from .import_jobs import create_import_job
+
+        def too_large():
+            return JsonResponse({
+                'status': 'error',
+                'message': f'CSV file must be at most {MAX_UPLOAD_BYTES // (1024 * 1024)} MB'
+            }, status=413)
+
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        # Checked before request.FILES, so an oversized body is never spooled to disk
+        if content_length > MAX_UPLOAD_BYTES:
+            return too_large()
+
         try:
             # Handle CSV upload
-            if 'csv_file' in request.FILES:
-                csv_file = request.FILES['csv_file']
-                
-                # Read CSV content
-                csv_content = csv_file.read().decode('utf-8')
-                csv_reader = csv.DictReader(io.StringIO(csv_content))
-                
-                imported_count = 0
-                errors = []
-                
-                for row_num, row in enumerate(csv_reader, 1):
-                    try:
-                        # Create or update school
-                        school, created = School.objects.get_or_create(
-                            name=row.get('name', '').strip(),
-                            defaults={
-                                'address': row.get('address', '').strip(),
-                                'city': row.get('city', '').strip(),
-                                'state': row.get('state', '').strip(),
-                                'postal_code': row.get('postal_code', '').strip(),
-                                'phone': row.get('phone', '').strip(),
-                                'email': row.get('email', '').strip(),
-                                'principal_name': row.get('principal_name', '').strip(),
-                                'website': row.get('website', '').strip(),
-                                'student_count': int(row.get('student_count', 0) or 0),
-                                'grade_levels': row.get('grade_levels', '').strip(),
-                                'school_type': row.get('school_type', 'public').strip(),
-                                'is_active': True
-                            }
-                        )
-                        
-                        if created:
-                            imported_count += 1
-                        
-                    except Exception as e:
-                        errors.append(f"Row {row_num}: {str(e)}")
-                
-                return JsonResponse({
-                    'status': 'success',
-                    'message': f'Successfully imported {imported_count} schools',
-                    'imported_count': imported_count,
-                    'total_schools_now': School.objects.count(),
-                    'errors': errors[:10] if errors else [],  # Show first 10 errors
-                    'admin_link': '/admin/core/school/'
-                })
-            
-            else:
+            if 'csv_file' not in request.FILES:
                 return JsonResponse({
                     'status': 'error',
                     'message': 'No CSV file provided. Please upload a file with name "csv_file"'
                 }, status=400)
+
+            csv_file = request.FILES['csv_file']
+            if csv_file.size > MAX_UPLOAD_BYTES:
+                return too_large()
+            header = next(csv_file.chunks(), b'').split(b'\n', 1)[0].decode('utf-8-sig', errors='replace')
+            if 'School Code' not in header or 'School Name' not in header:
+                return JsonResponse({
+                    'status': 'error',
+                    'message': 'CSV header must include "School Code" and "School Name" columns'
+                }, status=400)
+
+            job = create_import_job(
+                csv_file, update_existing=request.POST.get('update_existing', '').lower() in ('1', 'true', 'yes')
+            )
+            return JsonResponse({
+                'status': 'queued',
+                'message': 'Import queued; poll status_url for progress',
+                'job_id': str(job.id),
+                'status_url': reverse('core:school_import_status', args=[job.id]),
+                'admin_link': '/admin/core/school/'
+            }, status=202)
                 
         except Exception as e:
             return JsonResponse({
@@ -1420,6 +1340,187 @@ def upload_schools_csv(request):
         }, status=405)
 
 
+@staff_member_required
+@require_http_methods(["GET"])
+def school_import_status(request, job_id):
+    """Progress of a background schools CSV import"""
+    from .import_jobs import import_job_runner
+    from .models import SchoolImportJob
+
+    job = SchoolImportJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Import job not found'
+        }, status=404)
+
+    # Unfinished jobs from before a restart resume once someone asks about them
+    if job.status in ('queued', 'running') and not import_job_runner.is_running():
+        import_job_runner.wake()
+
+    return JsonResponse({'status': 'success', 'job': job.to_dict()})
+
+
+AUTOCOMPLETE_FIELDS = ('school_code', 'school_name', 'district', 'state')
+AUTOCOMPLETE_MAX_RESULTS = 50
+
+
+@require_http_methods(["GET"])
+def school_autocomplete(request):
+    """
+    JSON autocomplete for the school dropdowns
+    ?q=<text>&state=<state>&district=<district>&limit=<n>
+    """
+    query = request.GET.get('q', '').strip()
+    state = request.GET.get('state', '').strip()
+    district = request.GET.get('district', '').strip()
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 10)), AUTOCOMPLETE_MAX_RESULTS))
+    except ValueError:
+        limit = 10
+
+    # A single character matches too much to be useful without a facet
+    if len(query) < 2 and not (state or district):
+        schools = []
+    else:
+        schools = School.search_schools(
+            query, state=state or None, district=district or None, limit=limit, fields=AUTOCOMPLETE_FIELDS
+        )
+
+    return JsonResponse({
+        'status': 'success',
+        'query': query,
+        'count': len(schools),
+        'results': [
+            {
+                'id': school.pk,
+                'school_code': school.school_code,
+                'school_name': school.school_name,
+                'district': school.district,
+                'state': school.state,
+                'display_name': school.display_name,
+            }
+            for school in schools
+        ]
+    })
+
+
+@require_http_methods(["GET"])
+def school_locations(request):
+    """
+    Location facets for the cascading school dropdowns
+    ?state=<state>&district=<district>&sub_district=<sub_district> lists that node's children
+    with school counts and student totals; the ETag is the facet version
+    """
+    from django.http import HttpResponse, HttpResponseNotModified
+    from django.utils.cache import patch_cache_control
+    from django.utils.http import parse_etags
+    from .school_facets import FACET_LEVELS, facet_tree
+
+    path = []
+    for level in FACET_LEVELS[:-1]:
+        value = request.GET.get(level, '').strip()
+        if not value:
+            break
+        path.append(value)
+
+    etag = f'"school-facets-{facet_tree.get_version()}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        document = facet_tree.document(tuple(path))
+        if document is None:
+            return JsonResponse({
+                'status': 'error',
+                'message': 'Unknown location'
+            }, status=404)
+        version, body = document
+        etag = f'"school-facets-{version}"'
+        response = HttpResponse(body, content_type='application/json')
+
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+@require_http_methods(["GET"])
+def school_enrollment(request):
+    """
+    Enrollment report from the materialized rollups
+    ?group_by=<state|district|management|school_category>&state=..&district=..&management=..&school_category=..
+    Each group (and the overall total) has class-wise sums, pupil-teacher ratio and distributions
+    """
+    from .school_rollups import ROLLUP_KEY, enrollment_report, summarize
+
+    group_by = request.GET.get('group_by', 'state').strip()
+    if group_by not in ROLLUP_KEY:
+        return JsonResponse({
+            'status': 'error',
+            'message': f"group_by must be one of: {', '.join(ROLLUP_KEY)}"
+        }, status=400)
+    filters = {field: request.GET[field].strip() for field in ROLLUP_KEY if request.GET.get(field, '').strip()}
+
+    total, groups = enrollment_report(group_by, **filters)
+    return JsonResponse({
+        'status': 'success',
+        'group_by': group_by,
+        'filters': filters,
+        'total': summarize(total),
+        'groups': [{'name': name, **summarize(groups[name])} for name in sorted(groups)],
+    })
+
+
+NEARBY_FIELDS = ('school_code', 'school_name', 'district', 'state', 'latitude', 'longitude')
+NEARBY_MAX_RESULTS = 50
+NEARBY_MAX_RADIUS_KM = 500
+
+
+@require_http_methods(["GET"])
+def school_nearby(request):
+    """
+    Nearest functional schools to a point, nearest first
+    ?lat=<latitude>&lon=<longitude>&k=<n>&radius_km=<km>&state=<state>
+    """
+    state = request.GET.get('state', '').strip()
+    try:
+        latitude = float(request.GET['lat'])
+        longitude = float(request.GET['lon'])
+        k = max(1, min(int(request.GET.get('k', 10)), NEARBY_MAX_RESULTS))
+        radius_km = request.GET.get('radius_km')
+        radius_km = max(0.0, min(float(radius_km), NEARBY_MAX_RADIUS_KM)) if radius_km else None
+    except (KeyError, ValueError):
+        return JsonResponse({
+            'status': 'error',
+            'message': 'lat and lon are required numbers; k and radius_km must be numbers'
+        }, status=400)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Coordinates out of range'
+        }, status=400)
+
+    schools = School.nearest(
+        latitude, longitude, k=k, radius_km=radius_km, state=state or None, fields=NEARBY_FIELDS
+    )
+    return JsonResponse({
+        'status': 'success',
+        'count': len(schools),
+        'results': [
+            {
+                'id': school.pk,
+                'school_code': school.school_code,
+                'school_name': school.school_name,
+                'district': school.district,
+                'state': school.state,
+                'latitude': float(school.latitude),
+                'longitude': float(school.longitude),
+                'distance_km': school.distance_km,
+            }
+            for school in schools
+        ]
+    })
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def migrate_quest_ciq(request):
@@ -10,6 +10,7 @@ from django.contrib.admin.views.decorators import staff_member_required
 from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
 from django.views import View
+from django.db.models import Count
 from django.utils import timezone
 from datetime import timedelta
 
@@ -196,7 +197,7 @@ class SessionDetailMonitoringView(TemplateView):
         try:
             teams_progress = []
             
-            for team in session.design_teams.all():
+            for team in session.design_teams.annotate(membership_count=Count('memberships')):
                 # Get completion tracking
                 completion_data = PhaseCompletionTracker.objects.filter(
                     session=session,
@@ -222,7 +223,7 @@ class SessionDetailMonitoringView(TemplateView):
                         'id': team.id,
                         'name': team.team_name,
                         'emoji': team.team_emoji,
-                        'member_count': len(team.team_members or [])
+                        'member_count': team.member_count
                     },
                     'completion': {
                         'percentage': completion_data.completion_percentage if completion_data else 0,
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class GroupLearningConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "group_learning"
+
+    def ready(self):
+        from .session_versions import connect_signals
+        from . import climate_state, connect_cache
+        connect_signals()
+        connect_cache.connect_signals()
+        climate_state.connect_signals()
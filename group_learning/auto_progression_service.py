@@ -18,9 +18,13 @@ from .models import (
 from .monitoring import (
     log_operation, log_session_activity, log_error, performance_monitor
 )
+from .session_versions import bump_session_version
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on students per phase_inputs_submit batch (each still capped at 10 inputs)
+MAX_BATCH_SUBMISSIONS = 10
+
 
 class AutoProgressionService:
     """
@@ -118,7 +122,91 @@ class AutoProgressionService:
                 'retry_allowed': True,
                 'debug_info': str(e) if getattr(settings, 'DEBUG', False) else None
             }
-    
+
+    @log_operation('process_phase_inputs')
+    def process_phase_inputs(self, team_id, mission_id, submissions):
+        """
+        Process several students' phase inputs as one batch
+
+        ``submissions`` is a list of ``{'student_data': {...}, 'input_data': [...]}``.
+        The whole batch is validated up front and either saved entirely or not
+        at all; completion tracking and auto-progression run once and a single
+        ``phase_inputs_submitted`` group message is sent after commit.
+        """
+        validation_result = self._validate_batch(team_id, mission_id, submissions)
+        if not validation_result['valid']:
+            return {
+                'success': False,
+                'error': f"Input validation failed: {validation_result['error']}"
+            }
+
+        team = validation_result['team']
+        mission = validation_result['mission']
+        session = team.session
+
+        try:
+            with transaction.atomic():
+                phase_inputs = self._save_phase_inputs(team, mission, submissions)
+
+                # bulk_create skips save(), so do its per-row side effects once here
+                team.mark_phase_completed(mission.mission_type)
+                bump_session_version(session.session_code)
+
+                completion_result = self._update_completion_tracking(phase_inputs[0], input_count=len(phase_inputs))
+                progression_result = self._check_auto_progression(team, mission)
+
+                transaction.on_commit(
+                    lambda: self._broadcast_batch_update(team, mission, phase_inputs, completion_result, progression_result)
+                )
+
+                log_session_activity(
+                    session.session_code,
+                    'inputs_batch_processed',
+                    {
+                        'team_id': team_id,
+                        'mission_id': mission_id,
+                        'student_count': len(submissions),
+                        'input_count': len(phase_inputs),
+                        'completion_percentage': completion_result.get('completion_percentage', 0),
+                        'auto_advance_triggered': progression_result.get('should_advance', False)
+                    }
+                )
+
+                return {
+                    'success': True,
+                    'input_saved': True,
+                    'completion_result': completion_result,
+                    'progression_result': progression_result,
+                    'phase_input_ids': [phase_input.id for phase_input in phase_inputs]
+                }
+
+        except ValidationError as e:
+            logger.warning(f"Validation error processing phase input batch: {str(e)}")
+            log_error('validation_error', session.session_code, {
+                'team_id': team_id,
+                'mission_id': mission_id,
+                'error_message': str(e)
+            })
+            return {
+                'success': False,
+                'error': f'Validation error: {str(e)}',
+                'retry_allowed': False
+            }
+        except Exception as e:
+            logger.error(f"Unexpected error processing phase input batch: {str(e)}", exc_info=True)
+            log_error('phase_input_batch_error', session.session_code, {
+                'team_id': team_id,
+                'mission_id': mission_id,
+                'error_message': str(e),
+                'error_type': type(e).__name__
+            })
+            return {
+                'success': False,
+                'error': 'Internal server error occurred',
+                'retry_allowed': True,
+                'debug_info': str(e) if getattr(settings, 'DEBUG', False) else None
+            }
+
     def _validate_input_data(self, team_id, mission_id, student_data, input_data):
         """Comprehensive input validation before processing"""
         try:
@@ -142,57 +230,12 @@ class AutoProgressionService:
             if team.session.design_game != mission.game:
                 return {'valid': False, 'error': 'Team and mission belong to different games'}
             
-            # Student data validation
-            if not isinstance(student_data, dict):
-                return {'valid': False, 'error': 'Student data must be a dictionary'}
-            
-            student_name = student_data.get('name', '').strip()
+            # Student and per-input field validation
+            fields_result = self._validate_submission_fields(student_data, input_data)
+            if not fields_result['valid']:
+                return fields_result
             student_session_id = student_data.get('session_id', '').strip()
             
-            if not student_name or len(student_name) > 100:
-                return {'valid': False, 'error': 'Valid student name (1-100 chars) required'}
-            
-            if not student_session_id or len(student_session_id) > 100:
-                return {'valid': False, 'error': 'Valid student session ID (1-100 chars) required'}
-            
-            # Input data validation
-            if not isinstance(input_data, list) or len(input_data) == 0:
-                return {'valid': False, 'error': 'Input data must be a non-empty list'}
-            
-            if len(input_data) > 10:
-                return {'valid': False, 'error': 'Too many inputs (max 10 per submission)'}
-            
-            # Validate each input
-            for i, input_item in enumerate(input_data):
-                if not isinstance(input_item, dict):
-                    return {'valid': False, 'error': f'Input {i+1} must be a dictionary'}
-                
-                input_type = input_item.get('type', '')
-                input_label = input_item.get('label', '').strip()
-                input_value = input_item.get('value', '').strip()
-                
-                if input_type not in ['radio', 'dropdown', 'checkbox', 'text_short', 'text_medium', 'rating']:
-                    return {'valid': False, 'error': f'Invalid input type: {input_type}'}
-                
-                if not input_label or len(input_label) > 200:
-                    return {'valid': False, 'error': f'Input {i+1} label must be 1-200 characters'}
-                
-                if not input_value or len(input_value) > 500:
-                    return {'valid': False, 'error': f'Input {i+1} value must be 1-500 characters'}
-                
-                # Type-specific validation
-                if input_type == 'text_short' and len(input_value) > 50:
-                    return {'valid': False, 'error': f'Short text input {i+1} cannot exceed 50 characters'}
-                elif input_type == 'text_medium' and len(input_value) > 200:
-                    return {'valid': False, 'error': f'Medium text input {i+1} cannot exceed 200 characters'}
-                elif input_type == 'rating':
-                    try:
-                        rating = int(input_value)
-                        if not 1 <= rating <= 5:
-                            return {'valid': False, 'error': f'Rating {i+1} must be between 1 and 5'}
-                    except ValueError:
-                        return {'valid': False, 'error': f'Rating {i+1} must be a valid number'}
-            
             # Check for duplicate submissions
             existing_inputs = SimplifiedPhaseInput.objects.filter(
                 team=team,
@@ -219,6 +262,156 @@ class AutoProgressionService:
             logger.error(f"Error validating input data: {str(e)}")
             return {'valid': False, 'error': 'Validation system error'}
     
+    def _validate_submission_fields(self, student_data, input_data):
+        """Validate one student's details and their list of inputs (no queries)"""
+        # Student data validation
+        if not isinstance(student_data, dict):
+            return {'valid': False, 'error': 'Student data must be a dictionary'}
+
+        student_name = student_data.get('name', '').strip()
+        student_session_id = student_data.get('session_id', '').strip()
+
+        if not student_name or len(student_name) > 100:
+            return {'valid': False, 'error': 'Valid student name (1-100 chars) required'}
+
+        if not student_session_id or len(student_session_id) > 100:
+            return {'valid': False, 'error': 'Valid student session ID (1-100 chars) required'}
+
+        # Input data validation
+        if not isinstance(input_data, list) or len(input_data) == 0:
+            return {'valid': False, 'error': 'Input data must be a non-empty list'}
+
+        if len(input_data) > 10:
+            return {'valid': False, 'error': 'Too many inputs (max 10 per submission)'}
+
+        # Validate each input
+        for i, input_item in enumerate(input_data):
+            if not isinstance(input_item, dict):
+                return {'valid': False, 'error': f'Input {i+1} must be a dictionary'}
+
+            input_type = input_item.get('type', '')
+            input_label = input_item.get('label', '').strip()
+            input_value = input_item.get('value', '').strip()
+
+            if input_type not in ['radio', 'dropdown', 'checkbox', 'text_short', 'text_medium', 'rating']:
+                return {'valid': False, 'error': f'Invalid input type: {input_type}'}
+
+            if not input_label or len(input_label) > 200:
+                return {'valid': False, 'error': f'Input {i+1} label must be 1-200 characters'}
+
+            if not input_value or len(input_value) > 500:
+                return {'valid': False, 'error': f'Input {i+1} value must be 1-500 characters'}
+
+            # Type-specific validation
+            if input_type == 'text_short' and len(input_value) > 50:
+                return {'valid': False, 'error': f'Short text input {i+1} cannot exceed 50 characters'}
+            elif input_type == 'text_medium' and len(input_value) > 200:
+                return {'valid': False, 'error': f'Medium text input {i+1} cannot exceed 200 characters'}
+            elif input_type == 'rating':
+                try:
+                    rating = int(input_value)
+                    if not 1 <= rating <= 5:
+                        return {'valid': False, 'error': f'Rating {i+1} must be between 1 and 5'}
+                except ValueError:
+                    return {'valid': False, 'error': f'Rating {i+1} must be a valid number'}
+        
+        return {'valid': True}
+
+    def _validate_batch(self, team_id, mission_id, submissions):
+        """Validate a batch of submissions together; returns team and mission when valid"""
+        try:
+            if not all([team_id, mission_id, submissions]):
+                return {'valid': False, 'error': 'Missing required parameters'}
+
+            if not isinstance(submissions, list):
+                return {'valid': False, 'error': 'Submissions must be a list'}
+
+            if len(submissions) > MAX_BATCH_SUBMISSIONS:
+                return {'valid': False, 'error': f'Too many submissions (max {MAX_BATCH_SUBMISSIONS} per batch)'}
+
+            try:
+                team = DesignTeam.objects.select_related(
+                    'session__design_game', 'session__current_mission'
+                ).get(id=team_id)
+            except DesignTeam.DoesNotExist:
+                return {'valid': False, 'error': f'Team {team_id} not found'}
+
+            try:
+                mission = DesignMission.objects.get(id=mission_id)
+            except DesignMission.DoesNotExist:
+                return {'valid': False, 'error': f'Mission {mission_id} not found'}
+
+            session = team.session
+            if session.design_game != mission.game:
+                return {'valid': False, 'error': 'Team and mission belong to different games'}
+
+            current_mission = session.current_mission
+            if current_mission and mission.order < current_mission.order:
+                return {
+                    'valid': False,
+                    'error': f'Cannot submit for past phase. Current phase is {current_mission.mission_type}.'
+                }
+
+            student_session_ids = []
+            for i, submission in enumerate(submissions):
+                if not isinstance(submission, dict):
+                    return {'valid': False, 'error': f'Submission {i+1} must be a dictionary'}
+
+                fields_result = self._validate_submission_fields(
+                    submission.get('student_data'), submission.get('input_data')
+                )
+                if not fields_result['valid']:
+                    return {'valid': False, 'error': f"Submission {i+1}: {fields_result['error']}"}
+
+                student_session_id = submission['student_data']['session_id'].strip()
+                if student_session_id in student_session_ids:
+                    return {'valid': False, 'error': f'Submission {i+1}: student appears more than once in the batch'}
+                student_session_ids.append(student_session_id)
+
+            # One query for duplicate checks across the whole batch
+            already_submitted = SimplifiedPhaseInput.objects.filter(
+                team=team,
+                mission=mission,
+                student_session_id__in=student_session_ids,
+                is_active=True
+            ).values_list('student_session_id', flat=True).first()
+
+            if already_submitted:
+                return {'valid': False, 'error': f'Student {already_submitted} has already submitted inputs for this phase'}
+
+            return {'valid': True, 'team': team, 'mission': mission}
+
+        except Exception as e:
+            logger.error(f"Error validating input batch: {str(e)}")
+            return {'valid': False, 'error': 'Validation system error'}
+
+    def _save_phase_inputs(self, team, mission, submissions):
+        """Create every input in the batch with one INSERT"""
+        session = team.session
+        phase_inputs = []
+        for submission in submissions:
+            student_data = submission['student_data']
+            for input_item in submission['input_data']:
+                phase_input = SimplifiedPhaseInput(
+                    team=team,
+                    mission=mission,
+                    session=session,
+                    student_name=student_data.get('name', 'Anonymous').strip(),
+                    student_session_id=student_data.get('session_id').strip(),
+                    input_type=input_item.get('type'),
+                    input_label=input_item.get('label'),
+                    selected_value=input_item.get('value'),
+                    input_order=input_item.get('order', 1),
+                    time_to_complete_seconds=input_item.get('time_taken', 0)
+                )
+                # Duplicates were checked for the whole batch; the unique constraint still backs it
+                phase_input.full_clean(validate_unique=False)
+                phase_inputs.append(phase_input)
+
+        phase_inputs = SimplifiedPhaseInput.objects.bulk_create(phase_inputs)
+        logger.info(f"✅ Saved {len(phase_inputs)} phase inputs from {len(submissions)} students for team {team.team_name}")
+        return phase_inputs
+
     def _save_phase_input(self, team_id, mission_id, student_data, input_data):
         """Save simplified phase input to database"""
         try:
@@ -250,7 +443,7 @@ class AutoProgressionService:
             logger.error(f"Error saving phase input: {str(e)}")
             return None
     
-    def _update_completion_tracking(self, phase_input):
+    def _update_completion_tracking(self, phase_input, input_count=1):
         """Update completion tracking for the team's current phase"""
         try:
             team = phase_input.team
@@ -271,8 +464,10 @@ class AutoProgressionService:
             if created:
                 logger.info(f"📊 Created new completion tracker for {team.team_name} - {mission.title}")
             
-            # Increment completed inputs
-            tracker.completed_inputs += 1
+            # Increment completed inputs (capped: extra answers can't push past 100%)
+            tracker.completed_inputs = min(
+                tracker.completed_inputs + input_count, tracker.total_required_inputs
+            )
             is_ready = tracker.update_completion_status()
             
             # Update team progress model as well
@@ -498,7 +693,66 @@ class AutoProgressionService:
         except Exception as e:
             logger.error(f"Error broadcasting input update: {str(e)}")
             return False
-    
+
+    def _broadcast_batch_update(self, team, mission, phase_inputs, completion_result, progression_result):
+        """Send one group message carrying a whole batch (consumers fan it out to the usual frames)"""
+        try:
+            if not self.channel_layer:
+                logger.warning("No channel layer available for broadcasting")
+                return False
+
+            team_data = {
+                'id': team.id,
+                'name': team.team_name,
+                'emoji': team.team_emoji
+            }
+            input_data = []
+            submissions = []
+            for phase_input in phase_inputs:
+                input_data.append({
+                    'type': phase_input.input_type,
+                    'label': phase_input.input_label,
+                    'value': phase_input.selected_value,
+                    'order': phase_input.input_order,
+                    'student_name': phase_input.student_name
+                })
+                # Same shape as the consumer's get_submission_details, without a query per input
+                submissions.append({
+                    'id': phase_input.id,
+                    'team_id': team.id,
+                    'team_name': team.team_name,
+                    'student_name': phase_input.student_name,
+                    'mission_title': mission.title,
+                    'mission_type': mission.get_mission_type_display(),
+                    'input_type': phase_input.get_input_type_display(),
+                    'input_label': phase_input.input_label,
+                    'selected_value': phase_input.selected_value,
+                    'submitted_at': phase_input.submitted_at.isoformat(),
+                    'teacher_score': phase_input.teacher_score,
+                    'needs_review': phase_input.teacher_score is None
+                })
+
+            async_to_sync(self.channel_layer.group_send)(
+                f'design_thinking_{team.session.session_code}',
+                {
+                    'type': 'phase_inputs_submitted',
+                    'team_data': team_data,
+                    'input_data': input_data,
+                    'submissions': submissions,
+                    'completion_percentage': completion_result['completion_percentage'],
+                    'is_ready_to_advance': completion_result['is_ready_to_advance'],
+                    'auto_advance_result': progression_result,
+                    'timestamp': timezone.now().isoformat()
+                }
+            )
+
+            logger.info(f"📡 Broadcasted {len(phase_inputs)} batched inputs for {team.team_name}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error broadcasting input batch: {str(e)}")
+            return False
+
     def execute_auto_advancement(self, session_code, current_mission_id, next_mission_id):
         """Execute the actual auto-advancement to next phase"""
         try:
@@ -561,6 +815,8 @@ class AutoProgressionService:
                     teacher_score=score,
                     scored_at=timezone.now()
                 )
+                # QuerySet.update() skips post_save, so bump the session version explicitly
+                bump_session_version(team.session.session_code)
                 
                 # Broadcast score update
                 if self.channel_layer:
@@ -6,9 +6,12 @@ Optimized caching for session progress, mission data, and team submissions
 from django.core.cache import cache
 from django.utils import timezone
 from django.db.models import Count, Q
+from collections import OrderedDict
+import copy
 import logging
 import hashlib
 import json
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -25,8 +28,8 @@ class DesignThinkingCache:
     TEAM_SUBMISSIONS_PREFIX = 'dt_team_submissions'
     FACILITATOR_DASHBOARD_PREFIX = 'dt_facilitator_dash'
     
-    # Cache timeouts (in seconds)
-    PROGRESS_TIMEOUT = 60  # 1 minute for progress data
+    # Cache timeouts (in seconds); session progress is materialized in
+    # session_progress_store and kept current by the write paths instead
     MISSION_TIMEOUT = 300  # 5 minutes for mission structure (rarely changes)
     SUBMISSION_TIMEOUT = 30  # 30 seconds for submission counts
     DASHBOARD_TIMEOUT = 45  # 45 seconds for facilitator dashboard data
@@ -34,16 +37,15 @@ class DesignThinkingCache:
     @classmethod
     def get_session_progress(cls, session_code):
         """
-        Get cached session progress data
+        Get materialized session progress data
         
         Args:
             session_code (str): Session code
             
         Returns:
-            dict or None: Cached progress data or None if not cached
+            dict or None: Progress data or None if not materialized yet
         """
-        cache_key = f"{cls.SESSION_PROGRESS_PREFIX}:{session_code}"
-        data = cache.get(cache_key)
+        data = session_progress_store.get(session_code)
         
         if data:
             logger.debug(f"Cache HIT for session progress: {session_code}")
@@ -55,30 +57,24 @@ class DesignThinkingCache:
     @classmethod
     def set_session_progress(cls, session_code, progress_data):
         """
-        Cache session progress data
+        Replace materialized session progress data
         
         Args:
             session_code (str): Session code
-            progress_data (dict): Progress data to cache
+            progress_data (dict): Freshly built progress data
         """
-        cache_key = f"{cls.SESSION_PROGRESS_PREFIX}:{session_code}"
-        
-        # Add timestamp for debugging
-        progress_data['cached_at'] = timezone.now().isoformat()
-        
-        cache.set(cache_key, progress_data, cls.PROGRESS_TIMEOUT)
-        logger.debug(f"Cached session progress for {session_code} (expires in {cls.PROGRESS_TIMEOUT}s)")
+        session_progress_store.replace(session_code, progress_data)
+        logger.debug(f"Materialized session progress for {session_code}")
     
     @classmethod
     def invalidate_session_progress(cls, session_code):
         """
-        Invalidate cached session progress
+        Drop materialized session progress (rebuilt on next read)
         
         Args:
             session_code (str): Session code
         """
-        cache_key = f"{cls.SESSION_PROGRESS_PREFIX}:{session_code}"
-        cache.delete(cache_key)
+        session_progress_store.discard(session_code)
         logger.info(f"Invalidated session progress cache for {session_code}")
     
     @classmethod
@@ -247,6 +243,7 @@ class DesignThinkingCache:
         # Redis or Memcached with proper stats collection
         return {
             'cache_backend': cache.__class__.__name__,
+            'materialized_sessions': session_progress_store.get_stats(),
             'prefixes': {
                 'session_progress': cls.SESSION_PROGRESS_PREFIX,
                 'mission_data': cls.MISSION_DATA_PREFIX,
@@ -254,7 +251,6 @@ class DesignThinkingCache:
                 'facilitator_dashboard': cls.FACILITATOR_DASHBOARD_PREFIX,
             },
             'timeouts': {
-                'progress': cls.PROGRESS_TIMEOUT,
                 'mission': cls.MISSION_TIMEOUT,
                 'submission': cls.SUBMISSION_TIMEOUT,
                 'dashboard': cls.DASHBOARD_TIMEOUT,
@@ -262,6 +258,143 @@ class DesignThinkingCache:
         }
 
 
+class SessionProgressStore:
+    """
+    In-process materialized session progress, one snapshot per session code
+    
+    Snapshots are built once (from a single prefetch query) and then updated
+    in place by the mission-advance and submission write paths, so reads
+    never recompute. Each update bumps the snapshot's ``version`` so clients
+    applying broadcast diffs can spot a gap and refetch. Kept in-process like
+    the connect caches: the default cache is a DummyCache and the app runs as
+    a single Daphne process.
+    """
+    
+    def __init__(self, max_sessions=500):
+        self.max_sessions = max_sessions
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, session_code):
+        """Copy of the current snapshot, or None"""
+        with self._lock:
+            snapshot = self._snapshots.get(session_code)
+            if snapshot is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._snapshots.move_to_end(session_code)
+            return copy.deepcopy(snapshot)
+    
+    def replace(self, session_code, progress_data, source_version=None):
+        """
+        Store a freshly built snapshot
+        
+        ``source_version`` is the session version the data was read at, so
+        readers can tell when writes outside the patched paths made it stale.
+        
+        Returns:
+            tuple: (previous snapshot or None, stored snapshot) - both copies
+        """
+        progress_data = copy.deepcopy(progress_data)
+        progress_data.setdefault('cached_at', timezone.now().isoformat())
+        progress_data['source_version'] = source_version
+        with self._lock:
+            previous = self._snapshots.get(session_code)
+            progress_data['version'] = previous['version'] + 1 if previous else 1
+            self._store(session_code, progress_data)
+            return copy.deepcopy(previous), copy.deepcopy(progress_data)
+    
+    def update(self, session_code, mutate, source_version=None):
+        """
+        Apply ``mutate(snapshot)`` in place to a materialized snapshot
+        
+        Returns:
+            tuple: (previous, updated) copies, or (None, None) when the
+            session isn't materialized (the next read builds it from the DB)
+        """
+        with self._lock:
+            previous = self._snapshots.get(session_code)
+            if previous is None:
+                return None, None
+            updated = copy.deepcopy(previous)
+            mutate(updated)
+            updated['version'] = previous['version'] + 1
+            updated['source_version'] = source_version
+            self._store(session_code, updated)
+            return previous, copy.deepcopy(updated)
+    
+    def discard(self, session_code):
+        with self._lock:
+            self._snapshots.pop(session_code, None)
+    
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+        self.hits = self.misses = 0
+    
+    def get_stats(self):
+        return {'sessions': len(self._snapshots), 'hits': self.hits, 'misses': self.misses}
+    
+    def _store(self, session_code, snapshot):
+        self._snapshots[session_code] = snapshot
+        self._snapshots.move_to_end(session_code)
+        while len(self._snapshots) > self.max_sessions:
+            self._snapshots.popitem(last=False)
+
+
+session_progress_store = SessionProgressStore()
+
+
+def diff_progress(previous, current):
+    """
+    Describe how a progress snapshot changed
+    
+    Top-level fields are included when they differ; ``missions`` maps mission
+    id to its changed fields, with ``team_progress`` narrowed to the teams
+    whose entry changed. Without a previous snapshot the whole snapshot is
+    sent (``full`` is True).
+    """
+    if previous is None:
+        return {'full': True, 'progress': current}
+    
+    changes = {}
+    for key, value in current.items():
+        if key in ('missions', 'version', 'source_version', 'cached_at'):
+            continue
+        if previous.get(key) != value:
+            changes[key] = value
+    
+    previous_missions = {mission['id']: mission for mission in previous.get('missions', [])}
+    mission_changes = {}
+    for mission in current.get('missions', []):
+        before = previous_missions.get(mission['id'])
+        if before is None:
+            mission_changes[mission['id']] = mission
+            continue
+        
+        changed = {
+            key: value for key, value in mission.items()
+            if key != 'team_progress' and before.get(key) != value
+        }
+        teams_before = {entry['team_id']: entry for entry in before.get('team_progress', [])}
+        team_changes = [
+            entry for entry in mission.get('team_progress', [])
+            if teams_before.get(entry['team_id']) != entry
+        ]
+        if team_changes:
+            changed['team_progress'] = team_changes
+        if changed:
+            mission_changes[mission['id']] = changed
+    
+    if mission_changes:
+        changes['missions'] = mission_changes
+    
+    return {'full': False, 'changes': changes}
+
+
 class CacheWarmer:
     """
     Utility for pre-warming caches with frequently accessed data
@@ -0,0 +1,343 @@
+"""
+Authoritative in-process state for live climate game sessions
+
+``ClimateGameSession.update_meters``, ``advance_phase``, ``start_new_round``,
+``start_timer`` and ``set_timer_duration`` each did a full-model ``save()``:
+a facilitator advancing the phase while round results updated the meters
+wrote back whichever stale copy of the other fields it had loaded, and every
+poll re-read the row for meters and the timer.
+
+``ClimateStateStore`` keeps one ``ClimateState`` per session code (the app
+runs as a single Daphne process), sharded by code so sessions don't contend
+on one lock. Every mutation runs under the shard lock, bumps the state's
+``version`` and marks only the fields it changed as dirty; a caller that read
+the state can pass ``expected_version`` and gets ``StaleStateError`` instead
+of silently overwriting a newer change. Dirty fields are written behind with
+one ``UPDATE ... SET <changed fields>`` per session after
+``CLIMATE_STATE_FLUSH_SECONDS`` (0 flushes as soon as the transaction
+commits).
+
+Views and consumers read meters, phase and timer info from the store, and
+timer changes are handed to the tick broadcaster (``timer_service``);
+``overlay(session)`` copies the live values onto a model instance that was
+loaded for other reasons (seeding the store from it on a miss).
+"""
+
+import atexit
+import logging
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .session_versions import bump_session_version
+
+logger = logging.getLogger(__name__)
+
+
+METERS = {
+    'climate_resilience': 'current_climate_resilience',
+    'gdp': 'current_gdp',
+    'public_morale': 'current_public_morale',
+    'environmental_health': 'current_environmental_health',
+}
+
+STATE_FIELDS = (
+    'status', 'current_round', 'current_phase',
+    'current_climate_resilience', 'current_gdp', 'current_public_morale', 'current_environmental_health',
+    'round_start_time', 'phase_start_time',
+    'round_duration_minutes', 'question_timer_enabled', 'current_timer_end',
+)
+
+
+class StaleStateError(Exception):
+    """The session state changed since the caller read it"""
+
+    def __init__(self, session_code, expected_version, current_version):
+        self.session_code = session_code
+        self.expected_version = expected_version
+        self.current_version = current_version
+        super().__init__(
+            f"Climate session {session_code} is at version {current_version}, not {expected_version}"
+        )
+
+
+class ClimateState:
+    """Live values for one session; mutate only through ``ClimateStateStore.mutate``"""
+
+    def __init__(self, pk, session_code, values):
+        self.pk = pk
+        self.session_code = session_code
+        self.values = {field: values[field] for field in STATE_FIELDS}
+        # Seeded from the clock so a reloaded state never reuses a version a
+        # client may still hold
+        self.version = int(time.time() * 1000)
+        self.dirty = set()
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['values'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def set(self, field, value):
+        if self.values[field] != value:
+            self.values[field] = value
+            self.dirty.add(field)
+
+    # -- transitions (same semantics as the ClimateGameSession methods) --
+
+    def start_new_round(self, round_number):
+        now = timezone.now()
+        self.set('current_round', round_number)
+        self.set('current_phase', 'scenario_intro')
+        self.set('round_start_time', now)
+        self.set('phase_start_time', now)
+
+    def advance_phase(self, new_phase):
+        self.set('current_phase', new_phase)
+        self.set('phase_start_time', timezone.now())
+
+    def update_meters(self, meter_changes):
+        # Meters are integer columns; round here so memory matches what's stored
+        for meter, field in METERS.items():
+            value = self.values[field] + meter_changes.get(meter, 0)
+            self.set(field, int(round(max(0, min(100, value)))))
+
+    def start_timer(self, duration_minutes=None):
+        if duration_minutes is None:
+            duration_minutes = self.values['round_duration_minutes']
+        self.set('current_timer_end', timezone.now() + timezone.timedelta(minutes=duration_minutes))
+
+    def set_timer_duration(self, minutes):
+        self.set('round_duration_minutes', minutes)
+
+    # -- reads --
+
+    def get_meter_status(self):
+        return {meter: self.values[field] for meter, field in METERS.items()}
+
+    def get_timer_info(self):
+        timer_end = self.values['current_timer_end']
+        if not timer_end:
+            return {
+                'enabled': False,
+                'seconds_remaining': 0,
+                'expired': True
+            }
+
+        seconds_remaining = max(0, (timer_end - timezone.now()).total_seconds())
+        return {
+            'enabled': self.values['question_timer_enabled'],
+            'seconds_remaining': int(seconds_remaining),
+            'expired': seconds_remaining <= 0,
+            'end_time': timer_end.isoformat()
+        }
+
+    def apply_to(self, session):
+        """Copy live values onto a model instance"""
+        for field, value in self.values.items():
+            setattr(session, field, value)
+        session.state_version = self.version
+        return session
+
+
+class ClimateStateStore:
+    """Process-local, sharded map of session code -> ``ClimateState`` with write-behind"""
+
+    def __init__(self, shards=16):
+        self._shards = [(threading.RLock(), {}) for _ in range(shards)]
+        self._flush_lock = threading.Lock()
+        self._flush_timer = None
+        self.flushes = 0
+        self.rows_written = 0
+
+    def _shard(self, session_code):
+        return self._shards[zlib.crc32(session_code.encode()) % len(self._shards)]
+
+    @staticmethod
+    def _load(session_code):
+        from .models import ClimateGameSession
+
+        row = ClimateGameSession.objects.filter(session_code=session_code).values('pk', *STATE_FIELDS).first()
+        if row is None:
+            raise ClimateGameSession.DoesNotExist(f"No climate session {session_code}")
+        return ClimateState(row.pop('pk'), session_code, row)
+
+    def _state(self, session_code, shard_states):
+        state = shard_states.get(session_code)
+        if state is None:
+            state = shard_states[session_code] = self._load(session_code)
+        return state
+
+    def get(self, session_code):
+        """Live state (loads the row on first use); raises ClimateGameSession.DoesNotExist"""
+        lock, states = self._shard(session_code)
+        with lock:
+            return self._state(session_code, states)
+
+    def overlay(self, session):
+        """Make a loaded ``ClimateGameSession`` show the live state"""
+        lock, states = self._shard(session.session_code)
+        with lock:
+            state = states.get(session.session_code)
+            if state is None or state.pk != session.pk:
+                state = states[session.session_code] = ClimateState(
+                    session.pk, session.session_code,
+                    {field: getattr(session, field) for field in STATE_FIELDS}
+                )
+            return state.apply_to(session)
+
+    def mutate(self, session_code, change, expected_version=None):
+        """
+        Apply ``change(state)`` atomically for this session
+
+        Raises ``StaleStateError`` when ``expected_version`` is given and the
+        state has moved on. Returns the state; its version only moves when a
+        field actually changed.
+        """
+        lock, states = self._shard(session_code)
+        with lock:
+            state = self._state(session_code, states)
+            if expected_version is not None and int(expected_version) != state.version:
+                raise StaleStateError(session_code, int(expected_version), state.version)
+
+            dirty_before = set(state.dirty)
+            previous = dict(state.values)
+            change(state)
+            changed = {field for field in STATE_FIELDS if state.values[field] != previous[field]}
+            state.dirty = dirty_before | changed
+            if changed:
+                state.version += 1
+
+        if changed:
+            bump_session_version(session_code)
+            self._schedule_flush(session_code)
+            if 'current_timer_end' in changed:
+                from .timer_service import timer_service
+                timer_service.schedule(session_code, state.current_timer_end)
+        return state
+
+    # Convenience wrappers for the model methods
+
+    def start_new_round(self, session_code, round_number, expected_version=None):
+        return self.mutate(session_code, lambda state: state.start_new_round(round_number), expected_version)
+
+    def advance_phase(self, session_code, new_phase, expected_version=None):
+        return self.mutate(session_code, lambda state: state.advance_phase(new_phase), expected_version)
+
+    def update_meters(self, session_code, meter_changes, expected_version=None):
+        return self.mutate(session_code, lambda state: state.update_meters(meter_changes), expected_version)
+
+    def start_timer(self, session_code, duration_minutes=None, expected_version=None):
+        return self.mutate(session_code, lambda state: state.start_timer(duration_minutes), expected_version)
+
+    def set_timer_duration(self, session_code, minutes, expected_version=None):
+        return self.mutate(session_code, lambda state: state.set_timer_duration(minutes), expected_version)
+
+    def set_status(self, session_code, status, expected_version=None):
+        return self.mutate(session_code, lambda state: state.set('status', status), expected_version)
+
+    # -- write-behind --
+
+    def _schedule_flush(self, session_code):
+        delay = getattr(settings, 'CLIMATE_STATE_FLUSH_SECONDS', 1.0)
+        if not delay:
+            transaction.on_commit(lambda: self.flush(session_code))
+            return
+        with self._flush_lock:
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(delay, self._flush_in_background)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _flush_in_background(self):
+        with self._flush_lock:
+            self._flush_timer = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"💥 Climate state flush failed: {str(e)}", exc_info=True)
+        finally:
+            # Timer threads don't go through request_finished
+            connections.close_all()
+
+    def flush(self, session_code=None):
+        """Persist dirty fields (one UPDATE per session); returns sessions written"""
+        from .models import ClimateGameSession
+
+        pending = []
+        for lock, states in self._shards:
+            with lock:
+                for code, state in states.items():
+                    if state.dirty and (session_code is None or code == session_code):
+                        pending.append((state, {field: state.values[field] for field in state.dirty}))
+                        state.dirty = set()
+
+        written = 0
+        for state, fields in pending:
+            try:
+                ClimateGameSession.objects.filter(pk=state.pk).update(**fields)
+                written += 1
+            except Exception as e:
+                logger.error(f"💥 Failed to flush climate state for {state.session_code}: {str(e)}")
+                lock, _states = self._shard(state.session_code)
+                with lock:
+                    # Keep newer writes to the same fields; retry the rest later
+                    state.dirty |= set(fields)
+
+        if pending:
+            self.flushes += 1
+            self.rows_written += written
+            logger.debug(f"💾 Flushed climate state for {written} sessions")
+        return written
+
+    def discard(self, session_code):
+        """Forget a clean state so the next read reloads it (dirty state is kept)"""
+        lock, states = self._shard(session_code)
+        with lock:
+            state = states.get(session_code)
+            if state is not None and not state.dirty:
+                del states[session_code]
+
+    def clear(self):
+        for lock, states in self._shards:
+            with lock:
+                states.clear()
+
+    def get_stats(self):
+        sessions = dirty = 0
+        for lock, states in self._shards:
+            with lock:
+                sessions += len(states)
+                dirty += sum(1 for state in states.values() if state.dirty)
+        return {
+            'sessions': sessions,
+            'dirty_sessions': dirty,
+            'flushes': self.flushes,
+            'rows_written': self.rows_written,
+        }
+
+
+climate_state = ClimateStateStore()
+atexit.register(climate_state.flush)
+
+
+def _discard_on_write(sender, instance, **kwargs):
+    # Full saves and deletes outside the store win over a clean cached copy
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not set(update_fields) & set(STATE_FIELDS):
+        return
+    climate_state.discard(instance.session_code)
+
+
+def connect_signals():
+    """Register state invalidation receivers (called from AppConfig.ready)"""
+    from .models import ClimateGameSession
+
+    post_save.connect(_discard_on_write, sender=ClimateGameSession, dispatch_uid='climate_state_save')
+    post_delete.connect(_discard_on_write, sender=ClimateGameSession, dispatch_uid='climate_state_delete')
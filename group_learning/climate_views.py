@@ -1,12 +1,14 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from django.contrib import messages
 from django.db.models import Count, Q
 from django.core.exceptions import ValidationError
+from django.db import transaction
 import json
+import time
 import uuid
 import random
 import logging
@@ -20,10 +22,40 @@ from .models import (
 )
 from core.models import GameReview
 from .websocket_utils import (
-    broadcast_game_started, broadcast_phase_change, 
-    broadcast_session_update, broadcast_response_received,
-    broadcast_player_joined
+    broadcast_game_started, broadcast_phase_change, broadcast_response_received
 )
+from .session_versions import conditional_session_get
+from .climate_state import climate_state, StaleStateError
+from .join_pipeline import allocate_join_slot, player_join_broadcasts
+
+
+# Timer status embeds seconds_remaining, so its ETag also rolls over every few seconds
+TIMER_ETAG_BUCKET_SECONDS = 5
+
+
+def _timer_etag_bucket():
+    return str(int(time.time()) // TIMER_ETAG_BUCKET_SECONDS)
+
+
+def get_climate_session(session_code):
+    """Load a session showing its live phase, meters and timer from the state store"""
+    return climate_state.overlay(get_object_or_404(ClimateGameSession, session_code=session_code))
+
+
+def get_climate_state(session_code):
+    """Live state for a session without loading the model (no query once warm)"""
+    try:
+        return climate_state.get(session_code)
+    except ClimateGameSession.DoesNotExist:
+        raise Http404(f"No climate session {session_code}")
+
+
+def stale_state_response(error):
+    return JsonResponse({
+        'success': False,
+        'message': 'Session was updated by someone else. Refresh and try again.',
+        'state_version': error.current_version
+    }, status=409)
 
 
 def get_session_status_for_broadcast(session):
@@ -125,7 +157,7 @@ def climate_facilitator_dashboard(request, session_code):
     """
     Facilitator dashboard to manage game session
     """
-    session = get_object_or_404(ClimateGameSession, session_code=session_code)
+    session = get_climate_session(session_code)
     
     # Get current round scenario
     current_scenario = None
@@ -189,7 +221,7 @@ def join_climate_session(request, session_code):
     """
     Players join a climate game session
     """
-    session = get_object_or_404(ClimateGameSession, session_code=session_code)
+    session = get_climate_session(session_code)
     
     if session.status == 'completed':
         return render(request, 'group_learning/climate/session_ended.html', {'session': session})
@@ -210,46 +242,42 @@ def join_climate_session(request, session_code):
         # Generate player session ID
         player_session_id = str(uuid.uuid4())
         
-        # Assign role (auto-assign evenly across 5 roles)
-        assigned_role = auto_assign_role(session)
-        
-        # Create placeholder ClimatePlayerResponse to show player in dashboard
-        # This allows the facilitator to see who has joined before the game starts
-        logger.info(f"Creating ClimatePlayerResponse for player: {player_name} (ID: {player_session_id}) in session {session_code} with role {assigned_role}")
-        
         try:
-            response_entry = ClimatePlayerResponse.objects.create(
-                climate_session=session,
-                player_name=player_name,
-                player_session_id=player_session_id,
-                assigned_role=assigned_role,
-                round_number=0,  # Special round number for lobby entries
-                climate_scenario=None,  # No scenario yet
-                selected_option=None,  # No response yet
-                response_time=0
-            )
-            logger.info(f"Successfully created ClimatePlayerResponse ID: {response_entry.id}")
+            with transaction.atomic():
+                # Claim a join ordinal with a conditional UPDATE; roles rotate with it
+                slot = allocate_join_slot(ClimateGameSession.objects, session.pk, 'players_joined')
+                if slot is None:
+                    raise ValidationError('Session is no longer available')
+                assigned_role = auto_assign_role(session, slot)
+                
+                # Create placeholder ClimatePlayerResponse to show player in dashboard
+                # This allows the facilitator to see who has joined before the game starts
+                logger.info(f"Creating ClimatePlayerResponse for player: {player_name} (ID: {player_session_id}) in session {session_code} with role {assigned_role}")
+                response_entry = ClimatePlayerResponse.objects.create(
+                    climate_session=session,
+                    player_name=player_name,
+                    player_session_id=player_session_id,
+                    assigned_role=assigned_role,
+                    round_number=0,  # Special round number for lobby entries
+                    climate_scenario=None,  # No scenario yet
+                    selected_option=None,  # No response yet
+                    response_time=0
+                )
+                logger.info(f"Successfully created ClimatePlayerResponse ID: {response_entry.id}")
+                
+                # Broadcast player joined plus a session update; joins in the same window share one snapshot
+                player_join_broadcasts.add(session_code, player_name)
         except Exception as e:
             logger.error(f"Failed to create ClimatePlayerResponse: {str(e)}")
             logger.error(f"Full traceback: ", exc_info=True)
             messages.error(request, 'Error joining session. Please try again.')
             return render(request, 'group_learning/climate/join_session.html', {'session': session})
         
-        # Store player info in session
+        # Store player info in session (saved by the session middleware with the response)
         request.session['climate_player_session_id'] = player_session_id
         request.session['climate_player_name'] = player_name
         request.session['climate_assigned_role'] = assigned_role
         request.session['climate_session_code'] = session_code
-        request.session.save()  # Explicitly save session data
-        
-        # Broadcast player joined via WebSocket using unified count method
-        total_players = session.get_active_player_count()
-        logger.info(f"Broadcasting player joined: {player_name} to session {session_code}, total players now: {total_players}")
-        broadcast_player_joined(session_code, player_name, total_players)
-        
-        # Also broadcast full session update to refresh student lists
-        session_data = get_session_status_for_broadcast(session)
-        broadcast_session_update(session_code, session_data)
         
         return redirect('group_learning:climate_game_lobby', session_code=session_code)
     
@@ -260,7 +288,7 @@ def climate_game_lobby(request, session_code):
     """
     Game lobby where players wait for game to start
     """
-    session = get_object_or_404(ClimateGameSession, session_code=session_code)
+    session = get_climate_session(session_code)
     
     # Check if player is properly registered
     player_session_id = request.session.get('climate_player_session_id')
@@ -301,7 +329,7 @@ def climate_game_play(request, session_code):
     """
     Main game play interface - routes to appropriate phase
     """
-    session = get_object_or_404(ClimateGameSession, session_code=session_code)
+    session = get_climate_session(session_code)
     
     # Check player registration
     player_session_id = request.session.get('climate_player_session_id')
@@ -469,7 +497,7 @@ def climate_impact_results(request, session_code):
     """
     Show detailed impact results and reasoning for student's decision
     """
-    session = get_object_or_404(ClimateGameSession, session_code=session_code)
+    session = get_climate_session(session_code)
     
     # Check player registration
     player_session_id = request.session.get('climate_player_session_id')
@@ -606,31 +634,34 @@ def start_climate_game(request, session_code):
     """
     Facilitator starts the climate game with atomic state transitions
     """
-    from django.db import transaction
-    
-    session = get_object_or_404(ClimateGameSession, session_code=session_code)
+    session = get_climate_session(session_code)
     
     if session.status == 'waiting':
-        # Atomic transaction ensures database consistency
-        with transaction.atomic():
-            old_phase = session.current_phase
-            session.status = 'in_progress'
-            session.start_new_round(1)
-            session.save()
-            
-            # Log state transition for production monitoring
-            logger.info(
-                f"[STATE_TRANSITION] Session {session_code}: {old_phase} -> {session.current_phase}",
-                extra={
-                    'session_code': session_code,
-                    'old_phase': old_phase,
-                    'new_phase': session.current_phase,
-                    'round': session.current_round,
-                    'status': session.status
-                }
-            )
+        old_phase = session.current_phase
+        
+        def start_game(state):
+            state.set('status', 'in_progress')
+            state.start_new_round(1)
+        
+        # Versioned so two clicks on "Start" can't both start the game
+        try:
+            climate_state.mutate(session_code, start_game, expected_version=session.state_version).apply_to(session)
+        except StaleStateError:
+            return JsonResponse({'success': False, 'message': 'Game already started'})
+        
+        # Log state transition for production monitoring
+        logger.info(
+            f"[STATE_TRANSITION] Session {session_code}: {old_phase} -> {session.current_phase}",
+            extra={
+                'session_code': session_code,
+                'old_phase': old_phase,
+                'new_phase': session.current_phase,
+                'round': session.current_round,
+                'status': session.status
+            }
+        )
         
-        # After successful database commit, broadcast WebSocket events
+        # Broadcast the new state (persisted write-behind)
         try:
             # Broadcast game started event via WebSocket
             broadcast_game_started(session_code)
@@ -667,7 +698,7 @@ def advance_climate_phase(request, session_code):
     """
     Facilitator advances to next phase
     """
-    session = get_object_or_404(ClimateGameSession, session_code=session_code)
+    session = get_climate_session(session_code)
     new_phase = request.POST.get('phase')
     
     # If no phase specified, determine next phase automatically
@@ -687,42 +718,55 @@ def advance_climate_phase(request, session_code):
     valid_phases = ['scenario_intro', 'question_phase', 'results_feedback', 'round_complete', 'game_complete']
     
     if new_phase in valid_phases:
-        session.advance_phase(new_phase)
-        
-        # If starting new round
-        if new_phase == 'scenario_intro' and session.current_round < 5:
-            session.start_new_round(session.current_round + 1)
+        # The next phase was worked out from the state we read; refuse to apply
+        # it on top of a newer change (e.g. a double click or a second tab)
+        client_version = request.POST.get('state_version', '')
+        expected_version = int(client_version) if client_version.isdigit() else session.state_version
         
-        # Auto-start timer when entering question phase
-        if new_phase == 'question_phase' and session.question_timer_enabled:
-            session.start_timer()  # Uses default 10min duration
+        def advance(state):
+            state.advance_phase(new_phase)
             
+            # If starting new round
+            if new_phase == 'scenario_intro' and state.current_round < 5:
+                state.start_new_round(state.current_round + 1)
+            
+            # Auto-start timer when entering question phase
+            if new_phase == 'question_phase' and state.question_timer_enabled:
+                state.start_timer()  # Uses default 10min duration
+        
+        try:
+            state = climate_state.mutate(session_code, advance, expected_version=expected_version)
+        except StaleStateError as e:
+            return stale_state_response(e)
+        
+        if new_phase == 'question_phase' and state.question_timer_enabled:
             # Broadcast timer started
             from .websocket_utils import broadcast_timer_started
-            timer_info = session.get_timer_info()
-            broadcast_timer_started(session_code, timer_info)
+            broadcast_timer_started(session_code, state.get_timer_info())
         
         # Broadcast phase change via WebSocket
         broadcast_phase_change(
             session_code,
-            session.current_phase,
-            session.current_round
+            state.current_phase,
+            state.current_round
         )
         
         return JsonResponse({
             'success': True,
-            'current_phase': session.current_phase,
-            'current_round': session.current_round
+            'current_phase': state.current_phase,
+            'current_round': state.current_round,
+            'state_version': state.version
         })
     
     return JsonResponse({'success': False, 'message': 'Invalid phase'})
 
 
+@conditional_session_get('climate_session_status')
 def get_climate_session_status(request, session_code):
     """
     Get real-time session status for polling
     """
-    session = get_object_or_404(ClimateGameSession, session_code=session_code)
+    session = get_climate_session(session_code)
     
     # Count responses for current round
     current_responses = ClimatePlayerResponse.objects.filter(
@@ -758,10 +802,18 @@ def generate_session_code():
             return code
 
 
-def auto_assign_role(session):
-    """Auto-assign roles evenly across players"""
+def auto_assign_role(session, join_slot=None):
+    """
+    Auto-assign roles evenly across players
+    
+    With a join slot (the player's 1-based join ordinal) roles simply rotate,
+    which stays even under concurrent joins without counting existing players.
+    """
     roles = ['government', 'business', 'farmer', 'urban_citizen', 'ngo_worker']
     
+    if join_slot is not None:
+        return roles[(join_slot - 1) % len(roles)]
+    
     # Count existing role assignments
     role_counts = defaultdict(int)
     existing_responses = ClimatePlayerResponse.objects.filter(climate_session=session)
@@ -1515,7 +1567,7 @@ def quick_test_join(request, session_code, role=None):
     Quick join test session with specified role or auto-assign
     """
     try:
-        session = get_object_or_404(ClimateGameSession, session_code=session_code)
+        session = get_climate_session(session_code)
         
         # Available roles for testing
         available_roles = ['government', 'business', 'farmer', 'urban_citizen', 'ngo_worker']
@@ -1569,18 +1621,19 @@ def set_timer_duration(request, session_code):
     """
     Facilitator sets timer duration for rounds
     """
-    session = get_object_or_404(ClimateGameSession, session_code=session_code)
+    get_climate_state(session_code)
     
     try:
         duration_minutes = int(request.POST.get('duration', 5))
         if duration_minutes < 1 or duration_minutes > 30:
             return JsonResponse({'success': False, 'message': 'Duration must be between 1-30 minutes'})
         
-        session.set_timer_duration(duration_minutes)
+        state = climate_state.set_timer_duration(session_code, duration_minutes)
         
         return JsonResponse({
             'success': True,
             'duration': duration_minutes,
+            'state_version': state.version,
             'message': f'Timer duration set to {duration_minutes} minutes'
         })
     except ValueError:
@@ -1593,7 +1646,7 @@ def start_round_timer(request, session_code):
     """
     Facilitator starts timer for current round
     """
-    session = get_object_or_404(ClimateGameSession, session_code=session_code)
+    get_climate_state(session_code)
     
     try:
         duration_minutes = None
@@ -1612,11 +1665,11 @@ def start_round_timer(request, session_code):
         
         if duration_minutes:
             duration_minutes = int(duration_minutes)
-            session.start_timer(duration_minutes)
+            state = climate_state.start_timer(session_code, duration_minutes)
         else:
-            session.start_timer()
+            state = climate_state.start_timer(session_code)
         
-        timer_info = session.get_timer_info()
+        timer_info = state.get_timer_info()
         
         # Broadcast timer started via WebSocket
         from .websocket_utils import broadcast_timer_started
@@ -1631,15 +1684,16 @@ def start_round_timer(request, session_code):
         return JsonResponse({'success': False, 'message': str(e)})
 
 
+@conditional_session_get('climate_timer_status', etag_suffix=_timer_etag_bucket)
 def get_timer_status(request, session_code):
     """
     Get current timer status for session
     """
-    session = get_object_or_404(ClimateGameSession, session_code=session_code)
-    timer_info = session.get_timer_info()
+    state = get_climate_state(session_code)
+    timer_info = state.get_timer_info()
     
     return JsonResponse({
         'success': True,
         'timer_info': timer_info,
-        'round_duration_minutes': session.round_duration_minutes
+        'round_duration_minutes': state.round_duration_minutes
     })
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+Connect-time caches for the WebSocket consumers
+
+Every ``connect`` checks that the session code exists and then sends an
+initial status snapshot. Reconnect storms and bots probing random codes used
+to turn each of those into fresh queries. Existence results (hits and misses)
+are kept for a short TTL, initial-status snapshots are shared per session
+version, and concurrent lookups for the same key wait on a single in-flight
+load - so N simultaneous connects to one session cost one query.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.db.models.signals import post_save, post_delete
+
+from .session_versions import SessionVersions
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightTTLCache:
+    """
+    Bounded in-process TTL cache with single-flight async loading
+
+    ``get_or_load(key, loader)`` returns the cached value, or awaits the one
+    in-flight load for ``key`` if another coroutine already started it, or
+    runs ``loader()`` itself. ``ttl_for(value)`` picks each entry's lifetime;
+    returning 0 or None skips caching (e.g. error payloads).
+    """
+
+    def __init__(self, name, ttl_for, max_entries=2000):
+        self.name = name
+        self.ttl_for = ttl_for
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """(found, value) for a live entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value):
+        ttl = self.ttl_for(value)
+        if not ttl:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, match):
+        """Drop every entry whose key satisfies ``match(key)``"""
+        with self._lock:
+            for key in [key for key in self._entries if match(key)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self.hits = self.misses = 0
+
+    async def get_or_load(self, key, loader):
+        found, value = self.get(key)
+        if found:
+            self.hits += 1
+            return value
+
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight[0] is loop:
+            self.hits += 1
+            return await asyncio.shield(inflight[1])
+
+        self.misses += 1
+        future = loop.create_future()
+        self._inflight[key] = (loop, future)
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieve it so a load nobody else awaited doesn't log "never retrieved"
+            future.exception()
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            if self._inflight.get(key, (None, None))[1] is future:
+                del self._inflight[key]
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0,
+        }
+
+
+# Existing sessions are cached longer than misses so a code created right
+# after being probed becomes joinable quickly (creation also evicts the miss)
+EXISTS_TTL_SECONDS = 300
+MISSING_TTL_SECONDS = 30
+# Snapshots are keyed by session version; the TTL only bounds staleness from
+# writes that bypass model signals
+STATUS_TTL_SECONDS = 30
+
+
+def _existence_ttl(exists):
+    return EXISTS_TTL_SECONDS if exists else MISSING_TTL_SECONDS
+
+
+def _status_ttl(session_data):
+    if not session_data or 'error' in session_data:
+        return None
+    return STATUS_TTL_SECONDS
+
+
+session_existence_cache = SingleFlightTTLCache('session_exists', _existence_ttl, max_entries=5000)
+initial_status_cache = SingleFlightTTLCache('initial_status', _status_ttl, max_entries=500)
+
+
+async def cached_session_exists(kind, session_code, loader):
+    """Existence check shared by every connect for ``(kind, session_code)``"""
+    return await session_existence_cache.get_or_load((kind, session_code), loader)
+
+
+async def cached_initial_status(kind, session_code, loader):
+    """
+    Initial status snapshot shared by connects at the same session version
+
+    The version is read before loading, so a concurrent write can only leave
+    the snapshot filed under an older version, never a newer one. Callers must
+    treat the returned dict as read-only.
+    """
+    version = SessionVersions.get(session_code)
+    return await initial_status_cache.get_or_load((kind, session_code, version), loader)
+
+
+def invalidate_session(session_code):
+    """Forget cached existence and snapshots for a session code"""
+    session_existence_cache.invalidate(lambda key: key[1] == session_code)
+    initial_status_cache.invalidate(lambda key: key[1] == session_code)
+
+
+def _invalidate_for_session(sender, instance, created=False, **kwargs):
+    # Creation evicts a cached miss; deletion evicts a cached hit
+    if created or kwargs.get('signal') is post_delete:
+        invalidate_session(instance.session_code)
+
+
+def connect_signals():
+    """Register cache invalidation receivers (called from AppConfig.ready)"""
+    from .models import GameSession, ClimateGameSession, DesignThinkingSession
+
+    for session_model in (GameSession, ClimateGameSession, DesignThinkingSession):
+        post_save.connect(_invalidate_for_session, sender=session_model, dispatch_uid=f'connect_cache_{session_model.__name__}')
+        post_delete.connect(_invalidate_for_session, sender=session_model, dispatch_uid=f'connect_cache_del_{session_model.__name__}')
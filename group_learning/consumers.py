@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
+from django.db.models import Count
 from django.utils import timezone
 from django.conf import settings
 from .models import (
@@ -17,11 +18,21 @@ from .models import (
     DesignThinkingSession, DesignTeam, DesignMission, TeamSubmission, TeamProgress
 )
 from .monitoring import log_websocket_event
+from .connect_cache import cached_session_exists, cached_initial_status
+from .outbound_queue import OutboundQueueMixin
+from .rate_limiting import RateLimitMixin
+from .nudge_engine import nudge_engine
+from .climate_state import climate_state
+from .timer_service import timer_service
+from .join_pipeline import player_join_broadcasts, team_join_broadcasts
+from .feedback_delivery import (
+    MAX_BULK_FEEDBACK, create_feedback_bulk, feedback_ack_buffer, pending_feedback
+)
 
 logger = logging.getLogger(__name__)
 
 
-class ClimateGameConsumer(AsyncWebsocketConsumer):
+class ClimateGameConsumer(RateLimitMixin, OutboundQueueMixin, AsyncWebsocketConsumer):
     """
     WebSocket consumer for Climate Game sessions
     Handles real-time updates for facilitators and players
@@ -45,7 +56,9 @@ class ClimateGameConsumer(AsyncWebsocketConsumer):
         
         # Validate session exists
         try:
-            session_exists = await self.get_session_exists(self.session_code)
+            session_exists = await cached_session_exists(
+                'climate', self.session_code, lambda: self.get_session_exists(self.session_code)
+            )
             logger.info(f"✅ Session existence check: {session_exists} for {self.session_code}")
         except Exception as e:
             logger.error(f"💥 Database error during session check: {str(e)}")
@@ -77,12 +90,19 @@ class ClimateGameConsumer(AsyncWebsocketConsumer):
             # Start ping monitoring task
             self.ping_task = asyncio.create_task(self.ping_monitor())
             
+            # Round timer ticks are pushed by the shared tick service
+            timer_service.attach()
+            self.timer_service_attached = True
+            player_join_broadcasts.attach()
+            
         except Exception as e:
             logger.error(f"💥 Failed to accept WebSocket connection: {str(e)}")
             return
         
-        # Send initial session state
-        session_data = await self.get_session_status(self.session_code)
+        # Send initial session state (snapshot shared by connects at the same session version)
+        session_data = await cached_initial_status(
+            'climate', self.session_code, lambda: self.get_session_status(self.session_code)
+        )
         await self.send(text_data=json.dumps({
             'type': 'session_status',
             'data': session_data
@@ -100,6 +120,10 @@ class ClimateGameConsumer(AsyncWebsocketConsumer):
             except asyncio.CancelledError:
                 pass
         
+        if getattr(self, 'timer_service_attached', False):
+            timer_service.detach()
+            self.timer_service_attached = False
+        
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
@@ -115,6 +139,9 @@ class ClimateGameConsumer(AsyncWebsocketConsumer):
             data = json.loads(text_data)
             message_type = data.get('type')
             
+            if not await self.allow_message(message_type, data):
+                return
+            
             if message_type == 'ping':
                 # Update last ping time and respond
                 self.last_ping = timezone.now()
@@ -185,6 +212,7 @@ class ClimateGameConsumer(AsyncWebsocketConsumer):
         await self.send(text_data=json.dumps({
             'type': 'player_joined',
             'player_name': event['player_name'],
+            'player_names': event.get('player_names') or [event['player_name']],
             'total_players': event['total_players']
         }))
 
@@ -224,8 +252,8 @@ class ClimateGameConsumer(AsyncWebsocketConsumer):
         }))
 
     async def timer_update(self, event):
-        """Handle timer update notification"""
-        logger.info(f"🕐 Broadcasting timer_update to {self.session_code} - Connection: {self.connection_id}")
+        """Handle timer update notification (sent every few seconds by the tick service)"""
+        logger.debug(f"🕐 Broadcasting timer_update to {self.session_code} - Connection: {self.connection_id}")
         await self.send(text_data=json.dumps({
             'type': 'timer_update',
             'end_time': event.get('end_time'),
@@ -233,6 +261,15 @@ class ClimateGameConsumer(AsyncWebsocketConsumer):
             'remaining_time': event.get('remaining_time')
         }))
 
+    async def timer_expired(self, event):
+        """Handle timer expiry notification"""
+        logger.info(f"⏰ Broadcasting timer_expired to {self.session_code} - Connection: {self.connection_id}")
+        await self.send(text_data=json.dumps({
+            'type': 'timer_expired',
+            'end_time': event.get('end_time'),
+            'timer_info': event.get('timer_info', {})
+        }))
+
     # Database helper methods
     @database_sync_to_async
     def get_session_exists(self, session_code):
@@ -243,7 +280,7 @@ class ClimateGameConsumer(AsyncWebsocketConsumer):
     def get_session_status(self, session_code):
         """Get current session status"""
         try:
-            session = ClimateGameSession.objects.get(session_code=session_code)
+            session = climate_state.overlay(ClimateGameSession.objects.get(session_code=session_code))
             
             # Count responses for current round
             current_responses = ClimatePlayerResponse.objects.filter(
@@ -282,6 +319,9 @@ class ClimateGameConsumer(AsyncWebsocketConsumer):
                 'environment_health': getattr(session, 'environment_health', 50),
                 'economy_health': getattr(session, 'economy_health', 50),
                 'social_equity': getattr(session, 'social_equity', 50),
+                'meter_status': session.get_meter_status(),
+                'timer_info': session.get_timer_info(),
+                'state_version': session.state_version,
             }
         except ClimateGameSession.DoesNotExist:
             return None
@@ -300,7 +340,9 @@ class ClimateGameConsumer(AsyncWebsocketConsumer):
             1014: "Bad gateway",
             1015: "TLS handshake failure",
             4004: "Session not found",
-            4005: "Connection timeout"
+            4005: "Connection timeout",
+            4006: "Rate limit exceeded",
+            4008: "Slow consumer (reconnect to resync)"
         }
         return reasons.get(close_code, f"Unknown code {close_code}")
 
@@ -326,7 +368,7 @@ class ClimateGameConsumer(AsyncWebsocketConsumer):
 # This eliminates dual WebSocket architecture and prevents race conditions
 
 
-class DesignThinkingConsumer(AsyncWebsocketConsumer):
+class DesignThinkingConsumer(RateLimitMixin, OutboundQueueMixin, AsyncWebsocketConsumer):
     """
     WebSocket consumer for Design Thinking sessions
     Handles real-time updates for facilitators and teams
@@ -347,7 +389,9 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
         
         # Validate session exists
         try:
-            session_exists = await self.get_design_session_exists(self.session_code)
+            session_exists = await cached_session_exists(
+                'design_thinking', self.session_code, lambda: self.get_design_session_exists(self.session_code)
+            )
             logger.info(f"✅ Design session existence check: {session_exists} for {self.session_code}")
         except Exception as e:
             logger.error(f"💥 Database error during design session check: {str(e)}")
@@ -379,8 +423,15 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
             # Start ping monitoring task
             self.ping_task = asyncio.create_task(self.design_ping_monitor())
             
-            # Send initial session status
-            session_status = await self.get_design_session_status(self.session_code)
+            # Keep the Vani nudge scan running while anyone is connected
+            nudge_engine.attach()
+            self.nudge_engine_attached = True
+            team_join_broadcasts.attach()
+            
+            # Send initial session status (snapshot shared by connects at the same session version)
+            session_status = await cached_initial_status(
+                'design_thinking', self.session_code, lambda: self.get_design_session_status(self.session_code)
+            )
             await self.send(text_data=json.dumps({
                 'type': 'session_status',
                 'data': session_status
@@ -400,6 +451,10 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
             except asyncio.CancelledError:
                 pass
         
+        if getattr(self, 'nudge_engine_attached', False):
+            nudge_engine.detach()
+            self.nudge_engine_attached = False
+        
         disconnect_reason = self.get_close_reason(close_code)
         logger.info(f"🔌 Design Thinking WebSocket DISCONNECT - Session: {self.session_code}, Code: {close_code} ({disconnect_reason})")
         
@@ -431,16 +486,25 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
             
             logger.info(f"📨 Design Thinking WebSocket message received - Type: {message_type}, Session: {self.session_code}")
             
+            if not await self.allow_message(message_type, data):
+                return
+            
             if message_type == 'mission_control':
                 await self.handle_mission_control(data)
             elif message_type == 'team_update':
                 await self.handle_team_update(data)
             elif message_type == 'simplified_input_submit':
                 await self.handle_simplified_input(data)
+            elif message_type == 'phase_inputs_submit':
+                await self.handle_phase_inputs_submit(data)
             elif message_type == 'teacher_score_submit':
                 await self.handle_teacher_scoring(data)
             elif message_type == 'teacher_feedback_submit':
                 await self.handle_teacher_feedback(data)
+            elif message_type == 'teacher_feedback_bulk_submit':
+                await self.handle_teacher_feedback_bulk(data)
+            elif message_type == 'feedback_ack':
+                self.handle_feedback_ack(data)
             elif message_type == 'vani_nudge':
                 await self.handle_vani_nudge(data)
             elif message_type == 'ping':
@@ -460,12 +524,14 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
             elif message_type == 'join_as_student':
                 self.user_type = 'student'
                 team_id = data.get('team_id')
+                self.team_id = team_id
                 student_data = data.get('student_data', {})
                 await self.send(text_data=json.dumps({
                     'type': 'joined',
                     'role': 'student',
                     'team_id': team_id
                 }))
+                await self.replay_pending_feedback()
             elif message_type == 'heartbeat_response':
                 # Client responded to heartbeat
                 self.last_ping = timezone.now()
@@ -520,11 +586,6 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
                 await self.send_error('Missing required fields for input submission')
                 return
             
-            # Rate limiting check
-            if not await self.check_rate_limit(team_id):
-                await self.send_error('Too many submissions. Please wait before trying again.')
-                return
-            
             # Process through auto-progression service
             from .auto_progression_service import auto_progression_service
             
@@ -560,6 +621,45 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
             logger.error(f"Unexpected error handling simplified input: {str(e)}", exc_info=True)
             await self.send_error('Internal server error. Please try again later.', retry_allowed=True)
 
+    async def handle_phase_inputs_submit(self, data):
+        """Handle a batch of phase inputs from several students in one message"""
+        try:
+            team_id = data.get('team_id')
+            mission_id = data.get('mission_id')
+            submissions = data.get('submissions')
+            
+            if not all([team_id, mission_id, submissions]):
+                await self.send_error('Missing required fields for batch input submission')
+                return
+            
+            from .auto_progression_service import auto_progression_service
+            
+            result = await self.run_in_executor(
+                auto_progression_service.process_phase_inputs,
+                team_id, mission_id, submissions
+            )
+            
+            if result.get('success'):
+                # Teachers receive the batch through the phase_inputs_submitted group message
+                await self.send(text_data=json.dumps({
+                    'type': 'phase_inputs_submission_success',
+                    'phase_input_ids': result.get('phase_input_ids'),
+                    'completion_result': result.get('completion_result'),
+                    'progression_result': result.get('progression_result'),
+                    'timestamp': timezone.now().isoformat()
+                }))
+                
+                progression_result = result.get('progression_result', {})
+                if progression_result.get('should_advance'):
+                    await self.handle_auto_advancement(progression_result)
+                    
+            else:
+                await self.send_error(result.get('error', 'Unknown error occurred'), result.get('retry_allowed', False))
+                
+        except Exception as e:
+            logger.error(f"Unexpected error handling batch input submission: {str(e)}", exc_info=True)
+            await self.send_error('Internal server error. Please try again later.', retry_allowed=True)
+
     async def handle_teacher_scoring(self, data):
         """Handle teacher scoring of team submissions"""
         try:
@@ -583,11 +683,8 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
         """Handle real-time teacher feedback submission"""
         try:
             team_id = data.get('team_id')
-            submission_id = data.get('submission_id')
             message = data.get('message', '').strip()
             score = data.get('score')
-            feedback_type = data.get('feedback_type', 'teacher_message')
-            sender_name = data.get('sender_name', 'Teacher')
             
             # Validation
             if not team_id:
@@ -599,26 +696,75 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
                 return
             
             # Create feedback record
-            feedback_created = await self.create_feedback_record(
-                team_id, submission_id, message, score, feedback_type, sender_name
-            )
+            created, errors = await self.create_feedback_records([data], data.get('sender_name', 'Teacher'))
             
-            if feedback_created:
-                # Broadcast feedback to students in real-time
-                await self.broadcast_teacher_feedback(feedback_created)
-                
-                # Send success confirmation to teacher
-                await self.send(text_data=json.dumps({
-                    'type': 'feedback_submission_success',
-                    'feedback_id': feedback_created['id'],
-                    'team_id': team_id,
-                    'timestamp': timezone.now().isoformat()
-                }))
+            if errors:
+                await self.send_error(errors[0]['error'])
+                return
+            
+            # Broadcast feedback to students in real-time
+            await self.broadcast_teacher_feedback(created)
+            
+            # Send success confirmation to teacher
+            await self.send(text_data=json.dumps({
+                'type': 'feedback_submission_success',
+                'feedback_id': next(iter(created.values()))[0]['id'],
+                'team_id': team_id,
+                'timestamp': timezone.now().isoformat()
+            }))
                 
         except Exception as e:
             logger.error(f"Error handling teacher feedback: {str(e)}")
             await self.send_error('Failed to save teacher feedback')
 
+    async def handle_teacher_feedback_bulk(self, data):
+        """
+        Handle feedback for many teams in one message
+        
+        Accepts ``items`` (one dict per team, same fields as
+        ``teacher_feedback_submit``) or ``team_ids`` with a shared
+        ``message``/``score``.
+        """
+        try:
+            items = data.get('items')
+            if items is None:
+                items = [
+                    {
+                        'team_id': team_id,
+                        'message': data.get('message', ''),
+                        'score': data.get('score'),
+                        'feedback_type': data.get('feedback_type'),
+                        'is_urgent': data.get('is_urgent'),
+                    }
+                    for team_id in data.get('team_ids', [])
+                ]
+            if not items:
+                await self.send_error('No feedback items provided')
+                return
+            if len(items) > MAX_BULK_FEEDBACK:
+                await self.send_error(f'At most {MAX_BULK_FEEDBACK} feedback items per batch')
+                return
+
+            created, errors = await self.create_feedback_records(items, data.get('sender_name', 'Teacher'))
+            await self.broadcast_teacher_feedback(created)
+
+            await self.send(text_data=json.dumps({
+                'type': 'feedback_bulk_submission_success',
+                'feedback_ids': [feedback['id'] for feedback_list in created.values() for feedback in feedback_list],
+                'errors': errors,
+                'timestamp': timezone.now().isoformat()
+            }))
+
+        except Exception as e:
+            logger.error(f"Error handling bulk teacher feedback: {str(e)}")
+            await self.send_error('Failed to save teacher feedback')
+
+    def handle_feedback_ack(self, data):
+        """Student confirmed it showed these feedback messages; flushed in batches"""
+        if self.user_type != 'student' or not self.team_id:
+            return
+        feedback_ack_buffer.ack(self.session_code, self.team_id, data.get('feedback_ids'))
+
     async def handle_vani_nudge(self, data):
         """Handle Vani mentor nudge requests"""
         await self.send_group_message('vani_nudge', data.get('nudge_data'))
@@ -650,6 +796,15 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
             'timestamp': event.get('timestamp')
         }))
 
+    async def session_progress_diff(self, event):
+        """Send the change to the session progress snapshot to client"""
+        await self.send(text_data=json.dumps({
+            'type': 'progress_update',
+            'progress_diff': event['progress_diff'],
+            'version': event['version'],
+            'timestamp': event.get('timestamp')
+        }))
+
     async def team_spotlight(self, event):
         """Send team spotlight notification to client"""
         await self.send(text_data=json.dumps({
@@ -667,6 +822,17 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
             'timestamp': event.get('timestamp')
         }))
 
+    async def vani_nudges(self, event):
+        """Send a scan's batch of rule-based Vani nudges (students only get their own team's)"""
+        for nudge_data in event['nudges']:
+            if self.team_id and str(nudge_data.get('team_id')) != str(self.team_id):
+                continue
+            await self.send(text_data=json.dumps({
+                'type': 'vani_nudge',
+                'nudge_data': nudge_data,
+                'timestamp': event.get('timestamp')
+            }))
+
     async def session_status_update(self, event):
         """Send session status update to client"""
         await self.send(text_data=json.dumps({
@@ -680,6 +846,7 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
         await self.send(text_data=json.dumps({
             'type': 'team_joined',
             'team_data': event['team_data'],
+            'teams_joined': event.get('teams_joined') or [event['team_data']],
             'session_data': event['session_data'],
             'timestamp': event.get('timestamp')
         }))
@@ -694,14 +861,43 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
             'timestamp': event.get('timestamp')
         }))
 
-    async def teacher_feedback_update(self, event):
-        """Send teacher feedback update to client"""
+    async def phase_inputs_submitted(self, event):
+        """Fan a batched submission out to the per-submission frames clients already handle"""
         await self.send(text_data=json.dumps({
-            'type': 'teacher_feedback',
-            'feedback_data': event['feedback_data'],
-            'team_data': event.get('team_data'),
+            'type': 'input_submission',
+            'team_data': event['team_data'],
+            'input_data': event['input_data'],
+            'auto_advance_result': event.get('auto_advance_result'),
             'timestamp': event.get('timestamp')
         }))
+        await self.send(text_data=json.dumps({
+            'type': 'completion_status',
+            'team_data': event['team_data'],
+            'completion_percentage': event['completion_percentage'],
+            'is_ready_to_advance': event['is_ready_to_advance'],
+            'timestamp': event.get('timestamp')
+        }))
+        for submission_data in event.get('submissions', []):
+            await self.send(text_data=json.dumps({
+                'type': 'submission_for_review',
+                'submission_data': submission_data,
+                'team_data': event['team_data'],
+                'timestamp': event.get('timestamp')
+            }))
+
+    async def teacher_feedback_batch(self, event):
+        """Send teacher feedback to client (students only get their own team's)"""
+        for feedback_data in event['feedback']:
+            if self.team_id and str(feedback_data['team_id']) != str(self.team_id):
+                continue
+            await self.send(text_data=json.dumps({
+                'type': 'teacher_feedback',
+                'feedback_data': feedback_data,
+                'team_data': {
+                    'id': feedback_data['team_id']
+                },
+                'timestamp': event.get('timestamp')
+            }))
 
     async def student_submission_for_review(self, event):
         """Send student submission to teacher dashboard for review"""
@@ -943,29 +1139,6 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
         await self.send(text_data=json.dumps(error_response))
         logger.warning(f"🚨 Sent error to client: {message} (retry_allowed: {retry_allowed})")
     
-    async def check_rate_limit(self, team_id):
-        """Check if team is within rate limits for submissions"""
-        try:
-            # Simple rate limiting: max 10 submissions per minute per team
-            from django.core.cache import cache
-            cache_key = f'rate_limit_team_{team_id}'
-            current_time = timezone.now()
-            
-            # Get submission count from last minute
-            submission_count = cache.get(cache_key, 0)
-            
-            if submission_count >= 10:
-                logger.warning(f"⚠️ Rate limit exceeded for team {team_id}: {submission_count} submissions")
-                return False
-            
-            # Increment counter with 60-second expiry
-            cache.set(cache_key, submission_count + 1, 60)
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error checking rate limit: {str(e)}")
-            return True  # Allow on error to avoid blocking legitimate requests
-    
     async def design_ping_monitor(self):
         """Monitor connection health with ping/pong and automatic reconnection"""
         try:
@@ -1021,7 +1194,8 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
             4003: 'Database error',
             4004: 'Session not found',
             4005: 'Connection recovery failed',
-            4006: 'Rate limit exceeded'
+            4006: 'Rate limit exceeded',
+            4008: 'Slow consumer (reconnect to resync)'
         }
         return close_reasons.get(close_code, f'Unknown ({close_code})')
     
@@ -1278,12 +1452,14 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
             # Get teams and their progress
             teams_data = []
             try:
-                for team in session.design_teams.all():
+                for team in session.design_teams.annotate(membership_count=Count('memberships')):
                     teams_data.append({
                         'id': team.id,
                         'name': team.team_name,
                         'emoji': team.team_emoji,
                         'color': team.team_color,
+                        'member_count': team.member_count,
+                        'members': team.member_names,
                         'missions_completed': getattr(team, 'missions_completed', 0),
                         'total_submissions': getattr(team, 'total_submissions', 0),
                         'progress_percentage': getattr(team, 'get_progress_percentage', lambda: 0)()
@@ -1353,12 +1529,14 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
     def get_team_data(self, team_id):
         """Get team data for broadcasting"""
         try:
-            team = DesignTeam.objects.get(id=team_id)
+            team = DesignTeam.objects.annotate(membership_count=Count('memberships')).get(id=team_id)
             return {
                 'id': team.id,
                 'name': team.team_name,
                 'emoji': team.team_emoji,
                 'color': getattr(team, 'team_color', '#3B82F6'),
+                'member_count': team.member_count,
+                'members': team.member_names,
                 'missions_completed': getattr(team, 'missions_completed', 0),
                 'total_submissions': getattr(team, 'total_submissions', 0)
             }
@@ -1384,7 +1562,9 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
             1015: "TLS handshake failure",
             4003: "Database error",
             4004: "Session not found",
-            4005: "Connection timeout"
+            4005: "Connection timeout",
+            4006: "Rate limit exceeded",
+            4008: "Slow consumer (reconnect to resync)"
         }
         return reasons.get(close_code, f"Unknown code {close_code}")
 
@@ -1582,78 +1762,38 @@ class DesignThinkingConsumer(AsyncWebsocketConsumer):
             return None
 
     @database_sync_to_async
-    def create_feedback_record(self, team_id, submission_id, message, score, feedback_type, sender_name):
-        """Create a new realtime feedback record"""
-        try:
-            from .models import DesignTeam, SimplifiedPhaseInput, RealtimeFeedback
-            
-            team = DesignTeam.objects.get(id=team_id)
-            session = team.session
-            
-            submission = None
-            if submission_id:
-                try:
-                    submission = SimplifiedPhaseInput.objects.get(id=submission_id)
-                except SimplifiedPhaseInput.DoesNotExist:
-                    pass
-            
-            feedback = RealtimeFeedback.objects.create(
-                session=session,
-                team=team,
-                submission=submission,
-                feedback_type=feedback_type,
-                sender_type='teacher',
-                sender_name=sender_name,
-                message=message,
-                score=score
-            )
-            
-            return {
-                'id': feedback.id,
-                'team_id': team_id,
-                'message': message,
-                'score': score,
-                'feedback_type': feedback_type,
-                'sender_name': sender_name,
-                'created_at': feedback.created_at.isoformat(),
-                'submission_id': submission_id
-            }
-            
-        except Exception as e:
-            logger.error(f"Error creating feedback record: {str(e)}")
-            return None
+    def create_feedback_records(self, items, sender_name):
+        """Create realtime feedback records for this session in one insert"""
+        return create_feedback_bulk(items, sender_name=sender_name, session_code=self.session_code)
 
-    async def broadcast_teacher_feedback(self, feedback_data):
-        """Broadcast teacher feedback to all session participants"""
-        try:
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'teacher_feedback_update',
-                    'feedback_data': feedback_data,
-                    'team_data': {
-                        'id': feedback_data['team_id']
-                    },
-                    'timestamp': timezone.now().isoformat()
-                }
-            )
-            
-            # Mark as sent via WebSocket
-            if feedback_data.get('id'):
-                await self.mark_feedback_websocket_sent(feedback_data['id'])
-                
-        except Exception as e:
-            logger.error(f"Error broadcasting teacher feedback: {str(e)}")
+    async def broadcast_teacher_feedback(self, created):
+        """One broadcast per session group; delivery is recorded when students ack"""
+        for session_code, feedback_list in created.items():
+            try:
+                await self.channel_layer.group_send(
+                    f'design_thinking_{session_code}',
+                    {
+                        'type': 'teacher_feedback_batch',
+                        'feedback': feedback_list,
+                        'timestamp': timezone.now().isoformat()
+                    }
+                )
+            except Exception as e:
+                logger.error(f"Error broadcasting teacher feedback: {str(e)}")
 
-    @database_sync_to_async
-    def mark_feedback_websocket_sent(self, feedback_id):
-        """Mark feedback as sent via WebSocket"""
+    async def replay_pending_feedback(self):
+        """Resend feedback this team hasn't acknowledged yet (e.g. sent while offline)"""
+        if not self.team_id:
+            return
         try:
-            from .models import RealtimeFeedback
-            feedback = RealtimeFeedback.objects.get(id=feedback_id)
-            feedback.mark_websocket_sent()
+            feedback_list = await database_sync_to_async(pending_feedback)(self.team_id)
+            if feedback_list:
+                await self.teacher_feedback_batch({
+                    'feedback': feedback_list,
+                    'timestamp': timezone.now().isoformat()
+                })
         except Exception as e:
-            logger.error(f"Error marking feedback as sent: {str(e)}")
+            logger.error(f"Error replaying pending feedback: {str(e)}")
 
     async def broadcast_submission_to_teachers(self, result, team_id, mission_id, student_data, input_data):
         """Broadcast student submission to teacher dashboard for real-time review"""
@@ -0,0 +1,308 @@
+"""
+Server-Sent Events fallback for clients whose WebSockets are blocked
+
+Each stream subscribes to the same channel-layer group as the WebSocket
+consumers and renders group messages through the consumers' own handler
+methods, so SSE clients receive byte-for-byte the payloads WebSocket clients
+get. A short in-process event log per group assigns event ids and lets
+reconnecting clients resume with ``Last-Event-ID``.
+
+Like the WebSocket consumer, a stream opened with ``?team_id=`` (a team of
+that session) only gets its own team's feedback and Vani nudges; streams
+without one (facilitators) get every team's.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.http import Http404, StreamingHttpResponse
+
+from .connect_cache import cached_initial_status, cached_session_exists
+from .consumers import ClimateGameConsumer, DesignThinkingConsumer
+
+logger = logging.getLogger(__name__)
+
+
+# Stream name (URL kwarg) -> (group name prefix, consumer whose handlers render payloads)
+STREAM_SOURCES = {
+    'design-thinking': ('design_thinking', DesignThinkingConsumer),
+    'climate': ('climate_session', ClimateGameConsumer),
+}
+
+EVENT_BUFFER_SIZE = 200      # Events kept per session for Last-Event-ID resume
+KEEPALIVE_SECONDS = 15       # Comment line so proxies don't drop idle streams
+MAX_STREAM_SECONDS = 300     # End the response periodically; EventSource reconnects
+LOG_IDLE_SECONDS = 120       # Keep listening this long after the last client leaves
+CLIENT_RETRY_MS = 3000
+
+# Group message types the consumer filters per team -> the list of items, each with a ``team_id``
+TEAM_SCOPED_MESSAGES = {
+    'teacher_feedback_batch': 'feedback',
+    'vani_nudges': 'nudges',
+}
+
+
+def _payload_renderer(consumer_class, session_code):
+    """
+    Build a consumer instance whose ``send`` captures text instead of writing
+    to a socket, so group messages go through the real handler methods.
+    """
+    class PayloadRenderer(consumer_class):
+        def __init__(self):
+            self.session_code = session_code
+            self.connection_id = 'sse'
+            self.user_type = None
+            self.team_id = None
+            self.captured = []
+
+        async def send(self, text_data=None, bytes_data=None, close=False):
+            if text_data is not None:
+                self.captured.append(text_data)
+
+        async def render(self, message):
+            """``[(team_id or None for everyone, payload)]`` for one group message"""
+            message_type = message.get('type', '')
+            handler = getattr(self, message_type.replace('.', '_'), None)
+            if handler is None:
+                return []
+            items_key = TEAM_SCOPED_MESSAGES.get(message_type)
+            if items_key is None:
+                self.captured = []
+                await handler(message)
+                return [(None, payload) for payload in self.captured]
+
+            # One item at a time, so each payload is tagged with the team it belongs to
+            rendered = []
+            for item in message.get(items_key, []):
+                self.captured = []
+                await handler({**message, items_key: [item]})
+                rendered.extend((item.get('team_id'), payload) for payload in self.captured)
+            return rendered
+
+    return PayloadRenderer()
+
+
+class SessionEventLog:
+    """
+    Listens on one session group and keeps the recent rendered events
+
+    Event ids are ``<log epoch>:<sequence>``; a Last-Event-ID from another log
+    instance (e.g. after a restart) or older than the buffer triggers a
+    ``resync`` event so the client refetches full state.
+    """
+
+    def __init__(self, group_name, renderer):
+        self.group_name = group_name
+        self.renderer = renderer
+        self.epoch = str(int(time.time() * 1000))
+        self.sequence = 0
+        self.events = deque(maxlen=EVENT_BUFFER_SIZE)
+        self.subscribers = 0
+        self.last_detached = time.monotonic()
+        self._new_event = asyncio.Condition()
+        self._listening = asyncio.Event()
+        self._task = None
+
+    def ensure_listening(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._listen())
+
+    def attach(self):
+        self.subscribers += 1
+        self.ensure_listening()
+
+    async def wait_until_listening(self, timeout=5):
+        """Wait for the group subscription so no event slips past a new client"""
+        try:
+            await asyncio.wait_for(self._listening.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ SSE event log for {self.group_name} slow to subscribe")
+
+    def detach(self):
+        self.subscribers = max(0, self.subscribers - 1)
+        self.last_detached = time.monotonic()
+
+    def event_id(self, sequence):
+        return f"{self.epoch}:{sequence}"
+
+    def resume_sequence(self, last_event_id):
+        """Sequence to resume after, or None if the client must resync"""
+        if not last_event_id:
+            return None
+        epoch, _, sequence = last_event_id.partition(':')
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        oldest = self.events[0][0] if self.events else self.sequence + 1
+        if sequence > self.sequence or sequence < oldest - 1:
+            return None
+        return sequence
+
+    def events_after(self, sequence, team_id=None):
+        """Events newer than ``sequence``; with ``team_id``, other teams' scoped events are left out"""
+        return [
+            (seq, payload) for seq, team, payload in self.events
+            if seq > sequence and (not team_id or team is None or str(team) == str(team_id))
+        ]
+
+    def is_gap(self, sequence):
+        """True when events after ``sequence`` have already been evicted"""
+        return bool(self.events) and self.events[0][0] > sequence + 1
+
+    async def wait_for_event(self, after_sequence, timeout):
+        """Wait until an event newer than ``after_sequence`` exists"""
+        async with self._new_event:
+            try:
+                await asyncio.wait_for(
+                    self._new_event.wait_for(lambda: self.sequence > after_sequence),
+                    timeout=timeout
+                )
+                return True
+            except asyncio.TimeoutError:
+                return False
+
+    async def _append(self, team_id, payload):
+        async with self._new_event:
+            self.sequence += 1
+            self.events.append((self.sequence, team_id, payload))
+            self._new_event.notify_all()
+
+    async def _listen(self):
+        channel_layer = get_channel_layer()
+        channel_name = await channel_layer.new_channel()
+        await channel_layer.group_add(self.group_name, channel_name)
+        self._listening.set()
+        logger.info(f"📡 SSE event log listening on {self.group_name}")
+
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(channel_layer.receive(channel_name), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if not self.subscribers and time.monotonic() - self.last_detached > LOG_IDLE_SECONDS:
+                        break
+                    # Re-add so group membership outlives the layer's group_expiry
+                    await channel_layer.group_add(self.group_name, channel_name)
+                    continue
+
+                try:
+                    for team_id, payload in await self.renderer.render(message):
+                        await self._append(team_id, payload)
+                except Exception as e:
+                    logger.error(f"Error rendering SSE event for {self.group_name}: {str(e)}")
+        finally:
+            self._listening.clear()
+            await channel_layer.group_discard(self.group_name, channel_name)
+            if _event_logs.get(self.group_name) is self:
+                del _event_logs[self.group_name]
+            logger.info(f"📡 SSE event log stopped for {self.group_name}")
+
+
+_event_logs = {}
+
+
+def get_event_log(group_name, renderer):
+    event_log = _event_logs.get(group_name)
+    if event_log is None:
+        event_log = _event_logs[group_name] = SessionEventLog(group_name, renderer)
+    return event_log
+
+
+@database_sync_to_async
+def _team_in_session(team_id, session_code):
+    from .models import DesignTeam
+    return DesignTeam.objects.filter(pk=team_id, session__session_code=session_code).exists()
+
+
+def _format_event(data, event_id=None):
+    lines = [f"id: {event_id}"] if event_id else []
+    lines.extend(f"data: {line}" for line in data.splitlines() or [''])
+    return '\n'.join(lines) + '\n\n'
+
+
+async def session_event_stream(request, stream, session_code):
+    """
+    SSE endpoint streaming the session's WebSocket group events
+
+    Fresh connections get the same initial ``session_status`` message the
+    WebSocket consumer sends on connect; reconnects resume after Last-Event-ID.
+    ``team_id`` scopes team feedback and nudges to one team of the session.
+    """
+    if stream not in STREAM_SOURCES:
+        raise Http404("Unknown event stream")
+
+    group_prefix, consumer_class = STREAM_SOURCES[stream]
+    renderer = _payload_renderer(consumer_class, session_code)
+
+    if consumer_class is DesignThinkingConsumer:
+        session_exists = await cached_session_exists(
+            'design_thinking', session_code, lambda: renderer.get_design_session_exists(session_code)
+        )
+    else:
+        session_exists = await cached_session_exists(
+            'climate', session_code, lambda: renderer.get_session_exists(session_code)
+        )
+    if not session_exists:
+        raise Http404("Session not found")
+
+    team_id = request.GET.get('team_id') or None
+    if team_id is not None:
+        if consumer_class is not DesignThinkingConsumer or not team_id.isdigit() \
+                or not await _team_in_session(int(team_id), session_code):
+            raise Http404("Team not found")
+
+    event_log = get_event_log(f'{group_prefix}_{session_code}', renderer)
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+
+    async def initial_status():
+        if consumer_class is DesignThinkingConsumer:
+            session_data = await cached_initial_status(
+                'design_thinking', session_code, lambda: renderer.get_design_session_status(session_code)
+            )
+        else:
+            session_data = await cached_initial_status(
+                'climate', session_code, lambda: renderer.get_session_status(session_code)
+            )
+        return json.dumps({'type': 'session_status', 'data': session_data})
+
+    async def event_source():
+        event_log.attach()
+        try:
+            yield f"retry: {CLIENT_RETRY_MS}\n\n"
+            await event_log.wait_until_listening()
+
+            cursor = event_log.resume_sequence(last_event_id)
+            if cursor is None:
+                cursor = event_log.sequence
+                if last_event_id:
+                    yield _format_event(json.dumps({'type': 'resync', 'reason': 'event_history_unavailable'}))
+                yield _format_event(await initial_status(), event_log.event_id(cursor))
+
+            deadline = time.monotonic() + MAX_STREAM_SECONDS
+            while time.monotonic() < deadline:
+                if event_log.is_gap(cursor):
+                    cursor = event_log.sequence
+                    yield _format_event(json.dumps({'type': 'resync', 'reason': 'client_too_slow'}))
+                    yield _format_event(await initial_status(), event_log.event_id(cursor))
+
+                latest = event_log.sequence
+                pending = event_log.events_after(cursor, team_id)
+                for sequence, payload in pending:
+                    yield _format_event(payload, event_log.event_id(sequence))
+                # Past other teams' events too, so they don't wake this stream again
+                cursor = max([latest] + [sequence for sequence, _payload in pending])
+
+                if not pending and not await event_log.wait_for_event(cursor, KEEPALIVE_SECONDS):
+                    yield ": keepalive\n\n"
+        finally:
+            event_log.detach()
+
+    response = StreamingHttpResponse(event_source(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
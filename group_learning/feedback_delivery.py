@@ -0,0 +1,235 @@
+"""
+Batched delivery and acknowledgement of RealtimeFeedback
+
+Teacher feedback used to take three round-trips per message: an INSERT,
+a group broadcast and a ``get()`` + ``save()`` marking it sent - before anyone
+had actually received it. Feedback typed for every team cost that per team.
+
+- ``create_feedback_bulk`` validates a list of feedback items against one
+  team query and one submission query and inserts them with one
+  ``bulk_create``; the caller broadcasts once per session group.
+- ``websocket_sent`` now means delivered: students ack the feedback ids they
+  showed, and ``FeedbackAckBuffer`` coalesces acks from every connection into
+  one UPDATE per ``FEEDBACK_ACK_FLUSH_SECONDS``.
+- ``pending_feedback`` loads a team's unacknowledged feedback in one query so
+  a reconnecting student gets what they missed.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import DesignTeam, RealtimeFeedback, SimplifiedPhaseInput
+from .session_versions import bump_session_version
+
+logger = logging.getLogger(__name__)
+
+
+MAX_BULK_FEEDBACK = 100
+FEEDBACK_ACK_FLUSH_SECONDS = getattr(settings, 'FEEDBACK_ACK_FLUSH_SECONDS', 0.5)
+# Flush straight away once this many acks are waiting
+FEEDBACK_ACK_MAX_PENDING = 500
+# Replay at most this many undelivered messages on reconnect (oldest first)
+REPLAY_LIMIT = 50
+
+
+def feedback_payload(feedback):
+    """Frame data for one feedback row (also used for replay)"""
+    return {
+        'id': feedback.id,
+        'team_id': feedback.team_id,
+        'message': feedback.message,
+        'score': feedback.score,
+        'feedback_type': feedback.feedback_type,
+        'sender_name': feedback.sender_name,
+        'is_urgent': feedback.is_urgent,
+        'created_at': feedback.created_at.isoformat(),
+        'submission_id': feedback.submission_id,
+    }
+
+
+def create_feedback_bulk(items, sender_name='Teacher', session_code=None):
+    """
+    Create teacher feedback for many teams at once
+
+    Each item is ``{'team_id', 'message', 'score', 'submission_id',
+    'feedback_type'}``. When ``session_code`` is given, teams outside that
+    session are rejected. Returns ``(created, errors)`` where ``created`` maps
+    session code -> list of feedback payloads and ``errors`` lists
+    ``{'index', 'team_id', 'error'}`` for items that were skipped.
+    """
+    if len(items) > MAX_BULK_FEEDBACK:
+        raise ValidationError(f'At most {MAX_BULK_FEEDBACK} feedback items per batch')
+
+    teams = DesignTeam.objects.filter(
+        id__in={item.get('team_id') for item in items if item.get('team_id')}
+    ).select_related('session')
+    if session_code:
+        teams = teams.filter(session__session_code=session_code)
+    teams = {str(team.id): team for team in teams}
+
+    submission_ids = {item['submission_id'] for item in items if item.get('submission_id')}
+    submissions = set(
+        SimplifiedPhaseInput.objects.filter(id__in=submission_ids).values_list('id', flat=True)
+    ) if submission_ids else set()
+
+    rows, errors = [], []
+    for index, item in enumerate(items):
+        team = teams.get(str(item.get('team_id')))
+        message = (item.get('message') or '').strip()
+        score = item.get('score')
+        if team is None:
+            errors.append({'index': index, 'team_id': item.get('team_id'), 'error': 'Team not found'})
+            continue
+        if not message and not score:
+            errors.append({'index': index, 'team_id': team.id, 'error': 'Either message or score is required'})
+            continue
+
+        submission_id = item.get('submission_id')
+        feedback = RealtimeFeedback(
+            session_id=team.session_id,
+            team=team,
+            submission_id=submission_id if submission_id in submissions else None,
+            feedback_type=item.get('feedback_type') or 'teacher_message',
+            sender_type='teacher',
+            sender_name=item.get('sender_name') or sender_name,
+            message=message,
+            score=score,
+            is_urgent=bool(item.get('is_urgent')),
+        )
+        try:
+            # Relations were checked above (skip the per-row FK lookups); a
+            # score-only feedback has an empty message
+            feedback.full_clean(exclude=['session', 'team', 'submission', 'message'], validate_unique=False)
+        except ValidationError as e:
+            errors.append({'index': index, 'team_id': team.id, 'error': '; '.join(e.messages)})
+            continue
+        rows.append(feedback)
+
+    created = defaultdict(list)
+    if not rows:
+        return dict(created), errors
+
+    with transaction.atomic():
+        # created_at (auto_now_add) is filled in by pre_save during bulk_create
+        RealtimeFeedback.objects.bulk_create(rows)
+
+    for feedback in rows:
+        code = feedback.team.session.session_code
+        created[code].append(feedback_payload(feedback))
+    for code in created:
+        bump_session_version(code)
+
+    logger.info(f"📝 Created {len(rows)} feedback messages across {len(created)} sessions")
+    return dict(created), errors
+
+
+def pending_feedback(team_id, limit=REPLAY_LIMIT):
+    """One query: feedback for a team that no client has acknowledged yet"""
+    feedback = RealtimeFeedback.objects.filter(
+        team_id=team_id, websocket_sent=False
+    ).order_by('id')[:limit]
+    return [feedback_payload(item) for item in feedback]
+
+
+def mark_feedback_delivered(acks):
+    """
+    Mark acknowledged feedback as delivered with one UPDATE
+
+    ``acks`` maps ``(session_code, team_id)`` -> feedback ids; ids are only
+    accepted for the team that acknowledged them.
+    """
+    acks = {key: ids for key, ids in acks.items() if ids}
+    if not acks:
+        return 0
+
+    condition = reduce(or_, (
+        Q(team_id=team_id, id__in=ids) for (_code, team_id), ids in acks.items()
+    ))
+    updated = RealtimeFeedback.objects.filter(condition, websocket_sent=False).update(
+        websocket_sent=True, websocket_sent_at=timezone.now()
+    )
+    if updated:
+        for session_code in {code for code, _team_id in acks}:
+            bump_session_version(session_code)
+    return updated
+
+
+class FeedbackAckBuffer:
+    """Coalesces ``feedback_ack`` messages from all connections into batched UPDATEs"""
+
+    def __init__(self, flush_seconds=None):
+        self.flush_seconds = flush_seconds
+        self._pending = defaultdict(set)   # (session_code, team_id) -> feedback ids
+        self._lock = threading.Lock()
+        self._task = None
+        self.flushes = 0
+        self.acked = 0
+
+    def ack(self, session_code, team_id, feedback_ids):
+        """Buffer acks from a student connection; schedules a flush on the running loop"""
+        ids = set()
+        for feedback_id in feedback_ids or []:
+            try:
+                ids.add(int(feedback_id))
+            except (TypeError, ValueError):
+                continue
+        try:
+            team_id = int(team_id)
+        except (TypeError, ValueError):
+            return
+        if not ids:
+            return
+
+        with self._lock:
+            self._pending[(session_code, team_id)].update(ids)
+        if self.pending_count() >= FEEDBACK_ACK_MAX_PENDING:
+            delay = 0
+        elif self._task is not None and not self._task.done():
+            return
+        else:
+            delay = self.flush_seconds if self.flush_seconds is not None else FEEDBACK_ACK_FLUSH_SECONDS
+        self._task = asyncio.get_running_loop().create_task(self._flush_later(delay))
+
+    def pending_count(self):
+        return sum(len(ids) for ids in self._pending.values())
+
+    async def _flush_later(self, delay):
+        try:
+            await asyncio.sleep(delay)
+            await database_sync_to_async(self.flush)()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"💥 Feedback ack flush failed: {str(e)}", exc_info=True)
+
+    def flush(self):
+        """Write every buffered ack; returns the number of rows marked delivered"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(set)
+        if not pending:
+            return 0
+        updated = mark_feedback_delivered(pending)
+        self.flushes += 1
+        self.acked += updated
+        return updated
+
+    def get_stats(self):
+        return {
+            'pending': self.pending_count(),
+            'flushes': self.flushes,
+            'acked': self.acked,
+        }
+
+
+feedback_ack_buffer = FeedbackAckBuffer()
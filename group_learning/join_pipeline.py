@@ -0,0 +1,190 @@
+"""
+Burst-tolerant join pipeline
+
+At class start a whole room scans the session code within a few seconds.
+Join views claim capacity with a single conditional UPDATE on a per-session
+counter (no count-then-insert, no session row lock held across the insert),
+and the post-join broadcasts are coalesced so a burst of joins costs one
+status snapshot and one group message per session per window instead of
+two broadcasts plus a full status rebuild per student.
+
+Windows are timed on the server's event loop (recorded by ``attach()`` when
+a consumer connects), never on a thread of their own: the in-memory channel
+layer isn't thread-safe, and a ``group_send`` from a timer thread reached
+waiting consumers late or not at all.
+"""
+
+import asyncio
+import logging
+import threading
+
+from channels.db import database_sync_to_async
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds to gather joins before broadcasting (0 = broadcast immediately);
+# override with settings.JOIN_BROADCAST_WINDOW_SECONDS
+DEFAULT_BROADCAST_WINDOW_SECONDS = 0.25
+
+
+def allocate_join_slot(queryset, pk, counter_field, capacity=None, recount=None):
+    """
+    Claim the next join slot on ``counter_field`` with one conditional UPDATE
+
+    Returns the 1-based slot number, or None when the session is full (or
+    missing). Call inside ``transaction.atomic()`` so a join that fails after
+    allocation gives its slot back on rollback.
+
+    ``recount`` returns the real occupancy and is only consulted when the
+    counter reports full, so slots freed by deleted rows are reclaimed.
+    """
+    rows = queryset.filter(pk=pk)
+    increment = {counter_field: F(counter_field) + 1}
+
+    def claim():
+        if capacity is None:
+            return rows.update(**increment)
+        return rows.filter(**{f'{counter_field}__lt': capacity}).update(**increment)
+
+    if not claim():
+        if recount is None:
+            return None
+        occupied = recount()
+        if capacity is not None and occupied >= capacity:
+            return None
+        if not rows.filter(**{f'{counter_field}__gt': occupied}).update(**{counter_field: occupied}):
+            return None
+        logger.info(f"🔁 Reconciled {counter_field} for {queryset.model.__name__} {pk} to {occupied}")
+        if not claim():
+            return None
+
+    # The UPDATE holds the row lock until commit, so this read sees our increment
+    return rows.values_list(counter_field, flat=True).get()
+
+
+class JoinBroadcastCoalescer:
+    """
+    Gathers join events per session and broadcasts them together
+
+    ``flush_callback(session_code, items)`` runs once per window with every
+    item added for that session since the last flush. Items are queued on
+    transaction commit, so rolled-back joins are never announced. Without an
+    attached event loop (nobody connected, management commands, tests) each
+    item is sent straight away from the committing thread.
+    """
+
+    def __init__(self, flush_callback, window=None):
+        self.flush_callback = flush_callback
+        self._window = window
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._loop = None
+
+    @property
+    def window(self):
+        if self._window is not None:
+            return self._window
+        return getattr(settings, 'JOIN_BROADCAST_WINDOW_SECONDS', DEFAULT_BROADCAST_WINDOW_SECONDS)
+
+    def attach(self):
+        """Called on connect: time the windows on this event loop"""
+        self._loop = asyncio.get_running_loop()
+
+    def add(self, session_code, item):
+        transaction.on_commit(lambda: self._queue(session_code, item))
+
+    def _queue(self, session_code, item):
+        loop = self._loop
+        if self.window <= 0 or loop is None or loop.is_closed():
+            self._run(session_code, [item])
+            return
+
+        with self._lock:
+            items = self._pending.get(session_code)
+            if items is not None:
+                items.append(item)
+                return
+            self._pending[session_code] = [item]
+
+        try:
+            loop.call_soon_threadsafe(self._start_window, session_code)
+        except RuntimeError:
+            # The loop closed meanwhile
+            self._flush(session_code)
+
+    def _start_window(self, session_code):
+        asyncio.get_running_loop().create_task(self._flush_later(session_code))
+
+    async def _flush_later(self, session_code):
+        await asyncio.sleep(self.window)
+        # Off the loop (the callback queries the database); its group_send comes back to this loop
+        await database_sync_to_async(self._flush)(session_code)
+
+    def _flush(self, session_code):
+        with self._lock:
+            items = self._pending.pop(session_code, [])
+        try:
+            self._run(session_code, items)
+        finally:
+            close_old_connections()
+
+    def _run(self, session_code, items):
+        if not items:
+            return
+        try:
+            self.flush_callback(session_code, items)
+            if len(items) > 1:
+                logger.info(f"📦 Coalesced {len(items)} joins into one broadcast for session {session_code}")
+        except Exception as e:
+            logger.error(f"Error broadcasting joins for session {session_code}: {str(e)}")
+
+
+def _broadcast_team_joins(session_code, teams_data):
+    """One team_joined message (latest team plus everyone in the window) with one status snapshot"""
+    from channels.layers import get_channel_layer
+    from asgiref.sync import async_to_sync
+    from .views import DesignThinkingJoinView
+
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+
+    session_data = DesignThinkingJoinView()._get_session_status_data(session_code)
+    async_to_sync(channel_layer.group_send)(
+        f'design_thinking_{session_code}',
+        {
+            'type': 'team_joined',
+            'team_data': teams_data[-1],
+            'teams_joined': teams_data,
+            'session_data': session_data,
+            'timestamp': timezone.now().isoformat()
+        }
+    )
+
+
+def _broadcast_player_joins(session_code, player_names):
+    """One player_joined plus one session_update for every player in the window"""
+    from .models import ClimateGameSession
+    from .climate_views import get_session_status_for_broadcast
+    from .websocket_utils import broadcast_player_joined, broadcast_session_update
+
+    session = ClimateGameSession.objects.select_related('facilitator').get(session_code=session_code)
+    session_data = get_session_status_for_broadcast(session)
+
+    if len(player_names) == 1:
+        label = player_names[0]
+    else:
+        label = f"{player_names[-1]} and {len(player_names) - 1} others"
+
+    broadcast_player_joined(session_code, label, session_data['total_players'], player_names=player_names)
+    broadcast_session_update(session_code, session_data)
+
+
+team_join_broadcasts = JoinBroadcastCoalescer(_broadcast_team_joins)
+player_join_broadcasts = JoinBroadcastCoalescer(_broadcast_player_joins)
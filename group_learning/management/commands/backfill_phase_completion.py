@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from group_learning.models import DesignTeam, SimplifiedPhaseInput
+
+
+def compute_team_phase_bits(teams):
+    """Expected completion bitmap per team id, from active SimplifiedPhaseInput rows"""
+    expected = {team.id: 0 for team in teams}
+    rows = SimplifiedPhaseInput.objects.filter(
+        team__in=teams, is_active=True
+    ).values_list('team_id', 'mission__mission_type').distinct()
+
+    for team_id, mission_type in rows:
+        expected[team_id] |= DesignTeam.PHASE_BITS.get(mission_type, 0)
+    return expected
+
+
+class Command(BaseCommand):
+    help = 'Rebuild DesignTeam.completed_phase_bits from submitted phase inputs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--session-code',
+            type=str,
+            help='Backfill teams in a specific session only',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report changes without saving them',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.HTTP_INFO('Backfilling team phase-completion bitmaps...'))
+
+        teams = DesignTeam.objects.only('id', 'team_name', 'completed_phase_bits')
+        if options['session_code']:
+            teams = teams.filter(session__session_code=options['session_code'])
+        teams = list(teams)
+
+        expected = compute_team_phase_bits(teams)
+        changed = [team for team in teams if team.completed_phase_bits != expected[team.id]]
+
+        for team in changed:
+            self.stdout.write(
+                f"  Team {team.team_name}: {team.completed_phase_bits:#08b} -> {expected[team.id]:#08b}"
+            )
+            team.completed_phase_bits = expected[team.id]
+
+        if changed and not options['dry_run']:
+            with transaction.atomic():
+                DesignTeam.objects.bulk_update(changed, ['completed_phase_bits'], batch_size=500)
+
+        self.stdout.write(f"\nTeams checked: {len(teams)}")
+        if options['dry_run']:
+            self.stdout.write(self.style.HTTP_INFO(f"Teams that would change: {len(changed)} (dry run)"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Teams updated: {len(changed)}"))
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
-from group_learning.models import DesignThinkingSession, TeamProgress, DesignMission, TeamSubmission
+from group_learning.models import DesignThinkingSession, TeamProgress, DesignMission, TeamSubmission, DesignTeam
+from group_learning.management.commands.backfill_phase_completion import compute_team_phase_bits
 
 
 class Command(BaseCommand):
@@ -123,6 +124,25 @@ class Command(BaseCommand):
                                         f"    Fixed completion status for {team.team_name} Empathy mission"
                                     )
                                 )
+            
+            # Check 4: Phase-completion bitmap matches submitted phase inputs
+            expected_bits = compute_team_phase_bits(teams)
+            for team in teams:
+                if team.completed_phase_bits != expected_bits[team.id]:
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f"  Team {team.team_name}: phase bitmap mismatch "
+                            f"(stored={team.completed_phase_bits:#08b}, expected={expected_bits[team.id]:#08b})"
+                        )
+                    )
+                    total_issues += 1
+                    
+                    if options['fix']:
+                        DesignTeam.objects.filter(pk=team.pk).update(completed_phase_bits=expected_bits[team.id])
+                        fixed_issues += 1
+                        self.stdout.write(
+                            self.style.SUCCESS(f"    Fixed phase bitmap for {team.team_name}")
+                        )
 
         # Summary
         self.stdout.write(f"\n{self.style.HTTP_INFO('Consistency Check Summary:')}")
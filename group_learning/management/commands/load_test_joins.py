@@ -0,0 +1,141 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+import statistics
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from group_learning.join_pipeline import player_join_broadcasts
+from group_learning.models import ClimateGame, ClimateGameSession, ClimatePlayerResponse
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(samples)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class Command(BaseCommand):
+    help = 'Load test the climate join pipeline with concurrent joins and report latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--joins',
+            type=int,
+            default=100,
+            help='Number of students joining (default: 100)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=100,
+            help='Joins in flight at once (default: 100)',
+        )
+        parser.add_argument(
+            '--session-code',
+            type=str,
+            help='Join an existing waiting climate session instead of a temporary one',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the temporary session and its players after the run',
+        )
+
+    def handle(self, *args, **options):
+        joins = options['joins']
+        concurrency = max(1, options['concurrency'])
+        if joins < 1:
+            raise CommandError('--joins must be at least 1')
+
+        session, temporary = self.get_session(options['session_code'])
+        url = reverse('group_learning:join_climate_session', args=[session.session_code])
+        host = next((h for h in settings.ALLOWED_HOSTS if h not in ('*', '') and not h.startswith('.')), 'localhost')
+
+        self.stdout.write(self.style.HTTP_INFO(
+            f'Joining {joins} players to {session.session_code} with concurrency {concurrency}...'
+        ))
+
+        def join(index):
+            client = Client(HTTP_HOST=host)
+            started = time.perf_counter()
+            try:
+                response = client.post(url, {'player_name': f'Load Player {index + 1}'})
+                ok = response.status_code == 302
+            except Exception:
+                ok = False
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if concurrency > 1:
+                    connection.close()
+            return elapsed_ms, ok
+
+        run_started = time.perf_counter()
+        if concurrency == 1:
+            results = [join(index) for index in range(joins)]
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(executor.map(join, range(joins)))
+        wall_seconds = time.perf_counter() - run_started
+
+        # Let the coalesced join broadcasts flush before reading back / cleaning up
+        time.sleep(player_join_broadcasts.window * 2)
+
+        try:
+            self.report(session, results, wall_seconds)
+        finally:
+            if temporary and not options['keep']:
+                session.delete()
+                self.stdout.write('Temporary session removed')
+
+    def get_session(self, session_code):
+        if session_code:
+            session = ClimateGameSession.objects.filter(session_code=session_code).first()
+            if session is None:
+                raise CommandError(f'Climate session {session_code} not found')
+            if session.status != 'waiting':
+                raise CommandError(f'Climate session {session_code} is not waiting for players')
+            return session, False
+
+        climate_game = ClimateGame.objects.filter(is_active=True).first()
+        if climate_game is None:
+            raise CommandError('No active climate game found - run populate_climate_scenarios first')
+
+        session = ClimateGameSession.objects.create(
+            game=climate_game.game_ptr,
+            climate_game=climate_game,
+            session_code=f'L{uuid.uuid4().hex[:5].upper()}',
+        )
+        return session, True
+
+    def report(self, session, results, wall_seconds):
+        latencies = [elapsed_ms for elapsed_ms, _ok in results]
+        failures = sum(1 for _elapsed_ms, ok in results if not ok)
+
+        self.stdout.write(self.style.HTTP_INFO('\n⏱️  Join latency (ms):'))
+        self.stdout.write(f'  p50: {percentile(latencies, 50):.1f}')
+        self.stdout.write(f'  p95: {percentile(latencies, 95):.1f}')
+        self.stdout.write(f'  p99: {percentile(latencies, 99):.1f}')
+        self.stdout.write(f'  max: {max(latencies):.1f}')
+        self.stdout.write(f'  mean: {statistics.mean(latencies):.1f}')
+        self.stdout.write(f'  throughput: {len(results) / wall_seconds:.1f} joins/s')
+
+        session.refresh_from_db()
+        roles = Counter(
+            ClimatePlayerResponse.objects.filter(climate_session=session, round_number=0)
+            .values_list('assigned_role', flat=True)
+        )
+        self.stdout.write(self.style.HTTP_INFO('\n👥 Result:'))
+        self.stdout.write(f'  players in lobby: {sum(roles.values())}, join counter: {session.players_joined}')
+        self.stdout.write(f'  roles: {dict(sorted(roles.items()))}')
+
+        if failures:
+            self.stdout.write(self.style.ERROR(f'  failed joins: {failures}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('  all joins succeeded'))
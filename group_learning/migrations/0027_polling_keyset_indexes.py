@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group_learning', '0026_remove_duplicate_teams'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='realtimefeedback',
+            index=models.Index(fields=['session', 'team', 'id'], name='group_learn_session_93d88e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='simplifiedphaseinput',
+            index=models.Index(fields=['session', 'is_active', 'id'], name='group_learn_session_128036_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group_learning', '0027_polling_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='designteam',
+            name='completed_phase_bits',
+            field=models.PositiveIntegerField(default=0, help_text='Bitmap of mission types with submitted inputs (see PHASE_BITS)'),
+        ),
+    ]
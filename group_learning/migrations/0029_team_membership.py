@@ -0,0 +1,66 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_memberships(apps, schema_editor):
+    """Build TeamMembership rows from existing DesignTeam.team_members JSON"""
+    DesignTeam = apps.get_model('group_learning', 'DesignTeam')
+    TeamMembership = apps.get_model('group_learning', 'TeamMembership')
+
+    memberships = []
+    for team in DesignTeam.objects.only('id', 'session_id', 'team_members').iterator():
+        seen = set()
+        for member in team.team_members or []:
+            if isinstance(member, dict):
+                name = str(member.get('name', '')).strip()
+                student_session_id = str(member.get('session_id') or '').strip()
+            else:
+                name = str(member).strip()
+                student_session_id = ''
+            if not name:
+                continue
+            key = student_session_id or f"team{team.id}:{name.lower()}"
+            if key in seen:
+                continue
+            seen.add(key)
+            memberships.append(TeamMembership(
+                team_id=team.id, session_id=team.session_id,
+                student_session_id=key, student_name=name[:100]
+            ))
+
+    # Legacy JSON was never validated - skip students listed in two teams
+    TeamMembership.objects.bulk_create(memberships, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group_learning', '0028_design_team_completed_phase_bits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_session_id', models.CharField(help_text="Student's session id (team-scoped key for name-only members)", max_length=100)),
+                ('student_name', models.CharField(max_length=100)),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='team_memberships', to='group_learning.designthinkingsession')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='group_learning.designteam')),
+            ],
+            options={
+                'verbose_name': 'Team Membership',
+                'verbose_name_plural': 'Team Memberships',
+                'ordering': ['joined_at'],
+                'indexes': [models.Index(fields=['team', 'student_name'], name='group_learn_team_id_78f849_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='teammembership',
+            constraint=models.UniqueConstraint(fields=('session', 'student_session_id'), name='unique_student_per_session'),
+        ),
+        migrations.RunPython(backfill_memberships, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:37
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_join_counters(apps, schema_editor):
+    """Seed the join counters from existing teams and lobby players"""
+    DesignThinkingSession = apps.get_model('group_learning', 'DesignThinkingSession')
+    DesignTeam = apps.get_model('group_learning', 'DesignTeam')
+    ClimateGameSession = apps.get_model('group_learning', 'ClimateGameSession')
+    ClimatePlayerResponse = apps.get_model('group_learning', 'ClimatePlayerResponse')
+
+    team_counts = DesignTeam.objects.filter(session=OuterRef('pk')).order_by().values('session').annotate(
+        total=Count('id')
+    ).values('total')
+    DesignThinkingSession.objects.update(team_slots_used=Coalesce(Subquery(team_counts), 0))
+
+    player_counts = ClimatePlayerResponse.objects.filter(climate_session=OuterRef('pk')).order_by().values(
+        'climate_session'
+    ).annotate(total=Count('player_session_id', distinct=True)).values('total')
+    ClimateGameSession.objects.update(players_joined=Coalesce(Subquery(player_counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group_learning', '0029_team_membership'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='climategamesession',
+            name='players_joined',
+            field=models.PositiveIntegerField(default=0, help_text='Players that have joined; the join ordinal drives role assignment'),
+        ),
+        migrations.AddField(
+            model_name='designthinkingsession',
+            name='team_slots_used',
+            field=models.PositiveIntegerField(default=0, help_text='Team slots claimed by joins; reconciled with the team count when full'),
+        ),
+        migrations.RunPython(backfill_join_counters, migrations.RunPython.noop),
+    ]
@@ -1538,39 +1538,38 @@ class ClimateGameSession(GameSession):
     question_timer_enabled = models.BooleanField(default=True, help_text="Enable timer for question phase")
     current_timer_end = models.DateTimeField(null=True, blank=True, help_text="When current timer expires")
     
+    # Join counter (claimed with a conditional UPDATE, see join_pipeline)
+    players_joined = models.PositiveIntegerField(
+        default=0,
+        help_text="Players that have joined; the join ordinal drives role assignment"
+    )
+    
     class Meta:
         verbose_name = "Climate Game Session"
         verbose_name_plural = "Climate Game Sessions"
     
-    def start_new_round(self, round_number):
+    # Meters, phase and timer live in the climate state store (see
+    # climate_state); these methods mutate it and refresh this instance, and
+    # only the changed fields are written back.
+
+    def start_new_round(self, round_number, expected_version=None):
         """Initialize a new scenario round"""
-        self.current_round = round_number
-        self.current_phase = 'scenario_intro'
-        self.round_start_time = timezone.now()
-        self.phase_start_time = timezone.now()
+        from .climate_state import climate_state
         
         # Don't set current_scenario - it's for base Scenario model, not ClimateScenario
         # Climate scenarios are accessed via self.climate_game.climate_scenarios.filter(round_number=round_number)
         
-        self.save()
+        climate_state.start_new_round(self.session_code, round_number, expected_version).apply_to(self)
     
-    def advance_phase(self, new_phase):
+    def advance_phase(self, new_phase, expected_version=None):
         """Move to next phase of current round"""
-        self.current_phase = new_phase
-        self.phase_start_time = timezone.now()
-        self.save()
+        from .climate_state import climate_state
+        climate_state.advance_phase(self.session_code, new_phase, expected_version).apply_to(self)
     
-    def update_meters(self, meter_changes):
+    def update_meters(self, meter_changes, expected_version=None):
         """Apply meter changes from player decisions"""
-        self.current_climate_resilience = max(0, min(100, 
-            self.current_climate_resilience + meter_changes.get('climate_resilience', 0)))
-        self.current_gdp = max(0, min(100, 
-            self.current_gdp + meter_changes.get('gdp', 0)))
-        self.current_public_morale = max(0, min(100, 
-            self.current_public_morale + meter_changes.get('public_morale', 0)))
-        self.current_environmental_health = max(0, min(100, 
-            self.current_environmental_health + meter_changes.get('environmental_health', 0)))
-        self.save()
+        from .climate_state import climate_state
+        climate_state.update_meters(self.session_code, meter_changes, expected_version).apply_to(self)
     
     def get_meter_status(self):
         """Return current meter values as dict"""
@@ -1591,13 +1590,10 @@ class ClimateGameSession(GameSession):
             'player_name', 'player_session_id', 'assigned_role'
         ).distinct().order_by('player_name')
     
-    def start_timer(self, duration_minutes=None):
+    def start_timer(self, duration_minutes=None, expected_version=None):
         """Start timer for current phase"""
-        if duration_minutes is None:
-            duration_minutes = self.round_duration_minutes
-        
-        self.current_timer_end = timezone.now() + timezone.timedelta(minutes=duration_minutes)
-        self.save()
+        from .climate_state import climate_state
+        climate_state.start_timer(self.session_code, duration_minutes, expected_version).apply_to(self)
     
     def get_timer_info(self):
         """Get current timer information"""
@@ -1618,10 +1614,10 @@ class ClimateGameSession(GameSession):
             'end_time': self.current_timer_end.isoformat() if self.current_timer_end else None
         }
     
-    def set_timer_duration(self, minutes):
+    def set_timer_duration(self, minutes, expected_version=None):
         """Set timer duration for rounds"""
-        self.round_duration_minutes = minutes
-        self.save()
+        from .climate_state import climate_state
+        climate_state.set_timer_duration(self.session_code, minutes, expected_version).apply_to(self)
 
 
 class ClimatePlayerResponse(models.Model):
@@ -1897,6 +1893,12 @@ class DesignThinkingSession(GameSession):
     )
     last_mentor_prompt = models.DateTimeField(null=True, blank=True)
     
+    # Join capacity counter (claimed with a conditional UPDATE, see join_pipeline)
+    team_slots_used = models.PositiveIntegerField(
+        default=0,
+        help_text="Team slots claimed by joins; reconciled with the team count when full"
+    )
+    
     class Meta:
         verbose_name = "Design Thinking Session"
         verbose_name_plural = "Design Thinking Sessions"
@@ -2049,6 +2051,10 @@ class DesignTeam(models.Model):
     )
     missions_completed = models.PositiveIntegerField(default=0)
     total_submissions = models.PositiveIntegerField(default=0)
+    completed_phase_bits = models.PositiveIntegerField(
+        default=0,
+        help_text="Bitmap of mission types with submitted inputs (see PHASE_BITS)"
+    )
     
     # Problem Focus (developed during Define mission)
     problem_statement = models.TextField(
@@ -2151,13 +2157,88 @@ class DesignTeam(models.Model):
     
     def save(self, *args, **kwargs):
         """Override save to validate before saving"""
+        from django.db import transaction
+        
         self.clean()
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'team_members' not in update_fields:
+            super().save(*args, **kwargs)
+            return
+        
+        # Keep the normalized membership index in step with the JSON list
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.sync_memberships()
+    
+    def _membership_entries(self):
+        """(student_session_id, name) pairs described by the team_members JSON"""
+        entries = {}
+        for member in self.team_members or []:
+            if isinstance(member, dict):
+                name = str(member.get('name', '')).strip()
+                student_session_id = str(member.get('session_id') or '').strip()
+            else:
+                name = str(member).strip()
+                student_session_id = ''
+            if not name:
+                continue
+            # Name-only members get a team-scoped key so equal names in other teams don't collide
+            entries.setdefault(student_session_id or f"team{self.pk}:{name.lower()}", name)
+        return entries
+    
+    def sync_memberships(self):
+        """Insert/delete TeamMembership rows so they mirror team_members (one SELECT when unchanged)"""
+        entries = self._membership_entries()
+        existing = dict(
+            self.memberships.values_list('student_session_id', 'student_name')
+        )
+        
+        stale = [key for key, name in existing.items() if entries.get(key) != name]
+        if stale:
+            self.memberships.filter(student_session_id__in=stale).delete()
+        
+        missing = [
+            TeamMembership(team=self, session_id=self.session_id, student_session_id=key, student_name=name)
+            for key, name in entries.items()
+            if existing.get(key) != name
+        ]
+        if missing:
+            TeamMembership.objects.bulk_create(missing)
+    
+    def add_member(self, name, student_session_id):
+        """
+        Add a student to the team (JSON list and membership index together)
+        
+        Raises IntegrityError if the student already belongs to another team
+        in this session.
+        """
+        from django.db import transaction
+        
+        with transaction.atomic():
+            TeamMembership.objects.create(
+                team=self, session_id=self.session_id,
+                student_session_id=student_session_id, student_name=name
+            )
+            self.team_members = list(self.team_members or []) + [
+                {'name': name, 'session_id': student_session_id}
+            ]
+            super().save(update_fields=['team_members', 'updated_at'])
+    
+    @classmethod
+    def for_student(cls, session, student_session_id):
+        """Indexed student -> team lookup within a session"""
+        membership = TeamMembership.objects.select_related('team').filter(
+            session=session, student_session_id=student_session_id
+        ).first()
+        return membership.team if membership else None
     
     @property 
     def member_count(self):
-        """Get the number of team members"""
-        return len(self.team_members) if self.team_members else 0
+        """Number of team members, from a Count('memberships') annotation when the queryset has one"""
+        annotated = getattr(self, 'membership_count', None)
+        if annotated is not None:
+            return annotated
+        return self.memberships.count() if self.pk else 0
     
     @property
     def member_names(self):
@@ -2173,6 +2254,42 @@ class DesignTeam(models.Model):
                 names.append(str(member))
         return [name.strip() for name in names if name.strip()]
     
+    # One bit per DesignMission.mission_type, in mission order
+    PHASE_BITS = {
+        mission_type: 1 << index
+        for index, (mission_type, _label) in enumerate(DesignMission.MISSION_TYPES)
+    }
+    
+    def has_completed_phase(self, mission_type):
+        """Check the completion bitmap for a mission type"""
+        return bool(self.completed_phase_bits & self.PHASE_BITS.get(mission_type, 0))
+    
+    def has_completed_phases(self, mission_types):
+        """Check that every mission type in the list is completed"""
+        mask = 0
+        for mission_type in mission_types:
+            mask |= self.PHASE_BITS.get(mission_type, 0)
+        return self.completed_phase_bits & mask == mask
+    
+    def mark_phase_completed(self, mission_type):
+        """Set a mission type's bit with an atomic bitwise OR (safe under concurrent submits)"""
+        bit = self.PHASE_BITS.get(mission_type)
+        if not bit or self.completed_phase_bits & bit:
+            return
+        
+        DesignTeam.objects.filter(pk=self.pk).update(
+            completed_phase_bits=models.F('completed_phase_bits').bitor(bit)
+        )
+        self.completed_phase_bits |= bit
+    
+    @classmethod
+    def compute_phase_bits(cls, mission_types):
+        """Build a bitmap from an iterable of mission types"""
+        bits = 0
+        for mission_type in mission_types:
+            bits |= cls.PHASE_BITS.get(mission_type, 0)
+        return bits
+    
     def get_phase_rating(self, mission_type):
         """Get rating for specific phase"""
         return self.phase_ratings.filter(mission__mission_type=mission_type).first()
@@ -2207,6 +2324,41 @@ class DesignTeam(models.Model):
         return "Submission completed"
 
 
+class TeamMembership(models.Model):
+    """
+    Normalized index of DesignTeam.team_members
+    
+    The JSON list stays the source of truth for existing readers; this table
+    is kept in sync by DesignTeam.save() and gives indexed student -> team
+    lookups, DB-enforced one-team-per-student, and cheap member counts.
+    """
+    team = models.ForeignKey(DesignTeam, on_delete=models.CASCADE, related_name='memberships')
+    session = models.ForeignKey(DesignThinkingSession, on_delete=models.CASCADE, related_name='team_memberships')
+    student_session_id = models.CharField(
+        max_length=100,
+        help_text="Student's session id (team-scoped key for name-only members)"
+    )
+    student_name = models.CharField(max_length=100)
+    joined_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Team Membership"
+        verbose_name_plural = "Team Memberships"
+        ordering = ['joined_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['session', 'student_session_id'],
+                name='unique_student_per_session'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['team', 'student_name']),
+        ]
+    
+    def __str__(self):
+        return f"{self.student_name} → {self.team.team_name}"
+
+
 class TeamProgress(models.Model):
     """
     Track individual team progress through each mission
@@ -2404,6 +2556,8 @@ class SimplifiedPhaseInput(models.Model):
             models.Index(fields=['team', 'mission', 'submitted_at']),
             models.Index(fields=['session', 'submitted_at']),
             models.Index(fields=['student_session_id', 'submitted_at']),
+            # Keyset pagination for polling APIs (id > cursor)
+            models.Index(fields=['session', 'is_active', 'id']),
         ]
     
     def __str__(self):
@@ -2441,6 +2595,10 @@ class SimplifiedPhaseInput(models.Model):
         """Enhanced save with validation"""
         self.full_clean()
         super().save(*args, **kwargs)
+        
+        # Keep the team's phase-completion bitmap current for phase gating
+        if self.is_active:
+            self.team.mark_phase_completed(self.mission.mission_type)
 
 
 class PhaseCompletionTracker(models.Model):
@@ -2566,7 +2724,7 @@ class PhaseCompletionTracker(models.Model):
                     logger.info(f"🎯 Team {self.team.team_name} completed {self.mission.title} at {self.phase_completed_at}")
                 
                 # Save changes
-                self.save(update_fields=['completion_percentage', 'is_ready_to_advance', 'phase_completed_at', 'updated_at'])
+                self.save(update_fields=['completed_inputs', 'completion_percentage', 'is_ready_to_advance', 'phase_completed_at', 'updated_at'])
                 
                 # Log significant changes
                 if abs(old_percentage - self.completion_percentage) >= 10:
@@ -2870,6 +3028,8 @@ class RealtimeFeedback(models.Model):
             models.Index(fields=['team', 'is_read', '-created_at']),
             models.Index(fields=['submission', '-created_at']),
             models.Index(fields=['websocket_sent', '-created_at']),
+            # Keyset pagination for feedback polling (id > cursor)
+            models.Index(fields=['session', 'team', 'id']),
         ]
     
     def __str__(self):
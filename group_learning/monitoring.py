@@ -4,6 +4,7 @@ Provides comprehensive logging, performance tracking, and error monitoring
 """
 
 import logging
+import threading
 import time
 import json
 from datetime import datetime, timedelta
@@ -324,10 +325,118 @@ class WebSocketConnectionMonitor:
         return cache.get(cache_key, {})
 
 
+class ConditionalGetMonitor:
+    """
+    Track how often polling endpoints answer with 304 Not Modified
+    
+    Counters are kept in-process: they are bumped on every poll, which is far
+    too hot a path for a cache round-trip, and the app runs as a single
+    Daphne process alongside the in-memory channel layer.
+    """
+    
+    def __init__(self, log_every: int = 500):
+        self.log_every = log_every
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+    
+    def record(self, endpoint: str, not_modified: bool):
+        """Record one conditional GET for an endpoint"""
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {'requests': 0, 'not_modified': 0})
+            stats['requests'] += 1
+            if not_modified:
+                stats['not_modified'] += 1
+            requests, hits = stats['requests'], stats['not_modified']
+        
+        if requests % self.log_every == 0:
+            logger.info(f"📉 Conditional GET {endpoint}: {hits}/{requests} answered 304 ({hits / requests:.1%})")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-endpoint request counts and 304 ratio"""
+        with self._lock:
+            snapshot = {endpoint: dict(stats) for endpoint, stats in self._stats.items()}
+        
+        for stats in snapshot.values():
+            stats['not_modified_ratio'] = round(stats['not_modified'] / stats['requests'], 4) if stats['requests'] else 0.0
+        return snapshot
+    
+    def reset(self):
+        """Clear all counters"""
+        with self._lock:
+            self._stats.clear()
+
+
+class OutboundQueueMonitor:
+    """
+    Per-session outbound WebSocket queue depth and slow-consumer counters
+    
+    In-process for the same reason as ConditionalGetMonitor: queue depth
+    changes on every broadcast to every connection.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._depths: Dict[str, Dict[str, int]] = {}
+    
+    def _session(self, session_code: str) -> Dict[str, Any]:
+        return self._sessions.setdefault(session_code, {
+            'sent': 0, 'collapsed': 0, 'max_depth': 0, 'slow_disconnects': 0
+        })
+    
+    def record_depth(self, session_code: str, connection_id: str, depth: int):
+        """Record the current queue depth of one connection"""
+        with self._lock:
+            stats = self._session(session_code)
+            stats['max_depth'] = max(stats['max_depth'], depth)
+            self._depths.setdefault(session_code, {})[connection_id] = depth
+    
+    def record_sent(self, session_code: str):
+        with self._lock:
+            self._session(session_code)['sent'] += 1
+    
+    def record_collapsed(self, session_code: str):
+        with self._lock:
+            self._session(session_code)['collapsed'] += 1
+    
+    def record_slow_disconnect(self, session_code: str, connection_id: str, depth: int):
+        with self._lock:
+            self._session(session_code)['slow_disconnects'] += 1
+        logger.warning(f"🐢 Slow consumer disconnected - Session: {session_code}, Connection: {connection_id}, Queue depth: {depth}")
+    
+    def remove_connection(self, session_code: str, connection_id: str):
+        with self._lock:
+            depths = self._depths.get(session_code, {})
+            depths.pop(connection_id, None)
+            if not depths:
+                self._depths.pop(session_code, None)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-session counters plus current connections and queue depths"""
+        with self._lock:
+            snapshot = {}
+            for session_code, stats in self._sessions.items():
+                depths = self._depths.get(session_code, {})
+                snapshot[session_code] = dict(
+                    stats,
+                    connections=len(depths),
+                    queued=sum(depths.values()),
+                    deepest_queue=max(depths.values(), default=0)
+                )
+        return snapshot
+    
+    def reset(self):
+        with self._lock:
+            self._sessions.clear()
+            self._depths.clear()
+
+
 # Global monitor instances
 performance_monitor = PerformanceMonitor()
 activity_monitor = SessionActivityMonitor()
 connection_monitor = WebSocketConnectionMonitor()
+conditional_get_monitor = ConditionalGetMonitor()
+outbound_queue_monitor = OutboundQueueMonitor()
 
 
 def log_operation(operation_name: str):
@@ -0,0 +1,331 @@
+"""
+Rule-based Vani mentor nudges from one periodic scan
+
+Mentor nudges used to be sent only by hand or on individual events, so
+spotting a stalled team meant polling each team. The engine runs inside the
+Daphne process (the channel layer is in-memory) while any Design Thinking
+socket is connected, and every ``VANI_NUDGE_SCAN_SECONDS``:
+
+1. Reads last input time, phase completion and time in phase for every team
+   in every active, mentor-enabled session with one aggregated query.
+2. Evaluates declarative rules in memory. "Class" comparisons use the teams
+   running the same game for the same facilitator; a session with no
+   facilitator is its own class.
+3. Sends at most one ``vani_nudges`` group message per session, carrying
+   that session's nudges, and stamps ``last_mentor_prompt`` with one UPDATE.
+
+Rules come from ``DEFAULT_NUDGE_RULES`` or ``settings.VANI_NUDGE_RULES``
+(same shape). When a mission has an active progress-based ``MentorNudge``
+whose ``trigger_condition`` names the rule (``{"rule": "inactive"}``), its
+title, message and emoji replace the rule's defaults.
+"""
+
+import asyncio
+import logging
+import statistics
+import time
+from collections import defaultdict
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db.models import F, Max, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import (
+    DesignTeam, DesignThinkingSession, MentorNudge, PhaseCompletionTracker
+)
+from .session_versions import bump_session_version
+
+logger = logging.getLogger(__name__)
+
+
+SCAN_SECONDS = getattr(settings, 'VANI_NUDGE_SCAN_SECONDS', 30)
+
+DEFAULT_NUDGE_RULES = [
+    {
+        'name': 'inactive',
+        'condition': 'inactive_for',
+        'seconds': 180,
+        'cooldown_seconds': 300,
+        'nudge_type': 'refocus',
+        'emoji': '⏰',
+        'title': 'Still with us?',
+        'message': "It's been a few minutes since your team's last answer. Pick one question and talk it through together!",
+    },
+    {
+        'name': 'behind_class',
+        'condition': 'behind_class_median',
+        'phases_behind': 0.5,
+        'min_class_size': 3,
+        'cooldown_seconds': 600,
+        'nudge_type': 'encouragement',
+        'emoji': '🚀',
+        'title': 'You can catch up!',
+        'message': 'Other teams are a little ahead. Split the questions between team members to move faster.',
+    },
+    {
+        'name': 'phase_overrun',
+        'condition': 'over_phase_time',
+        'cooldown_seconds': 600,
+        'nudge_type': 'instruction',
+        'emoji': '⌛',
+        'title': 'Time to wrap up',
+        'message': "You've spent longer than planned on this phase. Finish your answers so the class can move on.",
+    },
+]
+
+
+def _last_activity(team):
+    times = [t for t in (team['last_input_at'], team['phase_started_at']) if t]
+    return max(times) if times else None
+
+
+def _inactive_for(team, rule, now, class_median):
+    last_activity = _last_activity(team)
+    if last_activity is None or team['completion_percentage'] >= 100:
+        return False
+    return (now - last_activity).total_seconds() >= rule['seconds']
+
+
+def _behind_class_median(team, rule, now, class_median):
+    if class_median is None:
+        return False
+    return team['phases_done'] <= class_median - rule['phases_behind']
+
+
+def _over_phase_time(team, rule, now, class_median):
+    started, minutes = team['phase_started_at'], team['phase_minutes']
+    if not started or not minutes or team['completion_percentage'] >= 100:
+        return False
+    return (now - started).total_seconds() >= minutes * 60
+
+
+CONDITIONS = {
+    'inactive_for': _inactive_for,
+    'behind_class_median': _behind_class_median,
+    'over_phase_time': _over_phase_time,
+}
+
+
+def get_rules():
+    return getattr(settings, 'VANI_NUDGE_RULES', DEFAULT_NUDGE_RULES)
+
+
+class NudgeEngine:
+    """Periodic scan + in-memory rule evaluation for Vani nudges"""
+
+    def __init__(self, interval=None):
+        self.interval = interval
+        self.channel_layer = get_channel_layer()
+        self._last_sent = {}   # (team_id, mission_id, rule name) -> monotonic time
+        self._attached = 0
+        self._task = None
+        self.scans = 0
+        self.nudges_sent = 0
+
+    # -- lifecycle (driven by Design Thinking consumers) --
+
+    def attach(self):
+        """Called on connect: make sure a scan loop runs on this event loop"""
+        self._attached += 1
+        if not getattr(settings, 'VANI_NUDGE_ENGINE_ENABLED', True):
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    def detach(self):
+        """Called on disconnect: the loop exits once nobody is connected"""
+        self._attached = max(0, self._attached - 1)
+        if self._attached == 0 and self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def _run(self):
+        try:
+            while True:
+                await asyncio.sleep(self.interval or SCAN_SECONDS)
+                try:
+                    await self.scan_and_send()
+                except Exception as e:
+                    logger.error(f"💥 Vani nudge scan failed: {str(e)}", exc_info=True)
+        except asyncio.CancelledError:
+            pass
+
+    # -- scan --
+
+    async def scan_and_send(self):
+        nudges = await database_sync_to_async(self.scan)()
+        for session_code, session_nudges in nudges.items():
+            await self.channel_layer.group_send(
+                f'design_thinking_{session_code}',
+                {
+                    'type': 'vani_nudges',
+                    'nudges': session_nudges,
+                    'timestamp': timezone.now().isoformat()
+                }
+            )
+        return nudges
+
+    def scan(self, now=None):
+        """Evaluate every rule for every active team; returns {session_code: [nudge_data]}"""
+        now = now or timezone.now()
+        teams = self.load_team_activity()
+        self.scans += 1
+        if not teams:
+            return {}
+
+        class_medians = self._class_medians(teams)
+        rules = get_rules()
+        fired = []
+        for team in teams:
+            class_median = class_medians.get(team['class_key'])
+            for rule in rules:
+                condition = CONDITIONS.get(rule['condition'])
+                if condition is None or not self._cooled_down(team, rule):
+                    continue
+                if condition(team, rule, now, class_median):
+                    fired.append((team, rule))
+                    # One nudge per team per scan; rules are in priority order
+                    break
+
+        if not fired:
+            return {}
+
+        content = self._mission_content({team['mission_id'] for team, _rule in fired})
+        nudges = defaultdict(list)
+        for team, rule in fired:
+            self._last_sent[(team['team_id'], team['mission_id'], rule['name'])] = time.monotonic()
+            nudges[team['session_code']].append(self._nudge_data(team, rule, content))
+
+        DesignThinkingSession.objects.filter(
+            session_code__in=list(nudges)
+        ).update(last_mentor_prompt=now)
+        for session_code in nudges:
+            bump_session_version(session_code)
+
+        self.nudges_sent += len(fired)
+        self._prune_cooldowns(rules)
+        logger.info(f"🧭 Vani nudges: {len(fired)} across {len(nudges)} sessions ({len(teams)} teams scanned)")
+        return dict(nudges)
+
+    def load_team_activity(self):
+        """One query: per-team activity for the current phase of every active session"""
+        current_tracker = PhaseCompletionTracker.objects.filter(
+            team=OuterRef('pk'),
+            mission_id=OuterRef('session__current_mission_id')
+        ).values('completion_percentage')[:1]
+
+        rows = DesignTeam.objects.filter(
+            session__status='in_progress',
+            session__mentor_active=True,
+            session__current_mission__isnull=False
+        ).annotate(
+            last_input_at=Max(
+                'phase_inputs__submitted_at',
+                filter=Q(
+                    phase_inputs__mission_id=F('session__current_mission_id'),
+                    phase_inputs__is_active=True
+                )
+            ),
+            current_completion=Subquery(current_tracker)
+        ).values(
+            'id', 'team_name', 'last_input_at', 'current_completion',
+            'session__session_code', 'session__facilitator_id', 'session__design_game_id',
+            'session__mission_start_time', 'session__current_mission_id',
+            'session__current_mission__order', 'session__current_mission__estimated_duration'
+        )
+
+        teams = []
+        for row in rows:
+            completion = row['current_completion'] or 0
+            facilitator_id = row['session__facilitator_id']
+            teams.append({
+                'team_id': row['id'],
+                'team_name': row['team_name'],
+                'session_code': row['session__session_code'],
+                'class_key': (
+                    ('facilitator', facilitator_id, row['session__design_game_id'])
+                    if facilitator_id else ('session', row['session__session_code'])
+                ),
+                'mission_id': row['session__current_mission_id'],
+                'phase_minutes': row['session__current_mission__estimated_duration'],
+                'phase_started_at': row['session__mission_start_time'],
+                'last_input_at': row['last_input_at'],
+                'completion_percentage': completion,
+                'phases_done': (row['session__current_mission__order'] - 1) + completion / 100,
+            })
+        return teams
+
+    @staticmethod
+    def _class_medians(teams):
+        progress = defaultdict(list)
+        for team in teams:
+            progress[team['class_key']].append(team['phases_done'])
+
+        medians = {}
+        min_sizes = [rule.get('min_class_size', 2) for rule in get_rules() if rule['condition'] == 'behind_class_median']
+        min_size = min(min_sizes, default=2)
+        for class_key, values in progress.items():
+            if len(values) >= min_size:
+                medians[class_key] = statistics.median(values)
+        return medians
+
+    def _cooled_down(self, team, rule):
+        sent_at = self._last_sent.get((team['team_id'], team['mission_id'], rule['name']))
+        return sent_at is None or time.monotonic() - sent_at >= rule.get('cooldown_seconds', 300)
+
+    def _prune_cooldowns(self, rules):
+        longest = max((rule.get('cooldown_seconds', 300) for rule in rules), default=300)
+        cutoff = time.monotonic() - longest
+        for key in [key for key, sent_at in self._last_sent.items() if sent_at < cutoff]:
+            del self._last_sent[key]
+
+    @staticmethod
+    def _mission_content(mission_ids):
+        """Mentor nudges configured for the fired missions, keyed by (mission_id, rule name)"""
+        content = {}
+        for nudge in MentorNudge.objects.filter(
+            mission_id__in=mission_ids, trigger_type='progress_based', is_active=True
+        ):
+            rule_name = (nudge.trigger_condition or {}).get('rule')
+            if rule_name:
+                content.setdefault((nudge.mission_id, rule_name), nudge)
+        return content
+
+    @staticmethod
+    def _nudge_data(team, rule, content):
+        mentor_nudge = content.get((team['mission_id'], rule['name']))
+        nudge_data = {
+            'rule': rule['name'],
+            'team_id': team['team_id'],
+            'team_name': team['team_name'],
+            'nudge_type': rule['nudge_type'],
+            'emoji': rule['emoji'],
+            'title': rule['title'],
+            'message': rule['message'],
+            'completion_percentage': team['completion_percentage'],
+        }
+        if mentor_nudge:
+            nudge_data.update({
+                'nudge_id': mentor_nudge.id,
+                'nudge_type': mentor_nudge.nudge_type,
+                'emoji': mentor_nudge.emoji,
+                'title': mentor_nudge.title,
+                'message': mentor_nudge.message,
+                'display_duration': mentor_nudge.display_duration,
+                'background_color': mentor_nudge.background_color,
+            })
+        return nudge_data
+
+    def get_stats(self):
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'connections': self._attached,
+            'scans': self.scans,
+            'nudges_sent': self.nudges_sent,
+            'cooldowns_tracked': len(self._last_sent),
+        }
+
+
+nudge_engine = NudgeEngine()
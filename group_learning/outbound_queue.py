@@ -0,0 +1,189 @@
+"""
+Outbound flow control for the session WebSocket consumers
+
+Group-message handlers used to ``await self.send`` directly, so a student on
+a poor connection held up the consumer's receive loop and their channel-layer
+backlog grew until the InMemoryChannelLayer capacity silently dropped
+messages. With this mixin every outgoing frame goes through a bounded
+per-connection queue drained by a writer task.
+
+The server can't see a slow client from the send itself: Daphne writes each
+frame into the Twisted transport's buffer and returns at once. Lag is instead
+measured by the client, which reports how many frames it has received
+(``{"type": "outbound_ack", "received": n}``). Once a connection has acked,
+the writer keeps at most ``OUTBOUND_ACK_WINDOW`` frames unacknowledged and
+the rest wait in the queue, so the queue reflects frames the client really
+hasn't read. Clients that never ack are sent to without pacing.
+
+- Superseded state messages (session status, per-team progress, timer)
+  waiting in the queue are collapsed so only the latest copy is delivered.
+- A connection whose queue stays full, or whose oldest frame waits too long,
+  is closed with ``SLOW_CONSUMER_CLOSE_CODE``. Clients already reconnect on
+  close, and a fresh connect sends the full ``session_status``, so the close
+  is resumable.
+- Queue depths and collapse / disconnect counts are reported per session via
+  ``outbound_queue_monitor``.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import time
+from collections import deque
+
+from django.conf import settings
+
+from .monitoring import outbound_queue_monitor
+
+logger = logging.getLogger(__name__)
+
+
+OUTBOUND_QUEUE_SIZE = getattr(settings, 'WEBSOCKET_OUTBOUND_QUEUE_SIZE', 50)
+SLOW_CONSUMER_SECONDS = getattr(settings, 'WEBSOCKET_SLOW_CONSUMER_SECONDS', 15)
+SLOW_CONSUMER_CLOSE_CODE = 4008
+# Frames a client that acks may have unacknowledged before the writer waits
+OUTBOUND_ACK_WINDOW = getattr(settings, 'WEBSOCKET_OUTBOUND_ACK_WINDOW', 20)
+
+# Group message type -> function giving the part of the collapse key that
+# distinguishes independent copies (e.g. one progress stream per team)
+COLLAPSIBLE_MESSAGES = {
+    'session_status_update': lambda event: None,
+    'team_progress_update': lambda event: (event.get('team_data') or {}).get('id'),
+    'timer_update': lambda event: None,
+}
+
+# Set while a group message is dispatched; a context variable so frames sent
+# by other tasks (ping monitors) are never mistaken for the superseded kind
+_collapse_key = contextvars.ContextVar('outbound_collapse_key', default=None)
+
+
+class OutboundQueueMixin:
+    """
+    Mix in before ``AsyncWebsocketConsumer`` to queue outgoing frames
+
+    Expects ``self.session_code`` and ``self.connection_id`` (set in connect).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._outbound = deque()         # [collapse_key, text, enqueued_at]; text None = superseded
+        self._outbound_pending = {}      # collapse_key -> queued entry
+        self._outbound_depth = 0
+        self._outbound_writer = None
+        self._outbound_closed = False
+        self._outbound_sent = 0          # text frames handed to the server
+        self._outbound_acked = None      # frames the client reported; None until it first acks
+        self._outbound_ack = asyncio.Event()
+
+    async def dispatch(self, message):
+        key_for = COLLAPSIBLE_MESSAGES.get(message.get('type'))
+        if key_for is None:
+            return await super().dispatch(message)
+
+        token = _collapse_key.set((message['type'], key_for(message)))
+        try:
+            return await super().dispatch(message)
+        finally:
+            _collapse_key.reset(token)
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        if text_data is None or close:
+            # Binary frames and send-and-close bypass the queue
+            return await super().send(text_data=text_data, bytes_data=bytes_data, close=close)
+
+        if self._outbound_closed:
+            return
+
+        key = _collapse_key.get()
+        superseded = self._outbound_pending.pop(key, None) if key is not None else None
+        if superseded is not None:
+            superseded[1] = None
+            self._outbound_depth -= 1
+            outbound_queue_monitor.record_collapsed(self.session_code)
+        if self._is_slow_consumer():
+            await self._disconnect_slow_consumer()
+            return
+
+        entry = [key, text_data, time.monotonic()]
+        self._outbound.append(entry)
+        self._outbound_depth += 1
+        if key is not None:
+            self._outbound_pending[key] = entry
+        outbound_queue_monitor.record_depth(self.session_code, self.connection_id, self._outbound_depth)
+
+        if self._outbound_writer is None or self._outbound_writer.done():
+            self._outbound_writer = asyncio.ensure_future(self._drain_outbound())
+
+    async def websocket_receive(self, message):
+        text_data = message.get('text')
+        if text_data and '"outbound_ack"' in text_data:
+            try:
+                data = json.loads(text_data)
+            except ValueError:
+                data = None
+            if isinstance(data, dict) and data.get('type') == 'outbound_ack':
+                self._record_ack(data.get('received'))
+                return
+        await super().websocket_receive(message)
+
+    def _record_ack(self, received):
+        if not isinstance(received, int) or isinstance(received, bool):
+            return
+        # Never more than was sent, never backwards
+        received = min(max(received, 0), self._outbound_sent)
+        if self._outbound_acked is None or received > self._outbound_acked:
+            self._outbound_acked = received
+            self._outbound_ack.set()
+
+    def _window_full(self):
+        return (
+            self._outbound_acked is not None
+            and self._outbound_sent - self._outbound_acked >= OUTBOUND_ACK_WINDOW
+        )
+
+    def _is_slow_consumer(self):
+        if self._outbound_depth >= OUTBOUND_QUEUE_SIZE:
+            return True
+        oldest = next((entry for entry in self._outbound if entry[1] is not None), None)
+        return oldest is not None and time.monotonic() - oldest[2] > SLOW_CONSUMER_SECONDS
+
+    async def _drain_outbound(self):
+        while self._outbound:
+            if self._window_full():
+                # Frames stay queued (and collapsible) until the client catches up
+                self._outbound_ack.clear()
+                await self._outbound_ack.wait()
+                continue
+            entry = self._outbound.popleft()
+            key, text_data, _enqueued_at = entry
+            if text_data is None:
+                continue
+            if key is not None and self._outbound_pending.get(key) is entry:
+                del self._outbound_pending[key]
+            self._outbound_depth -= 1
+            await super().send(text_data=text_data)
+            self._outbound_sent += 1
+            outbound_queue_monitor.record_sent(self.session_code)
+            outbound_queue_monitor.record_depth(self.session_code, self.connection_id, self._outbound_depth)
+
+    def _clear_outbound(self):
+        self._outbound.clear()
+        self._outbound_pending.clear()
+        self._outbound_depth = 0
+        writer = self._outbound_writer
+        if writer is not None and not writer.done() and writer is not asyncio.current_task():
+            writer.cancel()
+
+    async def _disconnect_slow_consumer(self):
+        outbound_queue_monitor.record_slow_disconnect(self.session_code, self.connection_id, self._outbound_depth)
+        self._outbound_closed = True
+        self._clear_outbound()
+        await self.close(code=SLOW_CONSUMER_CLOSE_CODE)
+
+    async def websocket_disconnect(self, message):
+        self._outbound_closed = True
+        self._clear_outbound()
+        if getattr(self, 'session_code', None):
+            outbound_queue_monitor.remove_connection(self.session_code, self.connection_id)
+        await super().websocket_disconnect(message)
@@ -16,18 +16,31 @@ class BasePhaseView(TemplateView):
     next_phase = None  # Override in subclasses 
     template_name = None  # Override in subclasses
     
+    # Phase order and the mission type each phase's inputs are saved under
+    PHASE_ORDER = ['intro', 'empathy', 'define', 'ideate', 'prototype', 'testing']
+    PHASE_TO_MISSION = {
+        'intro': 'kickoff',
+        'empathy': 'empathy',
+        'define': 'define',
+        'ideate': 'ideate',
+        'prototype': 'prototype',
+        'testing': 'showcase'  # Use showcase for testing phase
+    }
+    
     def dispatch(self, request, *args, **kwargs):
         """Initialize common data and check access permissions"""
         self.session_code = kwargs.get('session_code')
         
-        # Get team from session (check cookies/session)
+        # Get team (with its session) from session cookies - one query
         self.team = self._get_team_from_session(request)
-        self.session = get_object_or_404(DesignThinkingSession, session_code=self.session_code)
         
         if not self.team:
+            get_object_or_404(DesignThinkingSession, session_code=self.session_code)
             messages.error(request, 'Please join a team first.')
             return redirect('group_learning:simplified_join_session', session_code=self.session_code)
         
+        self.session = self.team.session
+        
         # Check if this phase is already submitted (prevent re-submission)
         if self.is_phase_submitted():
             messages.info(request, f'{self.get_phase_display()} phase already completed.')
@@ -45,39 +58,25 @@ class BasePhaseView(TemplateView):
         team_id = request.session.get(f'team_id_{self.session_code}')
         if team_id:
             try:
-                return DesignTeam.objects.get(id=team_id, session__session_code=self.session_code)
+                return DesignTeam.objects.select_related('session__design_game').get(
+                    id=team_id, session__session_code=self.session_code
+                )
             except DesignTeam.DoesNotExist:
                 pass
         return None
     
     def is_phase_submitted(self):
         """Check if this phase is already submitted by the team"""
-        return SimplifiedPhaseInput.objects.filter(
-            team=self.team,
-            session=self.session,
-            phase_type=self.phase_type
-        ).exists()
+        return self.team.has_completed_phase(self.PHASE_TO_MISSION[self.phase_type])
     
     def can_access_phase(self):
         """Check if previous phases are completed (strict progression)"""
         if self.phase_type == 'intro':
             return True  # Can always access intro
             
-        # Define phase order
-        phase_order = ['intro', 'empathy', 'define', 'ideate', 'prototype', 'testing']
-        current_index = phase_order.index(self.phase_type)
-        
-        # Check all previous phases are completed
-        for i in range(current_index):
-            previous_phase = phase_order[i]
-            if not SimplifiedPhaseInput.objects.filter(
-                team=self.team,
-                session=self.session,
-                phase_type=previous_phase
-            ).exists():
-                return False
-                
-        return True
+        current_index = self.PHASE_ORDER.index(self.phase_type)
+        previous_missions = [self.PHASE_TO_MISSION[phase] for phase in self.PHASE_ORDER[:current_index]]
+        return self.team.has_completed_phases(previous_missions)
     
     def get_phase_display(self):
         """Get human-readable phase name"""
@@ -93,17 +92,7 @@ class BasePhaseView(TemplateView):
     
     def get_mission_for_phase(self):
         """Get the appropriate mission for this phase type"""
-        # Map phase types to mission types
-        phase_to_mission = {
-            'intro': 'kickoff',
-            'empathy': 'empathy',
-            'define': 'define',
-            'ideate': 'ideate',
-            'prototype': 'prototype',
-            'testing': 'showcase'  # Use showcase for testing phase
-        }
-        
-        mission_type = phase_to_mission.get(self.phase_type)
+        mission_type = self.PHASE_TO_MISSION.get(self.phase_type)
         if not mission_type:
             raise ValidationError(f"No mission type defined for phase: {self.phase_type}")
         
@@ -168,24 +157,13 @@ class StudentEntryView(View):
             
         try:
             team = DesignTeam.objects.get(id=team_id, session__session_code=session_code)
-            session = DesignThinkingSession.objects.get(session_code=session_code)
-        except (DesignTeam.DoesNotExist, DesignThinkingSession.DoesNotExist):
+        except DesignTeam.DoesNotExist:
             messages.error(request, 'Session or team not found.')
             return redirect('group_learning:simplified_create_session')
         
-        # Check which phases are completed
-        completed_phases = set(
-            SimplifiedPhaseInput.objects.filter(
-                team=team, 
-                session=session
-            ).values_list('phase_type', flat=True)
-        )
-        
-        # Determine next unsubmitted phase
-        phase_order = ['intro', 'empathy', 'define', 'ideate', 'prototype', 'testing']
-        
-        for phase in phase_order:
-            if phase not in completed_phases:
+        # Determine next unsubmitted phase from the team's completion bitmap
+        for phase in BasePhaseView.PHASE_ORDER:
+            if not team.has_completed_phase(BasePhaseView.PHASE_TO_MISSION[phase]):
                 return redirect(f'group_learning:{phase}_phase', session_code=session_code)
         
         # All phases complete
@@ -205,7 +183,6 @@ class IntroPhaseView(BasePhaseView):
             team=self.team,
             mission=mission,
             session=self.session,
-            phase_type=self.phase_type,
             student_name=self.team.team_name,
             student_session_id=f"team_{self.team.id}",
             input_type='checkbox',
@@ -235,7 +212,6 @@ class EmpathyPhaseView(BasePhaseView):
                 team=self.team,
                 mission=mission,
                 session=self.session,
-                phase_type=self.phase_type,
                 student_name=self.team.team_name,
                 student_session_id=f"team_{self.team.id}",
                 input_type='checkbox',
@@ -275,7 +251,6 @@ class DefinePhaseView(BasePhaseView):
                 team=self.team,
                 mission=mission,
                 session=self.session,
-                phase_type=self.phase_type,
                 student_name=self.team.team_name,
                 student_session_id=f"team_{self.team.id}",
                 input_type='text_medium',
@@ -309,7 +284,6 @@ class IdeatePhaseView(BasePhaseView):
                 team=self.team,
                 mission=mission,
                 session=self.session,
-                phase_type=self.phase_type,
                 student_name=self.team.team_name,
                 student_session_id=f"team_{self.team.id}",
                 input_type='text_medium',
@@ -347,7 +321,6 @@ class PrototypePhaseView(BasePhaseView):
                 team=self.team,
                 mission=mission,
                 session=self.session,
-                phase_type=self.phase_type,
                 student_name=self.team.team_name,
                 student_session_id=f"team_{self.team.id}",
                 input_type='text_medium' if i == 1 else 'checkbox',
@@ -373,7 +346,6 @@ class TestingPhaseView(BasePhaseView):
             team=self.team,
             mission=mission,
             session=self.session,
-            phase_type=self.phase_type,
             student_name=self.team.team_name,
             student_session_id=f"team_{self.team.id}",
             input_type='text_medium',
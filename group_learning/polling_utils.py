@@ -0,0 +1,68 @@
+"""
+Helpers for the HTTP polling APIs used by teacher and student dashboards
+
+Polling clients pass the ``next_cursor`` from their previous response back as
+``?since=<cursor>`` so every poll is a single indexed range scan over rows
+newer than the cursor instead of re-reading the whole session history.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db.models import QuerySet
+
+
+# Page size limits for keyset-paginated polling endpoints
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a malformed ``since``/``limit`` parameter"""
+
+
+def parse_cursor_params(request) -> Tuple[int, int]:
+    """
+    Read ``since`` and ``limit`` from the query string.
+
+    The cursor is the primary key of the last row the client has seen; ids are
+    monotonic so ``id > since`` returns exactly the rows created afterwards.
+    Returns (since, limit) with the limit clamped to MAX_PAGE_SIZE.
+    """
+    since_param = request.GET.get('since', '').strip()
+    limit_param = request.GET.get('limit', '').strip()
+
+    try:
+        since = int(since_param) if since_param else 0
+        limit = int(limit_param) if limit_param else DEFAULT_PAGE_SIZE
+    except ValueError:
+        raise InvalidCursor('since and limit must be integers')
+
+    if since < 0 or limit < 1:
+        raise InvalidCursor('since must be >= 0 and limit must be >= 1')
+
+    return since, min(limit, MAX_PAGE_SIZE)
+
+
+def keyset_page(queryset: QuerySet, since: int, limit: int) -> Tuple[List[Any], Optional[int], bool]:
+    """
+    Fetch one page of rows with ``id > since`` ordered by id.
+
+    One extra row is read to know whether another page follows, so no COUNT
+    query is needed. Returns (rows, next_cursor, has_more); next_cursor is the
+    id of the last returned row, or the incoming cursor when nothing is new so
+    clients can keep polling with the same value.
+    """
+    rows = list(queryset.filter(id__gt=since).order_by('id')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = rows[-1].id if rows else since
+    return rows, next_cursor, has_more
+
+
+def cursor_response_fields(next_cursor: Optional[int], has_more: bool, limit: int) -> Dict[str, Any]:
+    """Common pagination fields merged into polling API responses"""
+    return {
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'page_size': limit,
+    }
@@ -0,0 +1,260 @@
+"""
+Rate limiting for incoming WebSocket messages
+
+``DesignThinkingConsumer.check_rate_limit`` used to ``cache.get`` a counter and
+``cache.set`` it back with a fresh 60s TTL: two clients could read the same
+count, every write pushed the expiry out again, and under the DummyCache that
+production runs with it never limited anything.
+
+This module counts hits with a sliding-window counter built on atomic
+``cache.add`` + ``cache.incr``. Each window's counter key is written once with
+a fixed expiry (two windows), and the previous window's count is weighted by
+how much of it still overlaps the sliding window. When the configured cache
+can't count (DummyCache) or errors, an in-process store with the same
+semantics is used instead - the app runs as a single Daphne process, so
+in-process counts are exact there.
+
+Policies are configured per message type, each a list of limits scoped to the
+team the connection joined as (``self.team_id``, never the ``team_id`` a
+message claims, which a client could omit or rotate) or to the connection. A rejected message
+gets an ``error`` frame with ``retry_after`` seconds; a connection that keeps
+sending after being told to wait is closed with ``RATE_LIMIT_CLOSE_CODE``.
+"""
+
+import json
+import logging
+import math
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+RATE_LIMIT_CLOSE_CODE = 4006
+# Rejections in a row (without an accepted message in between) before closing
+RATE_LIMIT_STRIKES = getattr(settings, 'WEBSOCKET_RATE_LIMIT_STRIKES', 5)
+
+RateLimit = namedtuple('RateLimit', ['scope', 'limit', 'window'])
+RateLimitResult = namedtuple('RateLimitResult', ['allowed', 'retry_after', 'scope'])
+
+ALLOWED = RateLimitResult(True, 0, None)
+
+# Message type -> limits; overridden per type by settings.WEBSOCKET_RATE_LIMITS
+# using the same shape, e.g. {'vani_nudge': [('connection', 5, 60)]}
+DEFAULT_POLICIES = {
+    'simplified_input_submit': [RateLimit('team', 10, 60), RateLimit('connection', 5, 10)],
+    'phase_inputs_submit': [RateLimit('team', 5, 60), RateLimit('connection', 3, 10)],
+    'teacher_score_submit': [RateLimit('connection', 30, 60)],
+    'teacher_feedback_submit': [RateLimit('connection', 30, 60)],
+    'teacher_feedback_bulk_submit': [RateLimit('connection', 10, 60)],
+    'feedback_ack': [RateLimit('connection', 60, 60)],
+    'team_update': [RateLimit('team', 30, 60)],
+    'mission_control': [RateLimit('connection', 20, 60)],
+    'vani_nudge': [RateLimit('connection', 10, 60)],
+    'request_status': [RateLimit('connection', 20, 60)],
+    'reconnect_request': [RateLimit('connection', 5, 60)],
+}
+
+
+def get_policy(message_type):
+    overrides = getattr(settings, 'WEBSOCKET_RATE_LIMITS', {})
+    limits = overrides.get(message_type, DEFAULT_POLICIES.get(message_type, []))
+    return [RateLimit(*limit) for limit in limits]
+
+
+class LocalCounterStore:
+    """In-process stand-in for the cache calls the limiter needs"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._counters = {}  # key -> [count, expires_at]
+        self._lock = threading.Lock()
+
+    def incr(self, key, delta, timeout):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None or entry[1] <= now:
+                if len(self._counters) >= self.max_entries:
+                    self._prune(now)
+                entry = self._counters[key] = [0, now + timeout]
+            entry[0] += delta
+            return entry[0]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return 0
+            return entry[0]
+
+    def _prune(self, now):
+        for key in [key for key, entry in self._counters.items() if entry[1] <= now]:
+            del self._counters[key]
+        # Still full of live keys: drop the oldest half rather than grow unbounded
+        if len(self._counters) >= self.max_entries:
+            for key in list(self._counters)[:self.max_entries // 2]:
+                del self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class CacheCounterStore:
+    """Atomic counters on a Django cache (``add`` creates with a fixed expiry, ``incr`` never touches it)"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def incr(self, key, delta, timeout):
+        self.cache.add(key, 0, timeout)
+        try:
+            return self.cache.incr(key, delta)
+        except ValueError:
+            # Expired between add and incr
+            self.cache.add(key, delta, timeout)
+            return delta
+
+    def get(self, key):
+        return self.cache.get(key) or 0
+
+
+class SlidingWindowRateLimiter:
+    """Sliding-window counters keyed by ``(message_type, scope, identity)``"""
+
+    def __init__(self, cache_alias=None):
+        self.cache_alias = cache_alias
+        self.local_store = LocalCounterStore()
+        self._store = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            alias = self.cache_alias or getattr(settings, 'WEBSOCKET_RATE_LIMIT_CACHE', 'default')
+            cache = caches[alias]
+            self._store = self.local_store if isinstance(cache, DummyCache) else CacheCounterStore(cache)
+        return self._store
+
+    def hit(self, message_type, team_id=None, connection_id=None, now=None):
+        """
+        Count one message against every limit in its policy
+
+        Returns a ``RateLimitResult``. A rejected message is not counted, so a
+        client that waits ``retry_after`` seconds is let through.
+        """
+        policy = get_policy(message_type)
+        if not policy:
+            return ALLOWED
+
+        now = time.time() if now is None else now
+        identities = {'team': team_id, 'connection': connection_id}
+        counted = []
+        for rate_limit in policy:
+            identity = identities.get(rate_limit.scope)
+            if identity is None:
+                continue
+            key = f'ws_rate:{message_type}:{rate_limit.scope}:{identity}'
+            retry_after = self._hit_window(key, rate_limit, now)
+            if retry_after:
+                for counted_key, counted_limit in counted:
+                    self._incr(self._window_key(counted_key, counted_limit, now), -1, counted_limit.window * 2)
+                return RateLimitResult(False, retry_after, rate_limit.scope)
+            counted.append((key, rate_limit))
+        return ALLOWED
+
+    def _window_key(self, key, rate_limit, now, offset=0):
+        return f'{key}:{int(now // rate_limit.window) + offset}'
+
+    def _hit_window(self, key, rate_limit, now):
+        """Count a hit; on rejection undo it and return seconds until one would pass"""
+        window = rate_limit.window
+        current_key = self._window_key(key, rate_limit, now)
+        current = self._incr(current_key, 1, window * 2)
+        previous = self._get(self._window_key(key, rate_limit, now, offset=-1))
+
+        elapsed = now % window
+        overlap = 1 - elapsed / window
+        if previous * overlap + current <= rate_limit.limit:
+            return 0
+
+        self._incr(current_key, -1, window * 2)
+        current -= 1
+        return self._retry_after(rate_limit, previous, current, elapsed)
+
+    @staticmethod
+    def _retry_after(rate_limit, previous, current, elapsed):
+        window, room = rate_limit.window, rate_limit.limit - 1
+        if current > room:
+            # Wait out this window, then until enough of it has slid past
+            wait = (window - elapsed) + window * max(0.0, 1 - room / current)
+        else:
+            # Wait until enough of the previous window has slid past
+            wait = window * (1 - (room - current) / previous) - elapsed
+        return max(0.1, math.ceil(wait * 10) / 10)
+
+    def _incr(self, key, delta, timeout):
+        try:
+            return self.store.incr(key, delta, timeout)
+        except Exception as e:
+            logger.warning(f"⚠️ Rate limit cache unavailable, counting in-process: {str(e)}")
+            return self.local_store.incr(key, delta, timeout)
+
+    def _get(self, key):
+        try:
+            return self.store.get(key)
+        except Exception:
+            return self.local_store.get(key)
+
+    def reset(self):
+        self.local_store.clear()
+        self._store = None
+
+
+rate_limiter = SlidingWindowRateLimiter()
+
+
+class RateLimitMixin:
+    """
+    Mix into a WebSocket consumer; call ``allow_message`` at the top of receive
+
+    Expects ``self.session_code`` and ``self.connection_id`` (set in connect).
+    """
+
+    rate_limit_strikes = 0
+
+    async def allow_message(self, message_type, data):
+        """False (after telling the client, or closing) when the message is rate limited"""
+        result = rate_limiter.hit(
+            message_type,
+            team_id=getattr(self, 'team_id', None),
+            connection_id=self.channel_name
+        )
+        if result.allowed:
+            self.rate_limit_strikes = 0
+            return True
+
+        self.rate_limit_strikes += 1
+        if self.rate_limit_strikes >= RATE_LIMIT_STRIKES:
+            logger.warning(f"🚫 Closing rate-limited connection - Session: {self.session_code}, Connection: {self.connection_id}, Type: {message_type}")
+            await self.close(code=RATE_LIMIT_CLOSE_CODE)
+            return False
+
+        logger.warning(f"⚠️ Rate limited {message_type} ({result.scope}) - Session: {self.session_code}, Connection: {self.connection_id}, retry after {result.retry_after}s")
+        await self.send(text_data=json.dumps({
+            'type': 'error',
+            'message': 'Too many submissions. Please wait before trying again.',
+            'error_code': 'rate_limited',
+            'message_type': message_type,
+            'retry_after': result.retry_after,
+            'retry_allowed': True,
+            'timestamp': timezone.now().isoformat(),
+            'connection_id': self.connection_id
+        }))
+        return False
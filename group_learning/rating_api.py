@@ -278,7 +278,7 @@ class TeamSubmissionDetailView(View):
                     'id': team.id,
                     'name': team.team_name,
                     'emoji': team.team_emoji,
-                    'members': team.team_members
+                    'members': team.member_names
                 },
                 'mission': {
                     'type': mission.mission_type,
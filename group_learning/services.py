@@ -4,13 +4,15 @@ Centralized business logic for mission advancement, progress tracking, and sessi
 """
 
 from django.db import transaction, IntegrityError
+from django.db.models import Count, Prefetch, Q
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 import logging
 
-from .cache import DesignThinkingCache
+from .cache import DesignThinkingCache, diff_progress, session_progress_store
+from .session_versions import SessionVersions
 
 from .models import (
     DesignThinkingSession, DesignTeam, TeamProgress, 
@@ -123,8 +125,9 @@ class DesignThinkingService:
                 if deleted_count > 0:
                     logger.info(f"Cleaned up {deleted_count} future mission progress records")
                 
-                # Invalidate caches after mission advancement
-                DesignThinkingCache.invalidate_all_session_caches(self.session.session_code)
+                # Mission states and progress rows all moved: rematerialize after commit
+                DesignThinkingCache.invalidate_facilitator_dashboard(self.session.session_code)
+                transaction.on_commit(self._refresh_progress)
                 
                 # Broadcast real-time updates
                 self._broadcast_mission_change(old_mission, target_mission)
@@ -185,6 +188,7 @@ class DesignThinkingService:
                     teams = self.session.design_teams.all()
                 
                 completed_count = 0
+                completed_progress = []
                 
                 for team_obj in teams:
                     progress, created = TeamProgress.objects.get_or_create(
@@ -198,9 +202,15 @@ class DesignThinkingService:
                         progress.completed_at = timezone.now()
                         progress.save()
                         completed_count += 1
+                    completed_progress.append(progress)
                 
-                # Broadcast completion updates
-                self._broadcast_progress_update()
+                # Update the materialized progress and broadcast the diff
+                mission_id = self.session.current_mission.id
+                transaction.on_commit(
+                    lambda: self.apply_progress_change(
+                        lambda progress_data: _set_team_progress(progress_data, mission_id, completed_progress)
+                    )
+                )
                 
                 return {
                     'success': True,
@@ -214,39 +224,57 @@ class DesignThinkingService:
     
     def get_session_progress(self):
         """
-        Get comprehensive progress data for the session with caching
+        Get comprehensive progress data for the session
+        
+        Served from the materialized snapshot, which the mission-advance and
+        submission paths keep current. It is rebuilt from the database on a
+        cold start, or when the session version shows a write that went
+        through some other path.
         
         Returns:
             dict: Progress summary with mission states and team progress
         """
-        # Try to get from cache first
-        cached_data = DesignThinkingCache.get_session_progress(self.session.session_code)
-        if cached_data:
-            logger.debug(f"Returning cached progress data for session {self.session.session_code}")
-            return cached_data
+        session_code = self.session.session_code
+        version = SessionVersions.get(session_code)
+        progress_data = DesignThinkingCache.get_session_progress(session_code)
+        if progress_data and progress_data.get('source_version') == version:
+            return progress_data
         
-        logger.debug(f"Computing fresh progress data for session {self.session.session_code}")
+        logger.debug(f"Materializing progress data for session {session_code}")
+        _previous, progress_data = session_progress_store.replace(
+            session_code, self._build_session_progress(), source_version=version
+        )
+        return progress_data
+    
+    def _build_session_progress(self):
+        """
+        Build progress data from the database
         
+        Missions come back annotated with this session's submission counts and
+        with the session's TeamProgress rows prefetched, so the cost no longer
+        grows with the number of missions.
+        """
+        session = self.session
         missions = DesignMission.objects.filter(
-            game=self.session.design_game,
+            game_id=session.design_game_id,
             is_active=True
+        ).annotate(
+            session_submission_count=Count(
+                'teamsubmission', filter=Q(teamsubmission__team__session=session)
+            )
+        ).prefetch_related(
+            Prefetch(
+                'teamprogress_set',
+                queryset=TeamProgress.objects.filter(session=session).select_related('team'),
+                to_attr='session_team_progress'
+            )
         ).order_by('order')
         
-        teams = self.session.design_teams.all()
-        
-        current_mission_order = 0
-        if self.session.current_mission:
-            current_mission_order = self.session.current_mission.order
+        current_mission = session.current_mission
+        current_mission_order = current_mission.order if current_mission else 0
         
         mission_progress = []
-        
         for mission in missions:
-            # Get team progress for this mission
-            team_progress = TeamProgress.objects.filter(
-                session=self.session,
-                mission=mission
-            ).select_related('team')
-            
             # Determine mission state
             if mission.order < current_mission_order:
                 state = 'completed'
@@ -255,58 +283,49 @@ class DesignThinkingService:
             else:
                 state = 'locked'
             
-            # Count submissions for this mission with caching
-            cached_count = DesignThinkingCache.get_team_submissions_count(
-                'all_teams', mission.id
-            )
-            
-            if cached_count is not None:
-                submission_count = cached_count
-            else:
-                submission_count = TeamSubmission.objects.filter(
-                    mission=mission,
-                    team__in=teams
-                ).count()
-                
-                # Cache the count
-                DesignThinkingCache.set_team_submissions_count(
-                    'all_teams', mission.id, submission_count
-                )
-            
             mission_progress.append({
                 'id': mission.id,
                 'title': mission.title,
                 'order': mission.order,
                 'state': state,
                 'description': mission.description,
-                'team_progress': [
-                    {
-                        'team_name': tp.team.team_name,
-                        'is_completed': tp.is_completed,
-                        'started_at': tp.started_at,
-                        'completed_at': tp.completed_at
-                    }
-                    for tp in team_progress
-                ],
-                'submission_count': submission_count
+                'team_progress': [_team_progress_entry(tp) for tp in mission.session_team_progress],
+                'submission_count': mission.session_submission_count
             })
         
-        progress_data = {
-            'session_code': self.session.session_code,
+        return {
+            'session_code': session.session_code,
             'current_mission': {
-                'id': self.session.current_mission.id if self.session.current_mission else None,
-                'title': self.session.current_mission.title if self.session.current_mission else None,
+                'id': current_mission.id if current_mission else None,
+                'title': current_mission.title if current_mission else None,
                 'order': current_mission_order
             },
             'missions': mission_progress,
-            'teams_count': teams.count(),
-            'session_status': self.session.status
+            'teams_count': session.design_teams.count(),
+            'session_status': session.status
         }
+    
+    def _refresh_progress(self):
+        """Rebuild the materialized progress from the database and broadcast what changed"""
+        version = SessionVersions.get(self.session.session_code)
+        previous, current = session_progress_store.replace(
+            self.session.session_code, self._build_session_progress(), source_version=version
+        )
+        self._broadcast_progress_update(diff_progress(previous, current), current['version'])
+    
+    def apply_progress_change(self, mutate):
+        """
+        Apply ``mutate(progress_data)`` to the materialized progress and broadcast the diff
         
-        # Cache the computed data
-        DesignThinkingCache.set_session_progress(self.session.session_code, progress_data)
-        
-        return progress_data
+        Call after the write has committed. If the session isn't materialized
+        there is nothing to patch or diff against; the next read builds it.
+        """
+        session_code = self.session.session_code
+        previous, current = session_progress_store.update(
+            session_code, mutate, source_version=SessionVersions.get(session_code)
+        )
+        if current is not None:
+            self._broadcast_progress_update(diff_progress(previous, current), current['version'])
     
     def _broadcast_mission_change(self, old_mission, new_mission):
         """
@@ -351,35 +370,71 @@ class DesignThinkingService:
         except Exception as e:
             logger.error(f"Failed to broadcast mission change: {str(e)}")
     
-    def _broadcast_progress_update(self):
+    def _broadcast_progress_update(self, progress_diff, version):
         """
-        Broadcast progress update to all connected clients
+        Broadcast a progress diff to all connected clients
+        
+        Args:
+            progress_diff (dict): Output of diff_progress()
+            version (int): Snapshot version after the change
         """
         if not self.channel_layer:
             return
         
-        progress_data = self.get_session_progress()
-        
-        message = {
-            'type': 'progress_update',
-            'progress': progress_data,
-            'timestamp': timezone.now().isoformat()
-        }
+        if not progress_diff['full'] and not progress_diff['changes']:
+            return
         
-        group_name = f"session_{self.session.session_code}"
+        # The Design Thinking consumers' group; they relay it as a progress_update frame
+        group_name = f"design_thinking_{self.session.session_code}"
         
         try:
             async_to_sync(self.channel_layer.group_send)(
                 group_name,
                 {
-                    'type': 'broadcast_message',
-                    'message': message
+                    'type': 'session_progress_diff',
+                    'progress_diff': progress_diff,
+                    'version': version,
+                    'timestamp': timezone.now().isoformat()
                 }
             )
         except Exception as e:
             logger.error(f"Failed to broadcast progress update: {str(e)}")
 
 
+def _team_progress_entry(team_progress):
+    return {
+        'team_id': team_progress.team_id,
+        'team_name': team_progress.team.team_name,
+        'is_completed': team_progress.is_completed,
+        # Strings, so snapshots and their diffs serialize for the channel layer and JSON
+        'started_at': team_progress.started_at.isoformat() if team_progress.started_at else None,
+        'completed_at': team_progress.completed_at.isoformat() if team_progress.completed_at else None
+    }
+
+
+def _set_team_progress(progress_data, mission_id, team_progress_records):
+    """Upsert TeamProgress entries into a materialized snapshot's mission"""
+    for mission in progress_data['missions']:
+        if mission['id'] != mission_id:
+            continue
+        entries = {entry['team_id']: entry for entry in mission['team_progress']}
+        for team_progress in team_progress_records:
+            entry = _team_progress_entry(team_progress)
+            if team_progress.team_id in entries:
+                entries[team_progress.team_id].update(entry)
+            else:
+                mission['team_progress'].append(entry)
+
+
+def _count_submission(progress_data, mission_id, completed_progress=None):
+    """Add one submission (and optionally a newly completed team) to a snapshot"""
+    for mission in progress_data['missions']:
+        if mission['id'] == mission_id:
+            mission['submission_count'] += 1
+    if completed_progress is not None:
+        _set_team_progress(progress_data, mission_id, [completed_progress])
+
+
 class SubmissionService:
     """
     Service for handling team submissions with validation
@@ -415,6 +470,8 @@ class SubmissionService:
                     submitted_at=timezone.now()
                 )
                 
+                completed_progress = None
+                
                 # Check if this submission completes the mission for the team
                 if mission.title == "Empathy" and submission_type == 'observation':
                     # Count total observations for this team
@@ -435,14 +492,19 @@ class SubmissionService:
                             progress.is_completed = True
                             progress.completed_at = timezone.now()
                             progress.save()
+                            completed_progress = progress
                 
                 # Invalidate submission count caches
                 DesignThinkingCache.invalidate_team_submissions(team.id, mission.id)
-                DesignThinkingCache.invalidate_team_submissions('all_teams', mission.id)
                 
-                # Invalidate session progress cache as submission counts changed
+                # Count the submission into the session's materialized progress
                 if hasattr(team, 'session') and team.session:
-                    DesignThinkingCache.invalidate_session_progress(team.session.session_code)
+                    service = DesignThinkingService(team.session)
+                    transaction.on_commit(
+                        lambda: service.apply_progress_change(
+                            lambda progress_data: _count_submission(progress_data, mission.id, completed_progress)
+                        )
+                    )
                 
                 logger.info(f"Created submission for {team.team_name} - {mission.title}")
                 return submission
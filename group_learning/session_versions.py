@@ -0,0 +1,216 @@
+"""
+Per-session version counters for conditional GET on polling endpoints
+
+Every state-changing write to a session (or to rows hanging off it) bumps the
+session's version once the transaction commits. Polling endpoints expose the
+version as an ETag and answer a matching If-None-Match with 304 before running
+any model query.
+"""
+
+import logging
+import threading
+import time
+from functools import wraps
+from typing import Callable, Optional
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+
+from .monitoring import conditional_get_monitor
+
+logger = logging.getLogger(__name__)
+
+
+class SessionVersions:
+    """
+    Monotonic version counter per session code
+
+    Uses the shared cache (atomic incr) when a real backend is configured and
+    falls back to an in-process counter when the cache is a DummyCache. New
+    counters are seeded from the wall clock in milliseconds so a counter that
+    was evicted or lost on restart never reuses a version a client has seen.
+    """
+
+    CACHE_PREFIX = 'session_version'
+    TIMEOUT = 86400  # 24 hours - longer than any live session
+
+    _local_versions = {}
+    _session_codes = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _cache(cls):
+        cache = caches['default']
+        return None if isinstance(cache, DummyCache) else cache
+
+    @classmethod
+    def _key(cls, session_code: str) -> str:
+        return f"{cls.CACHE_PREFIX}_{session_code}"
+
+    @staticmethod
+    def _seed() -> int:
+        return int(time.time() * 1000)
+
+    @classmethod
+    def get(cls, session_code: str) -> int:
+        """Current version for a session, creating the counter if needed"""
+        cache = cls._cache()
+        if cache is None:
+            with cls._lock:
+                return cls._local_versions.setdefault(session_code, cls._seed())
+
+        key = cls._key(session_code)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, cls._seed(), cls.TIMEOUT)
+            version = cache.get(key, cls._seed())
+        return version
+
+    @classmethod
+    def bump(cls, session_code: str) -> int:
+        """Increment the version for a session and return the new value"""
+        cache = cls._cache()
+        if cache is None:
+            with cls._lock:
+                version = max(cls._local_versions.get(session_code, 0) + 1, cls._seed())
+                cls._local_versions[session_code] = version
+                return version
+
+        key = cls._key(session_code)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Counter missing or evicted - reseed above any earlier value
+            version = cls._seed()
+            cache.set(key, version, cls.TIMEOUT)
+            return version
+
+    @classmethod
+    def bump_on_commit(cls, session_code: str):
+        """Bump after the current transaction commits so readers never tag old rows with a new version"""
+        if session_code:
+            transaction.on_commit(lambda: cls.bump(session_code))
+
+    @classmethod
+    def code_for_session_id(cls, session_id: Optional[int]) -> Optional[str]:
+        """Resolve a GameSession id to its code (codes never change, so memoize)"""
+        if not session_id:
+            return None
+
+        session_code = cls._session_codes.get(session_id)
+        if session_code is None:
+            from .models import GameSession
+            session_code = GameSession.objects.filter(pk=session_id).values_list(
+                'session_code', flat=True
+            ).first()
+            if session_code:
+                cls._session_codes[session_id] = session_code
+        return session_code
+
+    @classmethod
+    def etag(cls, session_code: str, suffix: Optional[str] = None) -> str:
+        """Quoted ETag for the session's current version"""
+        version = cls.get(session_code)
+        tag = f"{session_code}.{version}.{suffix}" if suffix else f"{session_code}.{version}"
+        return f'"{tag}"'
+
+
+def bump_session_version(session_code: str):
+    """Helper for writes that bypass model signals (e.g. QuerySet.update)"""
+    SessionVersions.bump_on_commit(session_code)
+
+
+def conditional_session_get(endpoint: str, etag_suffix: Optional[Callable[[], str]] = None):
+    """
+    Decorator for session polling views taking a ``session_code`` kwarg
+
+    Answers If-None-Match with 304 straight from the version counter, and adds
+    the ETag (with ``Cache-Control: no-cache`` so browsers revalidate every
+    poll) to successful responses. ``etag_suffix`` lets time-dependent
+    endpoints mix a coarse time bucket into the tag.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            session_code = kwargs.get('session_code')
+            if request.method not in ('GET', 'HEAD') or not session_code:
+                return view_func(request, *args, **kwargs)
+
+            # Read the version before the view queries so a concurrent write
+            # can only make the tag older than the data, never newer
+            etag = SessionVersions.etag(session_code, etag_suffix() if etag_suffix else None)
+            client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+
+            if etag in client_etags or '*' in client_etags:
+                conditional_get_monitor.record(endpoint, not_modified=True)
+                response = HttpResponseNotModified()
+                response['ETag'] = etag
+                patch_cache_control(response, private=True, no_cache=True)
+                return response
+
+            response = view_func(request, *args, **kwargs)
+            conditional_get_monitor.record(endpoint, not_modified=False)
+
+            if response.status_code == 200:
+                response['ETag'] = etag
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+# Signal handlers - bump the owning session's version on every write
+
+def _session_id_for(instance) -> Optional[int]:
+    """Find the GameSession id that a changed row belongs to"""
+    from .models import ConstitutionAnswer, ClimatePlayerResponse, TeamSubmission
+
+    if isinstance(instance, ClimatePlayerResponse):
+        return instance.climate_session_id
+    if isinstance(instance, (ConstitutionAnswer, TeamSubmission)):
+        return instance.team.session_id if instance.team_id else None
+    return getattr(instance, 'session_id', None)
+
+
+def _bump_for_session(sender, instance, **kwargs):
+    """Bump the version of the session itself"""
+    SessionVersions.bump_on_commit(instance.session_code)
+
+
+def _bump_for_related(sender, instance, **kwargs):
+    """Bump the version of the session a related row belongs to"""
+    try:
+        session_code = SessionVersions.code_for_session_id(_session_id_for(instance))
+        SessionVersions.bump_on_commit(session_code)
+    except Exception as e:
+        logger.error(f"Error bumping session version for {sender.__name__}: {str(e)}")
+
+
+def connect_signals():
+    """Register version bump receivers (called from AppConfig.ready)"""
+    from .models import (
+        GameSession, ClimateGameSession, DesignThinkingSession,
+        PlayerAction, ConstitutionTeam, ConstitutionAnswer,
+        ClimatePlayerResponse, ClimateRoundResult,
+        DesignTeam, TeamProgress, SimplifiedPhaseInput, PhaseCompletionTracker,
+        TeamSubmission, RealtimeFeedback, TeamPhaseRating
+    )
+
+    for session_model in (GameSession, ClimateGameSession, DesignThinkingSession):
+        post_save.connect(_bump_for_session, sender=session_model, dispatch_uid=f'session_version_{session_model.__name__}')
+        post_delete.connect(_bump_for_session, sender=session_model, dispatch_uid=f'session_version_del_{session_model.__name__}')
+
+    related_models = (
+        PlayerAction, ConstitutionTeam, ConstitutionAnswer,
+        ClimatePlayerResponse, ClimateRoundResult,
+        DesignTeam, TeamProgress, SimplifiedPhaseInput, PhaseCompletionTracker,
+        TeamSubmission, RealtimeFeedback, TeamPhaseRating
+    )
+    for model in related_models:
+        post_save.connect(_bump_for_related, sender=model, dispatch_uid=f'session_version_{model.__name__}')
+        post_delete.connect(_bump_for_related, sender=model, dispatch_uid=f'session_version_del_{model.__name__}')
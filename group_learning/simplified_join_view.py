@@ -11,6 +11,7 @@ from django.db import transaction
 import logging
 
 from .models import DesignThinkingSession, DesignTeam
+from .join_pipeline import allocate_join_slot, team_join_broadcasts
 
 logger = logging.getLogger(__name__)
 
@@ -65,22 +66,34 @@ class SimplifiedJoinView(TemplateView):
             # If team members can't be parsed, just use empty list - not critical
             team_members = []
         
+        # The browser's session key identifies the student in the membership index
+        if not request.session.session_key:
+            request.session.save()
+        student_session_id = request.session.session_key
+        
         # 2. Database operations with full transaction safety
         try:
             with transaction.atomic():
-                # Find session
-                session = get_object_or_404(
-                    DesignThinkingSession.objects.select_for_update(),
-                    session_code=session_code
-                )
+                # Find session (no row lock - capacity is claimed with a conditional UPDATE)
+                session = get_object_or_404(DesignThinkingSession, session_code=session_code)
                 
                 # Quick session validation
                 if session.status in ['completed', 'abandoned']:
                     return self._handle_error(request, 'This session is no longer active', 'session_code')
                 
-                # Check team limit (reasonable limit for simplified mode)
-                current_team_count = session.design_teams.count()
-                if current_team_count >= 50:  # Reduced from 100 for simplicity
+                current_team = DesignTeam.for_student(session, student_session_id)
+                if current_team:
+                    return self._handle_error(
+                        request, f'You have already joined this session as Team {current_team.team_name}', 'session_code'
+                    )
+                
+                # Claim a team slot (reasonable limit for simplified mode)
+                slot = allocate_join_slot(
+                    DesignThinkingSession.objects, session.pk, 'team_slots_used',
+                    capacity=50,  # Reduced from 100 for simplicity
+                    recount=lambda: DesignTeam.objects.filter(session=session).count()
+                )
+                if slot is None:
                     return self._handle_error(request, 'Session is full (maximum 50 teams)', 'session_code')
                 
                 # Create team - this is where the unique constraint could fail
@@ -89,12 +102,16 @@ class SimplifiedJoinView(TemplateView):
                         session=session,
                         team_name=team_name,
                         team_emoji=team_emoji,
-                        team_members=team_members,
+                        team_members=team_members[1:],
                         team_color='#3B82F6'  # Default blue
                     )
+                    # The joining student is indexed by session key; the other names stay team-scoped
+                    team.add_member(team_members[0] if team_members else team_name, student_session_id)
                     logger.info(f"Team created successfully: {team_name} in session {session_code}")
                     
                 except Exception as create_error:
+                    # Undo the slot claim and any partly created team
+                    transaction.set_rollback(True)
                     # Handle specific constraint violations
                     error_msg = str(create_error).lower()
                     if 'unique' in error_msg and 'team_name' in error_msg:
@@ -107,6 +124,15 @@ class SimplifiedJoinView(TemplateView):
                         logger.error(f"Unexpected team creation error: {create_error}")
                         return self._handle_error(request, 'Failed to create team. Please try again.')
                 
+                # Announce the join once the transaction commits (coalesced with other joins)
+                team_join_broadcasts.add(session_code, {
+                    'id': team.id,
+                    'name': team.team_name,
+                    'emoji': team.team_emoji,
+                    'color': team.team_color,
+                    'members': team.member_names
+                })
+                
                 # 3. Set session data for phase navigation
                 request.session[f'team_id_{session_code}'] = team.id
                 request.session['current_session_code'] = session_code
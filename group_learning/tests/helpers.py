@@ -0,0 +1,18 @@
+"""
+Shared fixtures for the group_learning tests
+"""
+
+from group_learning.models import DesignThinkingGame
+
+
+def make_design_game(title, **extra):
+    return DesignThinkingGame.objects.create(
+        title=title,
+        game_type='social_issue',
+        description='Test game description',
+        context='Test context',
+        estimated_duration=45,
+        target_age_min=14,
+        target_age_max=18,
+        **extra
+    )
@@ -0,0 +1,107 @@
+"""
+Tests for the in-process climate session state store
+"""
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from group_learning.climate_state import ClimateStateStore, StaleStateError, climate_state
+from group_learning.models import ClimateGame, ClimateGameSession
+
+
+@override_settings(CLIMATE_STATE_FLUSH_SECONDS=0)
+class ClimateStateStoreTests(TestCase):
+
+    def setUp(self):
+        climate_state.clear()
+        self.addCleanup(climate_state.clear)
+        self.climate_game = ClimateGame.objects.create(
+            title='Climate State Game',
+            game_type='social_issue',
+            description='Test game description',
+            context='Test context',
+            estimated_duration=30,
+            target_age_min=10,
+            target_age_max=14,
+            introduction_text='Welcome'
+        )
+        self.session = ClimateGameSession.objects.create(
+            game=self.climate_game.game_ptr,
+            climate_game=self.climate_game,
+            session_code='CLS001',
+            status='in_progress',
+            current_phase='question_phase'
+        )
+
+    def load(self):
+        return ClimateGameSession.objects.get(pk=self.session.pk)
+
+    def test_concurrent_writers_keep_each_others_fields(self):
+        facilitator_copy, results_copy = self.load(), self.load()
+
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                facilitator_copy.advance_phase('results_feedback')
+            with self.captureOnCommitCallbacks(execute=True):
+                results_copy.update_meters({'gdp': -10, 'public_morale': 5.4})
+
+        # Each flush writes only the fields its change touched
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        self.assertNotIn('current_gdp', updates[0])
+        self.assertNotIn('current_phase', updates[1])
+
+        session = self.load()
+        self.assertEqual(session.current_phase, 'results_feedback')
+        self.assertEqual(session.get_meter_status(), {
+            'climate_resilience': 50, 'gdp': 40, 'public_morale': 55, 'environmental_health': 50
+        })
+        self.assertEqual(results_copy.current_phase, 'results_feedback')
+
+    def test_stale_version_is_rejected(self):
+        version = climate_state.get('CLS001').version
+        climate_state.start_timer('CLS001', 5, expected_version=version)
+
+        with self.assertRaises(StaleStateError) as raised:
+            climate_state.advance_phase('CLS001', 'results_feedback', expected_version=version)
+        self.assertEqual(raised.exception.current_version, version + 1)
+        self.assertEqual(climate_state.get('CLS001').current_phase, 'question_phase')
+
+        # No-op changes don't move the version
+        climate_state.set_timer_duration('CLS001', 10)
+        self.assertEqual(climate_state.get('CLS001').version, version + 1)
+
+    def test_write_behind_batches_changes_until_flush(self):
+        store = ClimateStateStore()
+        with override_settings(CLIMATE_STATE_FLUSH_SECONDS=60):
+            store.start_new_round('CLS001', 2)
+            store.update_meters('CLS001', {'climate_resilience': 20})
+            store._flush_timer.cancel()
+
+        self.assertEqual(self.load().current_round, 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(store.flush(), 1)
+        session = self.load()
+        self.assertEqual((session.current_round, session.current_phase), (2, 'scenario_intro'))
+        self.assertEqual(session.current_climate_resilience, 70)
+        self.assertEqual(store.get_stats()['dirty_sessions'], 0)
+
+    def test_views_read_and_version_the_live_state(self):
+        climate_state.start_timer('CLS001', 5)
+
+        self.client.get(reverse('group_learning:get_timer_status', args=['CLS001']))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('group_learning:get_timer_status', args=['CLS001']))
+        self.assertTrue(response.json()['timer_info']['enabled'])
+
+        url = reverse('group_learning:advance_climate_phase', args=['CLS001'])
+        stale = climate_state.get('CLS001').version - 1
+        response = self.client.post(url, {'phase': 'results_feedback', 'state_version': stale})
+        self.assertEqual(response.status_code, 409)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'phase': 'results_feedback'})
+        self.assertEqual(response.json()['current_phase'], 'results_feedback')
+        self.assertEqual(self.load().current_phase, 'results_feedback')
@@ -0,0 +1,74 @@
+"""
+Tests for the WebSocket connect-time caches
+"""
+
+import asyncio
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, TestCase
+
+from group_learning.connect_cache import (
+    SingleFlightTTLCache, cached_session_exists, session_existence_cache
+)
+from group_learning.models import DesignThinkingSession
+from group_learning.tests.helpers import make_design_game
+
+
+class SingleFlightTTLCacheTests(SimpleTestCase):
+
+    def test_concurrent_loads_share_one_call(self):
+        cache = SingleFlightTTLCache('test', lambda value: 60)
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {'status': 'waiting'}
+
+        async def scenario():
+            return await asyncio.gather(*[cache.get_or_load('ABC123', loader) for _ in range(20)])
+
+        results = async_to_sync(scenario)()
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(async_to_sync(cache.get_or_load)('ABC123', loader), {'status': 'waiting'})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.get_stats()['misses'], 1)
+
+    def test_uncacheable_values_are_reloaded(self):
+        cache = SingleFlightTTLCache('test', lambda value: None if 'error' in value else 60)
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            return {'error': 'Status retrieval failed'}
+
+        async_to_sync(cache.get_or_load)('ABC123', loader)
+        async_to_sync(cache.get_or_load)('ABC123', loader)
+        self.assertEqual(len(calls), 2)
+
+
+class SessionExistenceCacheTests(TestCase):
+
+    def setUp(self):
+        session_existence_cache.clear()
+
+    def test_misses_are_cached_until_session_is_created(self):
+        calls = []
+
+        async def exists():
+            calls.append(1)
+            return False
+
+        check = async_to_sync(cached_session_exists)
+        self.assertFalse(check('design_thinking', 'CACHE1', exists))
+        self.assertFalse(check('design_thinking', 'CACHE1', exists))
+        self.assertEqual(len(calls), 1)
+
+        game = make_design_game('Cache Game')
+        DesignThinkingSession.objects.create(game=game, design_game=game, session_code='CACHE1')
+
+        # Creating the session evicts the cached miss
+        self.assertFalse(check('design_thinking', 'CACHE1', exists))
+        self.assertEqual(len(calls), 2)
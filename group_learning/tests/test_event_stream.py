@@ -0,0 +1,92 @@
+"""
+Tests for the Server-Sent Events fallback stream
+"""
+
+import json
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from group_learning.consumers import DesignThinkingConsumer
+from group_learning.event_stream import SessionEventLog, _payload_renderer, _format_event
+from group_learning.models import DesignThinkingSession, DesignTeam
+from group_learning.tests.helpers import make_design_game
+
+
+class SessionEventLogTests(SimpleTestCase):
+    """Event log renders group messages exactly like the WebSocket consumer"""
+
+    def test_group_message_rendered_and_resumable(self):
+        async def scenario():
+            renderer = _payload_renderer(DesignThinkingConsumer, 'SSE001')
+            event_log = SessionEventLog('design_thinking_SSE001', renderer)
+            event_log.attach()
+            await event_log.wait_until_listening()
+
+            await get_channel_layer().group_send('design_thinking_SSE001', {
+                'type': 'session_status_update',
+                'session_data': {'status': 'in_progress'},
+                'timestamp': '2024-01-01T00:00:00'
+            })
+            self.assertTrue(await event_log.wait_for_event(0, timeout=2))
+            event_log.detach()
+            event_log._task.cancel()
+            return event_log
+
+        event_log = async_to_sync(scenario)()
+
+        (sequence, payload), = event_log.events_after(0)
+        self.assertEqual(json.loads(payload), {
+            'type': 'session_status',
+            'data': {'status': 'in_progress'},
+            'timestamp': '2024-01-01T00:00:00'
+        })
+
+        # Resume from the delivered id; unknown epochs must resync
+        self.assertEqual(event_log.resume_sequence(event_log.event_id(sequence)), sequence)
+        self.assertIsNone(event_log.resume_sequence(f'0:{sequence}'))
+        self.assertIsNone(event_log.resume_sequence(None))
+
+    def test_team_scoped_messages_are_tagged_and_filtered(self):
+        async def scenario():
+            renderer = _payload_renderer(DesignThinkingConsumer, 'SSE002')
+            return await renderer.render({
+                'type': 'teacher_feedback_batch',
+                'feedback': [{'team_id': 1, 'message': 'One'}, {'team_id': 2, 'message': 'Two'}],
+                'timestamp': '2024-01-01T00:00:00'
+            })
+
+        rendered = async_to_sync(scenario)()
+        self.assertEqual([team for team, _payload in rendered], [1, 2])
+
+        event_log = SessionEventLog('design_thinking_SSE002', None)
+        for team, payload in rendered + [(None, '{"type": "session_status"}')]:
+            event_log.sequence += 1
+            event_log.events.append((event_log.sequence, team, payload))
+        self.assertEqual([seq for seq, _payload in event_log.events_after(0, team_id='2')], [2, 3])
+        self.assertEqual(len(event_log.events_after(0)), 3)
+
+    def test_format_event(self):
+        self.assertEqual(_format_event('{"a": 1}', '1:2'), 'id: 1:2\ndata: {"a": 1}\n\n')
+
+
+class SessionEventStreamViewTests(TestCase):
+
+    def test_unknown_session_returns_404(self):
+        url = reverse('group_learning:session_event_stream', args=['design-thinking', 'NOPE00'])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_team_must_belong_to_the_session(self):
+        game = make_design_game('SSE Game')
+        session = DesignThinkingSession.objects.create(game=game, design_game=game, session_code='SSE003')
+        other = DesignThinkingSession.objects.create(game=game, design_game=game, session_code='SSE004')
+        stranger = DesignTeam.objects.create(session=other, team_name='Elsewhere')
+        url = reverse('group_learning:session_event_stream', args=['design-thinking', session.session_code])
+        self.assertEqual(self.client.get(url, {'team_id': stranger.pk}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'team_id': 'abc'}).status_code, 404)
+
+    def test_unknown_stream_returns_404(self):
+        url = reverse('group_learning:session_event_stream', args=['chess', 'NOPE00'])
+        self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,115 @@
+"""
+Tests for batched RealtimeFeedback delivery and acknowledgement
+"""
+
+import json
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.test import TestCase
+
+from group_learning.consumers import DesignThinkingConsumer
+from group_learning.feedback_delivery import (
+    FeedbackAckBuffer, create_feedback_bulk, pending_feedback
+)
+from group_learning.models import (
+    DesignThinkingSession, DesignTeam, RealtimeFeedback
+)
+from group_learning.tests.helpers import make_design_game
+
+
+class RecordingConsumer(DesignThinkingConsumer):
+
+    def __init__(self, session_code):
+        super().__init__()
+        self.session_code = session_code
+        self.room_group_name = f'design_thinking_{session_code}'
+        self.connection_id = 'conn0001'
+        self.channel_name = 'specific.test!feedback'
+        self.channel_layer = get_channel_layer()
+        self.frames = []
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        self.frames.append(json.loads(text_data))
+
+
+class FeedbackDeliveryTests(TestCase):
+
+    def setUp(self):
+        self.game = make_design_game('Feedback Game')
+        self.teams = []
+        for code in ['FDBK01', 'FDBK02']:
+            session = DesignThinkingSession.objects.create(game=self.game, design_game=self.game, session_code=code)
+            self.teams.append(DesignTeam.objects.create(session=session, team_name=f'Team {code}'))
+
+    def test_bulk_create_validates_and_groups_by_session(self):
+        items = [
+            {'team_id': self.teams[0].id, 'message': 'Great empathy map'},
+            {'team_id': self.teams[1].id, 'score': 8},
+            {'team_id': self.teams[1].id, 'score': 11},
+            {'team_id': 999999, 'message': 'Nobody'},
+            {'team_id': self.teams[0].id, 'message': '  '},
+        ]
+        with self.assertNumQueries(4):  # teams, savepoint, insert, release
+            created, errors = create_feedback_bulk(items, sender_name='Ms. Rao')
+
+        self.assertEqual(sorted(created), ['FDBK01', 'FDBK02'])
+        self.assertEqual(created['FDBK01'][0]['message'], 'Great empathy map')
+        self.assertEqual(created['FDBK02'][0]['score'], 8)
+        self.assertEqual([error['index'] for error in errors], [2, 3, 4])
+        self.assertEqual(RealtimeFeedback.objects.filter(sender_name='Ms. Rao', websocket_sent=False).count(), 2)
+
+        # Restricted to one session, other sessions' teams are rejected
+        created, errors = create_feedback_bulk(items[:2], session_code='FDBK01')
+        self.assertEqual(list(created), ['FDBK01'])
+        self.assertEqual(errors[0]['error'], 'Team not found')
+
+    def test_acks_are_flushed_in_one_update_per_batch(self):
+        created, _errors = create_feedback_bulk([
+            {'team_id': self.teams[0].id, 'message': 'One'},
+            {'team_id': self.teams[0].id, 'message': 'Two'},
+            {'team_id': self.teams[1].id, 'message': 'Three'},
+        ])
+        first_team_ids = [feedback['id'] for feedback in created['FDBK01']]
+        other_team_id = created['FDBK02'][0]['id']
+
+        buffer = FeedbackAckBuffer()
+        buffer._pending[('FDBK01', self.teams[0].id)].update(first_team_ids + [other_team_id])
+        with self.assertNumQueries(1):
+            self.assertEqual(buffer.flush(), 2)
+
+        # A team can't acknowledge another team's feedback
+        self.assertEqual(pending_feedback(self.teams[0].id), [])
+        self.assertEqual([feedback['id'] for feedback in pending_feedback(self.teams[1].id)], [other_team_id])
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_one_broadcast_per_session_and_replay_on_join(self):
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)('design_thinking_FDBK01', channel_name)
+
+        teacher = RecordingConsumer('FDBK01')
+        async_to_sync(teacher.receive)(json.dumps({
+            'type': 'teacher_feedback_bulk_submit',
+            'items': [
+                {'team_id': self.teams[0].id, 'message': 'Nice work'},
+                {'team_id': self.teams[0].id, 'message': 'Add a quote'},
+            ]
+        }))
+
+        self.assertEqual(teacher.frames[-1]['type'], 'feedback_bulk_submission_success')
+        message = async_to_sync(channel_layer.receive)(channel_name)
+        self.assertNotIn(channel_name, channel_layer.channels)  # nothing else queued
+        self.assertEqual(message['type'], 'teacher_feedback_batch')
+        self.assertEqual([feedback['message'] for feedback in message['feedback']], ['Nice work', 'Add a quote'])
+
+        # Nothing acked yet: a (re)joining student gets both, oldest first
+        student = RecordingConsumer('FDBK01')
+        async_to_sync(student.receive)(json.dumps({'type': 'join_as_student', 'team_id': self.teams[0].id}))
+        replayed = [frame for frame in student.frames if frame['type'] == 'teacher_feedback']
+        self.assertEqual([frame['feedback_data']['message'] for frame in replayed], ['Nice work', 'Add a quote'])
+
+        # Students only see their own team's feedback
+        student.team_id = self.teams[1].id
+        async_to_sync(student.teacher_feedback_batch)(message)
+        self.assertEqual(len([frame for frame in student.frames if frame['type'] == 'teacher_feedback']), 2)
@@ -0,0 +1,141 @@
+"""
+Tests for the burst-tolerant join pipeline
+"""
+
+import asyncio
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from group_learning.join_pipeline import JoinBroadcastCoalescer, allocate_join_slot
+from group_learning.models import (
+    ClimateGame, ClimateGameSession, ClimatePlayerResponse,
+    DesignThinkingSession, DesignTeam
+)
+from group_learning.tests.helpers import make_design_game
+
+
+class AllocateJoinSlotTests(TestCase):
+
+    def setUp(self):
+        self.game = make_design_game('Join Game', auto_advance_enabled=True)
+        self.session = DesignThinkingSession.objects.create(
+            game=self.game, design_game=self.game, session_code='JOIN01'
+        )
+
+    def allocate(self, capacity=2):
+        return allocate_join_slot(
+            DesignThinkingSession.objects, self.session.pk, 'team_slots_used',
+            capacity=capacity,
+            recount=lambda: DesignTeam.objects.filter(session=self.session).count()
+        )
+
+    def test_slots_are_sequential_until_full(self):
+        self.assertEqual(self.allocate(capacity=3), 1)
+        self.assertEqual(self.allocate(capacity=3), 2)
+        DesignTeam.objects.create(session=self.session, team_name='First')
+        self.assertIsNone(self.allocate(capacity=1))
+
+    def test_full_counter_reconciles_with_real_occupancy(self):
+        DesignThinkingSession.objects.filter(pk=self.session.pk).update(team_slots_used=2)
+        self.assertEqual(self.allocate(), 1)
+
+    def test_design_join_claims_slot_and_rejects_second_team(self):
+        url = reverse('group_learning:design_thinking_join')
+        headers = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+        response = self.client.post(url, {'session_code': 'JOIN01', 'team_name': 'Alpha'}, **headers)
+        self.assertEqual(response.status_code, 302)
+
+        # Another browser; this one is already on Alpha
+        response = Client().post(url, {'session_code': 'JOIN01', 'team_name': 'Beta'}, **headers)
+        self.assertEqual(response.status_code, 400)
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.team_slots_used, 1)
+
+
+@override_settings(JOIN_BROADCAST_WINDOW_SECONDS=0)
+class ClimateJoinTests(TestCase):
+
+    def setUp(self):
+        self.climate_game = ClimateGame.objects.create(
+            title='Climate Join Game',
+            game_type='social_issue',
+            description='Test game description',
+            context='Test context',
+            estimated_duration=30,
+            target_age_min=10,
+            target_age_max=14,
+            introduction_text='Welcome'
+        )
+        self.session = ClimateGameSession.objects.create(
+            game=self.climate_game.game_ptr,
+            climate_game=self.climate_game,
+            session_code='CLJ001'
+        )
+        self.url = reverse('group_learning:join_climate_session', args=['CLJ001'])
+
+    def test_roles_rotate_with_join_order_and_broadcast_on_commit(self):
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)('climate_session_CLJ001', channel_name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'player_name': 'Asha'})
+        self.assertEqual(response.status_code, 302)
+        self.client.post(self.url, {'player_name': 'Ravi'})
+
+        roles = list(ClimatePlayerResponse.objects.filter(
+            climate_session=self.session
+        ).order_by('id').values_list('assigned_role', flat=True))
+        self.assertEqual(roles, ['government', 'business'])
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.players_joined, 2)
+
+        joined = async_to_sync(channel_layer.receive)(channel_name)
+        self.assertEqual(joined['type'], 'player_joined')
+        self.assertEqual(joined['player_name'], 'Asha')
+        self.assertEqual(joined['total_players'], 1)
+        update = async_to_sync(channel_layer.receive)(channel_name)
+        self.assertEqual(update['type'], 'session_update')
+
+
+class JoinBroadcastCoalescerTests(SimpleTestCase):
+
+    def test_joins_within_window_flush_once_on_attached_loop(self):
+        layer = get_channel_layer()
+
+        def send(session_code, items):
+            async_to_sync(layer.group_send)(f'joins_{session_code}', {'type': 'joined', 'items': items})
+
+        coalescer = JoinBroadcastCoalescer(send, window=0.05)
+
+        async def burst():
+            channel = await layer.new_channel()
+            await layer.group_add('joins_ABC123', channel)
+            coalescer.attach()
+            # Joins commit on worker threads, as sync views do under the ASGI server
+            for name in ['Asha', 'Ravi', 'Meera']:
+                await sync_to_async(coalescer._queue)('ABC123', name)
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            message = await asyncio.wait_for(layer.receive(channel), 2)
+            return message, loop.time() - started
+
+        message, waited = async_to_sync(burst)()
+
+        self.assertEqual(message['items'], ['Asha', 'Ravi', 'Meera'])
+        self.assertLess(waited, 1)
+
+    def test_without_loop_sends_immediately(self):
+        flushed = []
+        coalescer = JoinBroadcastCoalescer(lambda session_code, items: flushed.append(items), window=0.05)
+
+        coalescer._queue('ABC123', 'Asha')
+        coalescer._queue('ABC123', 'Ravi')
+
+        self.assertEqual(flushed, [['Asha'], ['Ravi']])
@@ -0,0 +1,100 @@
+"""
+Tests for the rule-based Vani nudge engine
+"""
+
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from group_learning.models import (
+    DesignMission, DesignThinkingSession, DesignTeam,
+    MentorNudge, PhaseCompletionTracker, SimplifiedPhaseInput
+)
+from group_learning.nudge_engine import NudgeEngine
+from group_learning.tests.helpers import make_design_game
+
+
+class NudgeEngineTests(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.facilitator = User.objects.create_user('teacher', password='pw')
+        self.game = make_design_game('Nudge Game')
+        DesignMission.objects.create(
+            game=self.game, mission_type='kickoff', title='Kickoff', description='Kickoff', order=1
+        )
+        self.empathy = DesignMission.objects.create(
+            game=self.game, mission_type='empathy', title='Empathy', description='Empathy', order=2,
+            estimated_duration=30
+        )
+        self.teams = {
+            name: self.create_team(name, completion)
+            for name, completion in [('Ahead', 100.0), ('Middle', 50.0), ('Stalled', 0.0)]
+        }
+        self.engine = NudgeEngine()
+
+    def create_team(self, name, completion):
+        session = DesignThinkingSession.objects.create(
+            game=self.game, design_game=self.game, session_code=f'NDG{name[:3].upper()}',
+            facilitator=self.facilitator, status='in_progress', current_mission=self.empathy,
+            mission_start_time=self.now - timedelta(minutes=5)
+        )
+        team = DesignTeam.objects.create(session=session, team_name=name)
+        if completion:
+            SimplifiedPhaseInput.objects.create(
+                team=team, mission=self.empathy, session=session, student_name='Student1',
+                student_session_id=f'{name}_1', input_type='radio', input_label='Q1', selected_value='Yes'
+            )
+            PhaseCompletionTracker.objects.create(
+                session=session, team=team, mission=self.empathy, total_required_inputs=2,
+                completed_inputs=int(completion / 50), completion_percentage=completion
+            )
+        return team
+
+    def test_one_scan_nudges_stalled_team_and_respects_cooldown(self):
+        with self.assertNumQueries(3):  # activity, mentor content, last_mentor_prompt
+            nudges = self.engine.scan(now=self.now)
+
+        self.assertEqual(list(nudges), ['NDGSTA'])
+        nudge = nudges['NDGSTA'][0]
+        self.assertEqual(nudge['rule'], 'inactive')
+        self.assertEqual(nudge['team_id'], self.teams['Stalled'].id)
+        self.assertIsNotNone(DesignThinkingSession.objects.get(session_code='NDGSTA').last_mentor_prompt)
+
+        # Same rule for the same team is on cooldown; the next rule can still fire
+        nudges = self.engine.scan(now=self.now)
+        self.assertEqual([n['rule'] for n in nudges['NDGSTA']], ['behind_class'])
+        self.assertEqual(self.engine.scan(now=self.now), {})
+
+    def test_mentor_nudge_content_and_group_message(self):
+        MentorNudge.objects.create(
+            mission=self.empathy, title='Vani says hi', message='Try asking a classmate!',
+            nudge_type='prompt', trigger_type='progress_based', trigger_condition={'rule': 'inactive'}, emoji='🙋'
+        )
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)('design_thinking_NDGSTA', channel_name)
+
+        async_to_sync(self.engine.scan_and_send)()
+
+        message = async_to_sync(channel_layer.receive)(channel_name)
+        self.assertEqual(message['type'], 'vani_nudges')
+        self.assertEqual(len(message['nudges']), 1)
+        self.assertEqual(message['nudges'][0]['message'], 'Try asking a classmate!')
+        self.assertEqual(message['nudges'][0]['emoji'], '🙋')
+
+    def test_phase_overrun_and_inactive_sessions_are_skipped(self):
+        later = self.now + timedelta(minutes=40)
+        DesignThinkingSession.objects.filter(session_code='NDGSTA').update(mentor_active=False)
+
+        nudges = self.engine.scan(now=later)
+
+        self.assertEqual(list(nudges), ['NDGMID'])
+        self.assertEqual(nudges['NDGMID'][0]['rule'], 'inactive')
+        self.assertEqual(
+            [n['rule'] for n in self.engine.scan(now=later)['NDGMID']], ['phase_overrun']
+        )
@@ -0,0 +1,115 @@
+"""
+Tests for outbound flow control in the session consumers
+"""
+
+import asyncio
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from group_learning.consumers import DesignThinkingConsumer
+from group_learning.monitoring import outbound_queue_monitor
+from group_learning.outbound_queue import SLOW_CONSUMER_CLOSE_CODE
+
+
+class RecordingConsumer(DesignThinkingConsumer):
+    """Consumer whose socket takes every frame at once, as Daphne's transport does"""
+
+    def __init__(self):
+        super().__init__()
+        self.session_code = 'QUEUE1'
+        self.connection_id = 'conn0001'
+        self.frames = []
+
+    async def base_send(self, message):
+        self.frames.append(message)
+
+    async def client_acks(self, received):
+        await self.websocket_receive({
+            'type': 'websocket.receive',
+            'text': json.dumps({'type': 'outbound_ack', 'received': received}),
+        })
+        await asyncio.sleep(0)
+
+
+def status_update(version):
+    return {'type': 'session_status_update', 'session_data': {'version': version}}
+
+
+def vani_nudge(number):
+    return {'type': 'vani_nudge', 'nudge_data': {'number': number}}
+
+
+class OutboundQueueTests(SimpleTestCase):
+
+    def setUp(self):
+        outbound_queue_monitor.reset()
+
+    @mock.patch('group_learning.outbound_queue.OUTBOUND_ACK_WINDOW', 1)
+    def test_superseded_status_updates_are_collapsed(self):
+        async def scenario():
+            consumer = RecordingConsumer()
+            await consumer.client_acks(0)
+            await consumer.dispatch(status_update(1))
+            await asyncio.sleep(0)  # version 1 is sent; the client hasn't acked it yet
+            for version in (2, 3, 4):
+                await consumer.dispatch(status_update(version))
+            await consumer.dispatch(vani_nudge(1))
+
+            await consumer.client_acks(1)
+            await consumer.client_acks(2)
+            await consumer._outbound_writer
+            return consumer
+
+        consumer = async_to_sync(scenario)()
+
+        sent = [json.loads(frame['text']) for frame in consumer.frames]
+        self.assertEqual([frame['type'] for frame in sent], ['session_status', 'session_status', 'vani_nudge'])
+        self.assertEqual([frame['data']['version'] for frame in sent[:2]], [1, 4])
+
+        stats = outbound_queue_monitor.get_stats()['QUEUE1']
+        self.assertEqual(stats['collapsed'], 2)
+        self.assertEqual(stats['sent'], 3)
+        self.assertEqual(stats['queued'], 0)
+
+    @mock.patch('group_learning.outbound_queue.OUTBOUND_ACK_WINDOW', 2)
+    @mock.patch('group_learning.outbound_queue.OUTBOUND_QUEUE_SIZE', 3)
+    def test_client_that_stops_acking_is_disconnected_with_resumable_code(self):
+        async def scenario():
+            consumer = RecordingConsumer()
+            await consumer.client_acks(0)
+            for number in range(6):
+                await consumer.dispatch(vani_nudge(number))
+                await asyncio.sleep(0)
+            return consumer
+
+        consumer = async_to_sync(scenario)()
+
+        self.assertEqual([frame['type'] for frame in consumer.frames], ['websocket.send'] * 2 + ['websocket.close'])
+        self.assertEqual(consumer.frames[-1]['code'], SLOW_CONSUMER_CLOSE_CODE)
+        self.assertEqual(outbound_queue_monitor.get_stats()['QUEUE1']['slow_disconnects'], 1)
+
+    @mock.patch('group_learning.outbound_queue.OUTBOUND_ACK_WINDOW', 2)
+    @mock.patch('group_learning.outbound_queue.OUTBOUND_QUEUE_SIZE', 3)
+    def test_clients_keeping_up_or_not_acking_are_not_paced(self):
+        async def scenario(acking):
+            consumer = RecordingConsumer()
+            for number in range(10):
+                await consumer.dispatch(vani_nudge(number))
+                await asyncio.sleep(0)
+                if acking:
+                    await consumer.client_acks(len(consumer.frames))
+            return consumer
+
+        for acking in (True, False):
+            consumer = async_to_sync(scenario)(acking)
+            self.assertEqual([frame['type'] for frame in consumer.frames], ['websocket.send'] * 10)
+
+    def test_ack_beyond_frames_sent_is_clamped(self):
+        consumer = RecordingConsumer()
+        consumer._record_ack(50)
+        self.assertEqual(consumer._outbound_acked, 0)
+        consumer._record_ack('7')
+        self.assertEqual(consumer._outbound_acked, 0)
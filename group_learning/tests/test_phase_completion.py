@@ -0,0 +1,67 @@
+"""
+Tests for the per-team phase-completion bitmap
+"""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from group_learning.models import (
+    DesignMission, DesignThinkingSession,
+    DesignTeam, SimplifiedPhaseInput
+)
+from group_learning.tests.helpers import make_design_game
+
+
+class PhaseCompletionBitmapTests(TestCase):
+
+    def setUp(self):
+        self.game = make_design_game('Bitmap Game')
+        self.kickoff = DesignMission.objects.create(
+            game=self.game, mission_type='kickoff', title='Kickoff', description='Kickoff', order=1
+        )
+        self.empathy = DesignMission.objects.create(
+            game=self.game, mission_type='empathy', title='Empathy', description='Empathy', order=2
+        )
+        self.session = DesignThinkingSession.objects.create(
+            game=self.game, design_game=self.game, session_code='BITS01', current_mission=self.kickoff
+        )
+        self.team = DesignTeam.objects.create(session=self.session, team_name='Bit Team')
+
+    def submit(self, mission):
+        SimplifiedPhaseInput.objects.create(
+            team=self.team,
+            mission=mission,
+            session=self.session,
+            student_name='Student1',
+            student_session_id='student_1',
+            input_type='checkbox',
+            input_label='Done',
+            selected_value='true'
+        )
+
+    def test_saving_input_sets_phase_bit(self):
+        self.submit(self.kickoff)
+        self.team.refresh_from_db()
+
+        self.assertTrue(self.team.has_completed_phase('kickoff'))
+        self.assertFalse(self.team.has_completed_phase('empathy'))
+        self.assertTrue(self.team.has_completed_phases(['kickoff']))
+        self.assertFalse(self.team.has_completed_phases(['kickoff', 'empathy']))
+
+    def test_backfill_and_consistency_check(self):
+        self.submit(self.kickoff)
+        self.submit(self.empathy)
+        DesignTeam.objects.filter(pk=self.team.pk).update(completed_phase_bits=0)
+
+        output = StringIO()
+        call_command('check_design_thinking_consistency', session_code='BITS01', stdout=output)
+        self.assertIn('phase bitmap mismatch', output.getvalue())
+
+        call_command('backfill_phase_completion', stdout=StringIO())
+        self.team.refresh_from_db()
+        self.assertEqual(
+            self.team.completed_phase_bits,
+            DesignTeam.compute_phase_bits(['kickoff', 'empathy'])
+        )
@@ -0,0 +1,111 @@
+"""
+Tests for batched phase input submission
+"""
+
+import json
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.test import TestCase
+from django.urls import reverse
+
+from group_learning.auto_progression_service import auto_progression_service
+from group_learning.models import (
+    DesignMission, DesignThinkingSession,
+    DesignTeam, SimplifiedPhaseInput, PhaseCompletionTracker
+)
+from group_learning.tests.helpers import make_design_game
+
+
+def submission(number, value='Yes'):
+    return {
+        'student_data': {'name': f'Student{number}', 'session_id': f'student_{number}'},
+        'input_data': [
+            {'type': 'radio', 'label': 'Who is affected?', 'value': value, 'order': 1},
+            {'type': 'rating', 'label': 'How much?', 'value': '4', 'order': 2},
+        ]
+    }
+
+
+class PhaseInputsBatchTests(TestCase):
+
+    def setUp(self):
+        self.game = make_design_game('Batch Game', auto_advance_enabled=True)
+        self.empathy = DesignMission.objects.create(
+            game=self.game, mission_type='empathy', title='Empathy', description='Empathy', order=1,
+            requires_all_team_members=True, input_schema={'inputs': [{'type': 'radio'}, {'type': 'rating'}]}
+        )
+        self.session = DesignThinkingSession.objects.create(
+            game=self.game, design_game=self.game, session_code='BATCH1', current_mission=self.empathy
+        )
+        self.team = DesignTeam.objects.create(
+            session=self.session, team_name='Batch Team', team_members=['Student1', 'Student2', 'Student3']
+        )
+
+    def test_batch_is_saved_and_tracked_together(self):
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)('design_thinking_BATCH1', channel_name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = auto_progression_service.process_phase_inputs(
+                self.team.id, self.empathy.id, [submission(1), submission(2)]
+            )
+
+        self.assertTrue(result['success'])
+        self.assertEqual(len(result['phase_input_ids']), 4)
+        self.assertEqual(SimplifiedPhaseInput.objects.filter(team=self.team).count(), 4)
+
+        tracker = PhaseCompletionTracker.objects.get(team=self.team, mission=self.empathy)
+        self.assertEqual(tracker.completed_inputs, 4)
+        self.assertEqual(result['completion_result']['completed_inputs'], 4)
+
+        self.team.refresh_from_db()
+        self.assertTrue(self.team.has_completed_phase('empathy'))
+
+        # Exactly one group message for the whole batch
+        message = async_to_sync(channel_layer.receive)(channel_name)
+        self.assertNotIn(channel_name, channel_layer.channels)  # nothing else queued
+        self.assertEqual(message['type'], 'phase_inputs_submitted')
+        self.assertEqual(len(message['input_data']), 4)
+        self.assertEqual(
+            [item['student_name'] for item in message['submissions']],
+            ['Student1', 'Student1', 'Student2', 'Student2']
+        )
+
+    def test_one_invalid_submission_rejects_the_batch(self):
+        result = auto_progression_service.process_phase_inputs(
+            self.team.id, self.empathy.id, [submission(1), submission(2, value='')]
+        )
+
+        self.assertFalse(result['success'])
+        self.assertIn('Submission 2', result['error'])
+        self.assertFalse(SimplifiedPhaseInput.objects.exists())
+
+    def test_duplicate_students_are_rejected(self):
+        result = auto_progression_service.process_phase_inputs(
+            self.team.id, self.empathy.id, [submission(1), submission(1)]
+        )
+        self.assertFalse(result['success'])
+        self.assertIn('more than once', result['error'])
+
+        auto_progression_service.process_phase_inputs(self.team.id, self.empathy.id, [submission(2)])
+        result = auto_progression_service.process_phase_inputs(
+            self.team.id, self.empathy.id, [submission(3), submission(2)]
+        )
+        self.assertFalse(result['success'])
+        self.assertIn('already submitted', result['error'])
+        self.assertEqual(SimplifiedPhaseInput.objects.filter(student_session_id='student_3').count(), 0)
+
+    def test_http_endpoint(self):
+        url = reverse('group_learning:simplified_inputs_batch_submit', args=['BATCH1'])
+        response = self.client.post(url, json.dumps({
+            'team_id': self.team.id,
+            'mission_id': self.empathy.id,
+            'submissions': [submission(1), submission(2), submission(3)]
+        }), content_type='application/json')
+
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(len(data['phase_input_ids']), 6)
+        self.assertTrue(data['completion_result']['is_ready_to_advance'])
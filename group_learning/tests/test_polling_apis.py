@@ -0,0 +1,120 @@
+"""
+Tests for the cursor-paginated polling APIs used by the dashboards
+"""
+
+from django.test import TestCase
+from django.urls import reverse
+
+from group_learning.models import (
+    DesignMission, DesignThinkingSession,
+    DesignTeam, SimplifiedPhaseInput, RealtimeFeedback
+)
+from group_learning.tests.helpers import make_design_game
+
+
+class PollingAPITestBase(TestCase):
+    """Minimal Design Thinking session shared by polling API tests"""
+
+    def setUp(self):
+        self.game = make_design_game(
+            'Polling Game',
+            subtitle='Test Subtitle',
+            min_players=2,
+            max_players=8,
+            difficulty_level=2
+        )
+        self.mission = DesignMission.objects.create(
+            game=self.game,
+            mission_type='empathy',
+            title='Empathy Mission',
+            description='Test mission description',
+            order=1,
+            is_active=True
+        )
+        self.session = DesignThinkingSession.objects.create(
+            game=self.game,
+            design_game=self.game,
+            session_code='POLL01',
+            current_mission=self.mission
+        )
+        self.team = DesignTeam.objects.create(
+            session=self.session,
+            team_name='Poll Team',
+            team_emoji='🚀',
+            team_members=[{'name': 'Student1', 'session_id': 'student_1'}]
+        )
+
+    def create_inputs(self, count, student_session_id='student_1'):
+        return [
+            SimplifiedPhaseInput.objects.create(
+                team=self.team,
+                mission=self.mission,
+                session=self.session,
+                student_name='Student1',
+                student_session_id=student_session_id,
+                input_type='text_short',
+                input_label=f'Question {order}',
+                selected_value=f'Answer {order}',
+                input_order=order
+            )
+            for order in range(1, count + 1)
+        ]
+
+
+class SimplifiedSubmissionsCursorTests(PollingAPITestBase):
+    """Keyset pagination on the simplified submissions API"""
+
+    def get_page(self, **params):
+        url = reverse('group_learning:simplified_submissions_api', args=[self.session.session_code])
+        return self.client.get(url, params)
+
+    def test_pages_follow_next_cursor(self):
+        inputs = self.create_inputs(5)
+
+        first = self.get_page(limit=2).json()
+        self.assertEqual([s['id'] for s in first['submissions']], [inputs[0].id, inputs[1].id])
+        self.assertTrue(first['has_more'])
+        self.assertEqual(first['next_cursor'], inputs[1].id)
+
+        rest = self.get_page(since=first['next_cursor'], limit=10).json()
+        self.assertEqual([s['id'] for s in rest['submissions']], [i.id for i in inputs[2:]])
+        self.assertFalse(rest['has_more'])
+
+    def test_since_returns_only_new_rows(self):
+        inputs = self.create_inputs(3)
+        cursor = self.get_page().json()['next_cursor']
+        self.assertEqual(cursor, inputs[-1].id)
+
+        # Nothing new: cursor is echoed back unchanged
+        idle = self.get_page(since=cursor).json()
+        self.assertEqual(idle['submissions'], [])
+        self.assertEqual(idle['next_cursor'], cursor)
+
+        newer = self.create_inputs(1, student_session_id='student_2')
+        fresh = self.get_page(since=cursor).json()
+        self.assertEqual([s['id'] for s in fresh['submissions']], [newer[0].id])
+
+    def test_page_size_is_capped(self):
+        from group_learning.polling_utils import MAX_PAGE_SIZE
+        response = self.get_page(limit=MAX_PAGE_SIZE * 10).json()
+        self.assertEqual(response['page_size'], MAX_PAGE_SIZE)
+
+    def test_invalid_cursor_rejected(self):
+        self.assertEqual(self.get_page(since='abc').status_code, 400)
+
+
+class SimplifiedFeedbackCursorTests(PollingAPITestBase):
+    """Feedback polling returns only messages after the cursor"""
+
+    def test_feedback_messages_since_cursor(self):
+        old = RealtimeFeedback.objects.create(session=self.session, team=self.team, message='First')
+        new = RealtimeFeedback.objects.create(session=self.session, team=self.team, message='Second')
+        url = reverse('group_learning:simplified_feedback_api', args=[self.session.session_code])
+
+        data = self.client.get(url, {'team_id': self.team.id, 'since': old.id}).json()
+        self.assertEqual([m['id'] for m in data['messages']], [new.id])
+        self.assertEqual(data['next_cursor'], new.id)
+
+    def test_invalid_team_id_rejected(self):
+        url = reverse('group_learning:simplified_feedback_api', args=[self.session.session_code])
+        self.assertEqual(self.client.get(url, {'team_id': 'abc'}).status_code, 400)
@@ -0,0 +1,123 @@
+"""
+Tests for WebSocket message rate limiting
+"""
+
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from group_learning.consumers import DesignThinkingConsumer
+from group_learning.rate_limiting import (
+    RATE_LIMIT_CLOSE_CODE, CacheCounterStore, LocalCounterStore, SlidingWindowRateLimiter
+)
+
+LIMITS = {'simplified_input_submit': [('team', 3, 10), ('connection', 5, 10)]}
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'rate-limit-tests'}}
+
+
+@override_settings(WEBSOCKET_RATE_LIMITS=LIMITS)
+class SlidingWindowRateLimiterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.limiter = SlidingWindowRateLimiter()
+
+    def hit(self, now, team_id=7, connection_id='conn-a'):
+        return self.limiter.hit('simplified_input_submit', team_id=team_id, connection_id=connection_id, now=now)
+
+    def test_dummy_cache_falls_back_to_in_process_counts(self):
+        self.assertIsInstance(self.limiter.store, LocalCounterStore)
+
+        results = [self.hit(100.0) for _ in range(4)]
+        self.assertEqual([result.allowed for result in results], [True, True, True, False])
+        self.assertEqual(results[-1].scope, 'team')
+        self.assertEqual(results[-1].retry_after, 13.4)  # until the 3 hits weigh 2
+
+        # Other teams and unlimited message types are unaffected
+        self.assertTrue(self.hit(100.0, team_id=8).allowed)
+        self.assertTrue(self.limiter.hit('ping', team_id=7, now=100.0).allowed)
+
+    def test_previous_window_is_weighted_and_rejections_are_not_counted(self):
+        for _ in range(3):
+            self.hit(100.0)
+        for _ in range(5):
+            self.assertFalse(self.hit(105.0).allowed)
+
+        # 3 hits in [100, 110) weigh 3 * 0.5 at 115: one more fits, two don't
+        self.assertTrue(self.hit(115.0).allowed)
+        blocked = self.hit(115.0)
+        self.assertFalse(blocked.allowed)
+        self.assertEqual(blocked.retry_after, 1.7)
+        self.assertTrue(self.hit(115.0 + blocked.retry_after).allowed)
+
+    def test_rejected_team_hit_releases_connection_slot(self):
+        for _ in range(3):
+            self.hit(100.0)
+        self.assertFalse(self.hit(100.0).allowed)
+        self.assertEqual(
+            self.limiter.store.get('ws_rate:simplified_input_submit:connection:conn-a:10'), 3
+        )
+
+    @override_settings(CACHES=LOCMEM)
+    def test_counts_through_a_real_cache(self):
+        caches['default'].clear()
+        self.assertIsInstance(self.limiter.store, CacheCounterStore)
+
+        results = [self.hit(200.0) for _ in range(4)]
+        self.assertEqual([result.allowed for result in results], [True, True, True, False])
+        self.assertEqual(caches['default'].get('ws_rate:simplified_input_submit:team:7:20'), 3)
+
+
+class RecordingConsumer(DesignThinkingConsumer):
+
+    def __init__(self):
+        super().__init__()
+        self.session_code = 'RATE01'
+        self.connection_id = 'conn0001'
+        self.channel_name = 'specific.test!rate'
+        self.frames = []
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        self.frames.append(json.loads(text_data))
+
+    async def close(self, code=None):
+        self.frames.append({'type': 'closed', 'code': code})
+
+
+@override_settings(WEBSOCKET_RATE_LIMITS={'connection_status': [('connection', 1, 60)]})
+class RateLimitMixinTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch('group_learning.rate_limiting.rate_limiter', SlidingWindowRateLimiter())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_limited_client_gets_retry_after_then_is_closed(self):
+        consumer = RecordingConsumer()
+        consumer.send_connection_status = mock.AsyncMock()
+        message = json.dumps({'type': 'connection_status'})
+
+        for _ in range(6):
+            async_to_sync(consumer.receive)(message)
+
+        consumer.send_connection_status.assert_awaited_once()
+        errors = [frame for frame in consumer.frames if frame['type'] == 'error']
+        self.assertEqual(len(errors), 4)
+        self.assertEqual(errors[0]['error_code'], 'rate_limited')
+        self.assertGreater(errors[0]['retry_after'], 0)
+        self.assertEqual(consumer.frames[-1], {'type': 'closed', 'code': RATE_LIMIT_CLOSE_CODE})
+
+    @override_settings(WEBSOCKET_RATE_LIMITS={'team_update': [('team', 2, 60)]})
+    def test_team_limit_uses_joined_team_not_message_team_id(self):
+        consumer = RecordingConsumer()
+        consumer.team_id = 7
+        consumer.handle_team_update = mock.AsyncMock()
+
+        for claimed_team in (1, 2, 3, None):
+            async_to_sync(consumer.receive)(json.dumps({'type': 'team_update', 'team_id': claimed_team}))
+
+        self.assertEqual(consumer.handle_team_update.await_count, 2)
+        errors = [frame for frame in consumer.frames if frame['type'] == 'error']
+        self.assertEqual(len(errors), 2)
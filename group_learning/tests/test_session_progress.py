@@ -0,0 +1,117 @@
+"""
+Tests for materialized Design Thinking session progress
+"""
+
+import json
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.test import TestCase
+
+from group_learning.cache import session_progress_store
+from group_learning.consumers import DesignThinkingConsumer
+from group_learning.models import (
+    DesignMission, DesignThinkingSession, DesignTeam, TeamSubmission
+)
+from group_learning.services import DesignThinkingService, SubmissionService
+from group_learning.session_versions import SessionVersions
+from group_learning.tests.helpers import make_design_game
+
+
+class SessionProgressTests(TestCase):
+
+    def setUp(self):
+        session_progress_store.clear()
+        # Rolled-back tests reuse primary keys; don't resolve them to old codes
+        SessionVersions._session_codes.clear()
+        self.game = make_design_game('Progress Game')
+        self.missions = [
+            DesignMission.objects.create(
+                game=self.game, mission_type=mission_type, title=mission_type.title(),
+                description=mission_type, order=order
+            )
+            for order, mission_type in enumerate(['kickoff', 'empathy', 'define', 'ideate', 'prototype', 'showcase'], 1)
+        ]
+        self.session = DesignThinkingSession.objects.create(
+            game=self.game, design_game=self.game, session_code='PROG01'
+        )
+        self.other_session = DesignThinkingSession.objects.create(
+            game=self.game, design_game=self.game, session_code='PROG02'
+        )
+        self.team = DesignTeam.objects.create(session=self.session, team_name='Progress Team')
+        self.other_team = DesignTeam.objects.create(session=self.other_session, team_name='Other Team')
+
+    def service(self):
+        session = DesignThinkingSession.objects.get(pk=self.session.pk)
+        return DesignThinkingService(session)
+
+    def submission_counts(self, progress):
+        return [mission['submission_count'] for mission in progress['missions']]
+
+    def test_cold_start_query_count_does_not_grow_with_missions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service().advance_to_mission(2)
+        session_progress_store.clear()
+
+        service = self.service()
+        with self.assertNumQueries(4):
+            progress = service.get_session_progress()
+
+        self.assertEqual(len(progress['missions']), 6)
+        self.assertEqual([mission['state'] for mission in progress['missions'][:3]], ['completed', 'active', 'locked'])
+        self.assertEqual(len(progress['missions'][1]['team_progress']), 1)
+
+        # Warm reads don't touch the progress tables
+        with self.assertNumQueries(0):
+            service.get_session_progress()
+
+    def test_submission_counts_are_per_session_and_broadcast_as_diff(self):
+        empathy = self.missions[1]
+        self.service().get_session_progress()
+        DesignThinkingService(self.other_session).get_session_progress()
+
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)('design_thinking_PROG01', channel_name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SubmissionService.create_submission(self.team, empathy, 'observation', 'People queue for water')
+
+        message = async_to_sync(channel_layer.receive)(channel_name)
+        self.assertEqual(message['type'], 'session_progress_diff')
+        self.assertTrue(callable(getattr(DesignThinkingConsumer, message['type'], None)))
+        self.assertFalse(message['progress_diff']['full'])
+        self.assertEqual(message['progress_diff']['changes'], {'missions': {empathy.id: {'submission_count': 1}}})
+
+        self.assertEqual(self.submission_counts(self.service().get_session_progress()), [0, 1, 0, 0, 0, 0])
+        self.assertEqual(
+            self.submission_counts(DesignThinkingService(self.other_session).get_session_progress()),
+            [0, 0, 0, 0, 0, 0]
+        )
+
+    def test_team_progress_diff_is_serializable(self):
+        self.service().get_session_progress()
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)('design_thinking_PROG01', channel_name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service().advance_to_mission(2)
+
+        message = async_to_sync(channel_layer.receive)(channel_name)
+        entry = message['progress_diff']['changes']['missions'][self.missions[1].id]['team_progress'][0]
+        self.assertIsInstance(entry['started_at'], str)
+        self.assertIsNone(entry['completed_at'])
+        json.dumps(message)
+
+    def test_writes_outside_the_patched_paths_trigger_a_rebuild(self):
+        define = self.missions[2]
+        self.service().get_session_progress()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TeamSubmission.objects.create(
+                team=self.team, mission=define, submission_type='observation',
+                title='Direct', content='Written without the service'
+            )
+
+        self.assertEqual(self.submission_counts(self.service().get_session_progress())[2], 1)
@@ -0,0 +1,58 @@
+"""
+Tests for session version ETags on polling endpoints
+"""
+
+from django.test import TestCase
+from django.urls import reverse
+
+from group_learning.models import Game, GameSession
+from group_learning.monitoring import conditional_get_monitor
+from group_learning.session_versions import SessionVersions
+
+
+class SessionVersionETagTests(TestCase):
+    """Conditional GET on SessionActionsAPI"""
+
+    def setUp(self):
+        self.game = Game.objects.create(
+            title='Version Game',
+            game_type='social_issue',
+            description='Test game description',
+            context='Test context',
+            estimated_duration=30,
+            target_age_min=10,
+            target_age_max=14,
+            introduction_text='Welcome'
+        )
+        self.session = GameSession.objects.create(game=self.game, session_code='VER001')
+        self.url = reverse('group_learning:session_actions_api', args=[self.session.session_code])
+        conditional_get_monitor.reset()
+
+    def test_matching_etag_returns_304_without_queries(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertTrue(etag)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        stats = conditional_get_monitor.get_stats()['session_actions']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['not_modified'], 1)
+        self.assertEqual(stats['not_modified_ratio'], 0.5)
+
+    def test_write_bumps_version_after_commit(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.status = 'in_progress'
+            self.session.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_bump_is_monotonic(self):
+        first = SessionVersions.get('VER002')
+        self.assertGreater(SessionVersions.bump('VER002'), first)
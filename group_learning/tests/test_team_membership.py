@@ -0,0 +1,127 @@
+"""
+Tests for the normalized TeamMembership index
+"""
+
+import json
+
+from asgiref.sync import async_to_sync
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.test import TestCase
+from django.urls import reverse
+
+from group_learning.consumers import DesignThinkingConsumer
+from group_learning.models import (
+    DesignThinkingSession, DesignTeam, TeamMembership
+)
+from group_learning.tests.helpers import make_design_game
+
+
+class TeamMembershipTests(TestCase):
+
+    def setUp(self):
+        self.game = make_design_game('Membership Game')
+        self.session = DesignThinkingSession.objects.create(
+            game=self.game, design_game=self.game, session_code='MEMB01'
+        )
+        self.team = DesignTeam.objects.create(
+            session=self.session,
+            team_name='Index Team',
+            team_members=['Asha', {'name': 'Ravi', 'session_id': 'sess_ravi'}]
+        )
+
+    def memberships(self):
+        return dict(self.team.memberships.values_list('student_session_id', 'student_name'))
+
+    def test_create_syncs_memberships(self):
+        self.assertEqual(self.memberships(), {
+            f'team{self.team.pk}:asha': 'Asha',
+            'sess_ravi': 'Ravi',
+        })
+
+    def test_update_replaces_stale_rows(self):
+        self.team.team_members = [{'name': 'Ravi', 'session_id': 'sess_ravi'}, 'Meera']
+        self.team.save()
+
+        self.assertEqual(self.memberships(), {
+            'sess_ravi': 'Ravi',
+            f'team{self.team.pk}:meera': 'Meera',
+        })
+
+    def test_for_student_lookup(self):
+        self.assertEqual(DesignTeam.for_student(self.session, 'sess_ravi'), self.team)
+        self.assertIsNone(DesignTeam.for_student(self.session, 'sess_unknown'))
+
+    def test_add_member_keeps_json_and_index_together(self):
+        self.team.add_member('Kiran', 'sess_kiran')
+        self.team.refresh_from_db()
+
+        self.assertIn({'name': 'Kiran', 'session_id': 'sess_kiran'}, self.team.team_members)
+        self.assertEqual(DesignTeam.for_student(self.session, 'sess_kiran'), self.team)
+
+    def test_student_cannot_join_twice_in_session(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.team.add_member('Ravi Again', 'sess_ravi')
+
+        self.team.refresh_from_db()
+        self.assertEqual(self.team.member_count, 2)
+        self.assertEqual(TeamMembership.objects.filter(session=self.session).count(), 2)
+
+    def test_member_count_uses_membership_rows(self):
+        self.assertEqual(self.team.member_count, 2)
+
+        team = DesignTeam.objects.annotate(membership_count=Count('memberships')).get(pk=self.team.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(team.member_count, 2)
+
+
+    def test_consumer_payloads_count_members_from_memberships(self):
+        consumer = DesignThinkingConsumer()
+
+        status = async_to_sync(consumer.get_design_session_status)('MEMB01')
+        team_data = async_to_sync(consumer.get_team_data)(self.team.pk)
+
+        self.assertEqual(status['teams'][0]['member_count'], 2)
+        self.assertEqual(status['teams'][0]['members'], ['Asha', 'Ravi'])
+        self.assertEqual((team_data['member_count'], team_data['members']), (2, ['Asha', 'Ravi']))
+
+class JoinMembershipTests(TestCase):
+
+    def setUp(self):
+        self.game = make_design_game('Join Membership Game', auto_advance_enabled=True)
+        self.session = DesignThinkingSession.objects.create(
+            game=self.game, design_game=self.game, session_code='MEMB02'
+        )
+        self.url = reverse('group_learning:design_thinking_join')
+
+    def join(self, client, team_name, members):
+        return client.post(self.url, {
+            'session_code': 'MEMB02',
+            'team_name': team_name,
+            'team_members': json.dumps(members),
+        })
+
+    def test_join_indexes_student_by_session_key(self):
+        response = self.join(self.client, 'Alpha', ['Asha', 'Ravi'])
+        self.assertEqual(response.status_code, 302)
+
+        session_key = self.client.session.session_key
+        team = DesignTeam.for_student(self.session, session_key)
+        self.assertEqual(team.team_name, 'Alpha')
+        self.assertEqual(sorted(team.member_names), ['Asha', 'Ravi'])
+        self.assertEqual(
+            TeamMembership.objects.get(session=self.session, student_session_id=session_key).student_name,
+            'Asha'
+        )
+
+    def test_browser_cannot_join_session_twice(self):
+        self.join(self.client, 'Alpha', ['Asha'])
+
+        response = self.client.post(self.url, {
+            'session_code': 'MEMB02', 'team_name': 'Beta'
+        }, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('already joined this session as Team Alpha', response.json()['error'])
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.team_slots_used, 1)
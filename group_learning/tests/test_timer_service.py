@@ -0,0 +1,107 @@
+"""
+Tests for the server-driven climate timer tick service
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from group_learning.climate_state import climate_state
+from group_learning.models import ClimateGame, ClimateGameSession
+from group_learning.timer_service import TimerTickService, next_tick_at
+
+
+def at(epoch):
+    return datetime.fromtimestamp(epoch, tz=dt_timezone.utc)
+
+
+class TickScheduleTests(SimpleTestCase):
+
+    def test_coarse_ticks_then_every_second_at_the_end(self):
+        now, end, ticks = 1000.0, 1030.0, []
+        while now < end:
+            now = next_tick_at(end, now)
+            ticks.append(round(end - now))
+        self.assertEqual(ticks, [25, 20, 15, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1, 0])
+
+    def test_restarted_timer_drops_old_deadline(self):
+        service = TimerTickService()
+        service.schedule('TMR001', at(1030.0), now=1000.0)
+        service.schedule('TMR001', at(1060.0), now=1000.0)
+
+        # Both timers tick at 1005; only the live one is returned
+        self.assertEqual(service.pop_due(1005.0), [('TMR001', 1060.0)])
+        self.assertEqual(service.get_stats()['queued_ticks'], 0)
+
+        service.schedule('TMR001', None)
+        self.assertEqual(service.get_stats()['active_timers'], 0)
+
+
+@override_settings(CLIMATE_STATE_FLUSH_SECONDS=0)
+class TimerBroadcastTests(TestCase):
+
+    def setUp(self):
+        climate_state.clear()
+        self.addCleanup(climate_state.clear)
+        climate_game = ClimateGame.objects.create(
+            title='Timer Game',
+            game_type='social_issue',
+            description='Test game description',
+            context='Test context',
+            estimated_duration=30,
+            target_age_min=10,
+            target_age_max=14,
+            introduction_text='Welcome'
+        )
+        ClimateGameSession.objects.create(
+            game=climate_game.game_ptr, climate_game=climate_game, session_code='TMR002',
+            status='in_progress', current_phase='question_phase'
+        )
+        self.channel_layer = get_channel_layer()
+        self.channel_name = async_to_sync(self.channel_layer.new_channel)()
+        async_to_sync(self.channel_layer.group_add)('climate_session_TMR002', self.channel_name)
+
+    def receive(self):
+        return async_to_sync(self.channel_layer.receive)(self.channel_name)
+
+    @override_settings(CLIMATE_TIMER_AUTO_ADVANCE=True)
+    def test_ticks_then_expiry_advances_the_question_phase(self):
+        service = TimerTickService()
+        with self.captureOnCommitCallbacks(execute=True):
+            end = climate_state.start_timer('TMR002', 1).current_timer_end.timestamp()
+        service.schedule('TMR002', at(end), now=end - 60)
+
+        (due,) = service.pop_due(end - 55)
+        async_to_sync(service.fire)(*due, end - 55)
+        tick = self.receive()
+        self.assertEqual(tick['type'], 'timer_update')
+        self.assertEqual(tick['remaining_time'], 55)
+        self.assertEqual(tick['timer_info']['end_time'], at(end).isoformat())
+
+        service.pop_due(end - 50)
+        async_to_sync(service.fire)('TMR002', end, end)
+        self.assertEqual(self.receive()['type'], 'timer_expired')
+        changed = self.receive()
+        self.assertEqual((changed['type'], changed['new_phase']), ('phase_changed', 'results_feedback'))
+        self.assertEqual(climate_state.get('TMR002').current_phase, 'results_feedback')
+        self.assertEqual(service.get_stats()['active_timers'], 0)
+
+    def test_loop_wakes_for_a_newly_scheduled_deadline(self):
+        service = TimerTickService()
+        service._loaded = True
+
+        async def run():
+            service.attach()
+            await asyncio.sleep(0)
+            service.schedule('TMR002', timezone.now() + timedelta(seconds=0.2))
+            message = await asyncio.wait_for(self.channel_layer.receive(self.channel_name), timeout=2)
+            service.detach()
+            return message
+
+        message = async_to_sync(run)()
+        self.assertEqual(message['type'], 'timer_expired')
+        self.assertFalse(service.get_stats()['running'])
@@ -0,0 +1,241 @@
+"""
+Server-driven climate round timer ticks
+
+Clients used to poll ``get_timer_status`` once a second and count down on
+their own clock, and ``broadcast_timer_update`` was only called ad hoc. The
+tick service runs on the Daphne event loop while any climate socket is
+connected and keeps every active ``current_timer_end`` in a heap ordered by
+the next moment something must be sent:
+
+- a ``timer_update`` every ``TIMER_TICK_SECONDS`` (on whole multiples of it),
+  then every second in the last ``TIMER_FINAL_SECONDS``;
+- a ``timer_expired`` event at the deadline. With
+  ``CLIMATE_TIMER_AUTO_ADVANCE`` on, an expired question phase moves to
+  ``results_feedback`` (version-checked, so a facilitator who already moved
+  on wins) and ``phase_changed`` is broadcast.
+
+The climate state store reports every timer change through ``schedule``, so
+restarting or cancelling a timer just replaces the session's deadline; heap
+entries for an old deadline are dropped when they come up. Active timers are
+loaded from the database with one query when the loop first starts.
+"""
+
+import asyncio
+import heapq
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+TIMER_TICK_SECONDS = getattr(settings, 'CLIMATE_TIMER_TICK_SECONDS', 5)
+TIMER_FINAL_SECONDS = getattr(settings, 'CLIMATE_TIMER_FINAL_SECONDS', 10)
+# Deadlines this close count as reached (event loop wake-up jitter)
+EXPIRY_TOLERANCE = 0.05
+
+
+def next_tick_at(end, now):
+    """Epoch time of the next tick for a timer ending at ``end``"""
+    remaining = end - now
+    if remaining <= EXPIRY_TOLERANCE:
+        return end
+    step = 1 if remaining <= TIMER_FINAL_SECONDS + EXPIRY_TOLERANCE else TIMER_TICK_SECONDS
+    # Largest multiple of the step strictly below what's left now
+    tick_remaining = (math.ceil(remaining / step - EXPIRY_TOLERANCE) - 1) * step
+    if step != 1:
+        tick_remaining = max(tick_remaining, TIMER_FINAL_SECONDS)
+    return end - tick_remaining
+
+
+def timer_info_at(end, now):
+    seconds_remaining = max(0, int(round(end - now)))
+    return {
+        'enabled': True,
+        'seconds_remaining': seconds_remaining,
+        'expired': seconds_remaining <= 0,
+        'end_time': datetime.fromtimestamp(end, tz=dt_timezone.utc).isoformat()
+    }
+
+
+class TimerTickService:
+    """Deadline heap + one asyncio task broadcasting coarse timer ticks"""
+
+    def __init__(self):
+        self.channel_layer = get_channel_layer()
+        self._heap = []        # (tick_at, session_code, end)
+        self._deadlines = {}   # session_code -> end (epoch seconds) of the live timer
+        self._lock = threading.Lock()
+        self._loop = None
+        self._wake = None
+        self._task = None
+        self._attached = 0
+        self._loaded = False
+        self.ticks_sent = 0
+        self.timers_expired = 0
+
+    # -- lifecycle (driven by climate consumers) --
+
+    def attach(self):
+        """Called on connect: make sure the tick loop runs on this event loop"""
+        self._attached += 1
+        if not getattr(settings, 'CLIMATE_TIMER_TICKS_ENABLED', True):
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._loop = loop
+            self._wake = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    def detach(self):
+        """Called on disconnect: the loop exits once nobody is connected (deadlines are kept)"""
+        self._attached = max(0, self._attached - 1)
+        if self._attached == 0 and self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    # -- deadlines --
+
+    def schedule(self, session_code, timer_end, now=None):
+        """Track (or with ``None`` forget) a session's timer; safe to call from any thread"""
+        with self._lock:
+            if timer_end is None:
+                self._deadlines.pop(session_code, None)
+            else:
+                end = timer_end.timestamp()
+                self._deadlines[session_code] = end
+                heapq.heappush(self._heap, (next_tick_at(end, now or time.time()), session_code, end))
+        self._notify()
+
+    def _notify(self):
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass
+
+    def pop_due(self, now):
+        """Remove and return heap entries due at ``now`` that still match a live timer"""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now + EXPIRY_TOLERANCE:
+                _tick_at, session_code, end = heapq.heappop(self._heap)
+                if self._deadlines.get(session_code) == end:
+                    due.append((session_code, end))
+        return due
+
+    def _seconds_until_next(self, now):
+        with self._lock:
+            return max(0, self._heap[0][0] - now) if self._heap else None
+
+    def _load_active(self):
+        from .models import ClimateGameSession
+
+        rows = ClimateGameSession.objects.filter(
+            current_timer_end__gt=timezone.now()
+        ).values_list('session_code', 'current_timer_end')
+        for session_code, timer_end in rows:
+            if session_code not in self._deadlines:
+                self.schedule(session_code, timer_end)
+        self._loaded = True
+
+    # -- loop --
+
+    async def _run(self):
+        try:
+            if not self._loaded:
+                await database_sync_to_async(self._load_active)()
+            while True:
+                # Clear before looking so a schedule() landing meanwhile still wakes us
+                self._wake.clear()
+                now = time.time()
+                due = self.pop_due(now)
+                if due:
+                    for session_code, end in due:
+                        try:
+                            await self.fire(session_code, end, now)
+                        except Exception as e:
+                            logger.error(f"💥 Timer tick failed for {session_code}: {str(e)}", exc_info=True)
+                    continue
+
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self._seconds_until_next(now))
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            pass
+
+    async def fire(self, session_code, end, now):
+        """Send one tick (and queue the next), or the expiry event"""
+        group = f'climate_session_{session_code}'
+        info = timer_info_at(end, now)
+
+        if end - now > EXPIRY_TOLERANCE:
+            await self.channel_layer.group_send(group, {
+                'type': 'timer_update',
+                'end_time': info['end_time'],
+                'remaining_time': info['seconds_remaining'],
+                'timer_info': info
+            })
+            self.ticks_sent += 1
+            with self._lock:
+                if self._deadlines.get(session_code) == end:
+                    heapq.heappush(self._heap, (next_tick_at(end, now), session_code, end))
+            return
+
+        with self._lock:
+            if self._deadlines.get(session_code) == end:
+                del self._deadlines[session_code]
+        self.timers_expired += 1
+        await self.channel_layer.group_send(group, {
+            'type': 'timer_expired',
+            'end_time': info['end_time'],
+            'timer_info': info
+        })
+        logger.info(f"⏰ Timer expired for climate session {session_code}")
+
+        if getattr(settings, 'CLIMATE_TIMER_AUTO_ADVANCE', False):
+            state = await database_sync_to_async(self._advance_after_expiry)(session_code, end)
+            if state is not None:
+                await self.channel_layer.group_send(group, {
+                    'type': 'phase_changed',
+                    'new_phase': state.current_phase,
+                    'current_round': state.current_round
+                })
+
+    @staticmethod
+    def _advance_after_expiry(session_code, end):
+        """Close the question phase the expired timer belonged to; None if someone already moved on"""
+        from .climate_state import climate_state, StaleStateError
+
+        state = climate_state.get(session_code)
+        timer_end = state.current_timer_end
+        if state.current_phase != 'question_phase' or not timer_end or timer_end.timestamp() != end:
+            return None
+        try:
+            return climate_state.advance_phase(session_code, 'results_feedback', expected_version=state.version)
+        except StaleStateError:
+            return None
+
+    def get_stats(self):
+        with self._lock:
+            active = len(self._deadlines)
+            queued = len(self._heap)
+        return {
+            'running': self._task is not None and not self._task.done(),
+            'connections': self._attached,
+            'active_timers': active,
+            'queued_ticks': queued,
+            'ticks_sent': self.ticks_sent,
+            'timers_expired': self.timers_expired,
+        }
+
+
+timer_service = TimerTickService()
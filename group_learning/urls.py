@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views, climate_views, rating_api
+from . import views, climate_views, rating_api, event_stream
 
 app_name = 'group_learning'
 
@@ -64,10 +64,15 @@ urlpatterns = [
     path('api/climate/<str:session_code>/timer/start/', climate_views.start_round_timer, name='start_round_timer'),
     path('api/climate/<str:session_code>/timer/status/', climate_views.get_timer_status, name='get_timer_status'),
     
+    # Server-Sent Events fallback when WebSockets are blocked
+    path('api/events/<str:stream>/<str:session_code>/', event_stream.session_event_stream, name='session_event_stream'),
+    
     # Production setup endpoints
     path('api/test/', views.ProductionTestAPI.as_view(), name='production_test_api'),
     path('api/migrate/', views.ProductionMigrateAPI.as_view(), name='production_migrate_api'),
     path('api/diagnostics/', views.ProductionDiagnosticsAPI.as_view(), name='production_diagnostics_api'),
+    path('api/diagnostics/conditional-get/', views.ConditionalGetStatsAPI.as_view(), name='conditional_get_stats_api'),
+    path('api/diagnostics/outbound-queues/', views.OutboundQueueStatsAPI.as_view(), name='outbound_queue_stats_api'),
     path('api/setup-production/', views.ProductionSetupAPI.as_view(), name='production_setup_api'),
     
     # Design Thinking URLs (Simplified System Only)
@@ -81,6 +86,7 @@ urlpatterns = [
     
     # Simplified API endpoints
     path('api/simplified/<str:session_code>/input/', views.SimplifiedInputSubmissionView.as_view(), name='simplified_input_submit'),
+    path('api/simplified/<str:session_code>/inputs/', views.SimplifiedPhaseInputsBatchView.as_view(), name='simplified_inputs_batch_submit'),
     path('api/simplified/<str:session_code>/score/', views.TeacherScoringView.as_view(), name='simplified_teacher_score'),
     path('api/simplified/<str:session_code>/score-submission/', views.SimplifiedScoreSubmissionView.as_view(), name='simplified_score_submission'),
     path('api/simplified/<str:session_code>/submissions/', views.SimplifiedSubmissionsAPIView.as_view(), name='simplified_submissions_api'),
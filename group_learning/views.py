@@ -4,7 +4,7 @@ from django.contrib import messages
 from django.http import JsonResponse, HttpResponseBadRequest
 from django.urls import reverse
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.forms import ModelForm, CharField, ChoiceField
 from django.core.exceptions import ValidationError
 from django.views.decorators.cache import cache_page
@@ -28,6 +28,9 @@ from .models import (
 )
 from .cache_utils import ConstitutionCache, cache_view_response
 from .services import DesignThinkingService, SubmissionService, MissionAdvancementError
+from .polling_utils import InvalidCursor, parse_cursor_params, keyset_page, cursor_response_fields
+from .session_versions import conditional_session_get
+from .join_pipeline import allocate_join_slot, team_join_broadcasts
 
 
 class GameListView(ListView):
@@ -523,6 +526,7 @@ class ReflectionView(TemplateView):
 
 # API Views for real-time updates
 
+@method_decorator(conditional_session_get('session_status'), name='get')
 class SessionStatusAPI(View):
     """API endpoint for session status updates"""
     
@@ -596,6 +600,7 @@ class SessionDashboardView(TemplateView):
         return context
 
 
+@method_decorator(conditional_session_get('session_actions'), name='get')
 class SessionActionsAPI(View):
     """API endpoint for getting recent actions in session"""
     
@@ -1096,6 +1101,7 @@ class ConstitutionAnswerAPI(View):
         return None
 
 
+@method_decorator(conditional_session_get('constitution_leaderboard'), name='get')
 class ConstitutionLeaderboardAPI(View):
     """API endpoint for getting leaderboard data"""
     
@@ -1534,6 +1540,30 @@ class ProductionDiagnosticsAPI(View):
         return JsonResponse(results)
 
 
+class ConditionalGetStatsAPI(View):
+    """Report how often each polling endpoint is answered with 304 Not Modified"""
+    
+    def get(self, request):
+        from .monitoring import conditional_get_monitor
+        return JsonResponse({
+            'status': 'success',
+            'endpoints': conditional_get_monitor.get_stats(),
+            'timestamp': timezone.now().isoformat()
+        })
+
+
+class OutboundQueueStatsAPI(View):
+    """Report per-session WebSocket outbound queue depth and slow-consumer disconnects"""
+    
+    def get(self, request):
+        from .monitoring import outbound_queue_monitor
+        return JsonResponse({
+            'status': 'success',
+            'sessions': outbound_queue_monitor.get_stats(),
+            'timestamp': timezone.now().isoformat()
+        })
+
+
 class ProductionTestAPI(View):
     """Simple test API to check if deployment is working"""
     
@@ -2177,6 +2207,7 @@ class ProductionSetupAPI(View):
 class DesignThinkingJoinView(TemplateView):
     """Student session joining page"""
     template_name = 'group_learning/design_thinking/join_session.html'
+    MAX_TEAMS_PER_SESSION = 100
     
     def _handle_error(self, request, message, field=None):
         """Handle error response - AJAX or redirect"""
@@ -2222,115 +2253,101 @@ class DesignThinkingJoinView(TemplateView):
         
         # No validation required - team members are just metadata
         
-        # Get the simplified Design Thinking game
-        try:
-            design_game = DesignThinkingGame.objects.filter(
-                auto_advance_enabled=True
-            ).first()
-            
-            if not design_game:
-                return self._handle_error(request, 'Simplified Design Thinking game not found. Please refresh and try again.')
-        except Exception as e:
-            return self._handle_error(request, 'Design Thinking game not found. Please refresh and try again.')
-        
         # Find and validate session
-        try:
-            session = DesignThinkingSession.objects.get(session_code=session_code)
-            # Check if session uses any simplified game (auto_advance_enabled=True)
-            if not session.design_game or not session.design_game.auto_advance_enabled:
-                return self._handle_error(request, 'This session code is not for the Simplified Design Thinking game', 'session_code')
-            
-            # Check session status
-            if session.status == 'completed':
-                return self._handle_error(request, 'This session has already been completed', 'session_code')
-            elif session.status == 'abandoned':
-                return self._handle_error(request, 'This session is no longer active', 'session_code')
-            
-            # Check team limit (100 teams maximum)
-            current_team_count = session.design_teams.count()
-            if current_team_count >= 100:
-                return self._handle_error(request, 'This session is full (maximum 100 teams)', 'session_code')
-                
-        except DesignThinkingSession.DoesNotExist:
+        session = DesignThinkingSession.objects.select_related(
+            'design_game', 'current_mission'
+        ).filter(session_code=session_code).first()
+        if session is None:
             return self._handle_error(request, f'Session code {session_code} not found', 'session_code')
         
+        # Check if session uses any simplified game (auto_advance_enabled=True)
+        if not session.design_game or not session.design_game.auto_advance_enabled:
+            return self._handle_error(request, 'This session code is not for the Simplified Design Thinking game', 'session_code')
+        
+        # Check session status
+        if session.status == 'completed':
+            return self._handle_error(request, 'This session has already been completed', 'session_code')
+        elif session.status == 'abandoned':
+            return self._handle_error(request, 'This session is no longer active', 'session_code')
+        
         # Check for duplicate team name in session
         if DesignTeam.objects.filter(session=session, team_name=team_name).exists():
             return self._handle_error(request, f'Team name "{team_name}" is already taken. Please choose a different name.', 'team_name')
         
-        # Create team with members
-        team = DesignTeam.objects.create(
-            session=session,
-            team_name=team_name,
-            team_emoji=team_emoji,
-            team_members=team_members
-        )
+        # The browser's session key identifies the student in the membership index
+        if not request.session.session_key:
+            request.session.save()
+        student_session_id = request.session.session_key
+        current_team = DesignTeam.for_student(session, student_session_id)
+        if current_team:
+            return self._handle_error(
+                request, f'You have already joined this session as Team {current_team.team_name}', 'session_code'
+            )
         
-        # Create TeamProgress records for all missions up to current mission
         import logging
+        from django.db import transaction, IntegrityError
         logger = logging.getLogger(__name__)
         
-        # Get all missions in order
-        all_missions = session.design_game.missions.filter(is_active=True).order_by('order')
-        
-        if session.current_mission:
-            # Create progress records for all missions up to and including current mission
-            for mission in all_missions:
-                progress, created = TeamProgress.objects.get_or_create(
+        try:
+            with transaction.atomic():
+                # Claim a team slot with a conditional UPDATE (100 teams maximum)
+                slot = allocate_join_slot(
+                    DesignThinkingSession.objects, session.pk, 'team_slots_used',
+                    capacity=self.MAX_TEAMS_PER_SESSION,
+                    recount=lambda: DesignTeam.objects.filter(session=session).count()
+                )
+                if slot is None:
+                    return self._handle_error(
+                        request, f'This session is full (maximum {self.MAX_TEAMS_PER_SESSION} teams)', 'session_code'
+                    )
+                
+                # Create team with members; the joining student is indexed by session key
+                team = DesignTeam.objects.create(
                     session=session,
-                    team=team,
-                    mission=mission
+                    team_name=team_name,
+                    team_emoji=team_emoji,
+                    team_members=team_members[1:]
                 )
-                if created:
-                    logger.info(f"Created TeamProgress for new team {team.team_name} on mission {mission.title}")
+                team.add_member(team_members[0] if team_members else team_name, student_session_id)
                 
-                # Stop at current mission - don't create progress for future missions
-                if mission.id == session.current_mission.id:
-                    break
-        else:
-            # If no current mission, session hasn't started yet - don't create any progress records
-            logger.info(f"Session {session.session_code} has no current mission - progress records will be created when session starts")
+                # Create TeamProgress records for all missions up to and including the current mission
+                if session.current_mission:
+                    progress_records = []
+                    for mission in session.design_game.missions.filter(is_active=True).order_by('order'):
+                        progress_records.append(TeamProgress(session=session, team=team, mission=mission))
+                        # Stop at current mission - don't create progress for future missions
+                        if mission.id == session.current_mission_id:
+                            break
+                    TeamProgress.objects.bulk_create(progress_records, ignore_conflicts=True)
+                    logger.info(f"Created {len(progress_records)} TeamProgress records for new team {team.team_name}")
+                else:
+                    # If no current mission, session hasn't started yet - don't create any progress records
+                    logger.info(f"Session {session.session_code} has no current mission - progress records will be created when session starts")
+                
+                # Broadcast team join to all connected clients (coalesced with other joins, sent on commit)
+                self._broadcast_team_joined(session.session_code, team)
+        except IntegrityError:
+            return self._handle_error(
+                request, 'This session already has a team. Please check the session code.', 'session_code'
+            )
         
         # Store team info in Django session
         request.session['design_team_id'] = team.id
         request.session['design_session_code'] = session.session_code
         request.session['is_facilitator'] = False
         
-        # Broadcast team join to all connected clients via WebSocket
-        self._broadcast_team_joined(session.session_code, team)
-        
         messages.success(request, f'Successfully joined session! Welcome, Team {team_name} {team_emoji}')
         return redirect('group_learning:simplified_student_dashboard', session_code=session.session_code)
     
     def _broadcast_team_joined(self, session_code, team):
-        """Broadcast team join event to all connected clients"""
-        from channels.layers import get_channel_layer
-        from asgiref.sync import async_to_sync
-        from django.utils import timezone
-        
-        channel_layer = get_channel_layer()
-        if channel_layer:
-            group_name = f'design_thinking_{session_code}'
-            team_data = {
-                'id': team.id,
-                'name': team.team_name,
-                'emoji': team.team_emoji,
-                'color': team.team_color,
-                'members': team.team_members or []
-            }
-            
-            # Get updated session status including new team count
-            session_data = self._get_session_status_data(session_code)
-            
-            async_to_sync(channel_layer.group_send)(
-                group_name,
-                {
-                    'type': 'team_joined',
-                    'team_data': team_data,
-                    'session_data': session_data,
-                    'timestamp': timezone.now().isoformat()
-                }
-            )
+        """Queue the team join broadcast; joins in the same window share one status snapshot"""
+        team_join_broadcasts.add(session_code, {
+            'id': team.id,
+            'name': team.team_name,
+            'emoji': team.team_emoji,
+            'color': team.team_color,
+            'members': team.member_names
+        })
     
     def _get_session_status_data(self, session_code):
         """Get current session status data for broadcasting"""
@@ -2532,8 +2549,22 @@ class SimplifiedStudentDashboardView(TemplateView):
         from django.db import transaction
         logger = logging.getLogger(__name__)
         
-        # SIMPLE: Get the first team for this session, or create if none exists
         try:
+            # Team recorded for this browser when it joined (primary key lookup)
+            team_id = self.request.session.get('design_team_id')
+            if team_id and self.request.session.get('design_session_code') == session.session_code:
+                team = DesignTeam.objects.filter(pk=team_id, session=session).first()
+                if team:
+                    return team
+            
+            # Indexed membership lookup by the student's session id
+            student_session_id = self.request.session.session_key
+            if student_session_id:
+                team = DesignTeam.for_student(session, student_session_id)
+                if team:
+                    return team
+            
+            # SIMPLE: Get the first team for this session, or create if none exists
             team = DesignTeam.objects.filter(session=session).first()
             if team:
                 logger.info(f"Found existing team: {team.team_name} (ID: {team.id})")
@@ -2815,10 +2846,15 @@ class SessionSubmissionsAPIView(View):
                 session_code=session_code
             )
             
-            # Get all submissions for this session
-            submissions = TeamSubmission.objects.filter(
-                team__session=session
-            ).select_related('team', 'mission').order_by('submitted_at')
+            since, limit = parse_cursor_params(request)
+            
+            # Only rows newer than the client's cursor (keyset pagination)
+            submissions, next_cursor, has_more = keyset_page(
+                TeamSubmission.objects.filter(
+                    team__session=session
+                ).select_related('team', 'mission'),
+                since, limit
+            )
             
             # Format submissions for API response
             submissions_data = []
@@ -2848,9 +2884,12 @@ class SessionSubmissionsAPIView(View):
                 'session': {
                     'session_code': session.session_code,
                     'game_title': session.design_game.title if session.design_game else 'Design Thinking'
-                }
+                },
+                **cursor_response_fields(next_cursor, has_more, limit)
             })
             
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except DesignThinkingSession.DoesNotExist:
             return JsonResponse({'error': 'Session not found'}, status=404)
         except Exception as e:
@@ -3034,6 +3073,59 @@ class SimplifiedInputSubmissionView(View):
             }, status=500)
 
 
+class SimplifiedPhaseInputsBatchView(View):
+    """
+    Handle a batch of simplified phase inputs from several students via AJAX
+    Validates and saves the whole batch together, with one progression check
+    """
+    
+    def post(self, request, session_code):
+        try:
+            data = json.loads(request.body)
+            team_id = data.get('team_id')
+            mission_id = data.get('mission_id')
+            submissions = data.get('submissions', [])
+            
+            if not all([team_id, mission_id, submissions]):
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Missing required fields: team_id, mission_id, submissions'
+                })
+            
+            from .auto_progression_service import auto_progression_service
+            
+            result = auto_progression_service.process_phase_inputs(team_id, mission_id, submissions)
+            
+            if result['success']:
+                return JsonResponse({
+                    'success': True,
+                    'message': f"{len(result['phase_input_ids'])} inputs submitted successfully",
+                    'phase_input_ids': result['phase_input_ids'],
+                    'completion_result': result.get('completion_result'),
+                    'progression_result': result.get('progression_result')
+                })
+            else:
+                return JsonResponse({
+                    'success': False,
+                    'error': result.get('error', 'Unknown error occurred')
+                })
+                
+        except json.JSONDecodeError:
+            return JsonResponse({
+                'success': False,
+                'error': 'Invalid JSON data',
+                'retry_allowed': False
+            }, status=400)
+        except Exception as e:
+            logger.error(f"Error processing batched input submission: {str(e)}", exc_info=True)
+            return JsonResponse({
+                'success': False,
+                'error': 'Internal server error. Please try again later.',
+                'retry_allowed': True,
+                'debug_info': str(e) if getattr(settings, 'DEBUG', False) else None
+            }, status=500)
+
+
 class TeacherScoringView(View):
     """
     Handle teacher scoring submissions via AJAX
@@ -3094,29 +3186,65 @@ class SimplifiedFeedbackAPI(View):
     """
     
     def get(self, request, session_code):
-        """Get feedback for the current user's team"""
+        """
+        Get feedback for the current user's team
+        
+        Pass ?team_id= to pick the team and ?since=<next_cursor> to receive only
+        feedback messages created after the previous poll.
+        """
+        logger = logging.getLogger(__name__)
+        
         try:
-            # For now, get the first team (simplified approach)
-            # In a full implementation, you'd identify the specific team
+            from .models import RealtimeFeedback
+            
+            since, limit = parse_cursor_params(request)
             session = get_object_or_404(DesignThinkingSession, session_code=session_code)
-            teams = session.design_teams.all()
             
-            if not teams:
+            team_id = request.GET.get('team_id')
+            if team_id:
+                try:
+                    team_id = int(team_id)
+                except ValueError:
+                    return JsonResponse({'error': 'team_id must be an integer'}, status=400)
+                team = session.design_teams.filter(id=team_id).first()
+            else:
+                # Fall back to the first team (legacy clients don't send team_id)
+                team = session.design_teams.first()
+            
+            if not team:
                 return JsonResponse({
                     'feedback': None,
                     'feedback_date': None,
-                    'score': None
+                    'score': None,
+                    'messages': [],
+                    **cursor_response_fields(since, False, limit)
                 })
             
-            # Get the first team's data (simplified approach)
-            team = teams.first()
+            messages_page, next_cursor, has_more = keyset_page(
+                RealtimeFeedback.objects.filter(session=session, team=team),
+                since, limit
+            )
             
             return JsonResponse({
                 'feedback': team.teacher_feedback,
                 'feedback_date': team.feedback_given_at.isoformat() if team.feedback_given_at else None,
-                'score': getattr(team, 'teacher_score', None)  # Assuming score field exists
+                'score': getattr(team, 'teacher_score', None),  # Assuming score field exists
+                'messages': [{
+                    'id': feedback.id,
+                    'feedback_type': feedback.feedback_type,
+                    'sender_type': feedback.sender_type,
+                    'sender_name': feedback.sender_name,
+                    'message': feedback.message,
+                    'score': feedback.score,
+                    'submission_id': feedback.submission_id,
+                    'is_urgent': feedback.is_urgent,
+                    'created_at': feedback.created_at.isoformat()
+                } for feedback in messages_page],
+                **cursor_response_fields(next_cursor, has_more, limit)
             })
             
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except Exception as e:
             logger.error(f"Error getting feedback: {str(e)}", exc_info=True)
             return JsonResponse({
@@ -3178,11 +3306,16 @@ class SimplifiedSubmissionsAPIView(View):
                 session_code=session_code
             )
 
-            # Get all simplified phase inputs for this session
-            submissions = SimplifiedPhaseInput.objects.filter(
-                session=session,
-                is_active=True
-            ).select_related('team', 'mission').order_by('submitted_at')
+            since, limit = parse_cursor_params(request)
+
+            # Only inputs newer than the client's cursor (keyset pagination)
+            submissions, next_cursor, has_more = keyset_page(
+                SimplifiedPhaseInput.objects.filter(
+                    session=session,
+                    is_active=True
+                ).select_related('team', 'mission'),
+                since, limit
+            )
 
             # Format submissions for API response
             submissions_data = []
@@ -3226,9 +3359,12 @@ class SimplifiedSubmissionsAPIView(View):
                 'session': {
                     'session_code': session.session_code,
                     'game_title': session.design_game.title if session.design_game else 'Design Thinking'
-                }
+                },
+                **cursor_response_fields(next_cursor, has_more, limit)
             })
 
+        except InvalidCursor as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
         except DesignThinkingSession.DoesNotExist:
             return JsonResponse({'success': False, 'error': 'Session not found'}, status=404)
         except Exception as e:
@@ -3466,7 +3602,7 @@ class CIQPublicPresentationView(TemplateView):
         try:
             game = DesignThinkingGame.objects.get(id=game_id)
             session = DesignThinkingSession.objects.get(session_code=session_code)
-            team = DesignTeam.objects.get(id=team_id, session=session)
+            team = DesignTeam.objects.annotate(membership_count=Count('memberships')).get(id=team_id, session=session)
 
             # Get all missions in order
             missions = DesignMission.objects.filter(
@@ -3533,7 +3669,9 @@ class CIQTeacherGradingView(TemplateView):
                 return context
 
             # Get all teams in this session
-            teams = DesignTeam.objects.filter(session=session).prefetch_related(
+            teams = DesignTeam.objects.filter(session=session).annotate(
+                membership_count=Count('memberships')
+            ).prefetch_related(
                 'phase_ratings',
                 'simplified_inputs'
             )
@@ -3620,7 +3758,7 @@ class CIQLeaderboardView(TemplateView):
             game = DesignThinkingGame.objects.get(id=game_id)
             session = DesignThinkingSession.objects.get(session_code=session_code)
 
-            teams = DesignTeam.objects.filter(session=session)
+            teams = DesignTeam.objects.filter(session=session).annotate(membership_count=Count('memberships'))
 
             # Build teams leaderboard data
             teams_leaderboard = []
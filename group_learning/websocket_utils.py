@@ -40,6 +40,8 @@ def broadcast_to_session(session_code, message_type, data, event_type=None):
     elif message_type == 'player_joined':
         message['player_name'] = data.get('player_name')
         message['total_players'] = data.get('total_players')
+        if data.get('player_names'):
+            message['player_names'] = data['player_names']
     elif message_type == 'response_received':
         message['responses_count'] = data.get('responses_count')
         message['total_players'] = data.get('total_players')
@@ -48,6 +50,10 @@ def broadcast_to_session(session_code, message_type, data, event_type=None):
         message['data'] = data
     elif message_type == 'error_notification':
         message['message'] = data.get('message', 'An error occurred')
+    elif message_type in ('timer_started', 'timer_update'):
+        message['end_time'] = data.get('end_time')
+        message['remaining_time'] = data.get('seconds_remaining')
+        message['timer_info'] = data
     else:
         message['data'] = data
     
@@ -84,13 +90,14 @@ def broadcast_phase_change(session_code, new_phase, current_round):
     )
 
 
-def broadcast_player_joined(session_code, player_name, total_players):
-    """Broadcast that a new player joined the session"""
+def broadcast_player_joined(session_code, player_name, total_players, player_names=None):
+    """Broadcast that a new player joined the session (player_names lists a coalesced burst)"""
     broadcast_to_session(
         session_code,
         'player_joined',
         {
             'player_name': player_name,
+            'player_names': player_names,
             'total_players': total_players
         }
     )